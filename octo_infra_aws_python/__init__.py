@@ -0,0 +1,53 @@
+from importlib import import_module
+from typing import Any, Dict, List
+
+# Logic classes are loaded on first access, so importing the package only pays for what is used
+_LAZY_ATTRIBUTES: Dict[str, str] = {
+    "AMI": "octo_infra_aws_python.logic.ami",
+    "Artifacts": "octo_infra_aws_python.logic.artifacts",
+    "Clients": "octo_infra_aws_python.logic.clients",
+    "Codecs": "octo_infra_aws_python.logic.codecs",
+    "DescribeCache": "octo_infra_aws_python.logic.describe_cache",
+    "DependencyGraph": "octo_infra_aws_python.logic.dependency_graph",
+    "EC2": "octo_infra_aws_python.logic.ec2",
+    "Environment": "octo_infra_aws_python.logic.environment",
+    "Metrics": "octo_infra_aws_python.logic.metrics",
+    "Network": "octo_infra_aws_python.logic.network",
+    "ObjectCache": "octo_infra_aws_python.logic.object_cache",
+    "Packs": "octo_infra_aws_python.logic.packs",
+    "Planner": "octo_infra_aws_python.logic.planner",
+    "Regions": "octo_infra_aws_python.logic.regions",
+    "Retry": "octo_infra_aws_python.logic.retry",
+    "S3": "octo_infra_aws_python.logic.s3",
+    "SSM": "octo_infra_aws_python.logic.ssm",
+    "SSMChangeFeed": "octo_infra_aws_python.logic.ssm_change_feed",
+    "STS": "octo_infra_aws_python.logic.sts",
+    "ServiceDiscovery": "octo_infra_aws_python.logic.service_discovery",
+    "AsyncExecutor": "octo_infra_aws_python.logic.aio",
+    "AsyncAMI": "octo_infra_aws_python.logic.aio",
+    "AsyncArtifacts": "octo_infra_aws_python.logic.aio",
+    "AsyncEC2": "octo_infra_aws_python.logic.aio",
+    "AsyncEnvironment": "octo_infra_aws_python.logic.aio",
+    "AsyncNetwork": "octo_infra_aws_python.logic.aio",
+    "AsyncPacks": "octo_infra_aws_python.logic.aio",
+    "AsyncRegions": "octo_infra_aws_python.logic.aio",
+    "AsyncS3": "octo_infra_aws_python.logic.aio",
+    "AsyncSSM": "octo_infra_aws_python.logic.aio",
+    "AsyncSTS": "octo_infra_aws_python.logic.aio",
+    "AsyncServiceDiscovery": "octo_infra_aws_python.logic.aio",
+}
+
+__all__: List[str] = list(_LAZY_ATTRIBUTES)
+
+
+def __getattr__(name: str) -> Any:
+    module_name = _LAZY_ATTRIBUTES.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(module_name), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> List[str]:
+    return sorted(list(globals()) + __all__)
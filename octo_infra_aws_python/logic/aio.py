@@ -0,0 +1,239 @@
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+from typing import Awaitable, Callable, Final, Iterable, List, Literal, Optional, TypeVar, Union, overload
+
+from typing_extensions import ParamSpec
+
+from octo_infra_aws_python.logic.ami import AMI
+from octo_infra_aws_python.logic.artifacts import Artifacts
+from octo_infra_aws_python.logic.clients import Clients, DEFAULT_MAX_POOL_CONNECTIONS, with_caller_context
+from octo_infra_aws_python.logic.ec2 import EC2
+from octo_infra_aws_python.logic.environment import Environment
+from octo_infra_aws_python.logic.network import Network
+from octo_infra_aws_python.logic.packs import Packs
+from octo_infra_aws_python.logic.regions import Regions
+from octo_infra_aws_python.logic.s3 import S3
+from octo_infra_aws_python.logic.service_discovery import ServiceDiscovery
+from octo_infra_aws_python.logic.single_flight import SingleFlight
+from octo_infra_aws_python.logic.ssm import SSM
+from octo_infra_aws_python.logic.sts import STS
+
+DEFAULT_MAX_WORKERS: Final[int] = 256
+
+P = ParamSpec("P")
+T = TypeVar("T")
+
+
+class AsyncExecutor:
+    """
+    Managed executor running the blocking logic calls for the async facades
+    All the calls share the pooled clients of Clients
+    """
+    __lock: Lock = Lock()
+    __executor: Optional[ThreadPoolExecutor] = None
+    __max_workers: int = DEFAULT_MAX_WORKERS
+
+    @staticmethod
+    def configure(max_workers: int) -> None:
+        """
+        Sets the max amount of concurrent blocking calls, and sizes the client connection pools to match
+
+        :param max_workers:
+        :return:
+        """
+        with AsyncExecutor.__lock:
+            if AsyncExecutor.__executor is not None:
+                AsyncExecutor.__executor.shutdown(wait=False)
+                AsyncExecutor.__executor = None
+            AsyncExecutor.__max_workers = max_workers
+        if max_workers > DEFAULT_MAX_POOL_CONNECTIONS:
+            from botocore.config import Config
+            Clients.configure(Config(max_pool_connections=max_workers))
+
+    @staticmethod
+    def executor() -> ThreadPoolExecutor:
+        if AsyncExecutor.__executor is None:
+            with AsyncExecutor.__lock:
+                if AsyncExecutor.__executor is None:
+                    AsyncExecutor.__executor = ThreadPoolExecutor(max_workers=AsyncExecutor.__max_workers,
+                                                                  thread_name_prefix="octo-aws")
+        return AsyncExecutor.__executor
+
+    @staticmethod
+    def shutdown() -> None:
+        with AsyncExecutor.__lock:
+            if AsyncExecutor.__executor is not None:
+                AsyncExecutor.__executor.shutdown(wait=True)
+                AsyncExecutor.__executor = None
+
+    @staticmethod
+    async def run(func: Callable[P, T], *args: P.args, **kwargs: P.kwargs) -> T:
+        # Runs in the context of the calling task, so a region scope set by the task applies
+        return await asyncio.get_running_loop().run_in_executor(AsyncExecutor.executor(), with_caller_context(
+            functools.partial(func, *args, **kwargs)))
+
+
+def to_async(func: Callable[P, T]) -> Callable[P, Awaitable[T]]:
+    """
+    Wraps a blocking logic call into a coroutine function running on the managed executor
+
+    :param func:
+    :return:
+    """
+    if getattr(func, "single_flight", False):
+        return to_single_flight_async(func)
+
+    @functools.wraps(func)
+    async def wrapper(*args: P.args, **kwargs: P.kwargs) -> T:
+        return await AsyncExecutor.run(func, *args, **kwargs)
+    return wrapper
+
+
+def to_single_flight_async(func: Callable[P, T]) -> Callable[P, Awaitable[T]]:
+    """
+    Wraps a single flight logic call into a coroutine function, identical concurrent calls from tasks and threads
+    share a single call, and only the leading call runs on the managed executor
+
+    :param func:
+    :return:
+    """
+    call = getattr(func, "__wrapped__")
+
+    @functools.wraps(func)
+    async def wrapper(*args: P.args, **kwargs: P.kwargs) -> T:
+        key = SingleFlight.key(call, args, kwargs)
+        future, leader = SingleFlight.join(key)
+        if leader:
+            AsyncExecutor.executor().submit(with_caller_context(SingleFlight.lead), key, future, call, *args, **kwargs)
+        return await asyncio.wrap_future(future)
+    return wrapper
+
+
+@overload
+async def gather_bounded(awaitables: Iterable[Awaitable[T]], concurrency: int,
+                         return_exceptions: Literal[False] = False) -> List[T]:
+    ...
+
+
+@overload
+async def gather_bounded(awaitables: Iterable[Awaitable[T]], concurrency: int,
+                         return_exceptions: bool) -> List[Union[T, BaseException]]:
+    ...
+
+
+async def gather_bounded(awaitables: Iterable[Awaitable[T]], concurrency: int,
+                         return_exceptions: bool = False) -> Union[List[T], List[Union[T, BaseException]]]:
+    """
+    Gathers the awaitables while running at most the given amount of them at once
+
+    :param awaitables:
+    :param concurrency:
+    :param return_exceptions:
+    :return:
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def bounded(awaitable: Awaitable[T]) -> T:
+        async with semaphore:
+            return await awaitable
+
+    return await asyncio.gather(*(bounded(awaitable) for awaitable in awaitables),
+                                return_exceptions=return_exceptions)
+
+
+class AsyncAMI:
+    find_image = staticmethod(to_async(AMI.find_image))
+
+
+class AsyncArtifacts:
+    publish_artifacts = staticmethod(to_async(Artifacts.publish_artifacts))
+    download_artifacts = staticmethod(to_async(Artifacts.download_artifacts))
+    load_manifest = staticmethod(to_async(Artifacts.load_manifest))
+
+
+class AsyncS3:
+    download_object = staticmethod(to_async(S3.download_object))
+    load_object = staticmethod(to_async(S3.load_object))
+    upload_object = staticmethod(to_async(S3.upload_object))
+    save_object = staticmethod(to_async(S3.save_object))
+    save_objects = staticmethod(to_async(S3.save_objects))
+    delete_objects = staticmethod(to_async(S3.delete_objects))
+    copy_objects = staticmethod(to_async(S3.copy_objects))
+    move_objects = staticmethod(to_async(S3.move_objects))
+    find_objects = staticmethod(to_async(S3.find_objects))
+    find_objects_compact = staticmethod(to_async(S3.find_objects_compact))
+    object_exists = staticmethod(to_async(S3.object_exists))
+    presign_objects = staticmethod(to_async(S3.presign_objects))
+
+
+class AsyncPacks:
+    save_pack = staticmethod(to_async(Packs.save_pack))
+    load_pack_member = staticmethod(to_async(Packs.load_pack_member))
+    find_pack_index = staticmethod(to_async(Packs.find_pack_index))
+
+
+class AsyncSSM:
+    create_ssm_parameter = staticmethod(to_async(SSM.create_ssm_parameter))
+    destroy_ssm_parameter = staticmethod(to_async(SSM.destroy_ssm_parameter))
+    destroy_ssm_parameters = staticmethod(to_async(SSM.destroy_ssm_parameters))
+    destroy_ssm_path = staticmethod(to_async(SSM.destroy_ssm_path))
+    find_ssm_parameter = staticmethod(to_async(SSM.find_ssm_parameter))
+    has_ssm_parameter = staticmethod(to_async(SSM.has_ssm_parameter))
+
+
+class AsyncSTS:
+    get_caller_identity_response = staticmethod(to_async(STS.get_caller_identity_response))
+    get_account_id = staticmethod(to_async(STS.get_account_id))
+    get_account_arn = staticmethod(to_async(STS.get_account_arn))
+
+
+class AsyncServiceDiscovery:
+    find_service_instance = staticmethod(to_async(ServiceDiscovery.find_service_instance))
+
+
+class AsyncEC2:
+    create_key_pair = staticmethod(to_async(EC2.create_key_pair))
+    destroy_keypair = staticmethod(to_async(EC2.destroy_keypair))
+    create_ec2_instance = staticmethod(to_async(EC2.create_ec2_instance))
+    plan_create_ec2_instance = staticmethod(to_async(EC2.plan_create_ec2_instance))
+    reconcile_ec2_instances = staticmethod(to_async(EC2.reconcile_ec2_instances))
+    destroy_ec2_instance = staticmethod(to_async(EC2.destroy_ec2_instance))
+    destroy_ec2_instances = staticmethod(to_async(EC2.destroy_ec2_instances))
+    plan_destroy_ec2_instances = staticmethod(to_async(EC2.plan_destroy_ec2_instances))
+    find_ec2_instance_credentials = staticmethod(to_async(EC2.find_ec2_instance_credentials))
+    get_ec2_instance_properties = staticmethod(to_async(EC2.get_ec2_instance_properties))
+    find_ec2_instances = staticmethod(to_async(EC2.find_ec2_instances))
+    find_ec2_instance_types = staticmethod(to_async(EC2.find_ec2_instance_types))
+
+
+class AsyncNetwork:
+    create_security_group = staticmethod(to_async(Network.create_security_group))
+    plan_create_security_group = staticmethod(to_async(Network.plan_create_security_group))
+    sync_security_group_rules = staticmethod(to_async(Network.sync_security_group_rules))
+    destroy_security_group = staticmethod(to_async(Network.destroy_security_group))
+    find_security_groups = staticmethod(to_async(Network.find_security_groups))
+    create_internet_gateway = staticmethod(to_async(Network.create_internet_gateway))
+    destroy_internet_gateway = staticmethod(to_async(Network.destroy_internet_gateway))
+    find_internet_gateway = staticmethod(to_async(Network.find_internet_gateway))
+    create_vpc = staticmethod(to_async(Network.create_vpc))
+    destroy_vpc = staticmethod(to_async(Network.destroy_vpc))
+    plan_destroy_vpc = staticmethod(to_async(Network.plan_destroy_vpc))
+    find_vpc = staticmethod(to_async(Network.find_vpc))
+    create_subnet = staticmethod(to_async(Network.create_subnet))
+    destroy_subnet = staticmethod(to_async(Network.destroy_subnet))
+    find_subnets = staticmethod(to_async(Network.find_subnets))
+    reconcile_internet_gateway = staticmethod(to_async(Network.reconcile_internet_gateway))
+    reconcile_vpc = staticmethod(to_async(Network.reconcile_vpc))
+    reconcile_subnets = staticmethod(to_async(Network.reconcile_subnets))
+    reconcile_security_groups = staticmethod(to_async(Network.reconcile_security_groups))
+
+
+class AsyncEnvironment:
+    provision_environment = staticmethod(to_async(Environment.provision_environment))
+
+
+class AsyncRegions:
+    enabled_regions = staticmethod(to_async(Regions.enabled_regions))
+    fan_out = staticmethod(to_async(Regions.fan_out))
@@ -1,13 +1,19 @@
+from __future__ import annotations
 from octo_infra_aws_python.models.actions.ami.find_image import FindImage
-from typing import Optional, List
-import boto3
-from mypy_boto3_ec2.client import EC2Client
-from mypy_boto3_ec2.type_defs import DescribeImagesResultTypeDef, ImageTypeDef
+from typing import TYPE_CHECKING, Optional, List
+if TYPE_CHECKING:
+    from mypy_boto3_ec2.client import EC2Client
+    from mypy_boto3_ec2.type_defs import DescribeImagesResultTypeDef, ImageTypeDef
 from logging import Logger, getLogger
+from octo_infra_aws_python.logic.clients import Clients
+from octo_infra_aws_python.logic.single_flight import single_flight
+from octo_infra_aws_python.logic.describe_cache import persistent_cache
 
 
 class AMI:
     @staticmethod
+    @single_flight
+    @persistent_cache("image")
     def find_image(find_image: FindImage, logger: Optional[Logger] = None) -> Optional[str]:
         """
         Tries to find an image id for a given filter
@@ -21,7 +27,7 @@ class AMI:
             logger.info(f"Searching for AMI [Provider={find_image.provider}, "
                         f"Name={find_image.name}, "
                         f"Description={find_image.description}]")
-            ec2_client: EC2Client = boto3.client('ec2')
+            ec2_client: EC2Client = Clients.client('ec2')
             filters = [{
                 'Name': 'name',
                 'Values': [find_image.name]
@@ -0,0 +1,203 @@
+from __future__ import annotations
+from octo_infra_aws_python.logic.clients import Clients, with_caller_context
+from octo_infra_aws_python.logic.object_cache import ObjectCache
+from octo_infra_aws_python.logic.s3 import S3
+from octo_infra_aws_python.models.actions.artifacts import DownloadArtifacts, PublishArtifacts
+from octo_infra_aws_python.models.actions.s3 import DownloadObject, LoadObject, ObjectExists, SaveObject, \
+    UploadObject
+from octo_infra_aws_python.models.artifact_manifest import ArtifactBlob, ArtifactManifest
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Dict, Final, List, Optional
+if TYPE_CHECKING:
+    from mypy_boto3_s3.client import S3Client
+from botocore.exceptions import ClientError
+from hashlib import sha256
+from logging import Logger, getLogger
+import os
+import shutil
+
+# Size of the chunks files are hashed in, large enough for hashing to release the GIL
+HASH_CHUNK_SIZE: Final[int] = 1024 * 1024
+# Blobs and manifests are stored as is, so downloads write them back byte for byte
+STORED_CODEC: Final[str] = "identity"
+
+
+class Artifacts:
+    """
+    Content addressed artifact store, every distinct content is stored once as a blob named by its digest,
+    and the logical keys of a build are mapped to blobs by a manifest object
+    """
+    @staticmethod
+    def publish_artifacts(publish_artifacts: PublishArtifacts,
+                          logger: Optional[Logger] = None) -> Optional[ArtifactManifest]:
+        """
+        Hashes the files in parallel, uploads only the blobs missing from the bucket and saves the manifest
+        Blobs of the previous manifest are assumed present, so republishing an unchanged build costs
+        hashing and a single manifest call, with verify previous they are checked like any other blob
+        Returns the published manifest
+
+        :param publish_artifacts:
+        :param logger:
+        :return:
+        """
+        logger = logger or getLogger("publish_artifacts")
+        try:
+            missing_files = [path for path in publish_artifacts.files.values() if not os.path.isfile(path)]
+            if missing_files:
+                logger.error(f"Missing artifact files [{', '.join(missing_files)}]")
+                return None
+            keys = list(publish_artifacts.files)
+            with ThreadPoolExecutor(max_workers=publish_artifacts.max_workers) as executor:
+                # Hashing releases the GIL on large chunks, so files are hashed in parallel
+                blobs = executor.map(with_caller_context(Artifacts.__hash_file),
+                                     [publish_artifacts.files[key] for key in keys])
+                manifest = ArtifactManifest(blob_prefix=publish_artifacts.blob_prefix,
+                                            artifacts=dict(zip(keys, blobs)))
+                previous = Artifacts.__find_manifest(publish_artifacts.bucket_name, publish_artifacts.manifest_path)
+                unchanged = previous == manifest
+                if unchanged and not publish_artifacts.verify_previous:
+                    logger.info(f"Artifacts unchanged [{publish_artifacts.manifest_path}]")
+                    return manifest
+                # Nothing removes blobs a published manifest maps to, unless told otherwise they are not checked
+                present = {blob.digest for blob in previous.artifacts.values()} \
+                    if previous and previous.blob_prefix == manifest.blob_prefix and \
+                    not publish_artifacts.verify_previous else set()
+                # Keys sharing a content share its blob, uploaded once
+                paths: Dict[str, str] = {}
+                for key, blob in manifest.artifacts.items():
+                    if blob.digest not in present:
+                        paths.setdefault(blob.digest, publish_artifacts.files[key])
+                digests = list(paths)
+                exists = executor.map(with_caller_context(lambda digest: S3.object_exists(ObjectExists(
+                    bucket_name=publish_artifacts.bucket_name,
+                    object_path=Artifacts.blob_path(manifest.blob_prefix, digest)
+                ), logger)), digests)
+                uploads = [digest for digest, exist in zip(digests, list(exists)) if not exist]
+                uploaded = executor.map(with_caller_context(lambda digest: S3.upload_object(UploadObject(
+                    bucket_name=publish_artifacts.bucket_name,
+                    object_path=Artifacts.blob_path(manifest.blob_prefix, digest),
+                    input_path=paths[digest],
+                    codec=STORED_CODEC
+                ), logger)), uploads)
+                if not all(list(uploaded)):
+                    return None
+            if unchanged:
+                logger.info(f"Artifacts unchanged [{publish_artifacts.manifest_path}] [Uploaded={len(uploads)}]")
+                return manifest
+            if not S3.save_object(SaveObject(
+                bucket_name=publish_artifacts.bucket_name,
+                object_path=publish_artifacts.manifest_path,
+                body=manifest.model_dump_json(),
+                codec=STORED_CODEC
+            ), logger):
+                return None
+            logger.info(f"Published artifacts [{publish_artifacts.manifest_path}] "
+                        f"[Artifacts={len(manifest.artifacts)}] [Uploaded={len(uploads)}]")
+            return manifest
+        except Exception as e:
+            logger.exception(f"Failed publishing artifacts [{str(e)}]")
+        return None
+
+    @staticmethod
+    def download_artifacts(download_artifacts: DownloadArtifacts, logger: Optional[Logger] = None) -> bool:
+        """
+        Downloads the artifacts of the manifest under their logical keys in the output directory
+        Every blob is downloaded once, keys sharing a blob get a copy of it
+
+        :param download_artifacts:
+        :param logger:
+        :return:
+        """
+        logger = logger or getLogger("download_artifacts")
+        try:
+            manifest = Artifacts.load_manifest(LoadObject(bucket_name=download_artifacts.bucket_name,
+                                                          object_path=download_artifacts.manifest_path), logger)
+            if manifest is None:
+                return False
+            keys = download_artifacts.keys if download_artifacts.keys is not None else list(manifest.artifacts)
+            unknown_keys = [key for key in keys if key not in manifest.artifacts]
+            if unknown_keys:
+                logger.error(f"Artifacts not in manifest [{', '.join(unknown_keys)}]")
+                return False
+            output_directory = os.path.abspath(download_artifacts.output_directory)
+            output_paths: Dict[str, List[str]] = {}
+            for key in keys:
+                output_path = os.path.abspath(os.path.join(output_directory, key))
+                if os.path.commonpath([output_directory, output_path]) != output_directory:
+                    logger.error(f"Artifact key outside of the output directory [{key}]")
+                    return False
+                output_paths.setdefault(manifest.artifacts[key].digest, []).append(output_path)
+
+            def download(digest: str) -> bool:
+                first_path, *other_paths = output_paths[digest]
+                if not S3.download_object(DownloadObject(
+                    bucket_name=download_artifacts.bucket_name,
+                    object_path=Artifacts.blob_path(manifest.blob_prefix, digest),
+                    output_path=first_path
+                ), logger):
+                    return False
+                for output_path in other_paths:
+                    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+                    shutil.copyfile(first_path, output_path)
+                return True
+
+            with ThreadPoolExecutor(max_workers=download_artifacts.max_workers) as executor:
+                return all(list(executor.map(with_caller_context(download), output_paths)))
+        except Exception as e:
+            logger.exception(f"Failed downloading artifacts [{str(e)}]")
+        return False
+
+    @staticmethod
+    def load_manifest(load_object: LoadObject, logger: Optional[Logger] = None) -> Optional[ArtifactManifest]:
+        """
+        Tries to load an artifact manifest
+
+        :param load_object:
+        :param logger:
+        :return:
+        """
+        logger = logger or getLogger("load_manifest")
+        try:
+            data = S3.load_object(load_object, logger)
+            if data is not None:
+                return ArtifactManifest.model_validate_json(data)
+        except Exception as e:
+            logger.exception(f"Failed loading artifact manifest [{str(e)}]")
+        return None
+
+    @staticmethod
+    def blob_path(blob_prefix: str, digest: str) -> str:
+        # Blobs are spread over digest prefixes, as S3 scales request rates per prefix
+        return f"{blob_prefix}{digest[:2]}/{digest}"
+
+    @staticmethod
+    def __hash_file(path: str) -> ArtifactBlob:
+        digest = sha256()
+        size = 0
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+                digest.update(chunk)
+                size += len(chunk)
+        return ArtifactBlob(digest=digest.hexdigest(), size=size)
+
+    @staticmethod
+    def __find_manifest(bucket_name: str, manifest_path: str) -> Optional[ArtifactManifest]:
+        """
+        Returns the published manifest, or None if there is none yet
+        With the object cache enabled, an unchanged manifest costs a conditional get only
+
+        :param bucket_name:
+        :param manifest_path:
+        :return:
+        """
+        try:
+            if ObjectCache.is_enabled():
+                data = ObjectCache.fetch(bucket_name, manifest_path).read()
+            else:
+                client: S3Client = Clients.client("s3")
+                data = client.get_object(Bucket=bucket_name, Key=manifest_path)["Body"].read()
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") in ("NoSuchKey", "404"):
+                return None
+            raise
+        return ArtifactManifest.model_validate_json(data)
@@ -0,0 +1,231 @@
+from __future__ import annotations
+from typing import TYPE_CHECKING, Any, Callable, Dict, Final, Iterator, Literal, Optional, Tuple, TypeVar
+from threading import Lock, local
+from weakref import WeakSet
+from contextlib import contextmanager
+from contextvars import ContextVar, copy_context
+if TYPE_CHECKING:
+    import boto3
+    from botocore.config import Config
+
+# Shared clients are used by many threads at once, so the connection pool must not be the bottleneck
+DEFAULT_MAX_POOL_CONNECTIONS: Final[int] = 128
+DEFAULT_RETRY_MODE: Final[Literal["legacy", "standard", "adaptive"]] = "standard"
+DEFAULT_MAX_ATTEMPTS: Final[int] = 10
+
+# Called with every newly created client, used to register botocore event handlers
+ClientHook = Callable[[Any], None]
+
+T = TypeVar("T")
+
+
+def with_caller_context(func: Callable[..., T]) -> Callable[..., T]:
+    """
+    Binds the function to the context of the caller, so pool threads running it see the caller region scope
+    Every call runs in its own copy of the context, so the bound function can run on many threads at once
+
+    :param func:
+    :return:
+    """
+    context = copy_context()
+
+    def run(*args: Any, **kwargs: Any) -> T:
+        return context.copy().run(func, *args, **kwargs)
+    return run
+
+
+class Clients:
+    """
+    Process wide pool of boto3 clients and resources
+    Clients are thread safe and shared by all threads, resources are not and are kept per thread
+    """
+    __lock: Lock = Lock()
+    __session: Optional[boto3.Session] = None
+    # boto3 and botocore are loaded with the first client, not with the module
+    __config: Optional[Config] = None
+    __hooks: Dict[str, ClientHook] = {}
+    __clients: Dict[Tuple[str, Optional[str]], Any] = {}
+    # Every client still in use, pooled or of a resource, so hooks can be applied to them in place
+    __live_clients: WeakSet = WeakSet()
+    __resources: local = local()
+    __region: ContextVar[Optional[str]] = ContextVar("octo_infra_aws_region", default=None)
+
+    @staticmethod
+    def configure(config: Optional[Config] = None, session: Optional[boto3.Session] = None) -> None:
+        """
+        Sets the botocore config and session used for new clients, and drops all the pooled clients
+
+        :param config:
+        :param session:
+        :return:
+        """
+        with Clients.__lock:
+            if config is not None:
+                Clients.__config = Clients.__get_config().merge(config)
+            if session is not None:
+                Clients.__session = session
+            Clients.__clients = {}
+            Clients.__resources = local()
+
+    @staticmethod
+    def config() -> Config:
+        with Clients.__lock:
+            return Clients.__get_config()
+
+    @staticmethod
+    def session() -> boto3.Session:
+        with Clients.__lock:
+            return Clients.__get_session()
+
+    @staticmethod
+    def set_hook(name: str, hook: Optional[ClientHook]) -> None:
+        """
+        Sets or removes (if None) a named hook called with every new client, and drops all the pooled clients
+        so every client used from now on has the hook applied
+
+        :param name:
+        :param hook:
+        :return:
+        """
+        with Clients.__lock:
+            if hook is None:
+                Clients.__hooks.pop(name, None)
+            else:
+                Clients.__hooks[name] = hook
+            Clients.__clients = {}
+            Clients.__resources = local()
+
+    @staticmethod
+    def add_hook(name: str, hook: ClientHook) -> None:
+        """
+        Sets a named hook called with every new client, and applies it to the clients in use right away,
+        keeping them and their connection pools
+
+        :param name:
+        :param hook:
+        :return:
+        """
+        with Clients.__lock:
+            Clients.__hooks[name] = hook
+            clients = list(Clients.__live_clients)
+        for client in clients:
+            hook(client)
+
+    @staticmethod
+    def remove_hook(name: str, unhook: Optional[ClientHook] = None) -> None:
+        """
+        Removes a named hook, undoing it on the clients in use with the given unhook, keeping the clients
+        and their connection pools
+
+        :param name:
+        :param unhook:
+        :return:
+        """
+        with Clients.__lock:
+            Clients.__hooks.pop(name, None)
+            clients = list(Clients.__live_clients)
+        if unhook is not None:
+            for client in clients:
+                unhook(client)
+
+    @staticmethod
+    def reset() -> None:
+        """
+        Drops all the pooled clients and the session, new clients will pick up refreshed credentials
+
+        :return:
+        """
+        with Clients.__lock:
+            Clients.__session = None
+            Clients.__clients = {}
+            Clients.__resources = local()
+
+    @staticmethod
+    @contextmanager
+    def region_scope(region_name: Optional[str]) -> Iterator[None]:
+        """
+        Makes clients and resources requested without a region, within the scope, use the given region
+
+        :param region_name:
+        :return:
+        """
+        token = Clients.__region.set(region_name)
+        try:
+            yield
+        finally:
+            Clients.__region.reset(token)
+
+    @staticmethod
+    def region() -> Optional[str]:
+        return Clients.__region.get()
+
+    @staticmethod
+    def client(service_name: str, region_name: Optional[str] = None) -> Any:
+        """
+        Returns the pooled client of the service and region, creating it on first use
+        Without a region, the region of the current region scope or the session default region is used
+
+        :param service_name:
+        :param region_name:
+        :return:
+        """
+        key = (service_name, region_name or Clients.__region.get())
+        client = Clients.__clients.get(key)
+        if client is None:
+            with Clients.__lock:
+                client = Clients.__clients.get(key)
+                if client is None:
+                    # Service names are only known at run time, so the session is not typed per service
+                    session: Any = Clients.__get_session()
+                    client = session.client(service_name, region_name=key[1], config=Clients.__get_config())
+                    Clients.__apply_hooks(client)
+                    Clients.__clients[key] = client
+        return client
+
+    @staticmethod
+    def resource(service_name: str, region_name: Optional[str] = None) -> Any:
+        """
+        Returns the resource of the service and region for the calling thread, creating it on first use
+        Without a region, the region of the current region scope or the session default region is used
+
+        :param service_name:
+        :param region_name:
+        :return:
+        """
+        thread_resources = Clients.__resources
+        resources: Optional[Dict[Tuple[str, Optional[str]], Any]] = getattr(thread_resources, "resources", None)
+        if resources is None:
+            resources = thread_resources.resources = {}
+        key = (service_name, region_name or Clients.__region.get())
+        resource = resources.get(key)
+        if resource is None:
+            with Clients.__lock:
+                session: Any = Clients.__get_session()
+                resource = session.resource(service_name, region_name=key[1], config=Clients.__get_config())
+                Clients.__apply_hooks(resource.meta.client)
+            resources[key] = resource
+        return resource
+
+    @staticmethod
+    def __apply_hooks(client: Any) -> None:
+        # Callers must hold the lock
+        Clients.__live_clients.add(client)
+        for hook in Clients.__hooks.values():
+            hook(client)
+
+    @staticmethod
+    def __get_config() -> Config:
+        # Callers must hold the lock
+        if Clients.__config is None:
+            from botocore.config import Config
+            Clients.__config = Config(max_pool_connections=DEFAULT_MAX_POOL_CONNECTIONS,
+                                      retries={"mode": DEFAULT_RETRY_MODE, "total_max_attempts": DEFAULT_MAX_ATTEMPTS})
+        return Clients.__config
+
+    @staticmethod
+    def __get_session() -> boto3.Session:
+        # Sessions are not thread safe, callers must hold the lock
+        if Clients.__session is None:
+            import boto3
+            Clients.__session = boto3.Session()
+        return Clients.__session
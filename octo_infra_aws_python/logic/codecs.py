@@ -0,0 +1,236 @@
+from abc import ABC, abstractmethod
+from octo_infra_aws_python.logic.clients import with_caller_context
+from queue import Full, Queue
+from threading import Event, Lock, Thread
+from typing import Any, Dict, Final, Iterable, Iterator, Optional
+import zlib
+
+# User metadata key recording the codec of a compressed object
+CODEC_METADATA_KEY: Final[str] = "octo-codec"
+# Codec name that saves objects as is, overriding a prefix codec
+IDENTITY_CODEC: Final[str] = "identity"
+# Compressed chunks a background compression may buffer ahead of the upload
+MAX_BUFFERED_CHUNKS: Final[int] = 8
+QUEUE_POLL_SECONDS: Final[float] = 0.1
+_END: Final[object] = object()
+
+
+class Codec(ABC):
+    """
+    Streaming compression codec, compresses and decompresses iterators of bytes chunks
+    """
+    name: str = ""
+    content_encoding: str = ""
+
+    @abstractmethod
+    def compress_chunks(self, chunks: Iterable[bytes]) -> Iterator[bytes]:
+        """
+        Compresses the chunks as they are read
+
+        :param chunks:
+        :return:
+        """
+
+    @abstractmethod
+    def decompress_chunks(self, chunks: Iterable[bytes]) -> Iterator[bytes]:
+        """
+        Decompresses the chunks as they are read
+
+        :param chunks:
+        :return:
+        """
+
+
+class GzipCodec(Codec):
+    name = "gzip"
+    content_encoding = "gzip"
+
+    def __init__(self, level: int = 6) -> None:
+        self.__level = level
+
+    def compress_chunks(self, chunks: Iterable[bytes]) -> Iterator[bytes]:
+        # A window of 16 + 15 bits writes the gzip header and trailer
+        compressor = zlib.compressobj(self.__level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+        for chunk in chunks:
+            compressed = compressor.compress(chunk)
+            if compressed:
+                yield compressed
+        yield compressor.flush()
+
+    def decompress_chunks(self, chunks: Iterable[bytes]) -> Iterator[bytes]:
+        decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        for chunk in chunks:
+            decompressed = decompressor.decompress(chunk)
+            if decompressed:
+                yield decompressed
+        yield decompressor.flush()
+
+
+class ZstdCodec(Codec):
+    """
+    Zstandard codec, requires the zstandard package
+    """
+    name = "zstd"
+    content_encoding = "zstd"
+
+    def __init__(self, level: int = 3) -> None:
+        self.__level = level
+
+    def compress_chunks(self, chunks: Iterable[bytes]) -> Iterator[bytes]:
+        compressor = self.__zstandard().ZstdCompressor(level=self.__level).compressobj()
+        for chunk in chunks:
+            compressed = compressor.compress(chunk)
+            if compressed:
+                yield compressed
+        yield compressor.flush()
+
+    def decompress_chunks(self, chunks: Iterable[bytes]) -> Iterator[bytes]:
+        decompressor = self.__zstandard().ZstdDecompressor().decompressobj()
+        for chunk in chunks:
+            decompressed = decompressor.decompress(chunk)
+            if decompressed:
+                yield decompressed
+
+    @staticmethod
+    def __zstandard() -> Any:
+        try:
+            import zstandard
+        except ImportError as e:
+            raise ImportError("The zstd codec requires the zstandard package") from e
+        return zstandard
+
+
+class Lz4Codec(Codec):
+    """
+    LZ4 frame codec, requires the lz4 package
+    """
+    name = "lz4"
+    content_encoding = "lz4"
+
+    def compress_chunks(self, chunks: Iterable[bytes]) -> Iterator[bytes]:
+        compressor = self.__lz4_frame().LZ4FrameCompressor()
+        yield compressor.begin()
+        for chunk in chunks:
+            compressed = compressor.compress(chunk)
+            if compressed:
+                yield compressed
+        yield compressor.flush()
+
+    def decompress_chunks(self, chunks: Iterable[bytes]) -> Iterator[bytes]:
+        decompressor = self.__lz4_frame().LZ4FrameDecompressor()
+        for chunk in chunks:
+            decompressed = decompressor.decompress(chunk)
+            if decompressed:
+                yield decompressed
+
+    @staticmethod
+    def __lz4_frame() -> Any:
+        try:
+            import lz4.frame
+        except ImportError as e:
+            raise ImportError("The lz4 codec requires the lz4 package") from e
+        return lz4.frame
+
+
+class Codecs:
+    """
+    Process wide registry of the codecs, and of the codec used for objects saved under a path prefix
+    """
+    __lock: Lock = Lock()
+    __codecs: Dict[str, Codec] = {codec.name: codec for codec in (GzipCodec(), ZstdCodec(), Lz4Codec())}
+    __prefix_codecs: Dict[str, str] = {}
+
+    @staticmethod
+    def register(codec: Codec) -> None:
+        """
+        Adds a codec, or replaces the codec of the same name, for example to change its compression level
+
+        :param codec:
+        :return:
+        """
+        with Codecs.__lock:
+            Codecs.__codecs = {**Codecs.__codecs, codec.name: codec}
+
+    @staticmethod
+    def configure(prefix_codecs: Dict[str, str]) -> None:
+        """
+        Sets the codec names used for objects saved under path prefixes, the longest matching prefix is used
+
+        :param prefix_codecs:
+        :return:
+        """
+        for codec_name in prefix_codecs.values():
+            if codec_name != IDENTITY_CODEC:
+                Codecs.get(codec_name)
+        with Codecs.__lock:
+            Codecs.__prefix_codecs = dict(prefix_codecs)
+
+    @staticmethod
+    def get(codec_name: str) -> Codec:
+        codec = Codecs.__codecs.get(codec_name)
+        if codec is None:
+            raise ValueError(f"Unknown codec [{codec_name}]")
+        return codec
+
+    @staticmethod
+    def resolve(codec_name: Optional[str], object_path: str) -> Optional[Codec]:
+        """
+        Returns the codec to save an object with, the given codec name or else the codec of its path prefix
+        Returns None if the object is saved as is
+
+        :param codec_name:
+        :param object_path:
+        :return:
+        """
+        if codec_name is None:
+            prefixes = [prefix for prefix in Codecs.__prefix_codecs if object_path.startswith(prefix)]
+            if not prefixes:
+                return None
+            codec_name = Codecs.__prefix_codecs[max(prefixes, key=len)]
+        if codec_name == IDENTITY_CODEC:
+            return None
+        return Codecs.get(codec_name)
+
+
+def in_background(chunks: Iterator[bytes], max_buffered_chunks: int = MAX_BUFFERED_CHUNKS) -> Iterator[bytes]:
+    """
+    Runs the chunks iterator on a worker thread, so producing chunks (compressing, downloading) overlaps
+    with consuming them (uploading, decompressing)
+    Holds at most the given amount of chunks ahead of the consumer, and stops the worker when closed
+
+    :param chunks:
+    :param max_buffered_chunks:
+    :return:
+    """
+    buffered: Queue = Queue(maxsize=max_buffered_chunks)
+    stopped = Event()
+
+    def put(item: Any) -> None:
+        while not stopped.is_set():
+            try:
+                buffered.put(item, timeout=QUEUE_POLL_SECONDS)
+                return
+            except Full:
+                continue
+
+    def produce() -> None:
+        try:
+            for chunk in chunks:
+                if stopped.is_set():
+                    return
+                put(chunk)
+            put(_END)
+        except BaseException as e:
+            put(e)
+
+    Thread(target=with_caller_context(produce), name="octo-codec", daemon=True).start()
+    try:
+        while True:
+            item = buffered.get()
+            if item is _END:
+                return
+            if isinstance(item, BaseException):
+                raise item
+            yield item
+    finally:
+        stopped.set()
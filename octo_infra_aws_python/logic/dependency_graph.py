@@ -0,0 +1,119 @@
+from concurrent.futures import ThreadPoolExecutor, Future, wait, FIRST_COMPLETED
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from logging import Logger, getLogger
+import time
+from octo_infra_aws_python.logic.clients import with_caller_context
+
+# A node receives the results of all the nodes ran so far, returning None marks the node as failed
+NodeCallable = Callable[[Dict[str, Any]], Any]
+
+
+class DependencyGraph:
+    def __init__(self) -> None:
+        self.__nodes: Dict[str, NodeCallable] = {}
+        self.__dependencies: Dict[str, List[str]] = {}
+
+    def add_node(self, name: str, node: NodeCallable, dependencies: Optional[List[str]] = None) -> None:
+        """
+        Adds a node to the graph, a node with an existing name is ignored
+
+        :param name:
+        :param node:
+        :param dependencies:
+        :return:
+        """
+        if name in self.__nodes:
+            return
+        self.__nodes[name] = node
+        self.__dependencies[name] = list(dependencies or [])
+
+    def has_node(self, name: str) -> bool:
+        """
+        Checks if a node of the given name was added to the graph
+
+        :param name:
+        :return:
+        """
+        return name in self.__nodes
+
+    def dependencies(self, name: str) -> List[str]:
+        """
+        Returns the names of the nodes the given node depends on
+
+        :param name:
+        :return:
+        """
+        return self.__dependencies[name]
+
+    def critical_path_seconds(self, timings: Dict[str, float]) -> float:
+        """
+        Returns the summed timings of the slowest dependency chain of the graph
+
+        :param timings:
+        :return:
+        """
+        path_seconds: Dict[str, float] = {}
+
+        def node_path_seconds(name: str) -> float:
+            if name not in path_seconds:
+                path_seconds[name] = timings.get(name, 0) + max(
+                    (node_path_seconds(dependency) for dependency in self.__dependencies[name]), default=0)
+            return path_seconds[name]
+
+        return max((node_path_seconds(name) for name in self.__nodes), default=0)
+
+    def run(self, max_workers: int = 16,
+            logger: Optional[Logger] = None) -> Tuple[Dict[str, Any], Dict[str, float], List[str]]:
+        """
+        Runs all the nodes, each node starts as soon as all of its dependencies finished successfully
+        Returns the results, the per node timings in seconds, and the failed or skipped nodes
+
+        :param max_workers:
+        :param logger:
+        :return:
+        """
+        logger = logger or getLogger("dependency_graph")
+        for name, dependencies in self.__dependencies.items():
+            missing = [dependency for dependency in dependencies if dependency not in self.__nodes]
+            if missing:
+                raise ValueError(f"Node [{name}] depends on unknown nodes [{missing}]")
+        results: Dict[str, Any] = {}
+        timings: Dict[str, float] = {}
+        failed: List[str] = []
+        pending: Dict[str, List[str]] = {name: list(deps) for name, deps in self.__dependencies.items()}
+        running: Dict[Future, str] = {}
+
+        def timed(name: str) -> Any:
+            start = time.perf_counter()
+            try:
+                return self.__nodes[name](results)
+            finally:
+                timings[name] = time.perf_counter() - start
+
+        # Nodes run in the context of the caller, so a region scope applies to the whole graph
+        timed = with_caller_context(timed)
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            while pending or running:
+                for name in [name for name, deps in pending.items() if all(dep in results for dep in deps)]:
+                    del pending[name]
+                    running[executor.submit(timed, name)] = name
+                if not running:
+                    # Everything left depends on a failed node
+                    for name in pending:
+                        logger.error(f"Skipping node due to failed dependencies [{name}]")
+                    failed.extend(pending)
+                    break
+                done, _ = wait(list(running), return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        logger.exception(f"Node failed [{name}] [{str(e)}]")
+                        result = None
+                    if result is None:
+                        failed.append(name)
+                    else:
+                        results[name] = result
+                    logger.info(f"Node finished [{name}] [{timings[name]:.2f}s]")
+        return results, timings, failed
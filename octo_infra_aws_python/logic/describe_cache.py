@@ -0,0 +1,200 @@
+from octo_infra_aws_python.logic.clients import Clients
+from octo_infra_aws_python.logic.single_flight import SingleFlight
+from octo_infra_aws_python.models.describe_cache_policy import DescribeCachePolicy
+from pydantic import BaseModel
+from functools import wraps
+from hashlib import sha256
+from logging import Logger, getLogger
+from threading import Lock, local
+from typing import Any, Callable, Final, Optional, Type, TypeVar, overload
+import json
+import os
+import sqlite3
+import time
+
+T = TypeVar("T")
+M = TypeVar("M", bound=BaseModel)
+
+DATABASE_NAME: Final[str] = "describe_cache.sqlite3"
+ACCOUNT_CACHE_TYPE: Final[str] = "account"
+# Seconds a process waits on another process writing to the database
+BUSY_TIMEOUT_SECONDS: Final[float] = 30
+
+
+class DescribeCache:
+    """
+    Optional persistent cache of slow changing describe results, shared by all the processes using its directory
+    Results are keyed by account, region and the action model, so new processes start warm
+    """
+    __lock: Lock = Lock()
+    __policy: Optional[DescribeCachePolicy] = None
+    __connections: local = local()
+
+    @staticmethod
+    def configure(policy: DescribeCachePolicy, logger: Optional[Logger] = None) -> None:
+        """
+        Enables the cache in the policy directory, and drops its expired results
+
+        :param policy:
+        :param logger:
+        :return:
+        """
+        logger = logger or getLogger("describe_cache")
+        with DescribeCache.__lock:
+            DescribeCache.__policy = policy
+        try:
+            DescribeCache.__connection(policy).execute("DELETE FROM entries WHERE expires_at <= ?", (time.time(),))
+        except sqlite3.Error as e:
+            logger.warning(f"Failed dropping expired cache results [{str(e)}]")
+
+    @staticmethod
+    def disable() -> None:
+        with DescribeCache.__lock:
+            DescribeCache.__policy = None
+
+    @staticmethod
+    def is_enabled() -> bool:
+        return DescribeCache.__policy is not None
+
+    @staticmethod
+    def invalidate(cache_type: Optional[str] = None, logger: Optional[Logger] = None) -> int:
+        """
+        Drops the cached results of the type, or all of them, for all the processes using the cache
+        Returns the amount of results dropped
+
+        :param cache_type:
+        :param logger:
+        :return:
+        """
+        logger = logger or getLogger("describe_cache")
+        policy = DescribeCache.__policy
+        if policy is None:
+            return 0
+        try:
+            connection = DescribeCache.__connection(policy)
+            if cache_type is None:
+                return connection.execute("DELETE FROM entries").rowcount
+            return connection.execute("DELETE FROM entries WHERE cache_type = ?", (cache_type,)).rowcount
+        except sqlite3.Error as e:
+            logger.warning(f"Failed invalidating cache results [{cache_type}] [{str(e)}]")
+        return 0
+
+    @overload
+    @staticmethod
+    def call(cache_type: str, model: None, func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        ...
+
+    @overload
+    @staticmethod
+    def call(cache_type: str, model: Type[M], func: Callable[..., Optional[M]],
+             *args: Any, **kwargs: Any) -> Optional[M]:
+        ...
+
+    @staticmethod
+    def call(cache_type: str, model: Optional[Type[BaseModel]], func: Callable[..., Any],
+             *args: Any, **kwargs: Any) -> Any:
+        """
+        Returns the cached result of the call, or calls the function and caches its result unless it is None
+        Failures of the cache itself are logged and the function is called
+
+        :param cache_type:
+        :param model:
+        :param func:
+        :param args:
+        :param kwargs:
+        :return:
+        """
+        policy = DescribeCache.__policy
+        if policy is None:
+            return func(*args, **kwargs)
+        logger = getLogger("describe_cache")
+        key: Optional[str] = None
+        try:
+            account = DescribeCache.__account(cache_type)
+            if account is not None:
+                region = Clients.region() or Clients.session().region_name
+                key = repr((account, region, SingleFlight.key(func, args, kwargs)))
+                row = DescribeCache.__connection(policy).execute(
+                    "SELECT value FROM entries WHERE cache_type = ? AND key = ? AND expires_at > ?",
+                    (cache_type, key, time.time())
+                ).fetchone()
+                if row is not None:
+                    return model.model_validate_json(row[0]) if model else json.loads(row[0])
+        except Exception as e:
+            logger.warning(f"Failed reading cache [{cache_type}] [{str(e)}]")
+        result = func(*args, **kwargs)
+        if key is not None and result is not None:
+            try:
+                ttl_seconds = policy.ttl_seconds.get(cache_type, policy.default_ttl_seconds)
+                DescribeCache.__connection(policy).execute(
+                    "INSERT OR REPLACE INTO entries (cache_type, key, value, expires_at) VALUES (?, ?, ?, ?)",
+                    (cache_type, key, result.model_dump_json() if model else json.dumps(result),
+                     time.time() + ttl_seconds)
+                )
+            except Exception as e:
+                logger.warning(f"Failed writing cache [{cache_type}] [{str(e)}]")
+        return result
+
+    @staticmethod
+    def __account(cache_type: str) -> Optional[str]:
+        """
+        Returns the account part of the keys, the account results themselves are keyed by the credentials
+
+        :param cache_type:
+        :return:
+        """
+        if cache_type == ACCOUNT_CACHE_TYPE:
+            credentials = Clients.session().get_credentials()
+            if credentials is None:
+                return None
+            return f"credentials:{sha256(credentials.access_key.encode()).hexdigest()}"
+        from octo_infra_aws_python.logic.sts import STS
+        return STS.get_account_id()
+
+    @staticmethod
+    def __connection(policy: DescribeCachePolicy) -> sqlite3.Connection:
+        # Connections can not be shared between threads, so every thread keeps its own
+        path = os.path.join(policy.directory, DATABASE_NAME)
+        connections = DescribeCache.__connections
+        if getattr(connections, "path", None) != path:
+            if getattr(connections, "connection", None) is not None:
+                connections.connection.close()
+            os.makedirs(policy.directory, exist_ok=True)
+            # Autocommit, every statement is atomic on its own
+            connection = sqlite3.connect(path, timeout=BUSY_TIMEOUT_SECONDS, isolation_level=None)
+            # Write ahead logging lets processes read while another one writes
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("CREATE TABLE IF NOT EXISTS entries (cache_type TEXT NOT NULL, key TEXT NOT NULL, "
+                               "value TEXT NOT NULL, expires_at REAL NOT NULL, PRIMARY KEY (cache_type, key))")
+            connections.connection = connection
+            connections.path = path
+        return connections.connection
+
+
+@overload
+def persistent_cache(cache_type: str) -> Callable[[Callable[..., T]], Callable[..., T]]:
+    ...
+
+
+@overload
+def persistent_cache(cache_type: str, model: Type[M]) \
+        -> Callable[[Callable[..., Optional[M]]], Callable[..., Optional[M]]]:
+    ...
+
+
+def persistent_cache(cache_type: str, model: Optional[Type[BaseModel]] = None) \
+        -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+    """
+    Caches the results of a logic action in the describe cache, when it is configured
+    The cache type picks the TTL of the results, the model is given for results that are not JSON values
+
+    :param cache_type:
+    :param model:
+    :return:
+    """
+    def decorator(func: Callable[..., Any]) -> Callable[..., Any]:
+        @wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            return DescribeCache.call(cache_type, model, func, *args, **kwargs)
+        return wrapper
+    return decorator
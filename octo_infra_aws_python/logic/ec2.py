@@ -1,32 +1,45 @@
+from __future__ import annotations
 import base64
 import os
 import time
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime
 from http import HTTPStatus
-from typing import Final, List, Optional, Tuple, Union
-
-import boto3
-from mypy_boto3_ec2.client import EC2Client
-from Crypto.Cipher import PKCS1_v1_5
-from Crypto.PublicKey import RSA
-from mypy_boto3_ec2.service_resource import EC2ServiceResource, Image, Instance
-from mypy_boto3_ec2.type_defs import (DescribeInstancesResultTypeDef,
-                                      DescribeKeyPairsResultTypeDef,
-                                      FilterTypeDef,
-                                      GetPasswordDataResultTypeDef)
-
-from octo_infra_aws_python.logic.ami import AMI
+from typing import TYPE_CHECKING, Any, Dict, Final, List, Optional, Set, Tuple, Union
+
+if TYPE_CHECKING:
+    from mypy_boto3_ec2.client import EC2Client
+    from mypy_boto3_ec2.service_resource import EC2ServiceResource, Image, Instance
+    from mypy_boto3_ec2.type_defs import (DescribeInstancesResultTypeDef,
+                                          DescribeKeyPairsResultTypeDef,
+                                          FilterTypeDef,
+                                          GetPasswordDataResultTypeDef,
+                                          InstanceTypeDef,
+                                          WaiterConfigTypeDef)
+
 from octo_infra_aws_python.models.actions.ami import FindImage
 from octo_infra_aws_python.models.actions.ec2 import (CreateEC2, CreateKeypair, DestroyEC2,
-                                          DestroyKeypair,
+                                          DestroyEC2Instances, DestroyKeypair,
                                           FindEC2InstanceCredentials)
+from octo_infra_aws_python.models.actions.network import CreateSecurityGroup
+from octo_infra_aws_python.models.execution_plan import ExecutionPlan
 from octo_infra_aws_python.models.find_asset import FindAsset
-from octo_infra_aws_python.logic.network import Network
+from octo_infra_aws_python.models.plan_settings import PlanSettings
 from logging import Logger, getLogger
+from octo_infra_aws_python.logic.clients import Clients, with_caller_context
+from octo_infra_aws_python.logic.planner import Planner
 
 FIND_EC2_CREDENTIALS_INTERVAL: Final[int] = 1
-EXTRA_INSTANCE_CREATION_TIME: Final[int] = 2
+INSTANCE_WAITER_CONFIG: Final[WaiterConfigTypeDef] = {"Delay": 2, "MaxAttempts": 300}
+INSTANCE_STATE_POLL_INTERVAL_SECONDS: Final[int] = 2
+INSTANCE_STATE_TIMEOUT_SECONDS: Final[int] = 600
+MAX_INSTANCES_PER_CALL: Final[int] = 1000
+# Max values of a single describe filter
+MAX_FILTER_VALUES: Final[int] = 200
 DEFAULT_ADMIN_USERNAME: Final[str] = "Administrator"
+DEFAULT_AMI: Final[FindImage] = FindImage(provider="amazon",
+                                          description="Microsoft Windows Server 2019 with Desktop Experience "
+                                                      "Locale English AMI provided by Amazon")
 
 
 class EC2:
@@ -43,7 +56,7 @@ class EC2:
         logger = logger or getLogger("create_key_pair")
         try:
             logger.info(f"Starting creation of keypair [{create_key_pair.keypair_name}]")
-            ec2_resource: EC2ServiceResource = boto3.resource("ec2")
+            ec2_resource: EC2ServiceResource = Clients.resource("ec2")
             ec2_client: EC2Client = ec2_resource.meta.client
             # Check if the keypair already exists
             try:
@@ -94,7 +107,7 @@ class EC2:
         logger = logger or getLogger("destroy_keypair")
         try:
             logger.info(f"Starting termination of keypair [{destroy_keypair.keypair_name}]")
-            ec2_resource: EC2ServiceResource = boto3.resource("ec2")
+            ec2_resource: EC2ServiceResource = Clients.resource("ec2")
             ec2_resource.KeyPair(destroy_keypair.keypair_name).delete()
             logger.info(f"Keypair deleted [{destroy_keypair.keypair_name}]")
         except Exception as e:
@@ -112,34 +125,44 @@ class EC2:
         :param logger:
         :return:
         """
+        # Loaded on first use so importing the module does not pull in the network and AMI logic
+        from octo_infra_aws_python.logic.ami import AMI
+        from octo_infra_aws_python.logic.network import Network, CREATION_WAITER_CONFIG
         logger = logger or getLogger("create_ec2_instance")
         try:
-            ec2_resource: EC2ServiceResource = boto3.resource("ec2")
-
-            # Set the security group
-            security_group_id: Optional[str] = create_ec2.security_group
-            if create_ec2.security_group and not isinstance(create_ec2.security_group, str):
-                security_group_id = Network.create_security_group(create_ec2.security_group, logger)
-
-            # Set the keypair
-            keypair_id: Union[CreateKeypair, str] = create_ec2.keypair
-            if create_ec2.keypair and not isinstance(create_ec2.keypair, str):
-                _, keypair_id = EC2.create_key_pair(create_ec2.keypair, logger)
-
-            # Set the AMI
-            ami_id: Optional[str] = create_ec2.ami
-            if create_ec2.ami and not isinstance(create_ec2.ami, str):
-                ami_id = AMI.find_image(create_ec2.ami)
-            elif not create_ec2.ami:
-                ami_id = AMI.find_image(FindImage(provider="amazon",
-                                                  description="Microsoft Windows Server 2019 with Desktop Experience "
-                                                              "Locale English AMI provided by Amazon"))
-            if not ami_id and isinstance(create_ec2.ami, str):
-                ami_id = create_ec2.ami
-            elif not ami_id:
+            ec2_resource: EC2ServiceResource = Clients.resource("ec2")
+
+            # Resolve the security group, keypair and AMI concurrently as they are independent
+            with ThreadPoolExecutor(max_workers=3) as executor:
+                security_group_future: Optional[Future] = None
+                if create_ec2.security_group and not isinstance(create_ec2.security_group, str):
+                    security_group_future = executor.submit(with_caller_context(Network.create_security_group),
+                                                            create_ec2.security_group, logger)
+                keypair_future: Optional[Future] = None
+                if create_ec2.keypair and not isinstance(create_ec2.keypair, str):
+                    keypair_future = executor.submit(with_caller_context(EC2.create_key_pair), create_ec2.keypair, logger)
+                ami_future: Optional[Future] = None
+                if not isinstance(create_ec2.ami, str):
+                    ami_future = executor.submit(with_caller_context(AMI.find_image), create_ec2.ami or DEFAULT_AMI,
+                                                 logger)
+
+                # Set the security group
+                security_group_id: Optional[str] = create_ec2.security_group
+                if security_group_future:
+                    security_group_id = security_group_future.result()
+
+                # Set the keypair
+                keypair_id: Union[CreateKeypair, str] = create_ec2.keypair
+                if keypair_future:
+                    _, keypair_id = keypair_future.result()
+
+                # Set the AMI
+                ami_id: Optional[str] = create_ec2.ami
+                if ami_future:
+                    ami_id = ami_future.result()
+            if not ami_id:
                 raise Exception("Failed to deduce AMI to use")
 
-            ec2_resource: EC2ServiceResource = boto3.resource("ec2")
             logger.info(f"Starting to create EC2 Instances "
                         f"[Keypair ID: {keypair_id}, "
                         f"Security Group ID: {security_group_id}, "
@@ -187,18 +210,20 @@ class EC2:
                 UserData=create_ec2.user_data or '',
                 TagSpecifications=[{"ResourceType": "instance",
                                    "Tags": [{"Key": k, "Value": v} for k, v in create_ec2.tags.items()]}])
-            time.sleep(EXTRA_INSTANCE_CREATION_TIME)
+            instances_ids: List[str] = [instance.id for instance in instances]
+            client: EC2Client = ec2_resource.meta.client
             if create_ec2.wait_until_finished:
-                for instance in instances:
-                    logger.info(f"Waiting for instance to be running [{instance.id}]")
-                    instance.start()
-                    instance.wait_until_running()
+                # A single batched waiter polls all the instances with one describe call per attempt
+                logger.info(f"Waiting for instances to be running [{instances_ids}]")
+                client.get_waiter("instance_running").wait(InstanceIds=instances_ids,
+                                                           WaiterConfig=INSTANCE_WAITER_CONFIG)
+            elif create_ec2.disable_metadata_access:
+                client.get_waiter("instance_exists").wait(InstanceIds=instances_ids,
+                                                          WaiterConfig=CREATION_WAITER_CONFIG)
             if create_ec2.extra_startup_wait_time_seconds:
                 logger.info(f"Waiting extra startup time [{create_ec2.extra_startup_wait_time_seconds}]")
                 time.sleep(create_ec2.extra_startup_wait_time_seconds)
-            instances_ids: List[str] = [instance.id for instance in instances]
             if create_ec2.disable_metadata_access:
-                client: EC2Client = boto3.client("ec2")
                 for instance_id in instances_ids:
                     client.modify_instance_metadata_options(
                         InstanceId=instance_id,
@@ -211,6 +236,58 @@ class EC2:
             logger.exception(f"Failed creating EC2 instances [{str(e)}]")
         return None
 
+    @staticmethod
+    def reconcile_ec2_instances(create_ec2: CreateEC2,
+                                instance_count: int = 1,
+                                logger: Optional[Logger] = None) -> Optional[List[str]]:
+        """
+        Finds the pending / running instances by their subnet and name tag, and only creates the missing instances
+        Existing keypairs are used instead of being re-created
+
+        :param create_ec2:
+        :param instance_count:
+        :param logger:
+        :return:
+        """
+        from octo_infra_aws_python.logic.network import Network
+        logger = logger or getLogger("reconcile_ec2_instances")
+        try:
+            ec2_client: EC2Client = Clients.client("ec2")
+            instances_result: DescribeInstancesResultTypeDef = ec2_client.describe_instances(Filters=[{
+                "Name": "tag:Name",
+                "Values": [create_ec2.instance_name]
+            }, {
+                "Name": "subnet-id",
+                "Values": [create_ec2.subnet_id]
+            }, {
+                "Name": "instance-state-name",
+                "Values": ["pending", "running"]
+            }])
+            instances_ids: List[str] = [instance["InstanceId"]
+                                        for reservation in instances_result["Reservations"]
+                                        for instance in reservation["Instances"]]
+            missing_count = instance_count - len(instances_ids)
+            logger.info(f"Reconciling EC2 Instances [{create_ec2.instance_name}] "
+                        f"[Existing={len(instances_ids)}, Missing={max(missing_count, 0)}]")
+            if missing_count <= 0:
+                return instances_ids
+            update: Dict[str, Any] = {}
+            if isinstance(create_ec2.keypair, CreateKeypair):
+                update["keypair"] = create_ec2.keypair.model_copy(update={"use_if_exists": True,
+                                                                          "delete_if_exists": False})
+            if isinstance(create_ec2.security_group, CreateSecurityGroup):
+                security_group_ids = Network.reconcile_security_groups([create_ec2.security_group], logger=logger)
+                update["security_group"] = (security_group_ids or {}).get(create_ec2.security_group.name)
+                if not update["security_group"]:
+                    raise Exception("Failed to reconcile security group")
+            created_ids = EC2.create_ec2_instance(create_ec2.model_copy(update=update), missing_count, logger)
+            if created_ids is None:
+                return None
+            return instances_ids + created_ids
+        except Exception as e:
+            logger.exception(f"Failed reconciling EC2 instances [{str(e)}]")
+        return None
+
     @staticmethod
     def destroy_ec2_instance(destroy_ec2: DestroyEC2, logger: Optional[Logger] = None) -> None:
         """
@@ -220,24 +297,233 @@ class EC2:
         :param logger:
         :return:
         """
-        logger = logger or getLogger("destroy_ec2_instance")
+        EC2.destroy_ec2_instances(DestroyEC2Instances(
+            instance_ids=[destroy_ec2.instance_id],
+            destroy_keypair=destroy_ec2.destroy_keypair,
+            wait_for_termination=destroy_ec2.wait_for_termination,
+            wait_for_stopped=destroy_ec2.wait_for_stopped
+        ), logger or getLogger("destroy_ec2_instance"))
+
+    @staticmethod
+    def plan_create_ec2_instance(create_ec2: CreateEC2,
+                                 instance_count: int = 1,
+                                 plan_settings: Optional[PlanSettings] = None,
+                                 logger: Optional[Logger] = None) -> Optional[ExecutionPlan]:
+        """
+        Plans creating EC2 instances based on the create ec2 model, performing only read calls
+        The security group, keypair and AMI are resolved concurrently, the planned instances are named by index
+
+        :param create_ec2:
+        :param instance_count:
+        :param plan_settings:
+        :param logger:
+        :return:
+        """
+        from octo_infra_aws_python.logic.ami import AMI
+        from octo_infra_aws_python.logic.network import Network
+        logger = logger or getLogger("plan_create_ec2_instance")
+        try:
+            planner = Planner("create_ec2_instance", plan_settings)
+            resolution_steps: List[str] = []
+            if isinstance(create_ec2.security_group, CreateSecurityGroup):
+                security_group_plan = Network.plan_create_security_group(create_ec2.security_group,
+                                                                         planner.plan_settings, logger)
+                if security_group_plan is None:
+                    raise Exception("Failed planning the security group")
+                planner.add_plan(security_group_plan, dependencies=[])
+                resolution_steps.append(planner.last_step())
+            elif create_ec2.security_group:
+                planner.add_resources("security_group", [create_ec2.security_group])
+
+            if isinstance(create_ec2.keypair, CreateKeypair):
+                ec2_client: EC2Client = Clients.client("ec2")
+                keypair_names: List[str] = []
+                try:
+                    response: DescribeKeyPairsResultTypeDef = ec2_client.describe_key_pairs(
+                        KeyNames=[create_ec2.keypair.keypair_name])
+                    keypair_names = [keypair["KeyName"] for keypair in response.get("KeyPairs", [])]
+                except Exception as e:
+                    logger.debug(str(e))
+                create_keypair = not keypair_names or not create_ec2.keypair.use_if_exists
+                planner.add_step("create_key_pair", {
+                    "ec2.DescribeKeyPairs": 1,
+                    "ec2.DeleteKeyPair": 1 if keypair_names and create_ec2.keypair.delete_if_exists else 0,
+                    "ec2.CreateKeyPair": 1 if create_keypair else 0
+                }, [create_ec2.keypair.keypair_name], dependencies=[])
+                planner.add_resources("keypair", [create_ec2.keypair.keypair_name])
+                resolution_steps.append(planner.last_step())
+            elif create_ec2.keypair:
+                planner.add_resources("keypair", [create_ec2.keypair])
+
+            if isinstance(create_ec2.ami, str):
+                ami_id: Optional[str] = create_ec2.ami
+            else:
+                ami_id = AMI.find_image(create_ec2.ami or DEFAULT_AMI, logger)
+                planner.add_step("find_image", {"ec2.DescribeImages": 1}, [ami_id] if ami_id else [],
+                                 dependencies=[])
+                resolution_steps.append(planner.last_step())
+            if not ami_id:
+                raise Exception("Failed to deduce AMI to use")
+            planner.add_resources("image", [ami_id])
+
+            instance_names = [f"{create_ec2.instance_name}-{index}" for index in range(instance_count)]
+            planner.add_step("run_instances", {"ec2.DescribeImages": 1, "ec2.RunInstances": 1}, instance_names,
+                             dependencies=resolution_steps)
+            planner.add_resources("instance", instance_names)
+            settings = planner.plan_settings
+            if create_ec2.wait_until_finished:
+                planner.add_step("wait_for_running", {
+                    "ec2.DescribeInstances": Planner.polls(settings.instance_running_seconds,
+                                                           INSTANCE_WAITER_CONFIG["Delay"])
+                }, instance_names, wait_seconds=settings.instance_running_seconds)
+            elif create_ec2.disable_metadata_access:
+                planner.add_step("wait_for_exists", {"ec2.DescribeInstances": 1}, instance_names)
+            if create_ec2.extra_startup_wait_time_seconds:
+                planner.add_step("wait_extra_startup_time", {}, instance_names,
+                                 wait_seconds=create_ec2.extra_startup_wait_time_seconds)
+            if create_ec2.disable_metadata_access:
+                planner.add_step("disable_metadata_access", {"ec2.ModifyInstanceMetadataOptions": instance_count},
+                                 instance_names)
+            return planner.plan()
+        except Exception as e:
+            logger.exception(f"Failed planning EC2 instances creation [{str(e)}]")
+        return None
+
+    @staticmethod
+    def destroy_ec2_instances(destroy_ec2_instances: DestroyEC2Instances, logger: Optional[Logger] = None) -> bool:
+        """
+        Destroys many EC2 instances along with their keypairs if allowed
+        Stops and terminates the instances with batched calls, and waits on all of them with a single poll loop
+
+        :param destroy_ec2_instances:
+        :param logger:
+        :return:
+        """
+        logger = logger or getLogger("destroy_ec2_instances")
+        try:
+            instance_ids = list(dict.fromkeys(destroy_ec2_instances.instance_ids))
+            logger.info(f"Starting termination of EC2 Instances [Count={len(instance_ids)}]")
+            ec2_client: EC2Client = Clients.client("ec2")
+            instances = EC2.__describe_instances(ec2_client, instance_ids)
+            if destroy_ec2_instances.destroy_keypair:
+                for key_name in {instance["KeyName"] for instance in instances if instance.get("KeyName")}:
+                    EC2.destroy_keypair(DestroyKeypair(keypair_name=key_name), logger)
+            if not destroy_ec2_instances.skip_stop:
+                running_ids = [instance["InstanceId"] for instance in instances
+                               if instance["State"]["Name"] in ("pending", "running")]
+                for chunk_start in range(0, len(running_ids), MAX_INSTANCES_PER_CALL):
+                    ec2_client.stop_instances(InstanceIds=running_ids[chunk_start:chunk_start + MAX_INSTANCES_PER_CALL])
+                if destroy_ec2_instances.wait_for_stopped:
+                    logger.info(f"Waiting for EC2 Instances to be Stopped [Count={len(running_ids)}]")
+                    EC2.__wait_for_instances_state(ec2_client, running_ids, {"stopped", "terminated"})
+            terminate_ids = [instance["InstanceId"] for instance in instances
+                             if instance["State"]["Name"] not in ("shutting-down", "terminated")]
+            for chunk_start in range(0, len(terminate_ids), MAX_INSTANCES_PER_CALL):
+                ec2_client.terminate_instances(InstanceIds=terminate_ids[chunk_start:chunk_start + MAX_INSTANCES_PER_CALL])
+            if destroy_ec2_instances.wait_for_termination:
+                logger.info(f"Waiting for EC2 Instances to be Terminated [Count={len(instance_ids)}]")
+                EC2.__wait_for_instances_state(ec2_client, instance_ids, {"terminated"})
+            logger.info(f"EC2 Instances Terminated [{instance_ids}]")
+            return True
+        except Exception as e:
+            logger.exception(f"Failed destroying EC2 instances [{str(e)}]")
+        return False
+
+    @staticmethod
+    def plan_destroy_ec2_instances(destroy_ec2_instances: DestroyEC2Instances,
+                                   plan_settings: Optional[PlanSettings] = None,
+                                   logger: Optional[Logger] = None) -> Optional[ExecutionPlan]:
+        """
+        Plans destroying many EC2 instances along with their keypairs, performing only read calls
+
+        :param destroy_ec2_instances:
+        :param plan_settings:
+        :param logger:
+        :return:
+        """
+        logger = logger or getLogger("plan_destroy_ec2_instances")
         try:
-            logger.info(f"Starting termination of EC2 Instance [{destroy_ec2.instance_id}]")
-            ec2_resource: EC2ServiceResource = boto3.resource("ec2")
-            instance: Instance = ec2_resource.Instance(destroy_ec2.instance_id)
-            if destroy_ec2.destroy_keypair:
-                EC2.destroy_keypair(DestroyKeypair(keypair_name=instance.key_name), logger)
-            instance.stop()
-            if destroy_ec2.wait_for_stopped:
-                logger.info(f"Waiting for EC2 Instance to be Stopped [{destroy_ec2.instance_id}]")
-                instance.wait_until_stopped()
-            instance.terminate()
-            if destroy_ec2.wait_for_termination:
-                logger.info(f"Waiting for EC2 Instance to be Terminated [{destroy_ec2.instance_id}]")
-                instance.wait_until_terminated()
-            logger.info(f"EC2 Instance Terminated [{destroy_ec2.instance_id}]")
+            planner = Planner("destroy_ec2_instances", plan_settings)
+            settings = planner.plan_settings
+            instance_ids = list(dict.fromkeys(destroy_ec2_instances.instance_ids))
+            ec2_client: EC2Client = Clients.client("ec2")
+            instances = EC2.__describe_instances(ec2_client, instance_ids)
+            planner.add_step("describe_instances",
+                             {"ec2.DescribeInstances": Planner.chunks(len(instance_ids), MAX_FILTER_VALUES)},
+                             instance_ids)
+            planner.add_resources("instance", instance_ids)
+            if destroy_ec2_instances.destroy_keypair:
+                key_names = list(dict.fromkeys(instance["KeyName"] for instance in instances
+                                               if instance.get("KeyName")))
+                planner.add_step("destroy_keypairs", {"ec2.DeleteKeyPair": len(key_names)}, key_names)
+                planner.add_resources("keypair", key_names)
+            if not destroy_ec2_instances.skip_stop:
+                running_ids = [instance["InstanceId"] for instance in instances
+                               if instance["State"]["Name"] in ("pending", "running")]
+                stop_calls = Planner.chunks(len(running_ids), MAX_INSTANCES_PER_CALL)
+                wait_for_stopped = destroy_ec2_instances.wait_for_stopped and running_ids
+                planner.add_step("stop_instances", {
+                    "ec2.StopInstances": stop_calls,
+                    "ec2.DescribeInstances": Planner.chunks(len(running_ids), MAX_FILTER_VALUES) * Planner.polls(
+                        settings.instance_stop_seconds, INSTANCE_STATE_POLL_INTERVAL_SECONDS) if wait_for_stopped else 0
+                }, running_ids, wait_seconds=settings.instance_stop_seconds if wait_for_stopped else 0)
+            terminate_ids = [instance["InstanceId"] for instance in instances
+                             if instance["State"]["Name"] not in ("shutting-down", "terminated")]
+            planner.add_step("terminate_instances",
+                             {"ec2.TerminateInstances": Planner.chunks(len(terminate_ids), MAX_INSTANCES_PER_CALL)},
+                             terminate_ids)
+            if destroy_ec2_instances.wait_for_termination and instance_ids:
+                planner.add_step("wait_for_terminated", {
+                    "ec2.DescribeInstances": Planner.chunks(len(instance_ids), MAX_FILTER_VALUES) * Planner.polls(
+                        settings.instance_termination_seconds, INSTANCE_STATE_POLL_INTERVAL_SECONDS)
+                }, instance_ids, wait_seconds=settings.instance_termination_seconds)
+            return planner.plan()
         except Exception as e:
-            logger.exception(f"Failed destroying EC2 instance [{str(e)}]")
+            logger.exception(f"Failed planning EC2 instances destruction [{str(e)}]")
+        return None
+
+    @staticmethod
+    def __describe_instances(ec2_client: EC2Client, instance_ids: List[str]) -> List[InstanceTypeDef]:
+        """
+        Describes the given instances with a call per chunk of instances, filtered by id so missing instances
+        are skipped instead of failing the call
+
+        :param ec2_client:
+        :param instance_ids:
+        :return:
+        """
+        instances: List[InstanceTypeDef] = []
+        paginator = ec2_client.get_paginator("describe_instances")
+        for chunk_start in range(0, len(instance_ids), MAX_FILTER_VALUES):
+            for page in paginator.paginate(Filters=[{
+                "Name": "instance-id",
+                "Values": instance_ids[chunk_start:chunk_start + MAX_FILTER_VALUES]
+            }]):
+                for reservation in page["Reservations"]:
+                    instances.extend(reservation["Instances"])
+        return instances
+
+    @staticmethod
+    def __wait_for_instances_state(ec2_client: EC2Client, instance_ids: List[str], states: Set[str]) -> None:
+        """
+        Polls all the given instances until each of them reaches one of the given states
+        Instances that reached the state are no longer polled
+
+        :param ec2_client:
+        :param instance_ids:
+        :param states:
+        :return:
+        """
+        pending_ids = list(instance_ids)
+        deadline = time.monotonic() + INSTANCE_STATE_TIMEOUT_SECONDS
+        while pending_ids:
+            pending_ids = [instance["InstanceId"] for instance in EC2.__describe_instances(ec2_client, pending_ids)
+                           if instance["State"]["Name"] not in states]
+            if not pending_ids:
+                break
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"Timed out waiting for instances state [{states}] [{pending_ids}]")
+            time.sleep(INSTANCE_STATE_POLL_INTERVAL_SECONDS)
 
     @staticmethod
     def find_ec2_instance_credentials(find_ec2_instance_password: FindEC2InstanceCredentials, 
@@ -252,7 +538,7 @@ class EC2:
         """
         logger = logger or getLogger("find_ec2_instance_credentials")
         try:
-            ec2_client: EC2Client = boto3.client("ec2")
+            ec2_client: EC2Client = Clients.client("ec2")
             start = datetime.now()
             logger.info(f"Trying to get instance [{find_ec2_instance_password.instance_id}] "
                         f"password for [{find_ec2_instance_password.retry_timeout_seconds}] seconds")
@@ -265,6 +551,9 @@ class EC2:
                     InstanceId=find_ec2_instance_password.instance_id)
                 if response["ResponseMetadata"]["HTTPStatusCode"] == HTTPStatus.OK and \
                         response['PasswordData']:
+                    # pycryptodome is only needed for decrypting passwords, so it is not loaded with the module
+                    from Crypto.Cipher import PKCS1_v1_5
+                    from Crypto.PublicKey import RSA
                     with open(find_ec2_instance_password.private_key_path, 'r') as key_file:
                         key = RSA.importKey(key_file.read())
                         cipher = PKCS1_v1_5.new(key)
@@ -289,7 +578,7 @@ class EC2:
         """
         logger = logger or getLogger("get_ec2_instance_properties")
         try:
-            ec2_client: EC2Client = boto3.client('ec2')
+            ec2_client: EC2Client = Clients.client('ec2')
             filters: List[FilterTypeDef] = []
             if find_asset.tags:
                 filters.extend([{
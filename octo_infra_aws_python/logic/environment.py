@@ -0,0 +1,204 @@
+from octo_infra_aws_python.logic.dependency_graph import DependencyGraph
+from octo_infra_aws_python.logic.network import Network
+from octo_infra_aws_python.logic.ec2 import EC2, DEFAULT_AMI
+from octo_infra_aws_python.logic.ami import AMI
+from octo_infra_aws_python.models.actions.environment import ProvisionEnvironment, ProvisionInstances
+from octo_infra_aws_python.models.actions.ec2 import CreateKeypair
+from octo_infra_aws_python.models.actions.network import CreateInternetGateway, CreateSecurityGroup, CreateSubnet
+from octo_infra_aws_python.models.provisioned_environment import ProvisionedEnvironment
+from typing import Any, Callable, Dict, List, Optional
+from functools import partial
+from logging import Logger, getLogger
+import time
+
+INTERNET_GATEWAY_NODE = "internet_gateway"
+VPC_NODE = "vpc"
+SUBNETS_NODE = "subnets"
+SECURITY_GROUPS_NODE = "security_groups"
+
+
+class Environment:
+    @staticmethod
+    def build_graph(provision_environment: ProvisionEnvironment, logger: Optional[Logger] = None) -> DependencyGraph:
+        """
+        Resolves the environment into a dependency graph of creation nodes
+        Resources of the environment are referenced by name, any other value is used as an existing id
+        In reconcile mode, existing resources are found with batched describes and only the differences are applied
+
+        :param provision_environment:
+        :param logger:
+        :return:
+        """
+        logger = logger or getLogger("build_graph")
+        graph = DependencyGraph()
+        vpc = provision_environment.vpc
+        reconcile = provision_environment.reconcile
+        max_workers = provision_environment.max_workers
+
+        def vpc_reference(vpc_id: str, results: Dict[str, Any]) -> str:
+            if vpc and vpc_id == vpc.vpc_name:
+                return results[VPC_NODE]
+            return vpc_id
+
+        def vpc_dependencies(vpc_ids: List[str]) -> List[str]:
+            return [VPC_NODE] if vpc and vpc.vpc_name in vpc_ids else []
+
+        def reconciled_id(node_name: str, name: str, results: Dict[str, Any]) -> Optional[str]:
+            return results[node_name].get(name)
+
+        def create_subnet(subnet: CreateSubnet, results: Dict[str, Any]) -> Optional[str]:
+            return Network.create_subnet(subnet.model_copy(update={"vpc_id": vpc_reference(subnet.vpc_id, results)}),
+                                         logger)
+
+        def create_security_group(group: CreateSecurityGroup, results: Dict[str, Any]) -> Optional[str]:
+            return Network.create_security_group(
+                group.model_copy(update={"vpc_id": vpc_reference(group.vpc_id, results)}), logger)
+
+        if vpc:
+            vpc_dependencies_nodes = []
+            if isinstance(vpc.internet_gw, CreateInternetGateway):
+                internet_gw = vpc.internet_gw
+                create_internet_gateway = Network.reconcile_internet_gateway if reconcile else \
+                    Network.create_internet_gateway
+                graph.add_node(INTERNET_GATEWAY_NODE, lambda results: create_internet_gateway(internet_gw, logger))
+                vpc_dependencies_nodes.append(INTERNET_GATEWAY_NODE)
+            create_vpc = Network.reconcile_vpc if reconcile else Network.create_vpc
+            graph.add_node(VPC_NODE, lambda results: create_vpc(
+                vpc.model_copy(update={"internet_gw": results.get(INTERNET_GATEWAY_NODE, vpc.internet_gw)}),
+                logger), vpc_dependencies_nodes)
+
+        subnets = provision_environment.subnets
+        if reconcile and subnets:
+            graph.add_node(SUBNETS_NODE, lambda results: Network.reconcile_subnets(
+                [subnet.model_copy(update={"vpc_id": vpc_reference(subnet.vpc_id, results)}) for subnet in subnets],
+                max_workers, logger), vpc_dependencies([subnet.vpc_id for subnet in subnets]))
+        for subnet in subnets:
+            if reconcile:
+                graph.add_node(f"subnet:{subnet.subnet_name}",
+                               partial(reconciled_id, SUBNETS_NODE, subnet.subnet_name), [SUBNETS_NODE])
+            else:
+                graph.add_node(f"subnet:{subnet.subnet_name}", partial(create_subnet, subnet),
+                               vpc_dependencies([subnet.vpc_id]))
+
+        # Security groups given inline to the instances are created along with the environment groups
+        security_groups: Dict[str, CreateSecurityGroup] = {
+            group.name: group for group in provision_environment.security_groups}
+        for instances in provision_environment.instances:
+            if isinstance(instances.create_ec2.security_group, CreateSecurityGroup):
+                security_groups.setdefault(instances.create_ec2.security_group.name,
+                                           instances.create_ec2.security_group)
+        if reconcile and security_groups:
+            graph.add_node(SECURITY_GROUPS_NODE, lambda results: Network.reconcile_security_groups(
+                [group.model_copy(update={"vpc_id": vpc_reference(group.vpc_id, results)})
+                 for group in security_groups.values()], max_workers, logger),
+                vpc_dependencies([group.vpc_id for group in security_groups.values()]))
+        for group in security_groups.values():
+            if reconcile:
+                graph.add_node(f"security_group:{group.name}",
+                               partial(reconciled_id, SECURITY_GROUPS_NODE, group.name), [SECURITY_GROUPS_NODE])
+            else:
+                graph.add_node(f"security_group:{group.name}", partial(create_security_group, group),
+                               vpc_dependencies([group.vpc_id]))
+
+        for instances in provision_environment.instances:
+            Environment.__add_instances_node(graph, instances, reconcile, vpc_reference, vpc_dependencies, logger)
+        return graph
+
+    @staticmethod
+    def __add_instances_node(graph: DependencyGraph, instances: ProvisionInstances, reconcile: bool,
+                             vpc_reference: Callable[[str, Dict[str, Any]], str],
+                             vpc_dependencies: Callable[[List[str]], List[str]],
+                             logger: Logger) -> None:
+        """
+        Adds the instances node along with its keypair and AMI nodes
+        Keypairs and AMI lookups shared between instances are only added once
+
+        :param graph:
+        :param instances:
+        :param reconcile:
+        :param vpc_reference:
+        :param vpc_dependencies:
+        :param logger:
+        :return:
+        """
+        create_ec2 = instances.create_ec2
+        dependencies: List[str] = vpc_dependencies([create_ec2.vpc_id])
+        subnet_node: Optional[str] = None
+        if graph.has_node(f"subnet:{create_ec2.subnet_id}"):
+            subnet_node = f"subnet:{create_ec2.subnet_id}"
+            dependencies.append(subnet_node)
+
+        security_group_node: Optional[str] = None
+        security_group_name = create_ec2.security_group.name \
+            if isinstance(create_ec2.security_group, CreateSecurityGroup) else create_ec2.security_group
+        if graph.has_node(f"security_group:{security_group_name}"):
+            security_group_node = f"security_group:{security_group_name}"
+            dependencies.append(security_group_node)
+
+        keypair_node: Optional[str] = None
+        if isinstance(create_ec2.keypair, CreateKeypair):
+            keypair = create_ec2.keypair
+            if reconcile:
+                keypair = keypair.model_copy(update={"use_if_exists": True, "delete_if_exists": False})
+            keypair_node = f"keypair:{keypair.keypair_name}"
+            graph.add_node(keypair_node, lambda results: EC2.create_key_pair(keypair, logger)[1])
+            dependencies.append(keypair_node)
+
+        ami_node: Optional[str] = None
+        if not isinstance(create_ec2.ami, str):
+            find_image = create_ec2.ami or DEFAULT_AMI
+            ami_node = f"ami:{find_image.provider}:{find_image.name}:{find_image.description}"
+            graph.add_node(ami_node, lambda results: AMI.find_image(find_image, logger))
+            dependencies.append(ami_node)
+
+        create_ec2_instances = EC2.reconcile_ec2_instances if reconcile else EC2.create_ec2_instance
+
+        def create_instances(results: Dict[str, Any]) -> Optional[List[str]]:
+            update: Dict[str, Any] = {"vpc_id": vpc_reference(create_ec2.vpc_id, results)}
+            if subnet_node:
+                update["subnet_id"] = results[subnet_node]
+            if security_group_node:
+                update["security_group"] = results[security_group_node]
+            if keypair_node:
+                update["keypair"] = results[keypair_node]
+            if ami_node:
+                update["ami"] = results[ami_node]
+            return create_ec2_instances(create_ec2.model_copy(update=update), instances.instance_count, logger)
+
+        graph.add_node(f"instances:{create_ec2.instance_name}", create_instances, dependencies)
+
+    @staticmethod
+    def provision_environment(provision_environment: ProvisionEnvironment,
+                              logger: Optional[Logger] = None) -> ProvisionedEnvironment:
+        """
+        Provisions the environment resources, creating independent resources concurrently
+        Resources depending on a failed resource are skipped and reported as failed
+
+        :param provision_environment:
+        :param logger:
+        :return:
+        """
+        logger = logger or getLogger("provision_environment")
+        start = time.perf_counter()
+        graph = Environment.build_graph(provision_environment, logger)
+        logger.info(f"Starting to provision environment [Reconcile={provision_environment.reconcile}]")
+        results, timings, failed = graph.run(provision_environment.max_workers, logger)
+        provisioned = ProvisionedEnvironment(
+            vpc_id=results.get(VPC_NODE),
+            internet_gateway_id=results.get(INTERNET_GATEWAY_NODE),
+            failed=failed,
+            node_timings=timings,
+            critical_path_seconds=graph.critical_path_seconds(timings),
+            total_seconds=time.perf_counter() - start
+        )
+        for name, result in results.items():
+            node_type, _, node_name = name.partition(":")
+            if node_type == "subnet":
+                provisioned.subnet_ids[node_name] = result
+            elif node_type == "security_group":
+                provisioned.security_group_ids[node_name] = result
+            elif node_type == "instances":
+                provisioned.instance_ids[node_name] = result
+        logger.info(f"Finished provisioning environment [{provisioned.total_seconds:.2f}s, "
+                    f"Critical Path={provisioned.critical_path_seconds:.2f}s, Failed={failed}]")
+        return provisioned
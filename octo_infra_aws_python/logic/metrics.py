@@ -0,0 +1,261 @@
+from octo_infra_aws_python.logic.clients import Clients
+from abc import ABC, abstractmethod
+from octo_infra_aws_python.logic.retry import THROTTLE_ERROR_CODES
+from octo_infra_aws_python.models.operation_metrics import OperationMetrics
+from threading import Lock
+from typing import Any, Dict, Final, List, NamedTuple, Optional, Tuple
+from logging import getLogger
+import time
+
+METRICS_HOOK_NAME: Final[str] = "metrics"
+METRICS_EVENTS: Final[Tuple[str, ...]] = ("before-parameter-build", "request-created", "after-call", "after-call-error")
+DEFAULT_LATENCY_BUCKETS: Final[Tuple[float, ...]] = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+START_KEY: Final[str] = "octo_metrics_start"
+START_NS_KEY: Final[str] = "octo_metrics_start_ns"
+REQUEST_BYTES_KEY: Final[str] = "octo_metrics_request_bytes"
+
+
+class ApiCall(NamedTuple):
+    """
+    A single finished API call, including all of its retry attempts
+    """
+    service: str
+    operation: str
+    start_time_ns: int
+    seconds: float
+    retries: int
+    error_code: Optional[str]
+    request_bytes: int
+    response_bytes: int
+
+
+class MetricsSink(ABC):
+    @abstractmethod
+    def record(self, call: ApiCall) -> None:
+        """
+        Records a finished API call, called on the thread that made the call
+
+        :param call:
+        :return:
+        """
+
+
+class InMemorySink(MetricsSink):
+    """
+    Aggregates the calls by service and operation, with a latency histogram per operation
+    """
+    def __init__(self, latency_buckets: Tuple[float, ...] = DEFAULT_LATENCY_BUCKETS) -> None:
+        self.__latency_buckets = latency_buckets
+        self.__lock = Lock()
+        self.__operations: Dict[Tuple[str, str], List[Any]] = {}
+
+    def record(self, call: ApiCall) -> None:
+        with self.__lock:
+            operation = self.__operations.get((call.service, call.operation))
+            if operation is None:
+                # calls, errors, throttles, retries, request bytes, response bytes, seconds, per bucket counts
+                operation = self.__operations[(call.service, call.operation)] = \
+                    [0, 0, 0, 0, 0, 0, 0.0, [0] * len(self.__latency_buckets)]
+            operation[0] += 1
+            if call.error_code:
+                operation[1] += 1
+                if call.error_code in THROTTLE_ERROR_CODES:
+                    operation[2] += 1
+            operation[3] += call.retries
+            operation[4] += call.request_bytes
+            operation[5] += call.response_bytes
+            operation[6] += call.seconds
+            for index, bound in enumerate(self.__latency_buckets):
+                if call.seconds <= bound:
+                    operation[7][index] += 1
+                    break
+
+    def snapshot(self) -> List[OperationMetrics]:
+        """
+        Returns the aggregated metrics of every operation called so far
+
+        :return:
+        """
+        with self.__lock:
+            operations = [(key, list(values), list(values[7])) for key, values in self.__operations.items()]
+        snapshot: List[OperationMetrics] = []
+        for (service, operation), values, bucket_counts in sorted(operations):
+            cumulative = 0
+            latency_buckets: Dict[float, int] = {}
+            for bound, count in zip(self.__latency_buckets, bucket_counts):
+                cumulative += count
+                latency_buckets[bound] = cumulative
+            snapshot.append(OperationMetrics(
+                service=service, operation=operation,
+                calls=values[0], errors=values[1], throttles=values[2], retries=values[3],
+                request_bytes=values[4], response_bytes=values[5], total_seconds=values[6],
+                latency_buckets=latency_buckets
+            ))
+        return snapshot
+
+    def reset(self) -> None:
+        with self.__lock:
+            self.__operations = {}
+
+
+class PrometheusSink(InMemorySink):
+    def render(self, prefix: str = "octo_aws") -> str:
+        """
+        Renders the aggregated metrics in the prometheus text exposition format
+
+        :param prefix:
+        :return:
+        """
+        counters = (("calls", "calls_total", "API calls"),
+                    ("errors", "errors_total", "Failed API calls"),
+                    ("throttles", "throttles_total", "API calls failed on a throttle"),
+                    ("retries", "retries_total", "API call retry attempts"),
+                    ("request_bytes", "request_bytes_total", "Bytes sent to the API"),
+                    ("response_bytes", "response_bytes_total", "Bytes received from the API"))
+        snapshot = self.snapshot()
+        lines: List[str] = []
+        for field, name, description in counters:
+            lines.append(f"# HELP {prefix}_{name} {description}")
+            lines.append(f"# TYPE {prefix}_{name} counter")
+            for metrics in snapshot:
+                lines.append(f'{prefix}_{name}{{service="{metrics.service}",operation="{metrics.operation}"}} '
+                             f'{getattr(metrics, field)}')
+        lines.append(f"# HELP {prefix}_call_seconds API call latency including retries")
+        lines.append(f"# TYPE {prefix}_call_seconds histogram")
+        for metrics in snapshot:
+            labels = f'service="{metrics.service}",operation="{metrics.operation}"'
+            for bound, count in metrics.latency_buckets.items():
+                lines.append(f'{prefix}_call_seconds_bucket{{{labels},le="{bound}"}} {count}')
+            lines.append(f'{prefix}_call_seconds_bucket{{{labels},le="+Inf"}} {metrics.calls}')
+            lines.append(f'{prefix}_call_seconds_sum{{{labels}}} {metrics.total_seconds}')
+            lines.append(f'{prefix}_call_seconds_count{{{labels}}} {metrics.calls}')
+        return "\n".join(lines) + "\n"
+
+
+class OpenTelemetrySink(MetricsSink):
+    """
+    Emits a span per API call, requires the opentelemetry-api package
+    """
+    def __init__(self, tracer: Optional[Any] = None) -> None:
+        if tracer is None:
+            try:
+                from opentelemetry import trace
+            except ImportError as e:
+                raise ImportError("OpenTelemetrySink requires the opentelemetry-api package") from e
+            tracer = trace.get_tracer("octo_infra_aws_python")
+        self.__tracer = tracer
+
+    def record(self, call: ApiCall) -> None:
+        span = self.__tracer.start_span(f"{call.service}.{call.operation}", start_time=call.start_time_ns,
+                                        attributes={"rpc.system": "aws-api",
+                                                    "rpc.service": call.service,
+                                                    "rpc.method": call.operation,
+                                                    "aws.retries": call.retries,
+                                                    "aws.request_bytes": call.request_bytes,
+                                                    "aws.response_bytes": call.response_bytes,
+                                                    "aws.error_code": call.error_code or ""})
+        span.end(end_time=call.start_time_ns + int(call.seconds * 1e9))
+
+
+class Metrics:
+    """
+    Per API call instrumentation of all the pooled clients
+    Nothing is registered on the clients while disabled, so disabled metrics cost nothing
+    Toggling metrics registers or unregisters the handlers on the clients in use, the clients are kept
+    """
+    __sinks: List[MetricsSink] = []
+
+    @staticmethod
+    def enable(*sinks: MetricsSink) -> None:
+        """
+        Starts recording every API call made by the pooled clients into the given sinks
+
+        :param sinks:
+        :return:
+        """
+        Metrics.__sinks = list(sinks)
+        Clients.add_hook(METRICS_HOOK_NAME, Metrics.__register)
+
+    @staticmethod
+    def disable() -> None:
+        Metrics.__sinks = []
+        Clients.remove_hook(METRICS_HOOK_NAME, Metrics.__unregister)
+
+    @staticmethod
+    def is_enabled() -> bool:
+        return len(Metrics.__sinks) > 0
+
+    @staticmethod
+    def __record(call: ApiCall) -> None:
+        for sink in Metrics.__sinks:
+            try:
+                sink.record(call)
+            except Exception as e:
+                getLogger("metrics").exception(f"Failed recording API call metrics [{str(e)}]")
+
+    @staticmethod
+    def __register(client: Any) -> None:
+        """
+        Registers the instrumentation handlers on a new client
+
+        :param client:
+        :return:
+        """
+        from botocore.utils import determine_content_length
+        service_name: str = client.meta.service_model.service_name
+
+        def before_parameter_build(context: Dict[str, Any], **kwargs: Any) -> None:
+            # Emitted once per call before serialization, so the latency covers the whole client call
+            context[START_KEY] = time.perf_counter()
+            context[START_NS_KEY] = time.time_ns()
+            context[REQUEST_BYTES_KEY] = 0
+
+        def request_created(request: Any, **kwargs: Any) -> None:
+            # Created per attempt, so the bytes of retries are counted as well
+            context = getattr(request, "context", None)
+            if context is not None and START_KEY in context:
+                context[REQUEST_BYTES_KEY] += determine_content_length(request.body) or 0
+
+        def after_call(http_response: Any, parsed: Dict[str, Any], context: Dict[str, Any],
+                       event_name: str, **kwargs: Any) -> None:
+            if START_KEY not in context:
+                return
+            error_code = parsed.get("Error", {}).get("Code")
+            if not error_code and http_response.status_code >= 300:
+                error_code = str(http_response.status_code)
+            Metrics.__record(ApiCall(
+                service=service_name,
+                operation=event_name.rsplit(".", 1)[-1],
+                start_time_ns=context[START_NS_KEY],
+                seconds=time.perf_counter() - context[START_KEY],
+                retries=parsed.get("ResponseMetadata", {}).get("RetryAttempts", 0),
+                error_code=error_code,
+                request_bytes=context[REQUEST_BYTES_KEY],
+                response_bytes=int(http_response.headers.get("content-length", 0) or 0)
+            ))
+
+        def after_call_error(exception: Exception, context: Dict[str, Any], event_name: str, **kwargs: Any) -> None:
+            if START_KEY not in context:
+                return
+            Metrics.__record(ApiCall(
+                service=service_name,
+                operation=event_name.rsplit(".", 1)[-1],
+                start_time_ns=context[START_NS_KEY],
+                seconds=time.perf_counter() - context[START_KEY],
+                retries=context.get("retries", {}).get("attempt", 1) - 1,
+                error_code=type(exception).__name__,
+                request_bytes=context[REQUEST_BYTES_KEY],
+                response_bytes=0
+            ))
+
+        events = client.meta.events
+        # Registering a unique id twice is a no-op, so enabling metrics again keeps a single handler
+        for event_name, handler in zip(METRICS_EVENTS, (before_parameter_build, request_created, after_call,
+                                                        after_call_error)):
+            events.register(event_name, handler, unique_id=f"{METRICS_HOOK_NAME}-{event_name}")
+
+    @staticmethod
+    def __unregister(client: Any) -> None:
+        events = client.meta.events
+        for event_name in METRICS_EVENTS:
+            events.unregister(event_name, unique_id=f"{METRICS_HOOK_NAME}-{event_name}")
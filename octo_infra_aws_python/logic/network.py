@@ -1,21 +1,37 @@
+from __future__ import annotations
 from octo_infra_aws_python.models.actions.network import \
-    CreateSecurityGroup, DestroySecurityGroup, \
+    CreateSecurityGroup, DestroySecurityGroup, SyncSecurityGroupRules, \
     CreateVPC, DestroyVPC, \
     CreateInternetGateway, DestroyInternetGateway, \
     CreateSubnet, DestroySubnet
+from octo_infra_aws_python.models.execution_plan import ExecutionPlan
 from octo_infra_aws_python.models.find_asset import FindAsset
-from typing import Optional, Any, Union, List, Final
-import boto3
-from mypy_boto3_ec2.client import EC2Client
-from mypy_boto3_ec2.service_resource import EC2ServiceResource, Vpc, InternetGateway, Subnet
-from mypy_boto3_ec2.type_defs import DescribeVpcsResultTypeDef, \
-    DescribeInternetGatewaysResultTypeDef, DescribeSecurityGroupsResultTypeDef, \
-    DescribeSubnetsResultTypeDef, FilterTypeDef
-from concurrent.futures import ThreadPoolExecutor, wait
-import time
+from octo_infra_aws_python.models.network_rule import NetworkRule
+from octo_infra_aws_python.models.plan_settings import PlanSettings
+from typing import TYPE_CHECKING, Optional, Any, Union, List, Final, Dict, Tuple, Iterable
+if TYPE_CHECKING:
+    from mypy_boto3_ec2.client import EC2Client
+    from mypy_boto3_ec2.service_resource import EC2ServiceResource, Vpc, InternetGateway, Subnet
+    from mypy_boto3_ec2.type_defs import DescribeVpcsResultTypeDef, \
+        DescribeInternetGatewaysResultTypeDef, DescribeSecurityGroupsResultTypeDef, \
+        DescribeSubnetsResultTypeDef, FilterTypeDef, WaiterConfigTypeDef, \
+        IpPermissionTypeDef, IpPermissionOutputTypeDef, IpRangeTypeDef, Ipv6RangeTypeDef, UserIdGroupPairTypeDef, \
+        SecurityGroupTypeDef, TagTypeDef
+from concurrent.futures import ThreadPoolExecutor
 from logging import Logger, getLogger
+from octo_infra_aws_python.logic.clients import Clients, with_caller_context
+from octo_infra_aws_python.logic.describe_cache import DescribeCache, persistent_cache
+from octo_infra_aws_python.logic.planner import Planner
 
-EXTRA_CREATION_SLEEP_TIME_SECONDS: Final[int] = 2
+# Waiters poll immediately, so a consistent resource costs a single describe call
+CREATION_WAITER_CONFIG: Final[WaiterConfigTypeDef] = {"Delay": 1, "MaxAttempts": 60}
+# Max amount of CIDR / group entries sent in a single authorize / revoke call
+MAX_RULE_ENTRIES_PER_CALL: Final[int] = 100
+RULE_DESCRIPTION: Final[str] = "Automated Rule"
+PROTOCOL_NAMES: Final[Dict[str, str]] = {"all": "-1", "1": "icmp", "6": "tcp", "17": "udp", "58": "icmpv6"}
+
+# (protocol, from port, to port, entry type, entry value), a single flattened security group rule entry
+RuleEntry = Tuple[str, int, int, str, str]
 
 
 class Network:
@@ -32,42 +48,240 @@ class Network:
         logger = logger or getLogger("create_security_group")
         try:
             logger.info(f"Starting to create security group [{create_security_group.name}]")
-            ec2_resource: EC2ServiceResource = boto3.resource("ec2")
+            ec2_resource: EC2ServiceResource = Clients.resource("ec2")
             create_security_group.tags["Name"] = create_security_group.name
-            security_group = ec2_resource.create_security_group(GroupName=create_security_group.name,
-                                                                Description=create_security_group.description,
-                                                                VpcId=create_security_group.vpc_id)
-            time.sleep(EXTRA_CREATION_SLEEP_TIME_SECONDS)
-            security_group.create_tags(Tags=[{"Key": k, "Value": v} for k, v in create_security_group.tags.items()])
+            security_group = ec2_resource.create_security_group(
+                GroupName=create_security_group.name,
+                Description=create_security_group.description,
+                VpcId=create_security_group.vpc_id,
+                TagSpecifications=[{"ResourceType": "security-group",
+                                    "Tags": [{"Key": k, "Value": v} for k, v in
+                                             create_security_group.tags.items()]}])
+            if create_security_group.ingress or create_security_group.egress:
+                ec2_resource.meta.client.get_waiter("security_group_exists").wait(
+                    GroupIds=[security_group.id], WaiterConfig=CREATION_WAITER_CONFIG)
             if create_security_group.ingress:
-                for rule in create_security_group.ingress:
-                    security_group.authorize_ingress(IpPermissions=[{'IpProtocol': rule.protocol,
-                                                                     'FromPort': rule.from_port,
-                                                                     'ToPort': rule.to_port,
-                                                                     'IpRanges':
-                                                                         [{"CidrIp": v, "Description": "Automated Rule"}
-                                                                          for v in rule.allowed_cidr],
-                                                                     'UserIdGroupPairs':
-                                                                         [{'UserIdGroupPairs': v, "Description": "Automated Rule"}
-                                                                          for v in rule.allowed_groups]}])
+                Network.__apply_rule_entries(ec2_resource.meta.client, security_group.id,
+                                             Network.__rules_to_entries(create_security_group.ingress),
+                                             egress=False, revoke=False)
             if create_security_group.egress:
-                for rule in create_security_group.egress:
-                    security_group.authorize_egress(IpPermissions=[{'IpProtocol': rule.protocol,
-                                                                    'FromPort': rule.from_port,
-                                                                    'ToPort': rule.to_port,
-                                                                    'IpRanges':
-                                                                        [{"CidrIp": v, "Description": "Automated Rule"}
-                                                                         for v in rule.allowed_cidr],
-                                                                    'UserIdGroupPairs':
-                                                                        [{'UserIdGroupPairs': v,
-                                                                          "Description": "Automated Rule"}
-                                                                         for v in rule.allowed_groups]}])
+                Network.__apply_rule_entries(ec2_resource.meta.client, security_group.id,
+                                             Network.__rules_to_entries(create_security_group.egress),
+                                             egress=True, revoke=False)
             logger.info(f"Security group created with ID [{security_group.id}]")
             return security_group.id
         except Exception as e:
             logger.exception(f"Failed creating security group [{str(e)}]")
         return None
 
+    @staticmethod
+    def plan_create_security_group(create_security_group: CreateSecurityGroup,
+                                   plan_settings: Optional[PlanSettings] = None,
+                                   logger: Optional[Logger] = None) -> Optional[ExecutionPlan]:
+        """
+        Plans creating a security group along with its ingress and egress rules, without any API calls
+
+        :param create_security_group:
+        :param plan_settings:
+        :param logger:
+        :return:
+        """
+        logger = logger or getLogger("plan_create_security_group")
+        try:
+            planner = Planner("create_security_group", plan_settings)
+            has_rules = create_security_group.ingress or create_security_group.egress
+            planner.add_step("create_security_group", {
+                "ec2.CreateSecurityGroup": 1,
+                # The waiter polls immediately, so the new group costs a single describe call
+                "ec2.DescribeSecurityGroups": 1 if has_rules else 0,
+                "ec2.AuthorizeSecurityGroupIngress": len(Network.__entries_to_permissions(
+                    Network.__rules_to_entries(create_security_group.ingress), with_description=True)),
+                "ec2.AuthorizeSecurityGroupEgress": len(Network.__entries_to_permissions(
+                    Network.__rules_to_entries(create_security_group.egress), with_description=True))
+            }, [create_security_group.name])
+            planner.add_resources("security_group", [create_security_group.name])
+            return planner.plan()
+        except Exception as e:
+            logger.exception(f"Failed planning security group creation [{str(e)}]")
+        return None
+
+    @staticmethod
+    def sync_security_group_rules(sync_security_group_rules: SyncSecurityGroupRules,
+                                  logger: Optional[Logger] = None) -> bool:
+        """
+        Syncs the rules of an existing security group to the wanted rules
+        Reads the current rules once and only authorizes / revokes the differences
+
+        :param sync_security_group_rules:
+        :param logger:
+        :return:
+        """
+        logger = logger or getLogger("sync_security_group_rules")
+        try:
+            group_id = sync_security_group_rules.security_group_id
+            logger.info(f"Starting to sync security group rules [{group_id}]")
+            ec2_client: EC2Client = Clients.client("ec2")
+            security_groups: DescribeSecurityGroupsResultTypeDef = ec2_client.describe_security_groups(
+                GroupIds=[group_id])
+            Network.__sync_rules(ec2_client, security_groups["SecurityGroups"][0],
+                                 sync_security_group_rules.ingress, sync_security_group_rules.egress,
+                                 sync_security_group_rules.revoke_unlisted, logger)
+            return True
+        except Exception as e:
+            logger.exception(f"Failed syncing security group rules [{str(e)}]")
+        return False
+
+    @staticmethod
+    def __sync_rules(ec2_client: EC2Client, security_group: SecurityGroupTypeDef,
+                     ingress: Optional[List[NetworkRule]], egress: Optional[List[NetworkRule]],
+                     revoke_unlisted: bool, logger: Logger, skip_unset: bool = False) -> None:
+        """
+        Authorizes the missing rules and revokes the unlisted rules of a described security group
+        A direction without wanted rules given is left untouched
+
+        :param ec2_client:
+        :param security_group:
+        :param ingress:
+        :param egress:
+        :param revoke_unlisted:
+        :param logger:
+        :param skip_unset: Also leave a direction untouched if its wanted rules are empty
+        :return:
+        """
+        group_id = security_group["GroupId"]
+        for is_egress, wanted_rules, existing_permissions in (
+                (False, ingress, security_group.get("IpPermissions", [])),
+                (True, egress, security_group.get("IpPermissionsEgress", []))):
+            if wanted_rules is None or (skip_unset and not wanted_rules):
+                continue
+            wanted = Network.__rules_to_entries(wanted_rules)
+            existing = Network.__permissions_to_entries(existing_permissions)
+            existing_set = set(existing)
+            wanted_set = set(wanted)
+            to_add = [entry for entry in wanted if entry not in existing_set]
+            to_revoke = [entry for entry in existing if entry not in wanted_set] if revoke_unlisted else []
+            if to_add:
+                Network.__apply_rule_entries(ec2_client, group_id, to_add, egress=is_egress, revoke=False)
+            if to_revoke:
+                Network.__apply_rule_entries(ec2_client, group_id, to_revoke, egress=is_egress, revoke=True)
+            logger.info(f"Synced security group {'egress' if is_egress else 'ingress'} rules [{group_id}] "
+                        f"[Added={len(to_add)}, Revoked={len(to_revoke)}]")
+
+    @staticmethod
+    def __normalize_rule_key(protocol: str, from_port: Optional[int], to_port: Optional[int]) -> Tuple[str, int, int]:
+        """
+        Normalizes a rule protocol and port range to the form AWS reports it back with
+
+        :param protocol:
+        :param from_port:
+        :param to_port:
+        :return:
+        """
+        protocol = PROTOCOL_NAMES.get(str(protocol).lower(), str(protocol).lower())
+        if protocol == "-1":
+            return protocol, -1, -1
+        return protocol, -1 if from_port is None else from_port, -1 if to_port is None else to_port
+
+    @staticmethod
+    def __rules_to_entries(rules: Iterable[NetworkRule]) -> List[RuleEntry]:
+        """
+        Flattens network rules into unique rule entries, keeping the rules order
+
+        :param rules:
+        :return:
+        """
+        entries: Dict[RuleEntry, None] = {}
+        for rule in rules:
+            protocol, from_port, to_port = Network.__normalize_rule_key(rule.protocol, rule.from_port, rule.to_port)
+            for cidr in rule.allowed_cidr:
+                entries[(protocol, from_port, to_port, "CidrIpv6" if ":" in cidr else "CidrIp", cidr)] = None
+            for group in rule.allowed_groups:
+                entries[(protocol, from_port, to_port, "GroupId", group)] = None
+        return list(entries)
+
+    @staticmethod
+    def __permissions_to_entries(permissions: Iterable[IpPermissionOutputTypeDef]) -> List[RuleEntry]:
+        """
+        Flattens described security group permissions into rule entries
+        Prefix list entries are not managed and are ignored
+
+        :param permissions:
+        :return:
+        """
+        entries: List[RuleEntry] = []
+        for permission in permissions:
+            protocol, from_port, to_port = Network.__normalize_rule_key(
+                permission["IpProtocol"], permission.get("FromPort"), permission.get("ToPort"))
+            entries.extend((protocol, from_port, to_port, "CidrIp", ip_range["CidrIp"])
+                           for ip_range in permission.get("IpRanges", []))
+            entries.extend((protocol, from_port, to_port, "CidrIpv6", ip_range["CidrIpv6"])
+                           for ip_range in permission.get("Ipv6Ranges", []))
+            entries.extend((protocol, from_port, to_port, "GroupId", pair["GroupId"])
+                           for pair in permission.get("UserIdGroupPairs", []))
+        return entries
+
+    @staticmethod
+    def __entries_to_permissions(entries: List[RuleEntry], with_description: bool) -> List[List[IpPermissionTypeDef]]:
+        """
+        Coalesces rule entries sharing protocol and ports into a single permission,
+        and chunks the permissions so no call passes the max entries per call
+
+        :param entries:
+        :param with_description:
+        :return:
+        """
+        chunks: List[List[IpPermissionTypeDef]] = []
+        for chunk_start in range(0, len(entries), MAX_RULE_ENTRIES_PER_CALL):
+            ranges: Dict[Tuple[str, int, int], Tuple[List[IpRangeTypeDef], List[Ipv6RangeTypeDef],
+                                                     List[UserIdGroupPairTypeDef]]] = {}
+            for protocol, from_port, to_port, entry_type, value in \
+                    entries[chunk_start:chunk_start + MAX_RULE_ENTRIES_PER_CALL]:
+                ip_ranges, ipv6_ranges, group_pairs = ranges.setdefault((protocol, from_port, to_port), ([], [], []))
+                if entry_type == "CidrIp":
+                    ip_ranges.append({"CidrIp": value, "Description": RULE_DESCRIPTION} if with_description
+                                     else {"CidrIp": value})
+                elif entry_type == "CidrIpv6":
+                    ipv6_ranges.append({"CidrIpv6": value, "Description": RULE_DESCRIPTION} if with_description
+                                       else {"CidrIpv6": value})
+                else:
+                    group_pairs.append({"GroupId": value, "Description": RULE_DESCRIPTION} if with_description
+                                       else {"GroupId": value})
+            permissions: List[IpPermissionTypeDef] = []
+            for (protocol, from_port, to_port), (ip_ranges, ipv6_ranges, group_pairs) in ranges.items():
+                permission: IpPermissionTypeDef = {"IpProtocol": protocol, "FromPort": from_port, "ToPort": to_port}
+                if ip_ranges:
+                    permission["IpRanges"] = ip_ranges
+                if ipv6_ranges:
+                    permission["Ipv6Ranges"] = ipv6_ranges
+                if group_pairs:
+                    permission["UserIdGroupPairs"] = group_pairs
+                permissions.append(permission)
+            chunks.append(permissions)
+        return chunks
+
+    @staticmethod
+    def __apply_rule_entries(ec2_client: EC2Client, group_id: str, entries: List[RuleEntry],
+                             egress: bool, revoke: bool) -> None:
+        """
+        Authorizes or revokes the given rule entries with one call per chunk of entries
+
+        :param ec2_client:
+        :param group_id:
+        :param entries:
+        :param egress:
+        :param revoke:
+        :return:
+        """
+        for permissions in Network.__entries_to_permissions(entries, with_description=not revoke):
+            if revoke and egress:
+                ec2_client.revoke_security_group_egress(GroupId=group_id, IpPermissions=permissions)
+            elif revoke:
+                ec2_client.revoke_security_group_ingress(GroupId=group_id, IpPermissions=permissions)
+            elif egress:
+                ec2_client.authorize_security_group_egress(GroupId=group_id, IpPermissions=permissions)
+            else:
+                ec2_client.authorize_security_group_ingress(GroupId=group_id, IpPermissions=permissions)
+
     @staticmethod
     def destroy_security_group(destroy_security_group: DestroySecurityGroup, logger: Optional[Logger] = None) -> None:
         """
@@ -80,7 +294,7 @@ class Network:
         logger = logger or getLogger("destroy_security_group")
         try:
             logger.info(f"Starting to destroy security group [{destroy_security_group.security_group_id}]")
-            ec2_client: EC2Client = boto3.client("ec2")
+            ec2_client: EC2Client = Clients.client("ec2")
             ec2_client.delete_security_group(GroupId=destroy_security_group.security_group_id)
             logger.info(f"Security group destroyed [{destroy_security_group.security_group_id}]")
         except Exception as e:
@@ -97,7 +311,7 @@ class Network:
         """
         logger = logger or getLogger("find_security_groups")
         try:
-            ec2_client: EC2Client = boto3.client('ec2')
+            ec2_client: EC2Client = Clients.client('ec2')
             filters: List[FilterTypeDef] = []
             if find_asset.tags:
                 logger.info(f"Trying to find security group with tags [{find_asset.tags}]")
@@ -130,12 +344,12 @@ class Network:
         logger = logger or getLogger("create_internet_gateway")
         try:
             logger.info(f"Starting to create internet gateway [{create_internet_gateway.internet_gateway_name}]")
-            ec2_resource = boto3.resource("ec2")
-            internet_gw: InternetGateway = ec2_resource.create_internet_gateway()
-            time.sleep(EXTRA_CREATION_SLEEP_TIME_SECONDS)
+            ec2_resource = Clients.resource("ec2")
             create_internet_gateway.tags["Name"] = create_internet_gateway.internet_gateway_name
-            internet_gw.reload()
-            internet_gw.create_tags(Tags=[{"Key": k, "Value": v} for k, v in create_internet_gateway.tags.items()])
+            internet_gw: InternetGateway = ec2_resource.create_internet_gateway(
+                TagSpecifications=[{"ResourceType": "internet-gateway",
+                                    "Tags": [{"Key": k, "Value": v} for k, v in
+                                             create_internet_gateway.tags.items()]}])
             logger.info(f"Internet gateway created [{internet_gw.id}]")
             return internet_gw.id
         except Exception as e:
@@ -154,7 +368,7 @@ class Network:
         logger = logger or getLogger("destroy_internet_gateway")
         try:
             logger.info(f"Starting to destroy internet gateway [{destroy_internet_gateway.internet_gateway_id}]")
-            ec2_client: EC2Client = boto3.client("ec2")
+            ec2_client: EC2Client = Clients.client("ec2")
             ec2_client.delete_internet_gateway(InternetGatewayId=destroy_internet_gateway.internet_gateway_id)
             logger.info(f"Destroyed internet gateway [{destroy_internet_gateway.internet_gateway_id}]")
         except Exception as e:
@@ -171,7 +385,7 @@ class Network:
         """
         logger = logger or getLogger("find_internet_gateway")
         try:
-            ec2_client: EC2Client = boto3.client('ec2')
+            ec2_client: EC2Client = Clients.client('ec2')
             filters: List[FilterTypeDef] = []
             if find_asset.tags:
                 logger.info(f"Trying to find internet GW with tags [{find_asset.tags}]")
@@ -207,12 +421,16 @@ class Network:
             if isinstance(create_vpc.internet_gw, CreateInternetGateway):
                 internet_gw_id = Network.create_internet_gateway(create_vpc.internet_gw)
             logger.info(f"Starting to create VPC [{create_vpc.vpc_name}]")
-            ec2_resource: EC2ServiceResource = boto3.resource("ec2")
-            vpc: Vpc = ec2_resource.create_vpc(CidrBlock=create_vpc.cidr_block)
-            vpc.wait_until_available()
-            time.sleep(EXTRA_CREATION_SLEEP_TIME_SECONDS)
+            ec2_resource: EC2ServiceResource = Clients.resource("ec2")
             create_vpc.tags["Name"] = create_vpc.vpc_name
-            vpc.create_tags(Tags=[{"Key": k, "Value": v} for k, v in create_vpc.tags.items()])
+            vpc: Vpc = ec2_resource.create_vpc(CidrBlock=create_vpc.cidr_block,
+                                               TagSpecifications=[{"ResourceType": "vpc",
+                                                                   "Tags": [{"Key": k, "Value": v} for k, v in
+                                                                            create_vpc.tags.items()]}])
+            # Cached lookups may have missed the new VPC, even if the rest of the creation fails
+            DescribeCache.invalidate("network", logger)
+            ec2_resource.meta.client.get_waiter("vpc_available").wait(VpcIds=[vpc.id],
+                                                                      WaiterConfig=CREATION_WAITER_CONFIG)
             vpc.attach_internet_gateway(InternetGatewayId=internet_gw_id)
             vpc.modify_attribute(EnableDnsHostnames={
                 "Value": True
@@ -239,7 +457,7 @@ class Network:
     @staticmethod
     def __destroy_vpc_instances(vpc_id: str, vpc: Vpc, logger: Optional[Logger] = None) -> None:
         """
-        Destroys all instances related to the VPC in parallel
+        Destroys all instances related to the VPC with batched calls
 
         :param vpc_id:
         :param vpc:
@@ -247,20 +465,17 @@ class Network:
         :return:
         """
         from octo_infra_aws_python.logic.ec2 import EC2
-        from octo_infra_aws_python.models.actions.ec2 import DestroyEC2
+        from octo_infra_aws_python.models.actions.ec2 import DestroyEC2Instances
         logger = logger or getLogger("__destroy_vpc_instances")
         logger.info(f"Destroying VPC Instances [{vpc_id}]")
-        # Parallel instance termination due to waiting for actual termination to happen
-        with ThreadPoolExecutor(max_workers=16) as executor:
-            futures = []
-            for subnet in vpc.subnets.all():
-                for instance in subnet.instances.all():
-                    futures.append(executor.submit(EC2.destroy_ec2_instance,
-                                                   DestroyEC2(
-                                                       instance_id=instance.id,
-                                                       destroy_keypair=True
-                                                   ), logger))
-            wait(futures)
+        instance_ids = [instance.id for instance in vpc.instances.all()]
+        if instance_ids:
+            # The instances are deleted along with the VPC, so there is no EBS state to flush by stopping them
+            EC2.destroy_ec2_instances(DestroyEC2Instances(
+                instance_ids=instance_ids,
+                destroy_keypair=True,
+                skip_stop=True
+            ), logger)
 
     @staticmethod
     def __destroy_vpc_internet_gateways(vpc_id: str, vpc: Vpc, logger: Optional[Logger] = None) -> None:
@@ -293,10 +508,14 @@ class Network:
         logger = logger or getLogger("__destroy_vpc_internet_gateways")
         logger.info(f"Destroying VPC Route Tables [{vpc_id}]")
         for rt in vpc.route_tables.all():
+            # The associations are the ones loaded before disassociating, so the main table is told apart by them
+            is_main = False
             for rta in rt.associations:
-                if not rta.main:
+                if rta.main:
+                    is_main = True
+                else:
                     rta.delete()
-            if not rt.associations:
+            if not is_main:
                 rt.delete()
 
     @staticmethod
@@ -309,7 +528,7 @@ class Network:
         :return:
         """
         logger = logger or getLogger("__destroy_vpc_endpoints")
-        ec2_client: EC2Client = boto3.client('ec2')
+        ec2_client: EC2Client = Clients.client('ec2')
         logger.info(f"Destroying VPC Endpoints [{vpc_id}]")
         for ep in ec2_client.describe_vpc_endpoints(
                 Filters=[{'Name': 'vpc-id', 'Values': [vpc_id]}])['VpcEndpoints']:
@@ -341,7 +560,7 @@ class Network:
         :return:
         """
         logger = logger or getLogger("__destroy_vpc_peers")
-        ec2_resource: EC2ServiceResource = boto3.resource('ec2')
+        ec2_resource: EC2ServiceResource = Clients.resource('ec2')
         ec2_client: EC2Client = ec2_resource.meta.client
         logger.info(f"Destroying VPC Peers [{vpc_id}]")
         for vpc_peer in ec2_client.describe_vpc_peering_connections(Filters=[{
@@ -401,7 +620,7 @@ class Network:
         logger = logger or getLogger("destroy_vpc")
         try:
             logger.info(f"Starting to destroy VPC [{destroy_vpc.vpc_id}]")
-            ec2_resource: EC2ServiceResource = boto3.resource('ec2')
+            ec2_resource: EC2ServiceResource = Clients.resource('ec2')
             ec2_client: EC2Client = ec2_resource.meta.client
             vpc: Vpc = ec2_resource.Vpc(destroy_vpc.vpc_id)
 
@@ -435,11 +654,143 @@ class Network:
                 Network.__destroy_vpc_subnets(destroy_vpc.vpc_id, vpc, logger)
             # Delete VPC
             ec2_client.delete_vpc(VpcId=destroy_vpc.vpc_id)
+            DescribeCache.invalidate("network", logger)
             logger.info(f"Destroyed VPC [{destroy_vpc.vpc_id}]")
         except Exception as e:
             logger.exception(f"Failed destroying VPC [{str(e)}]")
 
     @staticmethod
+    def plan_destroy_vpc(destroy_vpc: DestroyVPC, plan_settings: Optional[PlanSettings] = None,
+                         logger: Optional[Logger] = None) -> Optional[ExecutionPlan]:
+        """
+        Plans destroying the VPC, and with full cleanup all of its resources, performing only read calls
+        The steps follow the order destroy_vpc runs them in, one after the other
+        Paginated describes are counted by the pages read while planning
+
+        :param destroy_vpc:
+        :param plan_settings:
+        :param logger:
+        :return:
+        """
+        from octo_infra_aws_python.logic.ec2 import EC2
+        from octo_infra_aws_python.models.actions.ec2 import DestroyEC2Instances
+        logger = logger or getLogger("plan_destroy_vpc")
+        try:
+            vpc_id = destroy_vpc.vpc_id
+            logger.info(f"Planning destruction of VPC [{vpc_id}]")
+            ec2_client: EC2Client = Clients.client("ec2")
+            planner = Planner("destroy_vpc", plan_settings)
+            planner.add_step("associate_default_dhcp_options", {"ec2.AssociateDhcpOptions": 1}, [vpc_id])
+
+            # Returns the described items and the amount of pages read, which is the amount of calls to plan
+            def describe(paginator: Any, result_key: str,
+                         filter_name: str = "vpc-id") -> Tuple[List[Dict[str, Any]], int]:
+                items: List[Dict[str, Any]] = []
+                pages = 0
+                for page in paginator.paginate(Filters=[{"Name": filter_name, "Values": [vpc_id]}]):
+                    items.extend(page[result_key])
+                    pages += 1
+                return items, pages
+
+            if destroy_vpc.full_cleanup:
+                reservations, pages = describe(ec2_client.get_paginator("describe_instances"), "Reservations")
+                instance_ids = [instance["InstanceId"] for reservation in reservations
+                                for instance in reservation["Instances"]]
+                planner.add_step("find_instances", {"ec2.DescribeInstances": pages}, instance_ids)
+                if instance_ids:
+                    instances_plan = EC2.plan_destroy_ec2_instances(DestroyEC2Instances(
+                        instance_ids=instance_ids,
+                        destroy_keypair=True,
+                        skip_stop=True
+                    ), planner.plan_settings, logger)
+                    if instances_plan is None:
+                        raise Exception("Failed planning the VPC instances destruction")
+                    planner.add_plan(instances_plan)
+
+                internet_gateways, pages = describe(ec2_client.get_paginator("describe_internet_gateways"),
+                                                    "InternetGateways", "attachment.vpc-id")
+                internet_gateway_ids = [internet_gateway["InternetGatewayId"] for internet_gateway in internet_gateways]
+                planner.add_step("destroy_internet_gateways", {
+                    "ec2.DescribeInternetGateways": pages,
+                    "ec2.DetachInternetGateway": len(internet_gateway_ids),
+                    "ec2.DeleteInternetGateway": len(internet_gateway_ids)
+                }, internet_gateway_ids)
+                planner.add_resources("internet_gateway", internet_gateway_ids)
+
+                route_tables, pages = describe(ec2_client.get_paginator("describe_route_tables"), "RouteTables")
+                association_ids = [association["RouteTableAssociationId"] for route_table in route_tables
+                                   for association in route_table.get("Associations", []) if not association["Main"]]
+                route_table_ids = [route_table["RouteTableId"] for route_table in route_tables
+                                   if not any(association["Main"] for association in
+                                              route_table.get("Associations", []))]
+                planner.add_step("destroy_route_tables", {
+                    "ec2.DescribeRouteTables": pages,
+                    "ec2.DisassociateRouteTable": len(association_ids),
+                    "ec2.DeleteRouteTable": len(route_table_ids)
+                }, route_table_ids)
+                planner.add_resources("route_table", route_table_ids)
+
+                endpoints, pages = describe(ec2_client.get_paginator("describe_vpc_endpoints"), "VpcEndpoints")
+                endpoint_ids = [endpoint["VpcEndpointId"] for endpoint in endpoints]
+                planner.add_step("destroy_vpc_endpoints", {
+                    "ec2.DescribeVpcEndpoints": pages,
+                    "ec2.DeleteVpcEndpoints": len(endpoint_ids)
+                }, endpoint_ids)
+                planner.add_resources("vpc_endpoint", endpoint_ids)
+
+                security_groups, pages = describe(ec2_client.get_paginator("describe_security_groups"),
+                                                  "SecurityGroups")
+                security_group_ids = [security_group["GroupId"] for security_group in security_groups
+                                      if security_group["GroupName"] != "default"]
+                planner.add_step("destroy_security_groups", {
+                    "ec2.DescribeSecurityGroups": pages,
+                    "ec2.DeleteSecurityGroup": len(security_group_ids)
+                }, security_group_ids)
+                planner.add_resources("security_group", security_group_ids)
+
+                peers, pages = describe(ec2_client.get_paginator("describe_vpc_peering_connections"),
+                                        "VpcPeeringConnections", "requester-vpc-info.vpc-id")
+                peering_connection_ids = [peer["VpcPeeringConnectionId"] for peer in peers]
+                planner.add_step("destroy_vpc_peers", {
+                    "ec2.DescribeVpcPeeringConnections": pages,
+                    "ec2.DeleteVpcPeeringConnection": len(peering_connection_ids)
+                }, peering_connection_ids)
+                planner.add_resources("vpc_peering_connection", peering_connection_ids)
+
+                network_acls, pages = describe(ec2_client.get_paginator("describe_network_acls"), "NetworkAcls")
+                network_acl_ids = [network_acl["NetworkAclId"] for network_acl in network_acls
+                                   if not network_acl["IsDefault"]]
+                planner.add_step("destroy_network_acls", {
+                    "ec2.DescribeNetworkAcls": pages,
+                    "ec2.DeleteNetworkAcl": len(network_acl_ids)
+                }, network_acl_ids)
+                planner.add_resources("network_acl", network_acl_ids)
+
+                subnets, pages = describe(ec2_client.get_paginator("describe_subnets"), "Subnets")
+                subnet_ids = [subnet["SubnetId"] for subnet in subnets]
+                # A single read finds the interfaces of all the subnets, destroy_vpc describes them per subnet
+                subnet_id_set = set(subnet_ids)
+                interfaces, _ = describe(ec2_client.get_paginator("describe_network_interfaces"), "NetworkInterfaces")
+                interface_ids = [interface["NetworkInterfaceId"] for interface in interfaces
+                                 if interface.get("SubnetId") in subnet_id_set]
+                planner.add_step("destroy_subnets", {
+                    "ec2.DescribeSubnets": pages,
+                    "ec2.DescribeNetworkInterfaces": len(subnet_ids),
+                    "ec2.DeleteNetworkInterface": len(interface_ids),
+                    "ec2.DeleteSubnet": len(subnet_ids)
+                }, subnet_ids + interface_ids)
+                planner.add_resources("network_interface", interface_ids)
+                planner.add_resources("subnet", subnet_ids)
+
+            planner.add_step("delete_vpc", {"ec2.DeleteVpc": 1}, [vpc_id])
+            planner.add_resources("vpc", [vpc_id])
+            return planner.plan()
+        except Exception as e:
+            logger.exception(f"Failed planning VPC destruction [{str(e)}]")
+        return None
+
+    @staticmethod
+    @persistent_cache("network")
     def find_vpc(find_asset: FindAsset, logger: Optional[Logger] = None) -> Optional[str]:
         """
         Tries to find a vpc for a given asset filter
@@ -450,7 +801,7 @@ class Network:
         """
         logger = logger or getLogger("find_vpc")
         try:
-            ec2_resource: EC2ServiceResource = boto3.resource('ec2')
+            ec2_resource: EC2ServiceResource = Clients.resource('ec2')
             ec2_client: EC2Client = ec2_resource.meta.client
             if find_asset.vpc_id:
                 # Just make sure the VPC exists for the given ID
@@ -481,17 +832,20 @@ class Network:
         logger = logger or getLogger("create_subnet")
         try:
             logger.info(f"Starting to create subnet [{create_subnet.subnet_name}]")
-            ec2_resource: EC2ServiceResource = boto3.resource("ec2")
+            ec2_resource: EC2ServiceResource = Clients.resource("ec2")
+            create_subnet.tags["Name"] = create_subnet.subnet_name
             params = {
                 "CidrBlock": create_subnet.cidr_block,
                 "VpcId": create_subnet.vpc_id,
+                "TagSpecifications": [{"ResourceType": "subnet",
+                                       "Tags": [{"Key": k, "Value": v} for k, v in create_subnet.tags.items()]}]
             }
             if create_subnet.availability_zone:
                 params['AvailabilityZone'] = create_subnet.availability_zone
             subnet: Subnet = ec2_resource.create_subnet(**params)
-            time.sleep(EXTRA_CREATION_SLEEP_TIME_SECONDS)
-            create_subnet.tags["Name"] = create_subnet.subnet_name
-            subnet.create_tags(Tags=[{"Key": k, "Value": v} for k, v in create_subnet.tags.items()])
+            DescribeCache.invalidate("network", logger)
+            ec2_resource.meta.client.get_waiter("subnet_available").wait(SubnetIds=[subnet.id],
+                                                                         WaiterConfig=CREATION_WAITER_CONFIG)
             main_route_table = list(
                 ec2_resource.route_tables.filter(Filters=[{
                     'Name': 'vpc-id',
@@ -519,13 +873,15 @@ class Network:
         logger = logger or getLogger("destroy_subnet")
         try:
             logger.info(f"Starting to destroy subnet [{destroy_subnet.subnet_id}]")
-            ec2_client: EC2Client = boto3.client("ec2")
+            ec2_client: EC2Client = Clients.client("ec2")
             ec2_client.delete_subnet(SubnetId=destroy_subnet.subnet_id)
+            DescribeCache.invalidate("network", logger)
             logger.info(f"Destroyed subnet [{destroy_subnet.subnet_id}]")
         except Exception as e:
             logger.exception(f"Failed destroying Subnet [{str(e)}]")
 
     @staticmethod
+    @persistent_cache("network")
     def find_subnets(find_asset: FindAsset, logger: Optional[Logger] = None) -> Optional[List[str]]:
         """
         Tries to find subnets based on the given asset filter
@@ -536,7 +892,7 @@ class Network:
         """
         logger = logger or getLogger("find_subnets")
         try:
-            ec2_client: EC2Client = boto3.client('ec2')
+            ec2_client: EC2Client = Clients.client('ec2')
             filters: List[FilterTypeDef] = []
             if find_asset.tags:
                 logger.info(f"Trying to find subnet with tags [{find_asset.tags}]")
@@ -556,3 +912,213 @@ class Network:
         except Exception as e:
             logger.exception(f"Failed finding subnets [{str(e)}]")
         return None
+
+    @staticmethod
+    def __sync_tags(ec2_client: EC2Client, resource_id: str, existing_tags: Optional[List[TagTypeDef]],
+                    wanted_tags: Dict[str, str]) -> None:
+        """
+        Adds or updates only the wanted tags that differ from the existing tags, tags that are not wanted are kept
+        Drops the cached network lookups when any tag changed
+
+        :param ec2_client:
+        :param resource_id:
+        :param existing_tags:
+        :param wanted_tags:
+        :return:
+        """
+        existing = {tag["Key"]: tag["Value"] for tag in existing_tags or []}
+        changed = {key: value for key, value in wanted_tags.items() if existing.get(key) != value}
+        if changed:
+            ec2_client.create_tags(Resources=[resource_id],
+                                   Tags=[{"Key": k, "Value": v} for k, v in changed.items()])
+            # Cached lookups by tags may be stale
+            DescribeCache.invalidate("network")
+
+    @staticmethod
+    def reconcile_internet_gateway(create_internet_gateway: CreateInternetGateway,
+                                   logger: Optional[Logger] = None) -> Optional[str]:
+        """
+        Finds the internet gateway by its name tag and syncs its tags, creates it if it does not exist
+
+        :param create_internet_gateway:
+        :param logger:
+        :return:
+        """
+        logger = logger or getLogger("reconcile_internet_gateway")
+        try:
+            ec2_client: EC2Client = Clients.client("ec2")
+            name = create_internet_gateway.internet_gateway_name
+            internet_gws: DescribeInternetGatewaysResultTypeDef = ec2_client.describe_internet_gateways(
+                Filters=[{"Name": "tag:Name", "Values": [name]}])
+            if len(internet_gws["InternetGateways"]) == 0:
+                return Network.create_internet_gateway(create_internet_gateway, logger)
+            internet_gw = internet_gws["InternetGateways"][0]
+            Network.__sync_tags(ec2_client, internet_gw["InternetGatewayId"], internet_gw.get("Tags"),
+                                {**create_internet_gateway.tags, "Name": name})
+            logger.info(f"Internet gateway reconciled [{internet_gw['InternetGatewayId']}]")
+            return internet_gw["InternetGatewayId"]
+        except Exception as e:
+            logger.exception(f"Failed reconciling internet gateway [{str(e)}]")
+        return None
+
+    @staticmethod
+    def reconcile_vpc(create_vpc: CreateVPC, logger: Optional[Logger] = None) -> Optional[str]:
+        """
+        Finds the VPC by its name tag and applies only the differences from the requested VPC:
+        - Tags
+        - Internet GW attachment
+        - Public route through the internet GW
+        Creates the VPC if it does not exist
+
+        :param create_vpc:
+        :param logger:
+        :return:
+        """
+        logger = logger or getLogger("reconcile_vpc")
+        try:
+            internet_gw_id = Network.reconcile_internet_gateway(create_vpc.internet_gw, logger) \
+                if isinstance(create_vpc.internet_gw, CreateInternetGateway) else create_vpc.internet_gw
+            if not internet_gw_id:
+                raise Exception("Failed to reconcile internet GW")
+            ec2_client: EC2Client = Clients.client("ec2")
+            vpcs: DescribeVpcsResultTypeDef = ec2_client.describe_vpcs(Filters=[{
+                "Name": "tag:Name",
+                "Values": [create_vpc.vpc_name]
+            }])
+            if len(vpcs["Vpcs"]) == 0:
+                return Network.create_vpc(create_vpc.model_copy(update={"internet_gw": internet_gw_id}), logger)
+            vpc = vpcs["Vpcs"][0]
+            vpc_id = vpc["VpcId"]
+            logger.info(f"Starting to reconcile VPC [{vpc_id}]")
+            if vpc["CidrBlock"] != create_vpc.cidr_block:
+                logger.warning(f"VPC CIDR block differs and cannot be changed [{vpc_id}] "
+                               f"[Existing={vpc['CidrBlock']}, Requested={create_vpc.cidr_block}]")
+            Network.__sync_tags(ec2_client, vpc_id, vpc.get("Tags"), {**create_vpc.tags, "Name": create_vpc.vpc_name})
+            internet_gws: DescribeInternetGatewaysResultTypeDef = ec2_client.describe_internet_gateways(
+                InternetGatewayIds=[internet_gw_id])
+            attachments = internet_gws["InternetGateways"][0].get("Attachments", [])
+            if not any(attachment["VpcId"] == vpc_id for attachment in attachments):
+                ec2_client.attach_internet_gateway(InternetGatewayId=internet_gw_id, VpcId=vpc_id)
+            if create_vpc.is_public:
+                main_route_table = ec2_client.describe_route_tables(Filters=[{
+                    'Name': 'vpc-id',
+                    'Values': [vpc_id]
+                }, {
+                    'Name': 'association.main',
+                    'Values': ['true']
+                }])["RouteTables"][0]
+                if not any(route.get("DestinationCidrBlock") == "0.0.0.0/0"
+                           and route.get("GatewayId") == internet_gw_id for route in main_route_table["Routes"]):
+                    ec2_client.create_route(RouteTableId=main_route_table["RouteTableId"],
+                                            DestinationCidrBlock="0.0.0.0/0", GatewayId=internet_gw_id)
+            logger.info(f"VPC reconciled [{vpc_id}]")
+            return vpc_id
+        except Exception as e:
+            logger.exception(f"Failed reconciling VPC [{str(e)}]")
+        return None
+
+    @staticmethod
+    def reconcile_subnets(create_subnets: List[CreateSubnet], max_workers: int = 16,
+                          logger: Optional[Logger] = None) -> Optional[Dict[str, Optional[str]]]:
+        """
+        Finds all the subnets by their VPC and name tag with a single describe call,
+        syncs the tags of the existing subnets and concurrently creates the missing ones
+        Returns the subnet ids by subnet name
+
+        :param create_subnets:
+        :param max_workers:
+        :param logger:
+        :return:
+        """
+        logger = logger or getLogger("reconcile_subnets")
+        try:
+            if not create_subnets:
+                return {}
+            ec2_client: EC2Client = Clients.client("ec2")
+            subnets: DescribeSubnetsResultTypeDef = ec2_client.describe_subnets(Filters=[{
+                "Name": "vpc-id",
+                "Values": list({create_subnet.vpc_id for create_subnet in create_subnets})
+            }, {
+                "Name": "tag:Name",
+                "Values": list({create_subnet.subnet_name for create_subnet in create_subnets})
+            }])
+            existing = {(subnet["VpcId"], tag["Value"]): subnet
+                        for subnet in subnets["Subnets"]
+                        for tag in subnet.get("Tags", []) if tag["Key"] == "Name"}
+            subnet_ids: Dict[str, Optional[str]] = {}
+            missing: List[CreateSubnet] = []
+            for create_subnet in create_subnets:
+                subnet = existing.get((create_subnet.vpc_id, create_subnet.subnet_name))
+                if not subnet:
+                    missing.append(create_subnet)
+                    continue
+                if subnet["CidrBlock"] != create_subnet.cidr_block:
+                    logger.warning(f"Subnet CIDR block differs and cannot be changed [{subnet['SubnetId']}] "
+                                   f"[Existing={subnet['CidrBlock']}, Requested={create_subnet.cidr_block}]")
+                Network.__sync_tags(ec2_client, subnet["SubnetId"], subnet.get("Tags"),
+                                    {**create_subnet.tags, "Name": create_subnet.subnet_name})
+                subnet_ids[create_subnet.subnet_name] = subnet["SubnetId"]
+            if missing:
+                with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                    for create_subnet, subnet_id in zip(missing, executor.map(with_caller_context(
+                            lambda create_subnet: Network.create_subnet(create_subnet, logger)), missing)):
+                        subnet_ids[create_subnet.subnet_name] = subnet_id
+            logger.info(f"Subnets reconciled [Existing={len(create_subnets) - len(missing)}, Created={len(missing)}]")
+            return subnet_ids
+        except Exception as e:
+            logger.exception(f"Failed reconciling subnets [{str(e)}]")
+        return None
+
+    @staticmethod
+    def reconcile_security_groups(create_security_groups: List[CreateSecurityGroup], max_workers: int = 16,
+                                  logger: Optional[Logger] = None) -> Optional[Dict[str, Optional[str]]]:
+        """
+        Finds all the security groups by their VPC and name with a single describe call,
+        syncs the tags and rules of the existing groups and concurrently creates the missing ones
+        Rules of a direction without any requested rules are left untouched
+        Returns the security group ids by group name
+
+        :param create_security_groups:
+        :param max_workers:
+        :param logger:
+        :return:
+        """
+        logger = logger or getLogger("reconcile_security_groups")
+        try:
+            if not create_security_groups:
+                return {}
+            ec2_client: EC2Client = Clients.client("ec2")
+            security_groups: DescribeSecurityGroupsResultTypeDef = ec2_client.describe_security_groups(Filters=[{
+                "Name": "vpc-id",
+                "Values": list({create_security_group.vpc_id for create_security_group in create_security_groups})
+            }, {
+                "Name": "group-name",
+                "Values": list({create_security_group.name for create_security_group in create_security_groups})
+            }])
+            existing = {(security_group["VpcId"], security_group["GroupName"]): security_group
+                        for security_group in security_groups["SecurityGroups"]}
+            security_group_ids: Dict[str, Optional[str]] = {}
+            missing: List[CreateSecurityGroup] = []
+            for create_security_group in create_security_groups:
+                security_group = existing.get((create_security_group.vpc_id, create_security_group.name))
+                if not security_group:
+                    missing.append(create_security_group)
+                    continue
+                Network.__sync_tags(ec2_client, security_group["GroupId"], security_group.get("Tags"),
+                                    {**create_security_group.tags, "Name": create_security_group.name})
+                Network.__sync_rules(ec2_client, security_group,
+                                     create_security_group.ingress, create_security_group.egress,
+                                     revoke_unlisted=True, logger=logger, skip_unset=True)
+                security_group_ids[create_security_group.name] = security_group["GroupId"]
+            if missing:
+                with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                    for create_security_group, security_group_id in zip(missing, executor.map(with_caller_context(
+                            lambda create_security_group: Network.create_security_group(create_security_group,
+                                                                                        logger)), missing)):
+                        security_group_ids[create_security_group.name] = security_group_id
+            logger.info(f"Security groups reconciled [Existing={len(create_security_groups) - len(missing)}, "
+                        f"Created={len(missing)}]")
+            return security_group_ids
+        except Exception as e:
+            logger.exception(f"Failed reconciling security groups [{str(e)}]")
+        return None
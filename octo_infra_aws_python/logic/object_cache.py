@@ -0,0 +1,399 @@
+from __future__ import annotations
+from octo_infra_aws_python.logic.clients import Clients
+from octo_infra_aws_python.logic.single_flight import SingleFlight
+from octo_infra_aws_python.models.object_cache_policy import ObjectCachePolicy
+from collections import OrderedDict
+from hashlib import sha256
+from http import HTTPStatus
+from logging import Logger, getLogger
+from threading import Lock
+from typing import TYPE_CHECKING, Any, Dict, Final, List, Optional, Tuple
+if TYPE_CHECKING:
+    from mypy_boto3_s3.client import S3Client
+from botocore.exceptions import ClientError
+import json
+import os
+import shutil
+import tempfile
+import time
+
+# Size of the chunks object bodies are written to the disk cache in
+DISK_CHUNK_SIZE: Final[int] = 1024 * 1024
+ENTRY_SUFFIX: Final[str] = ".json"
+TEMPORARY_SUFFIX: Final[str] = ".tmp"
+
+
+class CachedObject:
+    """
+    Cached body of an object and the ETag it was validated with, the body is in memory, on disk or both
+    """
+    __slots__ = ("bucket_name", "object_path", "etag", "metadata", "size", "validated_at", "body", "path")
+
+    def __init__(self, bucket_name: str, object_path: str, etag: str, metadata: Dict[str, str], size: int,
+                 validated_at: float, body: Optional[bytes] = None, path: Optional[str] = None) -> None:
+        self.bucket_name = bucket_name
+        self.object_path = object_path
+        self.etag = etag
+        self.metadata = metadata
+        self.size = size
+        self.validated_at = validated_at
+        self.body = body
+        self.path = path
+
+    def read(self) -> bytes:
+        if self.body is not None:
+            return self.body
+        if self.path is None:
+            raise ValueError(f"Cached object has neither a body nor a file [{self.object_path}]")
+        with open(self.path, "rb") as f:
+            return f.read()
+
+
+class ObjectCache:
+    """
+    Optional local read cache of object bodies, in memory and optionally on disk, keyed by bucket and object path
+    Cached objects are revalidated with conditional gets, so unchanged objects are not transferred again
+    """
+    __lock: Lock = Lock()
+    __policy: Optional[ObjectCachePolicy] = None
+    __entries: OrderedDict = OrderedDict()
+    __memory_bytes: int = 0
+
+    @staticmethod
+    def configure(policy: ObjectCachePolicy) -> None:
+        """
+        Enables the cache, dropping the objects cached in memory
+
+        :param policy:
+        :return:
+        """
+        if policy.directory:
+            os.makedirs(policy.directory, exist_ok=True)
+        with ObjectCache.__lock:
+            ObjectCache.__policy = policy
+            ObjectCache.__entries = OrderedDict()
+            ObjectCache.__memory_bytes = 0
+
+    @staticmethod
+    def disable() -> None:
+        with ObjectCache.__lock:
+            ObjectCache.__policy = None
+            ObjectCache.__entries = OrderedDict()
+            ObjectCache.__memory_bytes = 0
+
+    @staticmethod
+    def is_enabled() -> bool:
+        return ObjectCache.__policy is not None
+
+    @staticmethod
+    def policy() -> Optional[ObjectCachePolicy]:
+        return ObjectCache.__policy
+
+    @staticmethod
+    def invalidate(bucket_name: Optional[str] = None, object_path: Optional[str] = None,
+                   logger: Optional[Logger] = None) -> int:
+        """
+        Drops the cached object, the cached objects of the bucket, or all of them, from memory and disk
+        Returns the amount of objects dropped
+
+        :param bucket_name:
+        :param object_path:
+        :param logger:
+        :return:
+        """
+        logger = logger or getLogger("object_cache")
+        policy = ObjectCache.__policy
+        if policy is None:
+            return 0
+
+        def matches(entry_bucket_name: str, entry_object_path: str) -> bool:
+            return (bucket_name is None or entry_bucket_name == bucket_name) and \
+                (object_path is None or entry_object_path == object_path)
+
+        dropped = set()
+        with ObjectCache.__lock:
+            for key in [key for key in ObjectCache.__entries if matches(*key)]:
+                ObjectCache.__drop_from_memory(key)
+                dropped.add(key)
+        if policy.directory:
+            try:
+                if bucket_name is not None and object_path is not None:
+                    entry_paths = [ObjectCache.__entry_path(policy.directory, bucket_name, object_path)]
+                else:
+                    entry_paths = [os.path.join(policy.directory, name) for name in os.listdir(policy.directory)
+                                   if name.endswith(ENTRY_SUFFIX)]
+                for entry_path in entry_paths:
+                    entry = ObjectCache.__read_entry(entry_path)
+                    if entry is not None and matches(entry.bucket_name, entry.object_path):
+                        ObjectCache.__remove_files(entry_path, entry.path)
+                        dropped.add((entry.bucket_name, entry.object_path))
+            except OSError as e:
+                logger.warning(f"Failed invalidating cached objects [{str(e)}]")
+        return len(dropped)
+
+    @staticmethod
+    def fetch(bucket_name: str, object_path: str, logger: Optional[Logger] = None) -> CachedObject:
+        """
+        Returns the cached object, revalidated with a conditional get unless it is within its max staleness
+        Objects that are missing or changed are transferred and cached, concurrent fetches of an object
+        share a single transfer
+
+        :param bucket_name:
+        :param object_path:
+        :param logger:
+        :return:
+        """
+        return SingleFlight.do(ObjectCache.__fetch, bucket_name, object_path, logger)
+
+    @staticmethod
+    def download(cached: CachedObject, output_path: str) -> None:
+        """
+        Writes the cached object to the output path, hardlinking the file cached on disk if configured
+
+        :param cached:
+        :param output_path:
+        :return:
+        """
+        policy = ObjectCache.__policy
+        if cached.path is None:
+            with open(output_path, "wb") as f:
+                f.write(cached.read())
+            return
+        if policy is not None and policy.hardlink_downloads:
+            if os.path.lexists(output_path):
+                os.remove(output_path)
+            try:
+                os.link(cached.path, output_path)
+                return
+            except OSError:
+                # The output path is on another file system, or the file system has no hardlinks
+                pass
+        shutil.copyfile(cached.path, output_path)
+
+    @staticmethod
+    def __fetch(bucket_name: str, object_path: str, logger: Optional[Logger] = None) -> CachedObject:
+        logger = logger or getLogger("object_cache")
+        policy = ObjectCache.__policy
+        if policy is None:
+            raise ValueError("Object cache is not configured")
+        cached = ObjectCache.__lookup(policy, bucket_name, object_path, logger)
+        now = time.time()
+        if cached is not None and now - cached.validated_at <= ObjectCache.__max_staleness(policy, object_path):
+            return cached
+        client: S3Client = Clients.client("s3")
+        arguments: Dict[str, Any] = {"Bucket": bucket_name, "Key": object_path}
+        if cached is not None:
+            arguments["IfNoneMatch"] = cached.etag
+        try:
+            response = client.get_object(**arguments)
+        except ClientError as e:
+            if cached is None or e.response.get("ResponseMetadata", {}).get("HTTPStatusCode") != \
+                    HTTPStatus.NOT_MODIFIED:
+                raise
+            cached.validated_at = now
+            if policy.directory and cached.path is not None:
+                ObjectCache.__write_entry(policy.directory, cached, cached.path, logger)
+            return cached
+        cached = CachedObject(
+            bucket_name=bucket_name,
+            object_path=object_path,
+            etag=response["ETag"],
+            metadata=response.get("Metadata", {}),
+            size=response.get("ContentLength", 0),
+            validated_at=now
+        )
+        if policy.directory:
+            ObjectCache.__store_on_disk(policy, policy.directory, cached, response["Body"], logger)
+        else:
+            cached.body = response["Body"].read()
+            cached.size = len(cached.body)
+        ObjectCache.__store_in_memory(policy, cached)
+        return cached
+
+    @staticmethod
+    def __lookup(policy: ObjectCachePolicy, bucket_name: str, object_path: str,
+                 logger: Logger) -> Optional[CachedObject]:
+        key = (bucket_name, object_path)
+        with ObjectCache.__lock:
+            cached: Optional[CachedObject] = ObjectCache.__entries.get(key)
+            if cached is not None:
+                if cached.body is not None or (cached.path is not None and os.path.exists(cached.path)):
+                    ObjectCache.__entries.move_to_end(key)
+                    return cached
+                # The file was evicted by another process
+                ObjectCache.__drop_from_memory(key)
+        if not policy.directory:
+            return None
+        try:
+            cached = ObjectCache.__read_entry(ObjectCache.__entry_path(policy.directory, bucket_name, object_path))
+            if cached is None or cached.path is None or not os.path.exists(cached.path):
+                return None
+            # Marks the file as recently used for the eviction of the disk cache
+            os.utime(cached.path)
+        except OSError as e:
+            logger.warning(f"Failed reading cached object [{object_path}] [{str(e)}]")
+            return None
+        ObjectCache.__store_in_memory(policy, cached)
+        return cached
+
+    @staticmethod
+    def __store_in_memory(policy: ObjectCachePolicy, cached: CachedObject) -> None:
+        # Bodies over the memory budget are read from disk when used, or not cached without a disk cache
+        if cached.size > policy.max_memory_bytes:
+            if cached.path is None:
+                return
+        elif cached.body is None:
+            cached.body = cached.read()
+        key = (cached.bucket_name, cached.object_path)
+        with ObjectCache.__lock:
+            if ObjectCache.__policy is not policy:
+                return
+            ObjectCache.__drop_from_memory(key)
+            ObjectCache.__entries[key] = cached
+            if cached.body is not None:
+                ObjectCache.__memory_bytes += cached.size
+            while ObjectCache.__memory_bytes > policy.max_memory_bytes:
+                ObjectCache.__drop_from_memory(next(iter(ObjectCache.__entries)))
+
+    @staticmethod
+    def __drop_from_memory(key: Tuple[str, str]) -> None:
+        # Callers must hold the lock
+        cached: Optional[CachedObject] = ObjectCache.__entries.pop(key, None)
+        if cached is not None and cached.body is not None:
+            ObjectCache.__memory_bytes -= cached.size
+
+    @staticmethod
+    def __store_on_disk(policy: ObjectCachePolicy, directory: str, cached: CachedObject, body: Any,
+                        logger: Logger) -> None:
+        """
+        Streams the body to a file of the disk cache, files are written aside and renamed into place so
+        concurrent processes never read a partial file
+        Bodies within the memory budget are also kept in memory
+
+        :param policy:
+        :param directory:
+        :param cached:
+        :param body:
+        :param logger:
+        :return:
+        """
+        key_hash = ObjectCache.__key_hash(cached.bucket_name, cached.object_path)
+        # Every version of the object has its own file, so an entry always matches the file it names
+        path = os.path.join(directory, f"{key_hash}.{sha256(cached.etag.encode()).hexdigest()[:16]}")
+        cached.path = path
+        keep_body = cached.size <= policy.max_memory_bytes
+        chunks: List[bytes] = []
+        size = 0
+        descriptor, temporary_path = tempfile.mkstemp(dir=directory, suffix=TEMPORARY_SUFFIX)
+        try:
+            with os.fdopen(descriptor, "wb") as f:
+                for chunk in body.iter_chunks(DISK_CHUNK_SIZE):
+                    f.write(chunk)
+                    size += len(chunk)
+                    if keep_body:
+                        chunks.append(chunk)
+            os.replace(temporary_path, path)
+        except BaseException:
+            if os.path.exists(temporary_path):
+                os.remove(temporary_path)
+            raise
+        cached.size = size
+        if keep_body:
+            cached.body = b"".join(chunks)
+        previous = ObjectCache.__read_entry(ObjectCache.__entry_path(directory, cached.bucket_name,
+                                                                     cached.object_path))
+        ObjectCache.__write_entry(directory, cached, path, logger)
+        if previous is not None and previous.path != path:
+            ObjectCache.__remove_files(None, previous.path)
+        ObjectCache.__evict_from_disk(directory, policy.max_disk_bytes, path, logger)
+
+    @staticmethod
+    def __write_entry(directory: str, cached: CachedObject, path: str, logger: Logger) -> None:
+        entry_path = ObjectCache.__entry_path(directory, cached.bucket_name, cached.object_path)
+        try:
+            descriptor, temporary_path = tempfile.mkstemp(dir=directory, suffix=TEMPORARY_SUFFIX)
+            with os.fdopen(descriptor, "w") as f:
+                json.dump({
+                    "bucket_name": cached.bucket_name,
+                    "object_path": cached.object_path,
+                    "etag": cached.etag,
+                    "metadata": cached.metadata,
+                    "size": cached.size,
+                    "validated_at": cached.validated_at,
+                    "path": os.path.basename(path)
+                }, f)
+            os.replace(temporary_path, entry_path)
+        except OSError as e:
+            logger.warning(f"Failed writing cached object [{cached.object_path}] [{str(e)}]")
+
+    @staticmethod
+    def __read_entry(entry_path: str) -> Optional[CachedObject]:
+        try:
+            with open(entry_path) as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return CachedObject(
+            bucket_name=entry["bucket_name"],
+            object_path=entry["object_path"],
+            etag=entry["etag"],
+            metadata=entry["metadata"],
+            size=entry["size"],
+            validated_at=entry["validated_at"],
+            path=os.path.join(os.path.dirname(entry_path), entry["path"])
+        )
+
+    @staticmethod
+    def __evict_from_disk(directory: str, max_disk_bytes: int, stored_path: str, logger: Logger) -> None:
+        """
+        Removes the least recently used files of the disk cache while it is over its budget, except the file
+        just stored
+
+        :param directory:
+        :param max_disk_bytes:
+        :param stored_path:
+        :param logger:
+        :return:
+        """
+        try:
+            files = []
+            for entry in os.scandir(directory):
+                if entry.is_file() and not entry.name.endswith((ENTRY_SUFFIX, TEMPORARY_SUFFIX)):
+                    stat = entry.stat()
+                    files.append((stat.st_mtime, stat.st_size, entry.path))
+            disk_bytes = sum(size for _, size, _ in files)
+            for _, size, path in sorted(files):
+                if disk_bytes <= max_disk_bytes:
+                    break
+                if path == stored_path:
+                    continue
+                entry_path = path.rsplit(".", 1)[0] + ENTRY_SUFFIX
+                ObjectCache.__remove_files(entry_path, path)
+                disk_bytes -= size
+        except OSError as e:
+            logger.warning(f"Failed evicting cached objects [{str(e)}]")
+
+    @staticmethod
+    def __remove_files(entry_path: Optional[str], path: Optional[str]) -> None:
+        # Files may already be removed by another process
+        for file_path in (entry_path, path):
+            if file_path is not None:
+                try:
+                    os.remove(file_path)
+                except FileNotFoundError:
+                    pass
+
+    @staticmethod
+    def __max_staleness(policy: ObjectCachePolicy, object_path: str) -> float:
+        prefixes = [prefix for prefix in policy.max_staleness_seconds if object_path.startswith(prefix)]
+        if not prefixes:
+            return -1
+        return policy.max_staleness_seconds[max(prefixes, key=len)]
+
+    @staticmethod
+    def __key_hash(bucket_name: str, object_path: str) -> str:
+        return sha256(f"{bucket_name}/{object_path}".encode()).hexdigest()
+
+    @staticmethod
+    def __entry_path(directory: str, bucket_name: str, object_path: str) -> str:
+        return os.path.join(directory, ObjectCache.__key_hash(bucket_name, object_path) + ENTRY_SUFFIX)
@@ -0,0 +1,235 @@
+from __future__ import annotations
+from octo_infra_aws_python.logic.clients import Clients
+from octo_infra_aws_python.logic.s3 import S3
+from octo_infra_aws_python.models.actions.s3 import FindPackIndex, LoadPackMember, PackIndex, SaveObject, \
+    SavePack
+from array import array
+from collections import OrderedDict
+from http import HTTPStatus
+from logging import Logger, getLogger
+from threading import Lock
+from typing import TYPE_CHECKING, Any, Final, Iterator, Optional
+if TYPE_CHECKING:
+    from mypy_boto3_s3.client import S3Client
+from botocore.exceptions import ClientError
+import struct
+import sys
+import zlib
+
+PACK_MAGIC: Final[bytes] = b"OCTOPK01"
+# Magic, index offset and index size, at the very end of the pack
+FOOTER: Final[struct.Struct] = struct.Struct("<8sQQ")
+# Bytes read from the end of a pack to find its index, most indexes are read along with the footer
+INDEX_READ_AHEAD: Final[int] = 256 * 1024
+# Packs whose index is kept in memory, least recently used first out
+MAX_CACHED_INDEXES: Final[int] = 64
+
+
+class Packs:
+    """
+    Packs many small objects into a single object, members are concatenated and followed by a compact index
+    and a fixed size footer, so a member is read with a single ranged get once the index is cached
+    """
+    __lock: Lock = Lock()
+    __indexes: OrderedDict = OrderedDict()
+
+    @staticmethod
+    def save_pack(save_pack: SavePack, logger: Optional[Logger] = None) -> Optional[PackIndex]:
+        """
+        Tries to save the members as a single pack object, streamed while the members are produced
+        Returns the index of the saved pack
+
+        :param save_pack:
+        :param logger:
+        :return:
+        """
+        logger = logger or getLogger("save_pack")
+        try:
+            index = PackIndex(save_pack.bucket_name, save_pack.object_path)
+            members = save_pack.members.items() if isinstance(save_pack.members, dict) else save_pack.members
+            Packs.__forget(save_pack.bucket_name, save_pack.object_path)
+            if not S3.save_object(SaveObject(
+                bucket_name=save_pack.bucket_name,
+                object_path=save_pack.object_path,
+                body=Packs.__iterate_pack(members, index),
+                part_size=save_pack.part_size,
+                max_concurrent_parts=save_pack.max_concurrent_parts,
+                # Members are read by range, so the pack is stored as is
+                codec="identity"
+            ), logger):
+                return None
+            logger.info(f"Saved pack [{save_pack.object_path}] [Members={len(index)}]")
+            return index
+        except Exception as e:
+            logger.exception(f"Failed saving pack [{str(e)}]")
+        return None
+
+    @staticmethod
+    def load_pack_member(load_pack_member: LoadPackMember, logger: Optional[Logger] = None) -> Optional[bytes]:
+        """
+        Tries to load a member of a pack with a single ranged get, reading the pack index first if not cached
+        A pack replaced since its index was cached fails the get, its index is then read again
+
+        :param load_pack_member:
+        :param logger:
+        :return:
+        """
+        logger = logger or getLogger("load_pack_member")
+        try:
+            client: S3Client = Clients.client("s3")
+            for _ in range(2):
+                try:
+                    # Reading an index beyond the read ahead fails the same way if the pack was just replaced
+                    index = Packs.__index(load_pack_member.bucket_name, load_pack_member.object_path)
+                    location = index.locate(load_pack_member.member_name)
+                    if location is None:
+                        logger.error(f"Not a pack member [{load_pack_member.object_path}] "
+                                     f"[{load_pack_member.member_name}]")
+                        return None
+                    offset, size = location
+                    if size == 0:
+                        return b""
+                    if index.etag is None:
+                        raise ValueError(f"Pack index has no etag [{load_pack_member.object_path}]")
+                    response = client.get_object(
+                        Bucket=load_pack_member.bucket_name,
+                        Key=load_pack_member.object_path,
+                        Range=f"bytes={offset}-{offset + size - 1}",
+                        IfMatch=index.etag
+                    )
+                    return response["Body"].read()
+                except ClientError as e:
+                    if e.response.get("ResponseMetadata", {}).get("HTTPStatusCode") != \
+                            HTTPStatus.PRECONDITION_FAILED:
+                        raise
+                    Packs.__forget(load_pack_member.bucket_name, load_pack_member.object_path)
+            logger.error(f"Pack keeps changing while read [{load_pack_member.object_path}]")
+        except Exception as e:
+            logger.exception(f"Failed loading pack member [{str(e)}]")
+        return None
+
+    @staticmethod
+    def find_pack_index(find_pack_index: FindPackIndex, logger: Optional[Logger] = None) -> Optional[PackIndex]:
+        """
+        Tries to find the index of a pack, listing its members without listing objects
+
+        :param find_pack_index:
+        :param logger:
+        :return:
+        """
+        logger = logger or getLogger("find_pack_index")
+        try:
+            return Packs.__index(find_pack_index.bucket_name, find_pack_index.object_path)
+        except Exception as e:
+            logger.exception(f"Failed finding pack index [{str(e)}]")
+        return None
+
+    @staticmethod
+    def __iterate_pack(members: Any, index: PackIndex) -> Iterator[bytes]:
+        """
+        Yields the members one after the other, then the index and the footer, filling the index on the way
+
+        :param members:
+        :param index:
+        :return:
+        """
+        for member_name, data in members:
+            if isinstance(data, str):
+                data = data.encode()
+            if "\0" in member_name:
+                raise ValueError(f"Pack member names can not hold NUL characters [{member_name!r}]")
+            index.append(member_name, len(data))
+            yield data
+        index_data = Packs.__encode_index(index)
+        yield index_data
+        yield FOOTER.pack(PACK_MAGIC, index.members_size, len(index_data))
+
+    @staticmethod
+    def __encode_index(index: PackIndex) -> bytes:
+        """
+        Encodes the index as the member count, the member sizes as little endian 64 bit integers and the
+        NUL separated member names, compressed with zlib
+
+        :param index:
+        :return:
+        """
+        sizes = array("q", index.member_sizes)
+        if sys.byteorder == "big":
+            sizes.byteswap()
+        return zlib.compress(struct.pack("<Q", len(index)) + sizes.tobytes()
+                             + "\0".join(index.member_names).encode())
+
+    @staticmethod
+    def __decode_index(bucket_name: str, object_path: str, etag: str, data: bytes) -> PackIndex:
+        """
+        Decodes an index encoded by encode index, for the pack version of the etag
+
+        :param bucket_name:
+        :param object_path:
+        :param etag:
+        :param data:
+        :return:
+        """
+        data = zlib.decompress(data)
+        count = struct.unpack_from("<Q", data)[0]
+        sizes_end = 8 + count * 8
+        sizes = array("q")
+        sizes.frombytes(data[8:sizes_end])
+        if sys.byteorder == "big":
+            sizes.byteswap()
+        names = data[sizes_end:].decode().split("\0") if count else []
+        return PackIndex(bucket_name, object_path, etag, names, sizes)
+
+    @staticmethod
+    def __index(bucket_name: str, object_path: str) -> PackIndex:
+        """
+        Returns the cached index of the pack, or reads it from the end of the pack and caches it
+
+        :param bucket_name:
+        :param object_path:
+        :return:
+        """
+        key = (bucket_name, object_path)
+        with Packs.__lock:
+            index: Optional[PackIndex] = Packs.__indexes.get(key)
+            if index is not None:
+                Packs.__indexes.move_to_end(key)
+                return index
+        client: S3Client = Clients.client("s3")
+        response = client.get_object(Bucket=bucket_name, Key=object_path, Range=f"bytes=-{INDEX_READ_AHEAD}")
+        tail = response["Body"].read()
+        etag = response["ETag"]
+        pack_size = Packs.__pack_size(response.get("ContentRange"), len(tail))
+        if len(tail) < FOOTER.size:
+            raise ValueError(f"Not a pack [{object_path}]")
+        magic, index_offset, index_size = FOOTER.unpack(tail[-FOOTER.size:])
+        if magic != PACK_MAGIC:
+            raise ValueError(f"Not a pack [{object_path}]")
+        tail_offset = pack_size - len(tail)
+        if index_offset >= tail_offset:
+            index_data = tail[index_offset - tail_offset:index_offset - tail_offset + index_size]
+        else:
+            index_data = client.get_object(
+                Bucket=bucket_name,
+                Key=object_path,
+                Range=f"bytes={index_offset}-{index_offset + index_size - 1}",
+                IfMatch=etag
+            )["Body"].read()
+        index = Packs.__decode_index(bucket_name, object_path, etag, index_data)
+        with Packs.__lock:
+            Packs.__indexes[key] = index
+            while len(Packs.__indexes) > MAX_CACHED_INDEXES:
+                Packs.__indexes.popitem(last=False)
+        return index
+
+    @staticmethod
+    def __pack_size(content_range: Optional[str], read_size: int) -> int:
+        # Ranged gets answer with bytes start-end/size, packs smaller than the range are returned whole
+        if not content_range:
+            return read_size
+        return int(content_range.rsplit("/", 1)[1])
+
+    @staticmethod
+    def __forget(bucket_name: str, object_path: str) -> None:
+        with Packs.__lock:
+            Packs.__indexes.pop((bucket_name, object_path), None)
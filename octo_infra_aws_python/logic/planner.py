@@ -0,0 +1,126 @@
+from octo_infra_aws_python.logic.retry import Retry
+from octo_infra_aws_python.models.execution_plan import ExecutionPlan, PlannedStep
+from octo_infra_aws_python.models.plan_settings import PlanSettings
+from typing import Dict, Iterable, List, Optional
+import math
+
+
+class Planner:
+    """
+    Builds the execution plan of an action out of the steps it would run, without running any of them
+    A step's calls run one after the other, and steps run as soon as their dependencies finished
+    """
+    def __init__(self, action: str, plan_settings: Optional[PlanSettings] = None) -> None:
+        self.__action = action
+        self.__plan_settings = plan_settings or PlanSettings()
+        self.__steps: List[PlannedStep] = []
+        self.__resources: Dict[str, List[str]] = {}
+
+    @property
+    def plan_settings(self) -> PlanSettings:
+        return self.__plan_settings
+
+    def add_step(self, name: str, api_calls: Dict[str, int], resources: Optional[Iterable[str]] = None,
+                 dependencies: Optional[List[str]] = None, wait_seconds: float = 0) -> None:
+        """
+        Adds a step to the plan, depending on the previously added step unless dependencies are given
+        The API calls are the expected amount of calls by service.Operation
+
+        :param name:
+        :param api_calls:
+        :param resources:
+        :param dependencies:
+        :param wait_seconds:
+        :return:
+        """
+        if dependencies is None:
+            dependencies = [self.__steps[-1].name] if self.__steps else []
+        self.__steps.append(PlannedStep(
+            name=name,
+            dependencies=dependencies,
+            resources=list(resources or []),
+            api_calls={operation: calls for operation, calls in api_calls.items() if calls},
+            wait_seconds=wait_seconds
+        ))
+
+    def add_plan(self, plan: ExecutionPlan, dependencies: Optional[List[str]] = None) -> None:
+        """
+        Adds the steps and resources of a planned sub action, with their names prefixed by the sub action
+        Its first steps depend on the given dependencies or on the previously added step
+
+        :param plan:
+        :param dependencies:
+        :return:
+        """
+        if dependencies is None:
+            dependencies = [self.__steps[-1].name] if self.__steps else []
+        prefix = f"{plan.action}."
+        for step in plan.steps:
+            self.__steps.append(step.model_copy(update={
+                "name": prefix + step.name,
+                "dependencies": [prefix + dependency for dependency in step.dependencies] or dependencies
+            }))
+        for resource_type, resource_ids in plan.resources.items():
+            self.add_resources(resource_type, resource_ids)
+
+    def add_resources(self, resource_type: str, resource_ids: Iterable[str]) -> None:
+        self.__resources.setdefault(resource_type, []).extend(resource_ids)
+
+    def last_step(self) -> str:
+        if not self.__steps:
+            raise ValueError(f"No steps planned yet [{self.__action}]")
+        return self.__steps[-1].name
+
+    @staticmethod
+    def chunks(count: int, chunk_size: int) -> int:
+        """
+        Returns the amount of calls sending the given amount of items in chunks
+
+        :param count:
+        :param chunk_size:
+        :return:
+        """
+        return math.ceil(count / chunk_size)
+
+    @staticmethod
+    def polls(wait_seconds: float, interval_seconds: float) -> int:
+        """
+        Returns the amount of polls of a wait expected to take the given seconds, the first poll is immediate
+
+        :param wait_seconds:
+        :param interval_seconds:
+        :return:
+        """
+        return 1 + math.ceil(wait_seconds / interval_seconds)
+
+    def plan(self) -> ExecutionPlan:
+        """
+        Estimates the wall time of every step and of the whole action, and returns the plan
+        Calls are estimated at the configured latency, or at the configured client side rate limit of their
+        service if it is slower
+
+        :return:
+        """
+        policy = Retry.policy()
+        rate_limits = policy.rate_limits if policy else {}
+        api_calls: Dict[str, int] = {}
+        path_seconds: Dict[str, float] = {}
+        steps: List[PlannedStep] = []
+        for step in self.__steps:
+            step_seconds = step.wait_seconds
+            for operation, calls in step.api_calls.items():
+                service_name = operation.split(".", 1)[0]
+                api_calls[service_name] = api_calls.get(service_name, 0) + calls
+                rate_limit = rate_limits.get(service_name)
+                step_seconds += max(calls * self.__plan_settings.call_latency_seconds,
+                                    calls / rate_limit if rate_limit else 0)
+            path_seconds[step.name] = step_seconds + max(
+                (path_seconds.get(dependency, 0) for dependency in step.dependencies), default=0)
+            steps.append(step.model_copy(update={"estimated_seconds": step_seconds}))
+        return ExecutionPlan(
+            action=self.__action,
+            steps=steps,
+            resources=self.__resources,
+            api_calls=api_calls,
+            estimated_seconds=max(path_seconds.values(), default=0)
+        )
@@ -0,0 +1,117 @@
+from __future__ import annotations
+from octo_infra_aws_python.models.actions.regions import FanOutRegions
+from octo_infra_aws_python.models.regions import Region
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+from typing import TYPE_CHECKING, Any, Callable, Dict, FrozenSet, List, Optional, Tuple, TypeVar
+if TYPE_CHECKING:
+    from mypy_boto3_ec2.client import EC2Client
+    from mypy_boto3_ec2.type_defs import DescribeRegionsResultTypeDef
+from logging import Logger, getLogger
+from octo_infra_aws_python.logic.clients import Clients, with_caller_context
+
+A = TypeVar("A")
+T = TypeVar("T")
+
+
+class Regions:
+    """
+    Runs logic actions across regions concurrently, every region uses its own pooled clients
+    """
+    __lock: Lock = Lock()
+    # Enabled regions by the access key they were found with, as every account enables its own regions
+    __enabled_regions: Dict[str, FrozenSet[str]] = {}
+
+    @staticmethod
+    def enabled_regions(refresh: bool = False, logger: Optional[Logger] = None) -> Optional[FrozenSet[str]]:
+        """
+        Returns the names of the regions enabled for the account, found once per credentials unless refreshed
+        so sessions configured for other accounts find their own regions
+        Regions of other partitions (China, GovCloud) are never listed
+
+        :param refresh:
+        :param logger:
+        :return:
+        """
+        logger = logger or getLogger("enabled_regions")
+        try:
+            credentials = Clients.session().get_credentials()
+            access_key = credentials.access_key if credentials is not None else None
+            if access_key and not refresh:
+                with Regions.__lock:
+                    cached_regions = Regions.__enabled_regions.get(access_key)
+                if cached_regions is not None:
+                    return cached_regions
+            ec2_client: EC2Client = Clients.client("ec2")
+            response: DescribeRegionsResultTypeDef = ec2_client.describe_regions(AllRegions=False)
+            enabled_regions = frozenset(region["RegionName"] for region in response["Regions"])
+            if access_key:
+                with Regions.__lock:
+                    Regions.__enabled_regions[access_key] = enabled_regions
+            return enabled_regions
+        except Exception as e:
+            logger.exception(f"Failed finding enabled regions [{str(e)}]")
+        return None
+
+    @staticmethod
+    def fan_out(action: Callable[[A, Logger], T], arguments: List[A], fan_out_regions: FanOutRegions,
+                logger: Optional[Logger] = None) -> Dict[Region, List[Optional[T]]]:
+        """
+        Runs the action with each of the arguments in every region, concurrently across and within regions
+        Any logic find / destroy action can be used, as the clients it uses are scoped to the running region
+        Returns the results by region in the order of the arguments, an action that raised results in None
+
+        :param action:
+        :param arguments:
+        :param fan_out_regions:
+        :param logger:
+        :return:
+        """
+        logger = logger or getLogger("fan_out")
+        regions = list(dict.fromkeys(fan_out_regions.regions))
+        if fan_out_regions.skip_disabled_regions:
+            enabled_regions = Regions.enabled_regions(logger=logger)
+            if enabled_regions is None:
+                logger.warning("Failed finding enabled regions, running in all the given regions")
+            else:
+                skipped = [region.value for region in regions if region.value not in enabled_regions]
+                if skipped:
+                    logger.info(f"Skipping regions not enabled for the account [{skipped}]")
+                regions = [region for region in regions if region.value in enabled_regions]
+        logger.info(f"Running action in regions [Action={getattr(action, '__name__', action)}, "
+                    f"Regions={len(regions)}, Arguments={len(arguments)}]")
+
+        def run_action(region: Region, argument: A) -> Optional[T]:
+            try:
+                with Clients.region_scope(region.value):
+                    return action(argument, logger)
+            except Exception as e:
+                logger.exception(f"Failed running action in region [{region.value}] [{str(e)}]")
+            return None
+
+        def run_region(region: Region) -> List[Optional[T]]:
+            # A pool per region bounds the concurrency of every region on its own
+            with ThreadPoolExecutor(max_workers=fan_out_regions.max_workers_per_region) as executor:
+                return list(executor.map(with_caller_context(lambda argument: run_action(region, argument)),
+                                         arguments))
+
+        with ThreadPoolExecutor(max_workers=fan_out_regions.max_concurrent_regions) as executor:
+            return dict(zip(regions, executor.map(with_caller_context(run_region), regions)))
+
+    @staticmethod
+    def merge(results: Dict[Region, List[Optional[Any]]]) -> List[Tuple[Region, Any]]:
+        """
+        Flattens fan out results into (region, result) pairs
+        List results are expanded into their items, and failed (None) results are dropped
+
+        :param results:
+        :return:
+        """
+        merged: List[Tuple[Region, Any]] = []
+        for region, region_results in results.items():
+            for result in region_results:
+                if isinstance(result, list):
+                    merged.extend((region, item) for item in result)
+                elif result is not None:
+                    merged.append((region, result))
+        return merged
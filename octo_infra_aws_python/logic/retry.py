@@ -0,0 +1,141 @@
+from octo_infra_aws_python.logic.clients import Clients
+from octo_infra_aws_python.models.retry_policy import RetryPolicy
+from octo_infra_aws_python.models.retry_statistics import RetryStatistics
+from threading import Lock
+from typing import Any, Dict, Final, FrozenSet, Optional
+import time
+
+RETRY_HOOK_NAME: Final[str] = "retry"
+THROTTLE_ERROR_CODES: Final[FrozenSet[str]] = frozenset({
+    "Throttling", "ThrottlingException", "ThrottledException", "RequestThrottledException",
+    "TooManyRequestsException", "ProvisionedThroughputExceededException", "TransactionInProgressException",
+    "RequestLimitExceeded", "BandwidthLimitExceeded", "LimitExceededException", "RequestThrottled",
+    "SlowDown", "PriorRequestNotComplete", "EC2ThrottledException"
+})
+
+
+class TokenBucket:
+    """
+    Thread safe token bucket, callers reserve a token and sleep outside the lock until it is due
+    """
+    def __init__(self, rate: float, capacity: float) -> None:
+        self.__rate = rate
+        self.__capacity = capacity
+        self.__tokens = capacity
+        self.__last = time.monotonic()
+        self.__lock = Lock()
+
+    def acquire(self) -> float:
+        """
+        Takes a single token, blocking until it is available
+        Returns the seconds waited
+
+        :return:
+        """
+        with self.__lock:
+            now = time.monotonic()
+            self.__tokens = min(self.__capacity, self.__tokens + (now - self.__last) * self.__rate)
+            self.__last = now
+            self.__tokens -= 1
+            wait_seconds = -self.__tokens / self.__rate if self.__tokens < 0 else 0
+        if wait_seconds:
+            time.sleep(wait_seconds)
+        return wait_seconds
+
+
+class Retry:
+    """
+    Process wide retry and rate limiting policy applied to all the pooled clients
+    """
+    __lock: Lock = Lock()
+    __policy: Optional[RetryPolicy] = None
+    __buckets: Dict[str, TokenBucket] = {}
+    __statistics: Dict[str, RetryStatistics] = {}
+
+    @staticmethod
+    def configure(policy: RetryPolicy) -> None:
+        """
+        Applies the retry policy to all the clients used from now on
+
+        :param policy:
+        :return:
+        """
+        from botocore.config import Config
+        with Retry.__lock:
+            Retry.__policy = policy
+            Retry.__buckets = {service_name: TokenBucket(rate, max(1.0, rate * policy.burst_seconds))
+                               for service_name, rate in policy.rate_limits.items()}
+        Clients.configure(Config(retries={"mode": policy.mode, "total_max_attempts": policy.max_attempts}))
+        Clients.set_hook(RETRY_HOOK_NAME, Retry.__register)
+
+    @staticmethod
+    def policy() -> Optional[RetryPolicy]:
+        return Retry.__policy
+
+    @staticmethod
+    def statistics() -> Dict[str, RetryStatistics]:
+        """
+        Returns a snapshot of the retry statistics by service name
+
+        :return:
+        """
+        with Retry.__lock:
+            return {service_name: statistics.model_copy() for service_name, statistics in Retry.__statistics.items()}
+
+    @staticmethod
+    def reset_statistics() -> None:
+        with Retry.__lock:
+            Retry.__statistics = {}
+
+    @staticmethod
+    def __service_statistics(service_name: str) -> RetryStatistics:
+        # Callers must hold the lock
+        statistics = Retry.__statistics.get(service_name)
+        if statistics is None:
+            statistics = Retry.__statistics[service_name] = RetryStatistics()
+        return statistics
+
+    @staticmethod
+    def __register(client: Any) -> None:
+        """
+        Registers the rate limiting and statistics handlers on a new client
+
+        :param client:
+        :return:
+        """
+        service_name: str = client.meta.service_model.service_name
+        bucket = Retry.__buckets.get(service_name)
+
+        if bucket is not None:
+            def before_send(**kwargs: Any) -> None:
+                # Sent per attempt, so retries are rate limited as well
+                waited = bucket.acquire()
+                if waited:
+                    with Retry.__lock:
+                        Retry.__service_statistics(service_name).rate_limited_seconds += waited
+            client.meta.events.register("before-send", before_send, unique_id=f"{RETRY_HOOK_NAME}-before-send")
+
+        def after_call(parsed: Dict[str, Any], **kwargs: Any) -> None:
+            metadata = parsed.get("ResponseMetadata", {})
+            retries = metadata.get("RetryAttempts", 0)
+            error_code = parsed.get("Error", {}).get("Code")
+            with Retry.__lock:
+                statistics = Retry.__service_statistics(service_name)
+                statistics.calls += 1
+                statistics.retries += retries
+                if error_code or metadata.get("HTTPStatusCode", 200) >= 300:
+                    statistics.failures += 1
+                    if error_code in THROTTLE_ERROR_CODES:
+                        statistics.throttled_failures += 1
+                elif retries:
+                    statistics.recovered += 1
+
+        def after_call_error(**kwargs: Any) -> None:
+            with Retry.__lock:
+                statistics = Retry.__service_statistics(service_name)
+                statistics.calls += 1
+                statistics.failures += 1
+
+        client.meta.events.register("after-call", after_call, unique_id=f"{RETRY_HOOK_NAME}-after-call")
+        client.meta.events.register("after-call-error", after_call_error,
+                                    unique_id=f"{RETRY_HOOK_NAME}-after-call-error")
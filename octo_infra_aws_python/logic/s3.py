@@ -1,17 +1,49 @@
+from __future__ import annotations
 from octo_infra_aws_python.models.actions.s3 import \
-    DownloadObject, DeleteObjects, UploadObject, \
-    ObjectInfo, ObjectExists, FindObjects, LoadObject, SaveObject
-from typing import List, Optional, Iterator
-from mypy_boto3_s3.client import S3Client
-from mypy_boto3_s3.type_defs import \
-    HeadObjectOutputTypeDef, GetObjectOutputTypeDef, PutObjectOutputTypeDef, \
-    DeleteObjectsOutputTypeDef, ListObjectsOutputTypeDef
+    DownloadObject, DeleteObjects, UploadObject, CopyObjects, MoveObjects, \
+    ObjectInfo, ObjectInfos, ObjectExists, FindObjects, LoadObject, SaveObject, SaveObjects, PresignObjects
+from octo_infra_aws_python.models.save_objects_report import SaveObjectsReport
+from typing import TYPE_CHECKING, Any, Callable, Dict, Final, List, Optional, Iterator, Pattern, Tuple
+if TYPE_CHECKING:
+    from mypy_boto3_s3.client import S3Client
+    from mypy_boto3_s3.type_defs import \
+        HeadObjectOutputTypeDef, GetObjectOutputTypeDef, PutObjectOutputTypeDef, \
+        DeleteObjectsOutputTypeDef, ListObjectsOutputTypeDef, \
+        CreateMultipartUploadOutputTypeDef, UploadPartOutputTypeDef, UploadPartCopyOutputTypeDef, \
+        CompletedPartTypeDef, CopySourceTypeDef
+from concurrent.futures import Future, ThreadPoolExecutor
 from http import HTTPStatus
+from threading import BoundedSemaphore, Event, Lock
 from botocore.exceptions import ClientError
-import boto3
+from hashlib import sha1, sha256
+from base64 import b64encode
+from urllib.parse import quote, unquote, urlsplit
+import hmac
 import os
 import fnmatch
+import itertools
+import math
+import random
+import re
+import time
 from logging import Logger, getLogger
+from octo_infra_aws_python.logic.clients import Clients, with_caller_context
+from octo_infra_aws_python.logic.codecs import CODEC_METADATA_KEY, Codecs, in_background
+from octo_infra_aws_python.logic.object_cache import ObjectCache
+from octo_infra_aws_python.logic.retry import THROTTLE_ERROR_CODES
+
+MAX_UPLOAD_PARTS: Final[int] = 10000
+# Max keys of a single delete objects call
+MAX_DELETE_OBJECTS: Final[int] = 1000
+# Head object fields set on the destination of a multipart copy, as a single copy does
+COPIED_HEAD_ARGUMENTS: Final[List[str]] = ["Metadata", "ContentType", "ContentEncoding", "ContentDisposition",
+                                           "ContentLanguage", "CacheControl"]
+# Size of the chunks read from bodies to compress, and from objects to decompress
+CODEC_CHUNK_SIZE: Final[int] = 1024 * 1024
+# Client operations presigned for the http methods of presign_objects
+PRESIGNED_OPERATIONS: Final[Dict[str, str]] = {"GET": "get_object", "PUT": "put_object"}
+# Object paths made of these characters only are the same url encoded, skipping quoting them
+UNENCODED_PATH: Final[Pattern] = re.compile(r"[A-Za-z0-9_.~/-]*")
 
 
 class S3:
@@ -19,6 +51,7 @@ class S3:
     def download_object(download_object: DownloadObject, logger: Optional[Logger] = None) -> bool:
         """
         Tries to download an object from a given bucket to the filesystem
+        With an on disk object cache, the object is served from the cache after revalidation
 
         :param download_object:
         :param logger:
@@ -27,7 +60,12 @@ class S3:
         logger = logger or getLogger("download_object")
         try:
             os.makedirs(os.path.dirname(download_object.output_path), exist_ok=True)
-            client: S3Client = boto3.client("s3")
+            object_cache_policy = ObjectCache.policy()
+            if object_cache_policy and object_cache_policy.directory:
+                ObjectCache.download(ObjectCache.fetch(download_object.bucket_name, download_object.object_path,
+                                                       logger), download_object.output_path)
+                return True
+            client: S3Client = Clients.client("s3")
             client.download_file(
                 Bucket=download_object.bucket_name,
                 Key=download_object.object_path,
@@ -42,6 +80,8 @@ class S3:
     def load_object(load_object: LoadObject, logger: Optional[Logger] = None) -> Optional[bytes]:
         """
         Tries to load an object from a given bucket and returns its raw data
+        Objects saved with a codec are decompressed unless asked otherwise
+        With the object cache enabled, the object is served from the cache after revalidation
 
         :param load_object:
         :param logger:
@@ -49,12 +89,23 @@ class S3:
         """
         logger = logger or getLogger("load_object")
         try:
-            client: S3Client = boto3.client("s3")
+            if ObjectCache.is_enabled():
+                cached = ObjectCache.fetch(load_object.bucket_name, load_object.object_path, logger)
+                codec_name = cached.metadata.get(CODEC_METADATA_KEY)
+                if codec_name and load_object.decompress:
+                    return b"".join(Codecs.get(codec_name).decompress_chunks([cached.read()]))
+                return cached.read()
+            client: S3Client = Clients.client("s3")
             response: GetObjectOutputTypeDef = client.get_object(
                 Bucket=load_object.bucket_name,
                 Key=load_object.object_path
             )
             if response and response["ResponseMetadata"]["HTTPStatusCode"] == HTTPStatus.OK:
+                codec_name = response.get("Metadata", {}).get(CODEC_METADATA_KEY)
+                if codec_name and load_object.decompress:
+                    # The object is downloaded on a worker thread while it is decompressed
+                    return b"".join(Codecs.get(codec_name).decompress_chunks(
+                        in_background(response["Body"].iter_chunks(CODEC_CHUNK_SIZE))))
                 return response["Body"].read()
         except Exception as e:
             logger.exception(f"Failed loading object [{str(e)}]")
@@ -64,6 +115,7 @@ class S3:
     def upload_object(upload_object: UploadObject, logger: Optional[Logger] = None) -> bool:
         """
         Tries to upload a file from filesystem to a given bucket
+        Files uploaded with a codec are compressed while they are uploaded
 
         :param upload_object:
         :param logger:
@@ -73,7 +125,16 @@ class S3:
         try:
             if not os.path.exists(upload_object.input_path):
                 return False
-            client: S3Client = boto3.client("s3")
+            ObjectCache.invalidate(upload_object.bucket_name, upload_object.object_path, logger)
+            if Codecs.resolve(upload_object.codec, upload_object.object_path):
+                with open(upload_object.input_path, "rb") as f:
+                    return S3.save_object(SaveObject(
+                        bucket_name=upload_object.bucket_name,
+                        object_path=upload_object.object_path,
+                        body=f,
+                        codec=upload_object.codec
+                    ), logger)
+            client: S3Client = Clients.client("s3")
             client.upload_file(
                 Filename=upload_object.input_path,
                 Bucket=upload_object.bucket_name,
@@ -87,7 +148,10 @@ class S3:
     @staticmethod
     def save_object(save_object: SaveObject, logger: Optional[Logger] = None) -> bool:
         """
-        Tries to save raw data to a given bucket
+        Tries to save raw data, an iterator of bytes chunks or a readable stream to a given bucket
+        Bodies up to a single part are saved with a single put, larger ones are uploaded in parts while
+        the body is still being read, holding at most max concurrent parts + 1 in memory
+        Bodies saved with a codec are compressed while they are uploaded, the codec is recorded in the metadata
 
         :param save_object:
         :param logger:
@@ -95,16 +159,239 @@ class S3:
         """
         logger = logger or getLogger("save_object")
         try:
-            client: S3Client = boto3.client("s3")
+            return S3.__save_object(save_object, logger)
+        except Exception as e:
+            logger.exception(f"Failed saving object [{str(e)}]")
+        return False
+
+    @staticmethod
+    def __save_object(save_object: SaveObject, logger: Logger) -> bool:
+        ObjectCache.invalidate(save_object.bucket_name, save_object.object_path, logger)
+        client: S3Client = Clients.client("s3")
+        body = save_object.body
+        object_arguments: Dict[str, Any] = {}
+        codec = Codecs.resolve(save_object.codec, save_object.object_path)
+        if codec:
+            # Compresses on a worker thread, overlapping the upload of the compressed parts
+            body = in_background(codec.compress_chunks(S3.__iterate_parts(body, CODEC_CHUNK_SIZE)))
+            object_arguments = {"ContentEncoding": codec.content_encoding,
+                                "Metadata": {CODEC_METADATA_KEY: codec.name}}
+        parts = S3.__iterate_parts(body, save_object.part_size)
+        head = list(itertools.islice(parts, 2))
+        if len(head) < 2:
             response: PutObjectOutputTypeDef = client.put_object(
                 Bucket=save_object.bucket_name,
                 Key=save_object.object_path,
-                Body=save_object.body
+                Body=head[0] if head else b"",
+                **object_arguments
             )
             return response and response["ResponseMetadata"]["HTTPStatusCode"] == HTTPStatus.OK
+        # The head parts are released as soon as they are uploaded
+        parts = itertools.chain(head, parts)
+        del head
+        return S3.__save_multipart(client, save_object, parts, object_arguments, logger)
+
+    @staticmethod
+    def save_objects(save_objects: SaveObjects, logger: Optional[Logger] = None) -> Optional[SaveObjectsReport]:
+        """
+        Saves many objects through a bounded pipeline of concurrent saves, consuming the objects while saving
+        Object paths can be spread over hash based shard prefixes, and throttled saves back off all the saves
+        before they are retried
+        Returns a report of the saved and failed objects
+
+        :param save_objects:
+        :param logger:
+        :return:
+        """
+        logger = logger or getLogger("save_objects")
+        try:
+            start = time.perf_counter()
+            report = SaveObjectsReport()
+            in_flight = BoundedSemaphore(save_objects.max_concurrent_saves)
+            lock = Lock()
+            # Backoff shared by all the saves, doubled on every throttle and reset by every success
+            backoff = {"until": 0.0, "seconds": 0.0}
+
+            def save(save_object: SaveObject) -> None:
+                try:
+                    # Streams and iterators are consumed by the first attempt
+                    retryable = isinstance(save_object.body, (bytes, bytearray, memoryview, str))
+                    for attempt in range(1, save_objects.max_attempts + 1):
+                        wait_seconds = backoff["until"] - time.monotonic()
+                        if wait_seconds > 0:
+                            time.sleep(wait_seconds)
+                            with lock:
+                                report.backoff_seconds += wait_seconds
+                        try:
+                            if not S3.__save_object(save_object, logger):
+                                raise RuntimeError("Unexpected put response")
+                            with lock:
+                                report.saved += 1
+                                backoff["seconds"] = 0.0
+                            return
+                        except ClientError as e:
+                            if e.response.get("Error", {}).get("Code") not in THROTTLE_ERROR_CODES:
+                                raise
+                            with lock:
+                                report.throttles += 1
+                                backoff["seconds"] = min(save_objects.max_backoff_seconds,
+                                                         max(save_objects.backoff_base_seconds,
+                                                             backoff["seconds"] * 2))
+                                backoff["until"] = max(backoff["until"], time.monotonic()
+                                                       + backoff["seconds"] * random.uniform(0.5, 1))
+                            if not retryable or attempt == save_objects.max_attempts:
+                                raise
+                except Exception as e:
+                    logger.warning(f"Failed saving object [{save_object.object_path}] [{str(e)}]")
+                    with lock:
+                        report.failed.append(save_object.object_path)
+                finally:
+                    in_flight.release()
+
+            with ThreadPoolExecutor(max_workers=save_objects.max_concurrent_saves) as executor:
+                save_in_context = with_caller_context(save)
+                for save_object in save_objects.objects:
+                    if save_objects.shard_digits:
+                        save_object = save_object.model_copy(update={"object_path": S3.shard_object_path(
+                            save_object.object_path, save_objects.shard_digits)})
+                    in_flight.acquire()
+                    executor.submit(save_in_context, save_object)
+            report.total_seconds = time.perf_counter() - start
+            report.objects_per_second = report.saved / report.total_seconds if report.total_seconds else 0
+            logger.info(f"Saved objects [Saved={report.saved}] [Failed={len(report.failed)}] "
+                        f"[Throttles={report.throttles}] [Seconds={report.total_seconds:.1f}]")
+            return report
         except Exception as e:
-            logger.exception(f"Failed saving object [{str(e)}]")
-        return False
+            logger.exception(f"Failed saving objects [{str(e)}]")
+        return None
+
+    @staticmethod
+    def shard_object_path(object_path: str, shard_digits: int) -> str:
+        """
+        Returns the object path prefixed by the first hex digits of its hash, as saved by save_objects
+        S3 scales request rates per key prefix, so sharded paths spread the load over partitions
+
+        :param object_path:
+        :param shard_digits:
+        :return:
+        """
+        if not shard_digits:
+            return object_path
+        return f"{sha256(object_path.encode()).hexdigest()[:shard_digits]}/{object_path}"
+
+    @staticmethod
+    def __iterate_parts(body: Any, part_size: int) -> Iterator[bytes]:
+        """
+        Splits the body into parts of the part size, the last part may be smaller
+        Iterators and streams are read lazily, so only the part being filled is held
+
+        :param body:
+        :param part_size:
+        :return:
+        """
+        if isinstance(body, str):
+            body = body.encode()
+        if isinstance(body, (bytes, bytearray, memoryview)):
+            if len(body) <= part_size:
+                yield bytes(body) if not isinstance(body, bytes) else body
+                return
+            view = memoryview(body)
+            for start in range(0, len(view), part_size):
+                yield view[start:start + part_size].tobytes()
+        elif hasattr(body, "read"):
+            while True:
+                # Raw streams may return less than asked for, so a part is read until full or the stream ends
+                part = body.read(part_size) or b""
+                while part and len(part) < part_size:
+                    data = body.read(part_size - len(part))
+                    if not data:
+                        break
+                    part += data
+                if not part:
+                    return
+                yield part
+        else:
+            buffer = bytearray()
+            for chunk in body:
+                buffer += chunk
+                while len(buffer) >= part_size:
+                    with memoryview(buffer) as view:
+                        part = view[:part_size].tobytes()
+                    del buffer[:part_size]
+                    yield part
+            if buffer:
+                yield bytes(buffer)
+
+    @staticmethod
+    def __save_multipart(client: S3Client, save_object: SaveObject, parts: Iterator[bytes],
+                         object_arguments: Dict[str, Any], logger: Logger) -> bool:
+        """
+        Uploads the parts concurrently while they are produced, the producer waits while max concurrent parts
+        are in flight, and the upload is aborted on any failure
+
+        :param client:
+        :param save_object:
+        :param parts:
+        :param object_arguments:
+        :param logger:
+        :return:
+        """
+        upload: CreateMultipartUploadOutputTypeDef = client.create_multipart_upload(
+            Bucket=save_object.bucket_name,
+            Key=save_object.object_path,
+            **object_arguments
+        )
+        upload_id = upload["UploadId"]
+        in_flight = BoundedSemaphore(save_object.max_concurrent_parts)
+        failed = Event()
+
+        def upload_part(part_number: int, part: bytes) -> CompletedPartTypeDef:
+            try:
+                response: UploadPartOutputTypeDef = client.upload_part(
+                    Bucket=save_object.bucket_name,
+                    Key=save_object.object_path,
+                    UploadId=upload_id,
+                    PartNumber=part_number,
+                    Body=part
+                )
+                return {"PartNumber": part_number, "ETag": response["ETag"]}
+            except Exception:
+                failed.set()
+                raise
+            finally:
+                in_flight.release()
+
+        try:
+            futures: List[Future] = []
+            with ThreadPoolExecutor(max_workers=save_object.max_concurrent_parts) as executor:
+                upload_part_in_context = with_caller_context(upload_part)
+                for part_number, part in enumerate(parts, start=1):
+                    if part_number > MAX_UPLOAD_PARTS:
+                        raise ValueError(f"Object has more than {MAX_UPLOAD_PARTS} parts, increase the part size")
+                    in_flight.acquire()
+                    if failed.is_set():
+                        in_flight.release()
+                        break
+                    futures.append(executor.submit(upload_part_in_context, part_number, part))
+            completed_parts = [future.result() for future in futures]
+            client.complete_multipart_upload(
+                Bucket=save_object.bucket_name,
+                Key=save_object.object_path,
+                UploadId=upload_id,
+                MultipartUpload={"Parts": completed_parts}
+            )
+            logger.info(f"Saved object in parts [{save_object.object_path}] [Parts={len(completed_parts)}]")
+            return True
+        except Exception:
+            try:
+                client.abort_multipart_upload(
+                    Bucket=save_object.bucket_name,
+                    Key=save_object.object_path,
+                    UploadId=upload_id
+                )
+            except Exception as e:
+                logger.warning(f"Failed aborting multipart upload [{upload_id}] [{str(e)}]")
+            raise
 
     @staticmethod
     def delete_objects(delete_objects: DeleteObjects, logger: Optional[Logger] = None) -> bool:
@@ -117,7 +404,9 @@ class S3:
         """
         logger = logger or getLogger("delete_objects")
         try:
-            client: S3Client = boto3.client("s3")
+            for object_path in delete_objects.objects_path:
+                ObjectCache.invalidate(delete_objects.bucket_name, object_path, logger)
+            client: S3Client = Clients.client("s3")
             response: DeleteObjectsOutputTypeDef = client.delete_objects(
                 Bucket=delete_objects.bucket_name,
                 Delete={
@@ -131,6 +420,195 @@ class S3:
             logger.exception(f"Failed deleting object [{str(e)}]")
         return False
 
+    @staticmethod
+    def copy_objects(copy_objects: CopyObjects, logger: Optional[Logger] = None) -> bool:
+        """
+        Copies the found objects under the destination prefix, server side, without transferring them through
+        this host. Objects over the multipart threshold are copied in parts, concurrently
+        Returns whether all the objects were copied
+
+        :param copy_objects:
+        :param logger:
+        :return:
+        """
+        logger = logger or getLogger("copy_objects")
+        try:
+            return S3.__copy_objects(copy_objects, False, logger)
+        except Exception as e:
+            logger.exception(f"Failed copying objects [{str(e)}]")
+        return False
+
+    @staticmethod
+    def move_objects(move_objects: MoveObjects, logger: Optional[Logger] = None) -> bool:
+        """
+        Copies the found objects under the destination prefix server side, then deletes the sources of the
+        confirmed copies in batches while the rest are still being copied. Sources of failed copies are kept
+        Returns whether all the objects were moved
+
+        :param move_objects:
+        :param logger:
+        :return:
+        """
+        logger = logger or getLogger("move_objects")
+        try:
+            destination_bucket_name = move_objects.destination_bucket_name or move_objects.source.bucket_name
+            source_prefix = move_objects.source.base_search_path
+            destination_prefix = move_objects.destination_prefix
+            # Moving under a prefix the listing covers would find the copies again, and moving to an enclosing
+            # prefix may copy objects onto sources not yet moved
+            if destination_bucket_name == move_objects.source.bucket_name and \
+                    (destination_prefix.startswith(source_prefix) or source_prefix.startswith(destination_prefix)):
+                logger.error(f"Can not move objects between overlapping prefixes "
+                             f"[{source_prefix}] [{destination_prefix}]")
+                return False
+            return S3.__copy_objects(move_objects, True, logger)
+        except Exception as e:
+            logger.exception(f"Failed moving objects [{str(e)}]")
+        return False
+
+    @staticmethod
+    def __copy_objects(copy_objects: CopyObjects, delete_sources: bool, logger: Logger) -> bool:
+        """
+        Copies the objects concurrently, at most max concurrent copies in flight
+        When deleting sources, every batch of confirmed copies is deleted as soon as it fills up
+
+        :param copy_objects:
+        :param delete_sources:
+        :param logger:
+        :return:
+        """
+        objects = S3.find_objects_compact(copy_objects.source, logger)
+        if objects is None:
+            return False
+        source_bucket_name = copy_objects.source.bucket_name
+        destination_bucket_name = copy_objects.destination_bucket_name or source_bucket_name
+        base_search_path = copy_objects.source.base_search_path
+        client: S3Client = Clients.client("s3")
+        in_flight = BoundedSemaphore(copy_objects.max_concurrent_copies)
+        lock = Lock()
+        confirmed: List[str] = []
+        failures: List[str] = []
+
+        def delete_batch(batch: List[str]) -> None:
+            try:
+                for source_path in batch:
+                    ObjectCache.invalidate(source_bucket_name, source_path, logger)
+                response: DeleteObjectsOutputTypeDef = client.delete_objects(
+                    Bucket=source_bucket_name,
+                    Delete={"Objects": [{"Key": key} for key in batch], "Quiet": True}
+                )
+                failed_paths = [error["Key"] for error in response.get("Errors", [])]
+            except Exception as e:
+                logger.warning(f"Failed deleting moved objects [{str(e)}]")
+                failed_paths = batch
+            if failed_paths:
+                with lock:
+                    failures.extend(failed_paths)
+
+        def copy(source_path: str, size: int) -> None:
+            batch: List[str] = []
+            try:
+                destination_path = copy_objects.destination_prefix + source_path[len(base_search_path):]
+                ObjectCache.invalidate(destination_bucket_name, destination_path, logger)
+                if size > copy_objects.multipart_threshold:
+                    S3.__copy_multipart(client, copy_objects, source_path, size, destination_bucket_name,
+                                        destination_path, logger)
+                else:
+                    client.copy_object(
+                        Bucket=destination_bucket_name,
+                        Key=destination_path,
+                        CopySource={"Bucket": source_bucket_name, "Key": source_path}
+                    )
+                if delete_sources:
+                    with lock:
+                        confirmed.append(source_path)
+                        if len(confirmed) >= MAX_DELETE_OBJECTS:
+                            batch = confirmed[:]
+                            confirmed.clear()
+            except Exception as e:
+                logger.warning(f"Failed copying object [{source_path}] [{str(e)}]")
+                with lock:
+                    failures.append(source_path)
+            finally:
+                in_flight.release()
+            if batch:
+                delete_batch(batch)
+
+        with ThreadPoolExecutor(max_workers=copy_objects.max_concurrent_copies) as executor:
+            copy_in_context = with_caller_context(copy)
+            for source_path, size in zip(objects.object_paths, objects.object_sizes):
+                in_flight.acquire()
+                executor.submit(copy_in_context, source_path, size)
+        if confirmed:
+            delete_batch(confirmed)
+        logger.info(f"Copied objects [{destination_bucket_name}/{copy_objects.destination_prefix}] "
+                    f"[Objects={len(objects)}] [Failed={len(failures)}]")
+        return not failures
+
+    @staticmethod
+    def __copy_multipart(client: S3Client, copy_objects: CopyObjects, source_path: str, size: int,
+                         destination_bucket_name: str, destination_path: str, logger: Logger) -> None:
+        """
+        Copies an object in parts concurrently, server side, and aborts the copy on any failure
+        The metadata of the source is not copied by multipart copies, so it is set on the upload
+
+        :param client:
+        :param copy_objects:
+        :param source_path:
+        :param size:
+        :param destination_bucket_name:
+        :param destination_path:
+        :param logger:
+        :return:
+        """
+        copy_source: CopySourceTypeDef = {"Bucket": copy_objects.source.bucket_name, "Key": source_path}
+        head: HeadObjectOutputTypeDef = client.head_object(**copy_source)
+        object_arguments: Dict[str, Any] = {argument: head.get(argument) for argument in COPIED_HEAD_ARGUMENTS
+                                            if head.get(argument)}
+        part_size = max(copy_objects.part_size, math.ceil(size / MAX_UPLOAD_PARTS))
+        upload: CreateMultipartUploadOutputTypeDef = client.create_multipart_upload(
+            Bucket=destination_bucket_name,
+            Key=destination_path,
+            **object_arguments
+        )
+        upload_id = upload["UploadId"]
+
+        def copy_part(part_number: int) -> CompletedPartTypeDef:
+            start = (part_number - 1) * part_size
+            response: UploadPartCopyOutputTypeDef = client.upload_part_copy(
+                Bucket=destination_bucket_name,
+                Key=destination_path,
+                UploadId=upload_id,
+                PartNumber=part_number,
+                CopySource=copy_source,
+                CopySourceRange=f"bytes={start}-{min(start + part_size, size) - 1}",
+                # The source must not change between the parts
+                CopySourceIfMatch=head["ETag"]
+            )
+            return {"PartNumber": part_number, "ETag": response["CopyPartResult"]["ETag"]}
+
+        try:
+            with ThreadPoolExecutor(max_workers=copy_objects.max_concurrent_parts) as executor:
+                completed_parts = list(executor.map(with_caller_context(copy_part),
+                                                    range(1, math.ceil(size / part_size) + 1)))
+            client.complete_multipart_upload(
+                Bucket=destination_bucket_name,
+                Key=destination_path,
+                UploadId=upload_id,
+                MultipartUpload={"Parts": completed_parts}
+            )
+            logger.info(f"Copied object in parts [{destination_path}] [Parts={len(completed_parts)}]")
+        except Exception:
+            try:
+                client.abort_multipart_upload(
+                    Bucket=destination_bucket_name,
+                    Key=destination_path,
+                    UploadId=upload_id
+                )
+            except Exception as e:
+                logger.warning(f"Failed aborting multipart copy [{upload_id}] [{str(e)}]")
+            raise
+
     @staticmethod
     def find_objects(find_objects: FindObjects, logger: Optional[Logger] = None) -> Optional[List[ObjectInfo]]:
         """
@@ -140,9 +618,22 @@ class S3:
         :param logger:
         :return:
         """
-        logger = logger or getLogger("find_objects")
+        objects = S3.find_objects_compact(find_objects, logger or getLogger("find_objects"))
+        return objects.to_object_infos() if objects is not None else None
+
+    @staticmethod
+    def find_objects_compact(find_objects: FindObjects, logger: Optional[Logger] = None) -> Optional[ObjectInfos]:
+        """
+        Tries to find all objects fitting the given filters on the bucket
+        Returns the objects in a compact columnar result, cheaper than find_objects on large listings
+
+        :param find_objects:
+        :param logger:
+        :return:
+        """
+        logger = logger or getLogger("find_objects_compact")
         try:
-            client: S3Client = boto3.client("s3")
+            client: S3Client = Clients.client("s3")
             paginator = client.get_paginator('list_objects')
             params = {
                 "Bucket": find_objects.bucket_name,
@@ -153,34 +644,172 @@ class S3:
             page_iterator: Iterator[ListObjectsOutputTypeDef] = paginator.paginate(
                 **params
             )
-            objects: List[ObjectInfo] = []
+            objects = ObjectInfos(find_objects.bucket_name)
             for page in page_iterator:
                 if page["ResponseMetadata"]["HTTPStatusCode"] == HTTPStatus.OK:
                     if find_objects.only_prefixes:
                         for prefix in page.get("CommonPrefixes", []):
                             if len(find_objects.filters) == 0 or \
                                     any(fnmatch.fnmatch(prefix["Prefix"], pattern) for pattern in find_objects.filters):
-                                objects.append(ObjectInfo(
-                                    bucket_name=find_objects.bucket_name,
-                                    object_path=prefix["Prefix"],
-                                    object_size=0,
-                                    is_folder=prefix["Prefix"].endswith("/")
-                                ))
+                                objects.append(prefix["Prefix"], 0)
                     else:
                         for obj in page.get("Contents", []):
                             if len(find_objects.filters) == 0 or \
                                     any(fnmatch.fnmatch(obj["Key"], pattern) for pattern in find_objects.filters):
-                                objects.append(ObjectInfo(
-                                    bucket_name=find_objects.bucket_name,
-                                    object_path=obj["Key"],
-                                    object_size=obj["Size"],
-                                    is_folder=obj["Key"].endswith("/")
-                                ))
+                                objects.append(obj["Key"], obj["Size"])
             return objects
         except Exception as e:
             logger.exception(f"Failed finding objects [{str(e)}]")
         return None
 
+    @staticmethod
+    def presign_objects(presign_objects: PresignObjects,
+                        logger: Optional[Logger] = None) -> Optional[Dict[str, str]]:
+        """
+        Tries to presign urls for many objects of a bucket
+        Returns the presigned urls by object path
+
+        :param presign_objects:
+        :param logger:
+        :return:
+        """
+        logger = logger or getLogger("presign_objects")
+        try:
+            return dict(S3.iterate_presigned_urls(presign_objects, logger))
+        except Exception as e:
+            logger.exception(f"Failed presigning objects [{str(e)}]")
+        return None
+
+    @staticmethod
+    def iterate_presigned_urls(presign_objects: PresignObjects,
+                               logger: Optional[Logger] = None) -> Iterator[Tuple[str, str]]:
+        """
+        Yields the object paths with their presigned urls, signed while iterated, raises on failures
+        The first url is presigned by the client, the others are signed with the same credentials, signing key
+        and time, so every url costs two hashes instead of a client call
+        Falls back to presigning every url with the client if the first url can not be signed the same way
+
+        :param presign_objects:
+        :param logger:
+        :return:
+        """
+        logger = logger or getLogger("iterate_presigned_urls")
+        client: S3Client = Clients.client("s3")
+        operation = PRESIGNED_OPERATIONS[presign_objects.method]
+
+        def presign(object_path: str) -> str:
+            return client.generate_presigned_url(
+                operation,
+                Params={"Bucket": presign_objects.bucket_name, "Key": object_path},
+                ExpiresIn=presign_objects.expires_in
+            )
+
+        sign: Optional[Callable[[str], str]] = None
+        for object_path in presign_objects.object_paths:
+            if sign is not None:
+                yield object_path, sign(object_path)
+                continue
+            url = presign(object_path)
+            sign = S3.__presigner(url, presign_objects.bucket_name, object_path, presign_objects.method)
+            if sign is None:
+                logger.debug(f"Presigning every url with the client [{presign_objects.bucket_name}]")
+                sign = presign
+            yield object_path, url
+
+    @staticmethod
+    def __presigner(url: str, bucket_name: str, object_path: str, method: str) -> Optional[Callable[[str], str]]:
+        """
+        Returns a function signing urls of other objects of the bucket like the given presigned url
+        Only the object path changes between the signed strings, so the signing key and the hmac state keyed
+        with it are derived once
+        Returns None if the url is not signed the expected way
+
+        :param url:
+        :param bucket_name:
+        :param object_path:
+        :param method:
+        :return:
+        """
+        parts = urlsplit(url)
+        encoded_path = quote(object_path, safe="/~")
+        if not encoded_path or not parts.path.endswith(encoded_path):
+            return None
+        session_credentials = Clients.session().get_credentials()
+        if session_credentials is None:
+            return None
+        credentials = session_credentials.get_frozen_credentials()
+        path_prefix = parts.path[:len(parts.path) - len(encoded_path)]
+        query_parameters = parts.query.split("&")
+        parameters = dict(parameter.split("=", 1) for parameter in query_parameters if "=" in parameter)
+        if parameters.get("X-Amz-Algorithm") == "AWS4-HMAC-SHA256":
+            signature_parameter = "X-Amz-Signature"
+            signature = S3.__sigv4_signature(method, parts.netloc, path_prefix, query_parameters, parameters,
+                                             credentials)
+        elif "Signature" in parameters and "Expires" in parameters:
+            signature_parameter = "Signature"
+            signature = S3.__sigv2_signature(method, bucket_name, parameters, credentials)
+        else:
+            return None
+        if signature is None:
+            return None
+        origin = f"{parts.scheme}://{parts.netloc}{path_prefix}"
+        query_head, _, query_tail = f"?{parts.query}".partition(
+            f"{signature_parameter}={parameters[signature_parameter]}")
+
+        def sign(path: str) -> str:
+            encoded = path if UNENCODED_PATH.fullmatch(path) else quote(path, safe="/~")
+            return f"{origin}{encoded}{query_head}{signature_parameter}={signature(encoded)}{query_tail}"
+
+        # The client signature of the given url checks every part of the signed string
+        return sign if sign(object_path) == url else None
+
+    @staticmethod
+    def __sigv4_signature(method: str, host: str, path_prefix: str, query_parameters: List[str],
+                          parameters: Dict[str, str], credentials: Any) -> Optional[Callable[[str], str]]:
+        if parameters.get("X-Amz-SignedHeaders") != "host":
+            return None
+        scope = unquote(parameters.get("X-Amz-Credential", "")).split("/")
+        if len(scope) != 5 or scope[0] != credentials.access_key:
+            return None
+        _, date, region, service, _ = scope
+        signing_key = f"AWS4{credentials.secret_key}".encode()
+        for scope_part in (date, region, service, "aws4_request"):
+            signing_key = hmac.new(signing_key, scope_part.encode(), sha256).digest()
+        keyed = hmac.new(signing_key, digestmod=sha256)
+        # Presigned urls sign their query parameters sorted, all but the signature
+        canonical_query = "&".join(sorted(parameter for parameter in query_parameters
+                                          if not parameter.startswith("X-Amz-Signature=")))
+        canonical_suffix = f"\n{canonical_query}\nhost:{host}\n\nhost\nUNSIGNED-PAYLOAD"
+        canonical_prefix = f"{method}\n{path_prefix}"
+        signed_prefix = f"AWS4-HMAC-SHA256\n{parameters['X-Amz-Date']}\n{date}/{region}/{service}/aws4_request\n"
+
+        def signature(encoded_path: str) -> str:
+            signing = keyed.copy()
+            signing.update((signed_prefix + sha256(
+                f"{canonical_prefix}{encoded_path}{canonical_suffix}".encode()).hexdigest()).encode())
+            return signing.hexdigest()
+
+        return signature
+
+    @staticmethod
+    def __sigv2_signature(method: str, bucket_name: str, parameters: Dict[str, str],
+                          credentials: Any) -> Optional[Callable[[str], str]]:
+        if unquote(parameters.get("AWSAccessKeyId", "")) != credentials.access_key:
+            return None
+        keyed = hmac.new(credentials.secret_key.encode(), digestmod=sha1)
+        signed_prefix = f"{method}\n\n\n{parameters['Expires']}\n"
+        if credentials.token:
+            signed_prefix += f"x-amz-security-token:{credentials.token}\n"
+        signed_prefix += f"/{bucket_name}/"
+
+        def signature(encoded_path: str) -> str:
+            signing = keyed.copy()
+            signing.update((signed_prefix + encoded_path).encode())
+            # Url encodes the base64 signature
+            return b64encode(signing.digest()).decode().replace("+", "%2B").replace("/", "%2F").replace("=", "%3D")
+
+        return signature
+
     @staticmethod
     def object_exists(object_exists: ObjectExists, logger: Optional[Logger] = None) -> bool:
         """
@@ -192,7 +821,7 @@ class S3:
         """
         logger = logger or getLogger("object_exists")
         try:
-            client: S3Client = boto3.client("s3")
+            client: S3Client = Clients.client("s3")
             response: HeadObjectOutputTypeDef = client.head_object(
                 Bucket=object_exists.bucket_name,
                 Key=object_exists.object_path
@@ -1,14 +1,20 @@
+from __future__ import annotations
 from octo_infra_aws_python.models.service_instance import ServiceInstance
 from octo_infra_aws_python.models.actions.service_discovery import FindServiceInstance
-from typing import Optional
-from mypy_boto3_servicediscovery.client import ServiceDiscoveryClient
-from mypy_boto3_servicediscovery.type_defs import DiscoverInstancesResponseTypeDef
-import boto3
+from typing import TYPE_CHECKING, Optional
+if TYPE_CHECKING:
+    from mypy_boto3_servicediscovery.client import ServiceDiscoveryClient
+    from mypy_boto3_servicediscovery.type_defs import DiscoverInstancesResponseTypeDef
 from logging import Logger, getLogger
+from octo_infra_aws_python.logic.clients import Clients
+from octo_infra_aws_python.logic.single_flight import single_flight
+from octo_infra_aws_python.logic.describe_cache import persistent_cache
 
 
 class ServiceDiscovery:
     @staticmethod
+    @single_flight
+    @persistent_cache("service_instance", ServiceInstance)
     def find_service_instance(find_service_instance: FindServiceInstance, logger: Optional[Logger] = None) -> Optional[ServiceInstance]:
         """
         Tries to find an instance for a given filter
@@ -19,8 +25,8 @@ class ServiceDiscovery:
         """
         logger = logger or getLogger("find_service_instance")
         try:
-            service_discovery_client: ServiceDiscoveryClient = boto3.client("servicediscovery",
-                                                                            region_name=find_service_instance.region)
+            service_discovery_client: ServiceDiscoveryClient = Clients.client("servicediscovery",
+                                                                              region_name=find_service_instance.region)
             instances: DiscoverInstancesResponseTypeDef = service_discovery_client.discover_instances(
                 NamespaceName=find_service_instance.namespace,
                 ServiceName=find_service_instance.service,
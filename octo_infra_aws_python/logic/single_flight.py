@@ -0,0 +1,109 @@
+from concurrent.futures import Future
+from functools import wraps
+from logging import Logger
+from threading import Lock
+from typing import Any, Callable, Dict, Hashable, Tuple, TypeVar
+
+from pydantic import BaseModel
+
+from octo_infra_aws_python.logic.clients import Clients
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """
+    Shares a single in flight call, and its result, between concurrent identical calls
+    Calls are shared while in flight only, a call made after the shared call finished runs again
+    """
+    __lock: Lock = Lock()
+    __calls: Dict[Hashable, Future] = {}
+
+    @staticmethod
+    def key(func: Callable[..., Any], args: Tuple[Any, ...], kwargs: Dict[str, Any]) -> Hashable:
+        """
+        Returns the key identifying identical calls of the function, the action models are keyed by their values
+        Loggers are ignored, and the region scope of the caller is part of the key
+
+        :param func:
+        :param args:
+        :param kwargs:
+        :return:
+        """
+        def value_key(value: Any) -> Hashable:
+            if isinstance(value, BaseModel):
+                return type(value).__qualname__, value.model_dump_json()
+            return value
+
+        return (func.__module__, func.__qualname__, Clients.region(),
+                tuple(value_key(arg) for arg in args if not isinstance(arg, Logger)),
+                tuple(sorted((name, value_key(value)) for name, value in kwargs.items() if name != "logger")))
+
+    @staticmethod
+    def join(key: Hashable) -> Tuple[Future, bool]:
+        """
+        Returns the future of the in flight call of the key, and whether the caller must lead (run) the call
+
+        :param key:
+        :return:
+        """
+        with SingleFlight.__lock:
+            future = SingleFlight.__calls.get(key)
+            if future is not None:
+                return future, False
+            future = SingleFlight.__calls[key] = Future()
+            return future, True
+
+    @staticmethod
+    def lead(key: Hashable, future: Future, func: Callable[..., T], *args: Any, **kwargs: Any) -> None:
+        """
+        Runs the call of the key and shares its result, or exception, with all the joined callers
+
+        :param key:
+        :param future:
+        :param func:
+        :param args:
+        :param kwargs:
+        :return:
+        """
+        try:
+            result = func(*args, **kwargs)
+        except BaseException as e:
+            with SingleFlight.__lock:
+                SingleFlight.__calls.pop(key, None)
+            future.set_exception(e)
+            return
+        with SingleFlight.__lock:
+            SingleFlight.__calls.pop(key, None)
+        future.set_result(result)
+
+    @staticmethod
+    def do(func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """
+        Calls the function, or waits on an identical call already in flight
+
+        :param func:
+        :param args:
+        :param kwargs:
+        :return:
+        """
+        key = SingleFlight.key(func, args, kwargs)
+        future, leader = SingleFlight.join(key)
+        if leader:
+            SingleFlight.lead(key, future, func, *args, **kwargs)
+        return future.result()
+
+
+def single_flight(func: Callable[..., T]) -> Callable[..., T]:
+    """
+    Makes concurrent calls of a logic action with identical action models share a single call
+
+    :param func:
+    :return:
+    """
+    @wraps(func)
+    def wrapper(*args: Any, **kwargs: Any) -> T:
+        return SingleFlight.do(func, *args, **kwargs)
+    # Lets the async facade join the in flight calls without holding an executor thread
+    setattr(wrapper, "single_flight", True)
+    return wrapper
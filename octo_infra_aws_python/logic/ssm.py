@@ -1,11 +1,22 @@
-from octo_infra_aws_python.models.actions.ssm import CreateSSMParameter, DestroySSMParameter, FindSSMParameter
-from typing import Optional
-import boto3
+from __future__ import annotations
+from octo_infra_aws_python.models.actions.ssm import CreateSSMParameter, DestroySSMParameter, FindSSMParameter, \
+    DestroySSMParameters, DestroySSMPath
+from octo_infra_aws_python.models.destroy_ssm_parameters_report import DestroySSMParametersReport
+from typing import TYPE_CHECKING, Final, Iterable, List, Optional
+from concurrent.futures import ThreadPoolExecutor
 from http import HTTPStatus
-from mypy_boto3_ssm.client import SSMClient
-from mypy_boto3_ssm.literals import ParameterTypeType
-from mypy_boto3_ssm.type_defs import PutParameterResultTypeDef, GetParameterResultTypeDef, DescribeParametersResultTypeDef
+from threading import BoundedSemaphore, Lock
+if TYPE_CHECKING:
+    from mypy_boto3_ssm.client import SSMClient
+    from mypy_boto3_ssm.literals import ParameterTypeType
+    from mypy_boto3_ssm.type_defs import PutParameterResultTypeDef, GetParameterResultTypeDef, DescribeParametersResultTypeDef
+    from mypy_boto3_ssm.type_defs import DeleteParametersResultTypeDef, GetParametersByPathResultTypeDef
 from logging import Logger, getLogger
+from octo_infra_aws_python.logic.clients import Clients, with_caller_context
+from octo_infra_aws_python.logic.single_flight import single_flight
+
+# Max names of a single delete parameters call, and max parameters of a get parameters by path page
+MAX_DELETE_PARAMETERS: Final[int] = 10
 
 
 class SSM:
@@ -21,7 +32,7 @@ class SSM:
         logger = logger or getLogger("create_ssm_parameter")
         try:
             logger.info(f"Starting creation of SSM parameter [{create_ssm_parameter.name}]")
-            ssm_client: SSMClient = boto3.client("ssm")
+            ssm_client: SSMClient = Clients.client("ssm")
             key_type: ParameterTypeType = "String"
             if create_ssm_parameter.encrypt:
                 key_type = "SecureString"
@@ -49,13 +60,117 @@ class SSM:
         logger = logger or getLogger("destroy_ssm_parameter")
         try:
             logger.info(f"Starting to destroy SSM parameter [{destroy_ssm_parameter.name}]")
-            ssm_client: SSMClient = boto3.client("ssm")
+            ssm_client: SSMClient = Clients.client("ssm")
             ssm_client.delete_parameter(Name=destroy_ssm_parameter.name)
             logger.info(f"SSM Parameter destroyed [{destroy_ssm_parameter.name}]")
         except Exception as e:
             logger.exception(f"Failed destroying SSM Parameter [{str(e)}]")
 
     @staticmethod
+    def destroy_ssm_parameters(destroy_ssm_parameters: DestroySSMParameters,
+                               logger: Optional[Logger] = None) -> Optional[DestroySSMParametersReport]:
+        """
+        Deletes SSM parameters in batches of delete parameters calls, running concurrently
+        Returns a report of the deleted, not found and failed parameters
+
+        :param destroy_ssm_parameters:
+        :param logger:
+        :return:
+        """
+        logger = logger or getLogger("destroy_ssm_parameters")
+        try:
+            names = list(dict.fromkeys(destroy_ssm_parameters.names))
+            logger.info(f"Starting to destroy SSM parameters [Parameters={len(names)}]")
+            report = SSM.__destroy_batches((names[index:index + MAX_DELETE_PARAMETERS]
+                                            for index in range(0, len(names), MAX_DELETE_PARAMETERS)),
+                                           destroy_ssm_parameters.max_concurrent_batches, logger)
+            logger.info(f"SSM Parameters destroyed [Deleted={len(report.deleted)}] "
+                        f"[Not Found={len(report.not_found)}] [Failed={len(report.failed)}]")
+            return report
+        except Exception as e:
+            logger.exception(f"Failed destroying SSM Parameters [{str(e)}]")
+        return None
+
+    @staticmethod
+    def destroy_ssm_path(destroy_ssm_path: DestroySSMPath,
+                         logger: Optional[Logger] = None) -> Optional[DestroySSMParametersReport]:
+        """
+        Deletes the SSM parameters under a hierarchy path, every listed page is deleted in a single batch
+        while the next pages are still listed
+        Returns a report of the deleted, not found and failed parameters, if listing fails the listed
+        parameters are still deleted and the listing error is reported
+
+        :param destroy_ssm_path:
+        :param logger:
+        :return:
+        """
+        logger = logger or getLogger("destroy_ssm_path")
+        try:
+            logger.info(f"Starting to destroy SSM path [{destroy_ssm_path.path}]")
+            ssm_client: SSMClient = Clients.client("ssm")
+            pages: Iterable[GetParametersByPathResultTypeDef] = ssm_client.get_paginator(
+                "get_parameters_by_path"
+            ).paginate(
+                Path=destroy_ssm_path.path,
+                Recursive=destroy_ssm_path.recursive,
+                PaginationConfig={"PageSize": MAX_DELETE_PARAMETERS}
+            )
+            report = SSM.__destroy_batches(([parameter["Name"] for parameter in page["Parameters"]]
+                                            for page in pages),
+                                           destroy_ssm_path.max_concurrent_batches, logger)
+            if report.listing_error is not None:
+                logger.error(f"Failed listing SSM Path [{destroy_ssm_path.path}] [{report.listing_error}]")
+            logger.info(f"SSM Path destroyed [{destroy_ssm_path.path}] [Deleted={len(report.deleted)}] "
+                        f"[Failed={len(report.failed)}]")
+            return report
+        except Exception as e:
+            logger.exception(f"Failed destroying SSM Path [{str(e)}]")
+        return None
+
+    @staticmethod
+    def __destroy_batches(batches: Iterable[List[str]], max_concurrent_batches: int,
+                          logger: Logger) -> DestroySSMParametersReport:
+        """
+        Deletes the batches of names concurrently, at most max concurrent batches in flight
+        The batches are consumed while deleting, so listed pages are deleted as they come
+        A failure producing the batches is reported once the batches produced before it are deleted
+
+        :param batches:
+        :param max_concurrent_batches:
+        :param logger:
+        :return:
+        """
+        ssm_client: SSMClient = Clients.client("ssm")
+        report = DestroySSMParametersReport()
+        in_flight = BoundedSemaphore(max_concurrent_batches)
+        lock = Lock()
+
+        def destroy(batch: List[str]) -> None:
+            try:
+                response: DeleteParametersResultTypeDef = ssm_client.delete_parameters(Names=batch)
+                with lock:
+                    report.deleted.extend(response.get("DeletedParameters", []))
+                    report.not_found.extend(response.get("InvalidParameters", []))
+            except Exception as e:
+                logger.warning(f"Failed destroying SSM Parameters [{', '.join(batch)}] [{str(e)}]")
+                with lock:
+                    report.failed.update((name, str(e)) for name in batch)
+            finally:
+                in_flight.release()
+
+        with ThreadPoolExecutor(max_workers=max_concurrent_batches) as executor:
+            destroy_in_context = with_caller_context(destroy)
+            try:
+                for batch in batches:
+                    if batch:
+                        in_flight.acquire()
+                        executor.submit(destroy_in_context, batch)
+            except Exception as e:
+                report.listing_error = str(e)
+        return report
+
+    @staticmethod
+    @single_flight
     def find_ssm_parameter(find_ssm_parameter: FindSSMParameter, logger: Optional[Logger] = None) -> Optional[str]:
         """
         Finds an SSM parameter from the given info
@@ -67,7 +182,7 @@ class SSM:
         logger = logger or getLogger("find_ssm_parameter")
         try:
             logger.info(f"Starting to search for SSM parameter [{find_ssm_parameter.name}]")
-            ssm_client: SSMClient = boto3.client("ssm")
+            ssm_client: SSMClient = Clients.client("ssm")
             response: GetParameterResultTypeDef = ssm_client.get_parameter(Name=find_ssm_parameter.name,
                                                                            WithDecryption=find_ssm_parameter.decrpyt)
             if response["ResponseMetadata"]["HTTPStatusCode"] == HTTPStatus.OK and response["Parameter"]:
@@ -89,7 +204,7 @@ class SSM:
         logger = logger or getLogger("has_ssm_parameter")
         try:
             logger.info(f"Starting to search for SSM parameter [{find_ssm_parameter.name}]")
-            ssm_client: SSMClient = boto3.client("ssm")
+            ssm_client: SSMClient = Clients.client("ssm")
             response: DescribeParametersResultTypeDef = ssm_client.describe_parameters(ParameterFilters=[
                 {
                     "Key": "Name",
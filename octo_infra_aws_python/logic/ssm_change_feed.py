@@ -0,0 +1,198 @@
+from __future__ import annotations
+from octo_infra_aws_python.logic.clients import Clients, with_caller_context
+from octo_infra_aws_python.models.actions.ssm import WatchSSMPath
+from octo_infra_aws_python.models.ssm_parameter_changes import SSMParameterChanges
+from threading import Event, RLock, Thread, current_thread
+from typing import TYPE_CHECKING, Any, Callable, Dict, Final, Iterable, List, Optional, Tuple
+if TYPE_CHECKING:
+    from mypy_boto3_ssm.client import SSMClient
+    from mypy_boto3_ssm.type_defs import DescribeParametersResultTypeDef, GetParametersByPathResultTypeDef, \
+        GetParametersResultTypeDef
+from logging import Logger, getLogger
+
+# Max parameters of a describe parameters page, listed without their values
+DESCRIBE_PAGE_SIZE: Final[int] = 50
+# Max parameters of a get parameters by path page
+PATH_PAGE_SIZE: Final[int] = 10
+# Max names of a single get parameters call
+MAX_GET_PARAMETERS: Final[int] = 10
+
+SSMChangesCallback = Callable[[SSMParameterChanges], None]
+
+
+class SSMChangeFeed:
+    """
+    Change feed of the SSM parameters under a hierarchy path, delivering the added, updated and removed
+    parameters to subscribers
+    Changes are detected from the parameter versions, listed 50 per call without values, and only the parameters
+    whose version moved are fetched, so an unchanged hierarchy costs a describe call per 50 parameters
+    """
+    def __init__(self, watch_ssm_path: WatchSSMPath, logger: Optional[Logger] = None) -> None:
+        self.__watch_ssm_path = watch_ssm_path
+        self.__logger = logger or getLogger("ssm_change_feed")
+        # Refreshes and subscriptions are serialized, so subscribers see every change once and in order,
+        # reentrant for subscribers reading the values
+        self.__lock = RLock()
+        self.__subscribers: List[SSMChangesCallback] = []
+        self.__values: Dict[str, str] = {}
+        # Version and last modified date by name, a parameter deleted and created again restarts its versions
+        self.__versions: Dict[str, Tuple[int, Any]] = {}
+        self.__loaded = False
+        self.__stopped = Event()
+        self.__thread: Optional[Thread] = None
+
+    def values(self) -> Dict[str, str]:
+        """
+        Returns the current values by name of the watched parameters
+
+        :return:
+        """
+        with self.__lock:
+            return dict(self.__values)
+
+    def subscribe(self, callback: SSMChangesCallback) -> None:
+        """
+        Adds a subscriber, called with the changes of every refresh that found any
+        Once the feed is loaded, the subscriber is first called with all the current parameters as added
+
+        :param callback:
+        :return:
+        """
+        with self.__lock:
+            self.__subscribers.append(callback)
+            if self.__loaded and self.__values:
+                self.__deliver(callback, SSMParameterChanges(added=dict(self.__values)))
+
+    def unsubscribe(self, callback: SSMChangesCallback) -> None:
+        with self.__lock:
+            if callback in self.__subscribers:
+                self.__subscribers.remove(callback)
+
+    def refresh(self) -> Optional[SSMParameterChanges]:
+        """
+        Tries to detect the changes since the last refresh and deliver them to the subscribers
+        The first refresh loads all the parameters, as added
+        Returns the changes
+
+        :return:
+        """
+        try:
+            with self.__lock:
+                changes = self.__detect_changes() if self.__loaded else self.__load()
+                self.__loaded = True
+                if not changes.is_empty():
+                    self.__logger.info(f"SSM Parameters changed [{self.__watch_ssm_path.path}] "
+                                       f"[Added={len(changes.added)}] [Updated={len(changes.updated)}] "
+                                       f"[Removed={len(changes.removed)}]")
+                    for callback in list(self.__subscribers):
+                        self.__deliver(callback, changes)
+                return changes
+        except Exception as e:
+            self.__logger.exception(f"Failed refreshing SSM change feed [{str(e)}]")
+        return None
+
+    def start(self) -> bool:
+        """
+        Loads the parameters and keeps refreshing them every poll interval on a background thread
+        Returns if the parameters were loaded
+
+        :return:
+        """
+        loaded = self.refresh() is not None
+        if self.__thread is None:
+            self.__stopped.clear()
+            self.__thread = Thread(target=with_caller_context(self.__poll), name="octo-ssm-change-feed", daemon=True)
+            self.__thread.start()
+        return loaded
+
+    def stop(self) -> None:
+        self.__stopped.set()
+        thread, self.__thread = self.__thread, None
+        if thread is not None and thread is not current_thread():
+            thread.join()
+
+    def __poll(self) -> None:
+        while not self.__stopped.wait(self.__watch_ssm_path.poll_interval_seconds):
+            self.refresh()
+
+    def __deliver(self, callback: SSMChangesCallback, changes: SSMParameterChanges) -> None:
+        try:
+            callback(changes)
+        except Exception as e:
+            self.__logger.exception(f"Failed delivering SSM changes [{str(e)}]")
+
+    def __load(self) -> SSMParameterChanges:
+        """
+        Reads all the parameters with their values, a page of 10 per call
+
+        :return:
+        """
+        ssm_client: SSMClient = Clients.client("ssm")
+        pages: Iterable[GetParametersByPathResultTypeDef] = ssm_client.get_paginator(
+            "get_parameters_by_path"
+        ).paginate(
+            Path=self.__watch_ssm_path.path,
+            Recursive=self.__watch_ssm_path.recursive,
+            WithDecryption=self.__watch_ssm_path.decrypt,
+            PaginationConfig={"PageSize": PATH_PAGE_SIZE}
+        )
+        changes = SSMParameterChanges()
+        versions: Dict[str, Tuple[int, Any]] = {}
+        for page in pages:
+            for parameter in page["Parameters"]:
+                changes.added[parameter["Name"]] = parameter["Value"]
+                versions[parameter["Name"]] = (parameter["Version"], parameter.get("LastModifiedDate"))
+        self.__versions.update(versions)
+        self.__values.update(changes.added)
+        return changes
+
+    def __detect_changes(self) -> SSMParameterChanges:
+        """
+        Lists the parameter versions without their values, and fetches only the parameters whose version moved
+
+        :return:
+        """
+        ssm_client: SSMClient = Clients.client("ssm")
+        pages: Iterable[DescribeParametersResultTypeDef] = ssm_client.get_paginator(
+            "describe_parameters"
+        ).paginate(
+            ParameterFilters=[{
+                "Key": "Path",
+                "Option": "Recursive" if self.__watch_ssm_path.recursive else "OneLevel",
+                "Values": [self.__watch_ssm_path.path]
+            }],
+            PaginationConfig={"PageSize": DESCRIBE_PAGE_SIZE}
+        )
+        listed = set()
+        moved: List[str] = []
+        for page in pages:
+            for parameter in page["Parameters"]:
+                listed.add(parameter["Name"])
+                if self.__versions.get(parameter["Name"]) != (parameter["Version"],
+                                                              parameter.get("LastModifiedDate")):
+                    moved.append(parameter["Name"])
+        changes = SSMParameterChanges(removed=[name for name in self.__versions if name not in listed])
+        versions: Dict[str, Tuple[int, Any]] = {}
+        for index in range(0, len(moved), MAX_GET_PARAMETERS):
+            response: GetParametersResultTypeDef = ssm_client.get_parameters(
+                Names=moved[index:index + MAX_GET_PARAMETERS],
+                WithDecryption=self.__watch_ssm_path.decrypt
+            )
+            for fetched in response["Parameters"]:
+                name = fetched["Name"]
+                versions[name] = (fetched["Version"], fetched.get("LastModifiedDate"))
+                if name not in self.__values:
+                    changes.added[name] = fetched["Value"]
+                elif self.__values[name] != fetched["Value"]:
+                    changes.updated[name] = fetched["Value"]
+            # Deleted between the listing and the get
+            changes.removed.extend(name for name in response.get("InvalidParameters", []) if name in self.__versions)
+        # Versions are committed along with the values once every fetch succeeded, so a refresh failing part way
+        # fetches all the moved parameters again
+        for name in changes.removed:
+            self.__versions.pop(name, None)
+            self.__values.pop(name, None)
+        self.__versions.update(versions)
+        self.__values.update(changes.added)
+        self.__values.update(changes.updated)
+        return changes
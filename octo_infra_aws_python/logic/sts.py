@@ -1,19 +1,25 @@
-from typing import Optional
+from __future__ import annotations
+from typing import TYPE_CHECKING, Optional
 
-import boto3
-from mypy_boto3_sts.client import STSClient
-from mypy_boto3_sts.type_defs import GetCallerIdentityResponseTypeDef
+if TYPE_CHECKING:
+    from mypy_boto3_sts.client import STSClient
+    from mypy_boto3_sts.type_defs import GetCallerIdentityResponseTypeDef
+from octo_infra_aws_python.logic.clients import Clients
+from octo_infra_aws_python.logic.single_flight import single_flight
+from octo_infra_aws_python.logic.describe_cache import persistent_cache
 
 
 class STS:
     @staticmethod
+    @single_flight
+    @persistent_cache("account")
     def get_caller_identity_response() -> GetCallerIdentityResponseTypeDef:
         """
         Gets the caller of the current assumed STS
 
         :return:
         """
-        sts_client: STSClient = boto3.client('sts')
+        sts_client: STSClient = Clients.client('sts')
         return sts_client.get_caller_identity()
 
     @staticmethod
@@ -0,0 +1,2 @@
+from octo_infra_aws_python.models.actions.artifacts.publish_artifacts import PublishArtifacts
+from octo_infra_aws_python.models.actions.artifacts.download_artifacts import DownloadArtifacts
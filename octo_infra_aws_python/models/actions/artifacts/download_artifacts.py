@@ -0,0 +1,11 @@
+from pydantic import BaseModel, Field
+from typing import List, Optional
+
+
+class DownloadArtifacts(BaseModel):
+    bucket_name: str = Field(description="Bucket to download from")
+    manifest_path: str = Field(description="Object path of the manifest mapping the logical keys to blobs")
+    output_directory: str = Field(description="Directory the artifacts are written to, under their logical keys")
+    keys: Optional[List[str]] = Field(description="Logical keys to download, all the artifacts if not given",
+                                      default=None)
+    max_workers: int = Field(description="Max blobs downloaded at once", default=16, ge=1)
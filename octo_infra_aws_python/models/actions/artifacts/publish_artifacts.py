@@ -0,0 +1,14 @@
+from pydantic import BaseModel, Field
+from typing import Dict
+
+
+class PublishArtifacts(BaseModel):
+    bucket_name: str = Field(description="Bucket to publish to")
+    manifest_path: str = Field(description="Object path of the manifest mapping the logical keys to blobs")
+    files: Dict[str, str] = Field(description="Local file path of every artifact by logical key")
+    blob_prefix: str = Field(description="Path prefix the blobs are stored under, named by their content digest",
+                             default="blobs/")
+    verify_previous: bool = Field(description="Check the blobs of the previous manifest still exist instead of "
+                                              "assuming it, for buckets where blobs may be deleted or expire "
+                                              "under a published manifest", default=False)
+    max_workers: int = Field(description="Max files hashed or uploaded at once", default=16, ge=1)
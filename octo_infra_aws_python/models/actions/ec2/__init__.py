@@ -1,5 +1,6 @@
 from octo_infra_aws_python.models.actions.ec2.create_ec2 import CreateEC2
 from octo_infra_aws_python.models.actions.ec2.create_key_pair import CreateKeypair
 from octo_infra_aws_python.models.actions.ec2.destroy_ec2 import DestroyEC2
+from octo_infra_aws_python.models.actions.ec2.destroy_ec2_instances import DestroyEC2Instances
 from octo_infra_aws_python.models.actions.ec2.destroy_key_pair import DestroyKeypair
 from octo_infra_aws_python.models.actions.ec2.find_ec2_instance_password import FindEC2InstanceCredentials
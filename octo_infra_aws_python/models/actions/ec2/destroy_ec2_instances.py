@@ -0,0 +1,15 @@
+from pydantic import BaseModel, Field
+from typing import List
+
+
+class DestroyEC2Instances(BaseModel):
+    instance_ids: List[str] = Field(description="EC2 Instance IDs to destroy")
+    destroy_keypair: bool = Field(description="If given, will also delete the instances key pairs",
+                                  default=True)
+    skip_stop: bool = Field(description="Terminate the instances without stopping them first, "
+                                        "when the EBS state does not need to be flushed",
+                            default=False)
+    wait_for_termination: bool = Field(description="Whether to fully wait for termination or not",
+                                       default=True)
+    wait_for_stopped: bool = Field(description="Whether to fully wait for stopped or not",
+                                   default=False)
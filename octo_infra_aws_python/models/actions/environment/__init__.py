@@ -0,0 +1,2 @@
+from octo_infra_aws_python.models.actions.environment.provision_environment import ProvisionEnvironment, \
+    ProvisionInstances
@@ -0,0 +1,27 @@
+from typing import List, Optional
+
+from pydantic import BaseModel, Field
+
+from octo_infra_aws_python.models.actions.ec2.create_ec2 import CreateEC2
+from octo_infra_aws_python.models.actions.network.create_security_group import CreateSecurityGroup
+from octo_infra_aws_python.models.actions.network.create_subnet import CreateSubnet
+from octo_infra_aws_python.models.actions.network.create_vpc import CreateVPC
+
+
+class ProvisionInstances(BaseModel):
+    create_ec2: CreateEC2 = Field(description="EC2 instances to create, the vpc, subnet and security group "
+                                              "may reference resources of the environment by name")
+    instance_count: int = Field(description="Amount of instances to create", default=1)
+
+
+class ProvisionEnvironment(BaseModel):
+    vpc: Optional[CreateVPC] = Field(description="VPC to create, if not given, "
+                                                 "all the resources must use existing VPC ids", default=None)
+    subnets: List[CreateSubnet] = Field(description="Subnets to create, the vpc id may be the "
+                                                    "environment VPC name", default_factory=list)
+    security_groups: List[CreateSecurityGroup] = Field(description="Security groups to create, the vpc id may be "
+                                                                   "the environment VPC name", default_factory=list)
+    instances: List[ProvisionInstances] = Field(description="EC2 instances to create", default_factory=list)
+    max_workers: int = Field(description="Max amount of resources to create concurrently", default=16)
+    reconcile: bool = Field(description="Find existing resources by name and only apply the differences, "
+                                        "instead of always creating new resources", default=False)
@@ -6,3 +6,4 @@ from octo_infra_aws_python.models.actions.network.create_internet_gateway import
 from octo_infra_aws_python.models.actions.network.destroy_internet_gateway import DestroyInternetGateway
 from octo_infra_aws_python.models.actions.network.create_subnet import CreateSubnet
 from octo_infra_aws_python.models.actions.network.destroy_subnet import DestroySubnet
+from octo_infra_aws_python.models.actions.network.sync_security_group_rules import SyncSecurityGroupRules
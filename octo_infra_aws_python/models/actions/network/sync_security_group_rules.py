@@ -0,0 +1,15 @@
+from octo_infra_aws_python.models.network_rule import NetworkRule
+from pydantic import BaseModel, Field
+from typing import List, Optional
+
+
+class SyncSecurityGroupRules(BaseModel):
+    security_group_id: str = Field(description="ID of the security group to sync")
+    ingress: Optional[List[NetworkRule]] = Field(description="Wanted ingress rules of the security group, "
+                                                             "the ingress rules are left untouched if not given",
+                                                 default=None)
+    egress: Optional[List[NetworkRule]] = Field(description="Wanted egress rules of the security group, "
+                                                            "the egress rules are left untouched if not given",
+                                                default=None)
+    revoke_unlisted: bool = Field(description="Whether to revoke existing rules that are not in the wanted rules",
+                                  default=True)
@@ -0,0 +1 @@
+from octo_infra_aws_python.models.actions.regions.fan_out_regions import FanOutRegions
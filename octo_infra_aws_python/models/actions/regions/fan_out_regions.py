@@ -0,0 +1,14 @@
+from pydantic import BaseModel, Field
+from typing import List
+
+from octo_infra_aws_python.models.regions import Region
+
+
+class FanOutRegions(BaseModel):
+    regions: List[Region] = Field(description="Regions to run the action in", default_factory=lambda: list(Region))
+    max_concurrent_regions: int = Field(description="Max amount of regions running at once", default=8)
+    max_workers_per_region: int = Field(description="Max amount of concurrent actions in a single region",
+                                        default=4)
+    skip_disabled_regions: bool = Field(description="Skip regions that are not enabled for the account, "
+                                                    "instead of letting their calls fail",
+                                        default=True)
@@ -6,3 +6,12 @@ from octo_infra_aws_python.models.actions.s3.object_info import ObjectInfo
 from octo_infra_aws_python.models.actions.s3.upload_object import UploadObject
 from octo_infra_aws_python.models.actions.s3.load_object import LoadObject
 from octo_infra_aws_python.models.actions.s3.save_object import SaveObject
+from octo_infra_aws_python.models.actions.s3.object_infos import ObjectInfos
+from octo_infra_aws_python.models.actions.s3.copy_objects import CopyObjects
+from octo_infra_aws_python.models.actions.s3.move_objects import MoveObjects
+from octo_infra_aws_python.models.actions.s3.pack_index import PackIndex
+from octo_infra_aws_python.models.actions.s3.save_pack import SavePack
+from octo_infra_aws_python.models.actions.s3.load_pack_member import LoadPackMember
+from octo_infra_aws_python.models.actions.s3.find_pack_index import FindPackIndex
+from octo_infra_aws_python.models.actions.s3.save_objects import SaveObjects
+from octo_infra_aws_python.models.actions.s3.presign_objects import PresignObjects
@@ -0,0 +1,22 @@
+from pydantic import BaseModel, Field
+from typing import Optional
+
+from octo_infra_aws_python.models.actions.s3.find_objects import FindObjects
+from octo_infra_aws_python.models.actions.s3.save_object import MIN_PART_SIZE
+
+# Largest object S3 copies with a single copy, larger ones are copied in parts
+MAX_COPY_OBJECT_SIZE = 5 * 1024 * 1024 * 1024
+
+
+class CopyObjects(BaseModel):
+    source: FindObjects = Field(description="Objects to copy, their paths under the base search path are kept")
+    destination_bucket_name: Optional[str] = Field(description="Bucket to copy to, the source bucket if not given",
+                                                   default=None)
+    destination_prefix: str = Field(description="Path prefix the objects are copied under")
+    max_concurrent_copies: int = Field(description="Max objects copied at once", default=16, ge=1)
+    multipart_threshold: int = Field(description="Objects larger than this are copied in parts",
+                                     default=MAX_COPY_OBJECT_SIZE, ge=MIN_PART_SIZE, le=MAX_COPY_OBJECT_SIZE)
+    part_size: int = Field(description="Size of the parts of a multipart copy, raised if the object would have "
+                                       "too many parts", default=512 * 1024 * 1024, ge=MIN_PART_SIZE,
+                           le=MAX_COPY_OBJECT_SIZE)
+    max_concurrent_parts: int = Field(description="Max parts of a single object copied at once", default=8, ge=1)
@@ -0,0 +1,6 @@
+from pydantic import BaseModel, Field
+
+
+class FindPackIndex(BaseModel):
+    bucket_name: str = Field(description="Bucket of the pack")
+    object_path: str = Field(description="Object path in s3 of the pack")
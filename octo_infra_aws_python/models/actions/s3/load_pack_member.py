@@ -0,0 +1,7 @@
+from pydantic import BaseModel, Field
+
+
+class LoadPackMember(BaseModel):
+    bucket_name: str = Field(description="Bucket to load from")
+    object_path: str = Field(description="Object path in s3 of the pack")
+    member_name: str = Field(description="Name of the member to load")
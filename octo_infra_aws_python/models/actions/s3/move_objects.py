@@ -0,0 +1,5 @@
+from octo_infra_aws_python.models.actions.s3.copy_objects import CopyObjects
+
+
+class MoveObjects(CopyObjects):
+    pass
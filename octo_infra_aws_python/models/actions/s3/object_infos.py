@@ -0,0 +1,80 @@
+from array import array
+from typing import Iterator, List, Optional, Sequence, Union, overload
+
+from octo_infra_aws_python.models.actions.s3.object_info import ObjectInfo
+
+
+class ObjectInfos(Sequence[ObjectInfo]):
+    """
+    Compact columnar result of bulk object listings, holding the paths and sizes of a single bucket
+    Items are converted to ObjectInfo on access only
+    """
+    __slots__ = ("bucket_name", "object_paths", "object_sizes")
+
+    def __init__(self, bucket_name: str, object_paths: Optional[List[str]] = None,
+                 object_sizes: Optional[array] = None) -> None:
+        self.bucket_name = bucket_name
+        self.object_paths: List[str] = object_paths if object_paths is not None else []
+        self.object_sizes: array = object_sizes if object_sizes is not None else array("q")
+
+    def append(self, object_path: str, object_size: int) -> None:
+        """
+        Adds an object to the result
+
+        :param object_path:
+        :param object_size:
+        :return:
+        """
+        self.object_paths.append(object_path)
+        self.object_sizes.append(object_size)
+
+    def is_folder(self, index: int) -> bool:
+        """
+        Returns whether the object at the index is a folder
+
+        :param index:
+        :return:
+        """
+        return self.object_paths[index].endswith("/")
+
+    def to_object_infos(self) -> List[ObjectInfo]:
+        """
+        Converts all the objects of the result to ObjectInfo models
+
+        :return:
+        """
+        return list(self)
+
+    def __len__(self) -> int:
+        return len(self.object_paths)
+
+    @overload
+    def __getitem__(self, index: int) -> ObjectInfo:
+        ...
+
+    @overload
+    def __getitem__(self, index: slice) -> "ObjectInfos":
+        ...
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[ObjectInfo, "ObjectInfos"]:
+        if isinstance(index, slice):
+            return ObjectInfos(self.bucket_name, self.object_paths[index], self.object_sizes[index])
+        object_path = self.object_paths[index]
+        return ObjectInfo(
+            bucket_name=self.bucket_name,
+            object_path=object_path,
+            object_size=self.object_sizes[index],
+            is_folder=object_path.endswith("/")
+        )
+
+    def __iter__(self) -> Iterator[ObjectInfo]:
+        for object_path, object_size in zip(self.object_paths, self.object_sizes):
+            yield ObjectInfo(
+                bucket_name=self.bucket_name,
+                object_path=object_path,
+                object_size=object_size,
+                is_folder=object_path.endswith("/")
+            )
+
+    def __repr__(self) -> str:
+        return f"ObjectInfos(bucket_name={self.bucket_name!r}, objects={len(self)})"
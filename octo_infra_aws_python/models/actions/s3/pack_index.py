@@ -0,0 +1,70 @@
+from array import array
+from typing import Dict, Iterator, List, Optional, Tuple
+
+
+class PackIndex:
+    """
+    Compact index of the members of a pack object, holding the member names and sizes in columns
+    Members are stored one after the other from the start of the pack, so offsets are derived from the sizes
+    """
+    __slots__ = ("bucket_name", "object_path", "etag", "member_names", "member_sizes", "__offsets", "__positions")
+
+    def __init__(self, bucket_name: str, object_path: str, etag: Optional[str] = None,
+                 member_names: Optional[List[str]] = None, member_sizes: Optional[array] = None) -> None:
+        self.bucket_name = bucket_name
+        self.object_path = object_path
+        self.etag = etag
+        self.member_names: List[str] = member_names if member_names is not None else []
+        self.member_sizes: array = member_sizes if member_sizes is not None else array("q")
+        self.__offsets: Optional[array] = None
+        self.__positions: Optional[Dict[str, int]] = None
+
+    def append(self, member_name: str, member_size: int) -> None:
+        """
+        Adds a member stored after the previous members
+
+        :param member_name:
+        :param member_size:
+        :return:
+        """
+        self.member_names.append(member_name)
+        self.member_sizes.append(member_size)
+        self.__offsets = None
+        self.__positions = None
+
+    def locate(self, member_name: str) -> Optional[Tuple[int, int]]:
+        """
+        Returns the offset and size of the member in the pack, or None if it is not a member
+
+        :param member_name:
+        :return:
+        """
+        offsets, positions = self.__offsets, self.__positions
+        if offsets is None or positions is None:
+            offsets = array("q", [0]) * len(self.member_sizes)
+            offset = 0
+            for index, size in enumerate(self.member_sizes):
+                offsets[index] = offset
+                offset += size
+            positions = {name: index for index, name in enumerate(self.member_names)}
+            self.__offsets, self.__positions = offsets, positions
+        position = positions.get(member_name)
+        if position is None:
+            return None
+        return offsets[position], self.member_sizes[position]
+
+    @property
+    def members_size(self) -> int:
+        return sum(self.member_sizes)
+
+    def __len__(self) -> int:
+        return len(self.member_names)
+
+    def __contains__(self, member_name: object) -> bool:
+        return isinstance(member_name, str) and self.locate(member_name) is not None
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.member_names)
+
+    def __repr__(self) -> str:
+        return f"PackIndex(bucket_name={self.bucket_name!r}, object_path={self.object_path!r}, members={len(self)})"
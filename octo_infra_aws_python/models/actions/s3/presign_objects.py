@@ -0,0 +1,16 @@
+from pydantic import BaseModel, Field
+from typing import Any
+from typing_extensions import Literal
+
+# Max expiry of SigV4 presigned urls
+MAX_PRESIGNED_EXPIRY_SECONDS = 7 * 24 * 60 * 60
+
+
+class PresignObjects(BaseModel):
+    bucket_name: str = Field(description="Bucket of the objects")
+    object_paths: Any = Field(description="Object paths to presign, an iterable consumed while signing, for "
+                                          "example the object_paths of the ObjectInfos found by find_objects_compact")
+    method: Literal["GET", "PUT"] = Field(description="HTTP method the urls are presigned for, GET to download "
+                                                      "the objects and PUT to upload them", default="GET")
+    expires_in: int = Field(description="Seconds the urls are valid for, from the time the first url is signed",
+                            default=3600, ge=1, le=MAX_PRESIGNED_EXPIRY_SECONDS)
@@ -1,7 +1,38 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field, field_validator
+from typing import IO, Any, Iterable, Optional, Union
+
+# Smallest part size S3 accepts for all but the last part of a multipart upload
+MIN_PART_SIZE = 5 * 1024 * 1024
 
 
 class SaveObject(BaseModel):
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
     bucket_name: str = Field(description="Bucket to save to")
     object_path: str = Field(description="Object path in s3 to save to")
-    body: bytes = Field(description="Data to save")
+    body: Union[bytes, str, IO[bytes], Iterable[bytes]] = Field(
+        description="Data to save, raw bytes, an iterator of bytes chunks or a readable binary stream, "
+                    "iterators and streams are consumed while uploading"
+    )
+    part_size: int = Field(description="Size of the parts of a multipart upload, bodies up to a single part "
+                                       "are saved with a single put", default=8 * 1024 * 1024, ge=MIN_PART_SIZE)
+    max_concurrent_parts: int = Field(description="Max parts uploaded at once, bounds the parts held in memory",
+                                      default=4, ge=1)
+    codec: Optional[str] = Field(description="Codec to compress the object with (gzip, zstd, lz4), identity to save it "
+                                             "as is, if not given the codec configured for its path prefix is used",
+                                 default=None)
+
+    @field_validator("body", mode="plain")
+    @classmethod
+    def validate_body(cls, body: Any) -> Any:
+        """
+        Checks the body type without validating its chunks, that would consume iterators and streams before uploading
+        Returns the body as given
+
+        :param body:
+        :return:
+        """
+        if isinstance(body, (bytes, bytearray, memoryview, str)) or hasattr(body, "read") or hasattr(body, "__iter__"):
+            return body
+        raise ValueError(f"Body must be bytes, str, a readable binary stream or an iterator of bytes chunks "
+                         f"[{type(body).__name__}]")
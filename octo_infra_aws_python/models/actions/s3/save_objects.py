@@ -0,0 +1,16 @@
+from pydantic import BaseModel, Field
+from typing import Any
+
+
+class SaveObjects(BaseModel):
+    objects: Any = Field(description="SaveObject models to save, an iterable consumed while saving")
+    max_concurrent_saves: int = Field(description="Max objects saved at once", default=64, ge=1)
+    shard_digits: int = Field(description="Hex digits of the object path hash prefixed to every object path, "
+                                          "spreading the objects over S3 partitions, 0 to keep the paths as is",
+                              default=0, ge=0, le=64)
+    max_attempts: int = Field(description="Max attempts of an object throttled with SlowDown, on top of the "
+                                          "retries of the client", default=5, ge=1)
+    backoff_base_seconds: float = Field(description="Initial backoff of all the saves after a throttle, doubled "
+                                                    "on every throttle until a save succeeds", default=0.1, gt=0)
+    max_backoff_seconds: float = Field(description="Max backoff of all the saves after a throttle", default=20,
+                                       gt=0)
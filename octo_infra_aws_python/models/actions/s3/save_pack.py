@@ -0,0 +1,15 @@
+from pydantic import BaseModel, Field
+from typing import Any
+
+from octo_infra_aws_python.models.actions.s3.save_object import MIN_PART_SIZE
+
+
+class SavePack(BaseModel):
+    bucket_name: str = Field(description="Bucket to save to")
+    object_path: str = Field(description="Object path in s3 of the pack")
+    members: Any = Field(description="Members to pack, a dict or an iterator of (name, data) pairs, iterators are "
+                                     "consumed while uploading")
+    part_size: int = Field(description="Size of the parts of the multipart upload", default=8 * 1024 * 1024,
+                           ge=MIN_PART_SIZE)
+    max_concurrent_parts: int = Field(description="Max parts uploaded at once, bounds the parts held in memory",
+                                      default=4, ge=1)
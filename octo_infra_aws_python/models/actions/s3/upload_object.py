@@ -1,7 +1,11 @@
 from pydantic import BaseModel, Field
+from typing import Optional
 
 
 class UploadObject(BaseModel):
     bucket_name: str = Field(description="Bucket to upload to")
     input_path: str = Field(description="Input path to upload")
     object_path: str = Field(description="Object path in s3 to upload to")
+    codec: Optional[str] = Field(description="Codec to compress the object with (gzip, zstd, lz4), identity to upload "
+                                             "it as is, if not given the codec configured for its path prefix is used",
+                                 default=None)
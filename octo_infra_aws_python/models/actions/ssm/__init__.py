@@ -1,3 +1,6 @@
 from octo_infra_aws_python.models.actions.ssm.create_ssm_parameter import CreateSSMParameter
 from octo_infra_aws_python.models.actions.ssm.destroy_ssm_parameter import DestroySSMParameter
 from octo_infra_aws_python.models.actions.ssm.find_ssm_parameter import FindSSMParameter
+from octo_infra_aws_python.models.actions.ssm.destroy_ssm_parameters import DestroySSMParameters
+from octo_infra_aws_python.models.actions.ssm.destroy_ssm_path import DestroySSMPath
+from octo_infra_aws_python.models.actions.ssm.watch_ssm_path import WatchSSMPath
@@ -0,0 +1,8 @@
+from pydantic import BaseModel, Field
+from typing import List
+
+
+class DestroySSMParameters(BaseModel):
+    names: List[str] = Field()
+    max_concurrent_batches: int = Field(description="Max delete parameters calls in flight, each deleting up to "
+                                                    "10 parameters", default=8, ge=1)
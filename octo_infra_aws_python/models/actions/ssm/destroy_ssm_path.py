@@ -0,0 +1,8 @@
+from pydantic import BaseModel, Field
+
+
+class DestroySSMPath(BaseModel):
+    path: str = Field(description="Hierarchy path of the parameters to delete, for example /app/staging")
+    recursive: bool = Field(description="Also delete the parameters of the nested paths", default=True)
+    max_concurrent_batches: int = Field(description="Max delete parameters calls in flight, each deleting up to "
+                                                    "10 parameters", default=8, ge=1)
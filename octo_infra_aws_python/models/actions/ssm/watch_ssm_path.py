@@ -0,0 +1,9 @@
+from pydantic import BaseModel, Field
+
+
+class WatchSSMPath(BaseModel):
+    path: str = Field(description="Hierarchy path of the watched parameters, for example /app/staging")
+    recursive: bool = Field(description="Also watch the parameters of the nested paths", default=True)
+    decrypt: bool = Field(default=True)
+    poll_interval_seconds: float = Field(description="Seconds between the refreshes of a started feed",
+                                         default=30, gt=0)
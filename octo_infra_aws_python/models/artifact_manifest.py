@@ -0,0 +1,13 @@
+from pydantic import BaseModel, Field
+from typing import Dict
+
+
+class ArtifactBlob(BaseModel):
+    digest: str = Field(description="SHA-256 hex digest of the artifact content")
+    size: int = Field(description="Size of the artifact in bytes")
+
+
+class ArtifactManifest(BaseModel):
+    blob_prefix: str = Field(description="Path prefix the blobs are stored under")
+    artifacts: Dict[str, ArtifactBlob] = Field(description="Blob of every artifact by logical key",
+                                               default_factory=dict)
@@ -0,0 +1,18 @@
+from pydantic import BaseModel, Field
+from typing import Dict, Final
+
+# Seconds a cached result is used for, by cache type
+DEFAULT_TTL_SECONDS: Final[Dict[str, float]] = {
+    "account": 24 * 60 * 60,
+    "image": 6 * 60 * 60,
+    "network": 60 * 60,
+    "service_instance": 60
+}
+
+
+class DescribeCachePolicy(BaseModel):
+    directory: str = Field(description="Directory of the cache database, shared by all the processes using it")
+    ttl_seconds: Dict[str, float] = Field(description="Seconds a cached result is used for, by cache type",
+                                          default_factory=lambda: dict(DEFAULT_TTL_SECONDS))
+    default_ttl_seconds: float = Field(description="Seconds a cached result of a type without a TTL is used for",
+                                       default=5 * 60)
@@ -0,0 +1,12 @@
+from pydantic import BaseModel, Field
+from typing import Dict, List, Optional
+
+
+class DestroySSMParametersReport(BaseModel):
+    deleted: List[str] = Field(description="Names of the deleted parameters", default_factory=list)
+    not_found: List[str] = Field(description="Names of the parameters that did not exist", default_factory=list)
+    failed: Dict[str, str] = Field(description="Error by name of the parameters that failed to delete",
+                                   default_factory=dict)
+    listing_error: Optional[str] = Field(description="Error that stopped listing the parameters to delete, "
+                                                     "the parameters listed before it are still deleted",
+                                         default=None)
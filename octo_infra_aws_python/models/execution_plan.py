@@ -0,0 +1,22 @@
+from pydantic import BaseModel, Field
+from typing import Dict, List
+
+
+class PlannedStep(BaseModel):
+    name: str = Field(description="Name of the step")
+    dependencies: List[str] = Field(description="Steps that must finish before the step starts",
+                                    default_factory=list)
+    resources: List[str] = Field(description="Ids of the resources the step acts on", default_factory=list)
+    api_calls: Dict[str, int] = Field(description="Expected amount of API calls by service.Operation",
+                                      default_factory=dict)
+    wait_seconds: float = Field(description="Expected seconds spent waiting on resource states", default=0)
+    estimated_seconds: float = Field(description="Estimated wall time of the step", default=0)
+
+
+class ExecutionPlan(BaseModel):
+    action: str = Field(description="Name of the planned action")
+    steps: List[PlannedStep] = Field(description="Steps of the action in dependency order", default_factory=list)
+    resources: Dict[str, List[str]] = Field(description="Ids of the resources the action acts on by resource type",
+                                            default_factory=dict)
+    api_calls: Dict[str, int] = Field(description="Expected amount of API calls by service", default_factory=dict)
+    estimated_seconds: float = Field(description="Estimated wall time along the slowest chain of steps", default=0)
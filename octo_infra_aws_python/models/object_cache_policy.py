@@ -0,0 +1,20 @@
+from pydantic import BaseModel, Field
+from typing import Dict, Optional
+
+
+class ObjectCachePolicy(BaseModel):
+    max_memory_bytes: int = Field(description="Bytes of object bodies kept in memory, least recently used first out",
+                                  default=256 * 1024 * 1024, ge=0)
+    directory: Optional[str] = Field(description="Directory of the on disk cache, shared by all the processes "
+                                                 "using it, objects are only cached in memory if not given",
+                                     default=None)
+    max_disk_bytes: int = Field(description="Bytes of object bodies kept on disk, least recently used first out",
+                                default=4 * 1024 * 1024 * 1024, ge=0)
+    max_staleness_seconds: Dict[str, float] = Field(description="Seconds a cached object is used without "
+                                                                "revalidation, by object path prefix, the longest "
+                                                                "matching prefix is used",
+                                                    default_factory=dict)
+    hardlink_downloads: bool = Field(description="Downloads of objects cached on disk are hardlinked to the cached "
+                                                 "file instead of copied, the downloaded files must not be modified "
+                                                 "in place",
+                                     default=False)
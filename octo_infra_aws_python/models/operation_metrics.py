@@ -0,0 +1,16 @@
+from pydantic import BaseModel, Field
+from typing import Dict
+
+
+class OperationMetrics(BaseModel):
+    service: str = Field(description="Service name of the operation")
+    operation: str = Field(description="API operation name")
+    calls: int = Field(description="Amount of calls", default=0)
+    errors: int = Field(description="Amount of failed calls", default=0)
+    throttles: int = Field(description="Amount of calls failed on a throttle", default=0)
+    retries: int = Field(description="Amount of retry attempts of all the calls", default=0)
+    request_bytes: int = Field(description="Bytes sent by all the attempts", default=0)
+    response_bytes: int = Field(description="Bytes received as reported by the responses", default=0)
+    total_seconds: float = Field(description="Summed latency of all the calls", default=0)
+    latency_buckets: Dict[float, int] = Field(description="Cumulative amount of calls by latency upper bound "
+                                                          "in seconds", default_factory=dict)
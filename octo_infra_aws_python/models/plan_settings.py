@@ -0,0 +1,11 @@
+from pydantic import BaseModel, Field
+
+
+class PlanSettings(BaseModel):
+    call_latency_seconds: float = Field(description="Expected latency of a single API call", default=0.15)
+    instance_running_seconds: float = Field(description="Expected seconds until new instances are running",
+                                            default=45)
+    instance_stop_seconds: float = Field(description="Expected seconds until stopped instances are stopped",
+                                         default=60)
+    instance_termination_seconds: float = Field(description="Expected seconds until terminated instances are "
+                                                            "terminated", default=60)
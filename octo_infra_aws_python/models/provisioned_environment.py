@@ -0,0 +1,16 @@
+from pydantic import BaseModel, Field
+from typing import Dict, List, Optional
+
+
+class ProvisionedEnvironment(BaseModel):
+    vpc_id: Optional[str] = Field(default=None)
+    internet_gateway_id: Optional[str] = Field(default=None)
+    subnet_ids: Dict[str, str] = Field(description="Subnet ids by subnet name", default_factory=dict)
+    security_group_ids: Dict[str, str] = Field(description="Security group ids by group name", default_factory=dict)
+    instance_ids: Dict[str, List[str]] = Field(description="Instance ids by instance name", default_factory=dict)
+    failed: List[str] = Field(description="Nodes that failed or were skipped due to a failed dependency",
+                              default_factory=list)
+    node_timings: Dict[str, float] = Field(description="Seconds each node took to run", default_factory=dict)
+    critical_path_seconds: float = Field(description="Sum of node timings along the slowest dependency chain",
+                                         default=0)
+    total_seconds: float = Field(description="Wall time of the whole provisioning", default=0)
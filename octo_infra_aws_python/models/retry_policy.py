@@ -0,0 +1,16 @@
+from pydantic import BaseModel, Field
+from typing import Dict
+from typing_extensions import Literal
+
+
+class RetryPolicy(BaseModel):
+    mode: Literal["legacy", "standard", "adaptive"] = Field(description="Botocore retry mode, standard and adaptive "
+                                                                        "use exponential backoff with jitter, "
+                                                                        "adaptive also rate limits on throttles",
+                                                            default="standard")
+    max_attempts: int = Field(description="Max attempts of a single call, including the first attempt", default=10)
+    rate_limits: Dict[str, float] = Field(description="Client side requests per second limit by service name, "
+                                                      "shared by all the threads of the process",
+                                          default_factory=dict)
+    burst_seconds: float = Field(description="Seconds worth of requests a service rate limit lets through at once",
+                                 default=1)
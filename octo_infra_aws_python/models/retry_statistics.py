@@ -0,0 +1,12 @@
+from pydantic import BaseModel, Field
+
+
+class RetryStatistics(BaseModel):
+    calls: int = Field(description="Amount of API calls made", default=0)
+    retries: int = Field(description="Amount of retry attempts made by all calls", default=0)
+    recovered: int = Field(description="Amount of calls that succeeded after retrying", default=0)
+    failures: int = Field(description="Amount of calls that failed after all attempts", default=0)
+    throttled_failures: int = Field(description="Amount of failed calls whose last error was a throttle",
+                                    default=0)
+    rate_limited_seconds: float = Field(description="Seconds spent waiting on the client side rate limit",
+                                        default=0)
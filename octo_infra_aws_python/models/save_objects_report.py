@@ -0,0 +1,13 @@
+from pydantic import BaseModel, Field
+from typing import List
+
+
+class SaveObjectsReport(BaseModel):
+    saved: int = Field(description="Amount of objects saved", default=0)
+    failed: List[str] = Field(description="Object paths that failed to save", default_factory=list)
+    throttles: int = Field(description="Amount of saves throttled with SlowDown after the client retries",
+                           default=0)
+    backoff_seconds: float = Field(description="Seconds spent backing off after throttles, summed over all the saves",
+                                   default=0)
+    total_seconds: float = Field(description="Wall time of the whole save", default=0)
+    objects_per_second: float = Field(description="Objects saved per second of wall time", default=0)
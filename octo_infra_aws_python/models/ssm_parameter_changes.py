@@ -0,0 +1,12 @@
+from pydantic import BaseModel, Field
+from typing import Dict, List
+
+
+class SSMParameterChanges(BaseModel):
+    added: Dict[str, str] = Field(description="Values by name of the parameters added", default_factory=dict)
+    updated: Dict[str, str] = Field(description="New values by name of the parameters updated",
+                                    default_factory=dict)
+    removed: List[str] = Field(description="Names of the parameters removed", default_factory=list)
+
+    def is_empty(self) -> bool:
+        return not self.added and not self.updated and not self.removed
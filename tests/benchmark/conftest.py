@@ -0,0 +1,167 @@
+"""
+Offline benchmarks of the hot paths against an in process AWS stand-in
+
+Run with:
+    python -m pytest tests/benchmark --benchmark-run [--benchmark-save results.json]
+    python -m pytest tests/benchmark --benchmark-run --benchmark-compare results.json --benchmark-threshold 0.2
+"""
+import gc
+import json
+import os
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, NamedTuple, Optional
+
+import pytest
+from stand_in import AWSStandIn
+
+from octo_infra_aws_python.logic.clients import Clients
+
+STAND_IN_HOOK_NAME = "benchmark-stand-in"
+
+
+class Measurement(NamedTuple):
+    name: str
+    wall_seconds: float
+    api_calls: Dict[str, int]
+    peak_memory_bytes: int
+
+    @property
+    def total_api_calls(self) -> int:
+        return sum(self.api_calls.values())
+
+
+def pytest_addoption(parser: Any) -> None:
+    group = parser.getgroup("benchmark")
+    group.addoption("--benchmark-run", action="store_true", default=False,
+                    help="Run the benchmarks, they are skipped otherwise")
+    group.addoption("--benchmark-latency", type=float, default=0.002,
+                    help="Latency in seconds injected into every stand-in API call")
+    group.addoption("--benchmark-rounds", type=int, default=3,
+                    help="Rounds per benchmark, the fastest round is reported")
+    group.addoption("--benchmark-scale", type=float, default=1.0,
+                    help="Multiplier of the synthetic data sizes")
+    group.addoption("--benchmark-save", default=None,
+                    help="Path to save the measurements to as a JSON baseline")
+    group.addoption("--benchmark-compare", default=None,
+                    help="Path of a JSON baseline to compare the measurements against")
+    group.addoption("--benchmark-threshold", type=float, default=0.2,
+                    help="Allowed relative regression of wall time and peak memory over the baseline")
+
+
+def pytest_collection_modifyitems(config: Any, items: List[Any]) -> None:
+    if config.getoption("--benchmark-run", default=False):
+        return
+    skip = pytest.mark.skip(reason="Benchmarks run only with --benchmark-run")
+    benchmark_dir = os.path.dirname(__file__)
+    for item in items:
+        if str(item.fspath).startswith(benchmark_dir):
+            item.add_marker(skip)
+
+
+def pytest_configure(config: Any) -> None:
+    config.benchmark_measurements = []
+
+
+def pytest_terminal_summary(terminalreporter: Any, config: Any) -> None:
+    measurements: List[Measurement] = getattr(config, "benchmark_measurements", [])
+    if not measurements:
+        return
+    terminalreporter.section("benchmark")
+    terminalreporter.write_line(f"{'Name':<40} {'Wall (s)':>10} {'API Calls':>10} {'Peak Memory (MB)':>18}")
+    for measurement in measurements:
+        terminalreporter.write_line(f"{measurement.name:<40} {measurement.wall_seconds:>10.3f} "
+                                    f"{measurement.total_api_calls:>10} "
+                                    f"{measurement.peak_memory_bytes / 1024 / 1024:>18.1f}")
+    save_path = config.getoption("--benchmark-save")
+    if save_path:
+        with open(save_path, "w") as f:
+            json.dump({measurement.name: measurement._asdict() for measurement in measurements}, f, indent=2)
+        terminalreporter.write_line(f"Saved benchmark baseline [{save_path}]")
+
+
+@pytest.fixture
+def scale(request: Any) -> float:
+    return request.config.getoption("--benchmark-scale")
+
+
+@pytest.fixture
+def aws(request: Any, monkeypatch: Any) -> AWSStandIn:
+    """
+    Routes all the pooled clients to a fresh stand-in for the duration of the benchmark
+    """
+    monkeypatch.setenv("AWS_DEFAULT_REGION", "us-east-1")
+    monkeypatch.setenv("AWS_ACCESS_KEY_ID", "benchmark")
+    monkeypatch.setenv("AWS_SECRET_ACCESS_KEY", "benchmark")
+    stand_in = AWSStandIn(request.config.getoption("--benchmark-latency"))
+    Clients.reset()
+    Clients.set_hook(STAND_IN_HOOK_NAME, stand_in.register)
+    yield stand_in
+    Clients.set_hook(STAND_IN_HOOK_NAME, None)
+    Clients.reset()
+
+
+@pytest.fixture
+def record_measurement(request: Any) -> Callable[..., None]:
+    """
+    Adds a measurement of the benchmark to the report, failing it when it regresses over the compared baseline
+    """
+    def record(wall_seconds: float, peak_memory_bytes: int, api_calls: Optional[Dict[str, int]] = None) -> None:
+        measurement = Measurement(name=request.node.name, wall_seconds=wall_seconds, api_calls=api_calls or {},
+                                  peak_memory_bytes=peak_memory_bytes)
+        request.config.benchmark_measurements.append(measurement)
+        _compare(request.config, measurement)
+
+    return record
+
+
+@pytest.fixture
+def benchmark(request: Any, aws: AWSStandIn, record_measurement: Callable[..., None]) -> Callable[..., Any]:
+    """
+    Measures a call over the configured rounds, reporting the fastest wall time, the API calls and the lowest
+    peak memory, so the clients created by the first round are not counted once warm
+    """
+    rounds = request.config.getoption("--benchmark-rounds")
+
+    def run(func: Callable[..., Any], *args: Any, setup: Optional[Callable[[], None]] = None, **kwargs: Any) -> Any:
+        result = None
+        wall_seconds: List[float] = []
+        peak_memory_bytes: List[int] = []
+        for _ in range(rounds):
+            if setup:
+                setup()
+            aws.reset_calls()
+            gc.collect()
+            tracemalloc.start()
+            start = time.perf_counter()
+            try:
+                result = func(*args, **kwargs)
+                wall_seconds.append(time.perf_counter() - start)
+                peak_memory_bytes.append(tracemalloc.get_traced_memory()[1])
+            finally:
+                tracemalloc.stop()
+        record_measurement(min(wall_seconds), min(peak_memory_bytes), dict(aws.calls))
+        return result
+
+    return run
+
+
+def _compare(config: Any, measurement: Measurement) -> None:
+    compare_path = config.getoption("--benchmark-compare")
+    if not compare_path:
+        return
+    with open(compare_path) as f:
+        baseline = json.load(f).get(measurement.name)
+    if not baseline:
+        return
+    threshold = 1 + config.getoption("--benchmark-threshold")
+    regressions = []
+    if measurement.wall_seconds > baseline["wall_seconds"] * threshold:
+        regressions.append(f"wall time {measurement.wall_seconds:.3f}s over {baseline['wall_seconds']:.3f}s")
+    if measurement.peak_memory_bytes > baseline["peak_memory_bytes"] * threshold:
+        regressions.append(f"peak memory {measurement.peak_memory_bytes} over {baseline['peak_memory_bytes']}")
+    # API calls are deterministic, so any additional call is a regression
+    if measurement.total_api_calls > sum(baseline["api_calls"].values()):
+        regressions.append(f"API calls {measurement.api_calls} over {baseline['api_calls']}")
+    if regressions:
+        pytest.fail(f"Benchmark regressed [{measurement.name}]: {', '.join(regressions)}")
@@ -0,0 +1,491 @@
+from bisect import bisect_left, bisect_right, insort
+from collections import Counter
+from hashlib import md5
+from itertools import count
+from threading import Lock
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import unquote
+from botocore.awsrequest import AWSResponse
+from botocore.response import StreamingBody
+import io
+import time
+
+PARAMS_KEY = "stand_in_params"
+MAX_KEPT_BODY_SIZE = 64 * 1024
+
+# Maps EC2 describe filter names to the values of an item they match against
+FILTER_VALUES: Dict[str, Callable[[Dict[str, Any]], List[Any]]] = {
+    "instance-id": lambda item: [item.get("InstanceId")],
+    "vpc-id": lambda item: [item.get("VpcId")],
+    "subnet-id": lambda item: [item.get("SubnetId")],
+    "attachment.vpc-id": lambda item: [attachment["VpcId"] for attachment in item.get("Attachments", [])],
+    "association.main": lambda item: [str(association.get("Main", False)).lower()
+                                      for association in item.get("Associations", [])],
+    "requester-vpc-info.vpc-id": lambda item: [item.get("RequesterVpcInfo", {}).get("VpcId")],
+    "instance-state-name": lambda item: [item.get("State", {}).get("Name")],
+}
+
+
+def body_size(body: Any) -> int:
+    # Botocore wraps bytes bodies into streams before the call
+    if body is None:
+        return 0
+    if hasattr(body, "seek"):
+        position = body.tell()
+        # Some stream wrappers return None from seek
+        body.seek(0, 2)
+        size = body.tell()
+        body.seek(position)
+        return size
+    return len(body)
+
+
+def body_content(body: Any) -> bytes:
+    if hasattr(body, "read"):
+        position = body.tell()
+        content = body.read()
+        body.seek(position)
+        return content
+    return bytes(body or b"")
+
+
+class StandInError(Exception):
+    def __init__(self, code: str, status_code: int = 400) -> None:
+        super().__init__(code)
+        self.code = code
+        self.status_code = status_code
+
+
+class AWSStandIn:
+    """
+    In process stand-in of the AWS APIs used by the hot paths
+    Answers the calls of the pooled clients from in memory state, after sleeping the injected latency
+    """
+    def __init__(self, latency_seconds: float) -> None:
+        self.latency_seconds = latency_seconds
+        self.calls: Counter = Counter()
+        self.__lock = Lock()
+        self.__ids = count(1)
+        self.objects: Dict[str, Dict[str, int]] = {}
+        self.__sorted_keys: Dict[str, List[str]] = {}
+        # Part sizes by part number of the multipart uploads in progress, by upload id
+        self.uploads: Dict[str, Dict[int, int]] = {}
+        # Content of the small objects put, or of all the objects if kept, other objects read back as zeros
+        self.bodies: Dict[Tuple[str, str], bytes] = {}
+        self.keep_bodies = False
+        self.__upload_bodies: Dict[str, Dict[int, bytes]] = {}
+        self.__body_etags: Dict[Tuple[str, str], str] = {}
+        self.parameters: Dict[str, str] = {}
+        # Versions of the parameters set with set_parameter, other parameters are at version 1
+        self.parameter_versions: Dict[str, int] = {}
+        self.service_instances: Dict[Tuple[str, str], List[Dict[str, Any]]] = {}
+        self.ec2: Dict[str, Dict[str, Dict[str, Any]]] = {collection: {} for collection in (
+            "Images", "Instances", "Vpcs", "Subnets", "SecurityGroups", "InternetGateways", "RouteTables",
+            "NetworkAcls", "NetworkInterfaces", "VpcEndpoints", "VpcPeeringConnections", "KeyPairs")}
+        self.__handlers: Dict[Tuple[str, str], Callable[[Dict[str, Any]], Dict[str, Any]]] = {
+            ("s3", "ListObjects"): self.__list_objects,
+            ("s3", "DeleteObjects"): self.__delete_objects,
+            ("s3", "GetObject"): self.__get_object,
+            ("s3", "HeadObject"): self.__head_object,
+            ("s3", "CopyObject"): self.__copy_object,
+            ("s3", "UploadPartCopy"): self.__upload_part_copy,
+            ("s3", "PutObject"): self.__put_object,
+            ("s3", "CreateMultipartUpload"): self.__create_multipart_upload,
+            ("s3", "UploadPart"): self.__upload_part,
+            ("s3", "CompleteMultipartUpload"): self.__complete_multipart_upload,
+            ("s3", "AbortMultipartUpload"): self.__abort_multipart_upload,
+            ("ssm", "GetParameter"): self.__get_parameter,
+            ("ssm", "GetParametersByPath"): self.__get_parameters_by_path,
+            ("ssm", "DeleteParameters"): self.__delete_parameters,
+            ("ssm", "DescribeParameters"): self.__describe_parameters,
+            ("ssm", "GetParameters"): self.__get_parameters,
+            ("servicediscovery", "DiscoverInstances"): self.__discover_instances,
+            ("ec2", "DescribeImages"): self.__describe("Images", "ImageId", "ImageIds"),
+            ("ec2", "DescribeInstances"): self.__describe_instances,
+            ("ec2", "RunInstances"): self.__run_instances,
+            ("ec2", "TerminateInstances"): self.__terminate_instances,
+            ("ec2", "DeleteKeyPair"): self.__delete("KeyPairs", "KeyName"),
+            ("ec2", "AssociateDhcpOptions"): lambda params: {},
+            ("ec2", "DescribeInternetGateways"): self.__describe("InternetGateways", "InternetGatewayId",
+                                                                 "InternetGatewayIds"),
+            ("ec2", "DetachInternetGateway"): self.__detach_internet_gateway,
+            ("ec2", "DeleteInternetGateway"): self.__delete("InternetGateways", "InternetGatewayId"),
+            ("ec2", "DescribeRouteTables"): self.__describe("RouteTables", "RouteTableId", "RouteTableIds"),
+            ("ec2", "DisassociateRouteTable"): self.__disassociate_route_table,
+            ("ec2", "DeleteRouteTable"): self.__delete("RouteTables", "RouteTableId"),
+            ("ec2", "DescribeVpcEndpoints"): self.__describe("VpcEndpoints", "VpcEndpointId", "VpcEndpointIds"),
+            ("ec2", "DeleteVpcEndpoints"): self.__delete_vpc_endpoints,
+            ("ec2", "DescribeSecurityGroups"): self.__describe("SecurityGroups", "GroupId", "GroupIds"),
+            ("ec2", "DeleteSecurityGroup"): self.__delete("SecurityGroups", "GroupId"),
+            ("ec2", "DescribeVpcPeeringConnections"): self.__describe("VpcPeeringConnections",
+                                                                      "VpcPeeringConnectionId",
+                                                                      "VpcPeeringConnectionIds"),
+            ("ec2", "DeleteVpcPeeringConnection"): self.__delete("VpcPeeringConnections", "VpcPeeringConnectionId"),
+            ("ec2", "DescribeNetworkAcls"): self.__describe("NetworkAcls", "NetworkAclId", "NetworkAclIds"),
+            ("ec2", "DeleteNetworkAcl"): self.__delete("NetworkAcls", "NetworkAclId"),
+            ("ec2", "DescribeSubnets"): self.__describe("Subnets", "SubnetId", "SubnetIds"),
+            ("ec2", "DescribeNetworkInterfaces"): self.__describe("NetworkInterfaces", "NetworkInterfaceId",
+                                                                  "NetworkInterfaceIds"),
+            ("ec2", "DeleteNetworkInterface"): self.__delete("NetworkInterfaces", "NetworkInterfaceId"),
+            ("ec2", "DeleteSubnet"): self.__delete("Subnets", "SubnetId"),
+            ("ec2", "DeleteVpc"): self.__delete("Vpcs", "VpcId"),
+        }
+
+    def register(self, client: Any) -> None:
+        """
+        Client hook answering every call of the client from the stand-in
+
+        :param client:
+        :return:
+        """
+        client.meta.events.register("before-parameter-build", self.__capture_params,
+                                    unique_id="stand-in-before-parameter-build")
+        client.meta.events.register("before-call", self.__respond, unique_id="stand-in-before-call")
+
+    def reset_calls(self) -> None:
+        with self.__lock:
+            self.calls = Counter()
+
+    def new_id(self, prefix: str) -> str:
+        return f"{prefix}-{next(self.__ids):017x}"
+
+    # Population
+
+    def add_objects(self, bucket_name: str, keys: Iterable[str], size: int = 1024) -> None:
+        bucket = self.objects.setdefault(bucket_name, {})
+        bucket.update((key, size) for key in keys)
+        self.__sorted_keys[bucket_name] = sorted(bucket)
+
+    def set_parameter(self, name: str, value: str) -> None:
+        if name in self.parameters:
+            self.parameter_versions[name] = self.parameter_versions.get(name, 1) + 1
+        self.parameters[name] = value
+
+    def add_ec2(self, collection: str, item: Dict[str, Any]) -> Dict[str, Any]:
+        id_key = {"Images": "ImageId", "Instances": "InstanceId", "Vpcs": "VpcId", "Subnets": "SubnetId",
+                  "SecurityGroups": "GroupId", "InternetGateways": "InternetGatewayId",
+                  "RouteTables": "RouteTableId", "NetworkAcls": "NetworkAclId",
+                  "NetworkInterfaces": "NetworkInterfaceId", "VpcEndpoints": "VpcEndpointId",
+                  "VpcPeeringConnections": "VpcPeeringConnectionId", "KeyPairs": "KeyName"}[collection]
+        self.ec2[collection][item[id_key]] = item
+        return item
+
+    # Dispatch
+
+    def __capture_params(self, params: Dict[str, Any], context: Dict[str, Any], **kwargs: Any) -> None:
+        context[PARAMS_KEY] = dict(params)
+
+    def __respond(self, model: Any, context: Dict[str, Any], **kwargs: Any) -> Tuple[AWSResponse, Dict[str, Any]]:
+        service_name = model.service_model.service_name
+        time.sleep(self.latency_seconds)
+        with self.__lock:
+            self.calls[f"{service_name}.{model.name}"] += 1
+            handler = self.__handlers.get((service_name, model.name))
+            try:
+                if handler is None:
+                    raise StandInError("NotImplementedByStandIn", 501)
+                parsed = handler(context.get(PARAMS_KEY, {}))
+                status_code = 200
+            except StandInError as e:
+                parsed = {"Error": {"Code": e.code, "Message": e.code}}
+                status_code = e.status_code
+        parsed["ResponseMetadata"] = {"HTTPStatusCode": status_code, "HTTPHeaders": {}, "RetryAttempts": 0}
+        return AWSResponse(None, status_code, {}, None), parsed
+
+    # S3
+
+    def __list_objects(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        bucket_name = params["Bucket"]
+        if bucket_name not in self.objects:
+            raise StandInError("NoSuchBucket", 404)
+        bucket = self.objects[bucket_name]
+        keys = self.__sorted_keys[bucket_name]
+        prefix = params.get("Prefix", "")
+        delimiter = params.get("Delimiter")
+        max_keys = params.get("MaxKeys", 1000)
+        index = bisect_right(keys, params["Marker"]) if params.get("Marker") else bisect_left(keys, prefix)
+        contents: List[Dict[str, Any]] = []
+        prefixes: List[Dict[str, str]] = []
+        last_key: Optional[str] = None
+        while index < len(keys) and len(contents) + len(prefixes) < max_keys:
+            key = keys[index]
+            if not key.startswith(prefix):
+                break
+            if delimiter and delimiter in key[len(prefix):]:
+                common_prefix = key[:key.index(delimiter, len(prefix)) + 1]
+                prefixes.append({"Prefix": common_prefix})
+                # Skip the rest of the keys under the common prefix
+                index = bisect_right(keys, common_prefix + "\U0010ffff")
+                last_key = common_prefix
+                continue
+            contents.append({"Key": key, "Size": bucket[key], "ETag": '"0"', "StorageClass": "STANDARD"})
+            last_key = key
+            index += 1
+        is_truncated = index < len(keys) and keys[index].startswith(prefix)
+        response: Dict[str, Any] = {"IsTruncated": is_truncated, "Name": bucket_name, "Prefix": prefix,
+                                    "MaxKeys": max_keys, "Contents": contents}
+        if delimiter:
+            response["CommonPrefixes"] = prefixes
+            if is_truncated:
+                response["NextMarker"] = last_key
+        return response
+
+    def __delete_objects(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        objects = params["Delete"]["Objects"]
+        if len(objects) > 1000:
+            raise StandInError("MalformedXML")
+        bucket = self.objects.get(params["Bucket"], {})
+        deleted = []
+        for obj in objects:
+            bucket.pop(obj["Key"], None)
+            self.bodies.pop((params["Bucket"], obj["Key"]), None)
+            self.__body_etags.pop((params["Bucket"], obj["Key"]), None)
+            deleted.append({"Key": obj["Key"]})
+        self.__sorted_keys[params["Bucket"]] = sorted(bucket)
+        return {"Deleted": deleted}
+
+    def __store_object(self, bucket_name: str, key: str, size: int) -> None:
+        bucket = self.objects.setdefault(bucket_name, {})
+        self.bodies.pop((bucket_name, key), None)
+        self.__body_etags.pop((bucket_name, key), None)
+        if key not in bucket:
+            insort(self.__sorted_keys.setdefault(bucket_name, []), key)
+        bucket[key] = size
+
+    def __source_size(self, copy_source: Any) -> int:
+        # Botocore serializes the copy source into a quoted bucket/key string before the call
+        if isinstance(copy_source, str):
+            bucket_name, key = unquote(copy_source).split("/", 1)
+            copy_source = {"Bucket": bucket_name, "Key": key}
+        size = self.objects.get(copy_source["Bucket"], {}).get(copy_source["Key"])
+        if size is None:
+            raise StandInError("NoSuchKey", 404)
+        return size
+
+    def __head_object(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        size = self.__source_size(params)
+        return {"ContentLength": size, "ETag": f'"{size}"', "Metadata": {}}
+
+    def __copy_object(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        size = self.__source_size(params["CopySource"])
+        if size > 5 * 1024 * 1024 * 1024:
+            raise StandInError("InvalidRequest")
+        self.__store_object(params["Bucket"], params["Key"], size)
+        return {"CopyObjectResult": {"ETag": f'"{size}"'}}
+
+    def __upload_part_copy(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        if params["UploadId"] not in self.uploads:
+            raise StandInError("NoSuchUpload", 404)
+        size = self.__source_size(params["CopySource"])
+        if params.get("CopySourceIfMatch") not in (None, f'"{size}"'):
+            raise StandInError("PreconditionFailed", 412)
+        start, end = (int(position) for position in params["CopySourceRange"][len("bytes="):].split("-"))
+        if end >= size:
+            raise StandInError("InvalidRange", 416)
+        self.uploads[params["UploadId"]][params["PartNumber"]] = end - start + 1
+        return {"CopyPartResult": {"ETag": f'"{params["PartNumber"]}"'}}
+
+    def __get_object(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        size = self.objects.get(params["Bucket"], {}).get(params["Key"])
+        if size is None:
+            raise StandInError("NoSuchKey", 404)
+        body = self.bodies.get((params["Bucket"], params["Key"]))
+        # Objects without content are identified by their size only, so the size stands in for the content hash
+        etag = f'"{size}"'
+        if body is not None:
+            etag = self.__body_etags.get((params["Bucket"], params["Key"])) or f'"{md5(body).hexdigest()}"'
+            self.__body_etags[(params["Bucket"], params["Key"])] = etag
+        if params.get("IfNoneMatch") == etag:
+            raise StandInError("304", 304)
+        if params.get("IfMatch") not in (None, etag):
+            raise StandInError("PreconditionFailed", 412)
+        response: Dict[str, Any] = {"ETag": etag, "Metadata": {}}
+        start, end = 0, size - 1
+        if params.get("Range"):
+            first, last = params["Range"][len("bytes="):].split("-")
+            start, end = (max(0, size - int(last)), size - 1) if not first else \
+                (int(first), min(int(last), size - 1) if last else size - 1)
+            response["ContentRange"] = f"bytes {start}-{end}/{size}"
+        content = body[start:end + 1] if body is not None else bytes(end + 1 - start)
+        response.update({"Body": StreamingBody(io.BytesIO(content), len(content)), "ContentLength": len(content)})
+        return response
+
+    def __put_object(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        body = params.get("Body")
+        size = body_size(body)
+        self.__store_object(params["Bucket"], params["Key"], size)
+        if size <= MAX_KEPT_BODY_SIZE or self.keep_bodies:
+            self.bodies[(params["Bucket"], params["Key"])] = body_content(body)
+        return {"ETag": '"0"'}
+
+    def __create_multipart_upload(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        upload_id = self.new_id("upload")
+        self.uploads[upload_id] = {}
+        return {"Bucket": params["Bucket"], "Key": params["Key"], "UploadId": upload_id}
+
+    def __upload_part(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        if params["UploadId"] not in self.uploads:
+            raise StandInError("NoSuchUpload", 404)
+        self.uploads[params["UploadId"]][params["PartNumber"]] = body_size(params["Body"])
+        if self.keep_bodies:
+            self.__upload_bodies.setdefault(params["UploadId"], {})[params["PartNumber"]] = \
+                body_content(params["Body"])
+        return {"ETag": f'"{params["PartNumber"]}"'}
+
+    def __complete_multipart_upload(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        part_sizes = self.uploads.pop(params["UploadId"], None)
+        if part_sizes is None:
+            raise StandInError("NoSuchUpload", 404)
+        parts = params["MultipartUpload"]["Parts"]
+        part_numbers = [part["PartNumber"] for part in parts]
+        if part_numbers != sorted(part_sizes) or any(part["ETag"] != f'"{part["PartNumber"]}"' for part in parts):
+            raise StandInError("InvalidPart")
+        self.__store_object(params["Bucket"], params["Key"], sum(part_sizes.values()))
+        part_bodies = self.__upload_bodies.pop(params["UploadId"], None)
+        if part_bodies is not None:
+            self.bodies[(params["Bucket"], params["Key"])] = b"".join(part_bodies[number] for number in part_numbers)
+        return {"Bucket": params["Bucket"], "Key": params["Key"], "ETag": f'"0-{len(parts)}"'}
+
+    def __abort_multipart_upload(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        self.uploads.pop(params["UploadId"], None)
+        self.__upload_bodies.pop(params["UploadId"], None)
+        return {}
+
+    # SSM
+
+    def __get_parameter(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        name = params["Name"]
+        if name not in self.parameters:
+            raise StandInError("ParameterNotFound")
+        return {"Parameter": self.__parameter(name)}
+
+    def __parameter(self, name: str) -> Dict[str, Any]:
+        return {"Name": name, "Type": "String", "Value": self.parameters[name],
+                "Version": self.parameter_versions.get(name, 1)}
+
+    def __parameters_page(self, path: str, recursive: bool, params: Dict[str, Any],
+                          max_results: int) -> Tuple[List[str], Optional[str]]:
+        # Pages by name, so parameters deleted while paging do not shift the next pages
+        path = path.rstrip("/") + "/"
+        names = sorted(name for name in self.parameters if name.startswith(path) and name > params.get("NextToken", "")
+                       and (recursive or "/" not in name[len(path):]))
+        page = names[:params.get("MaxResults", max_results)]
+        return page, page[-1] if len(names) > len(page) else None
+
+    def __get_parameters_by_path(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        page, next_token = self.__parameters_page(params["Path"], params.get("Recursive", False), params, 10)
+        response: Dict[str, Any] = {"Parameters": [self.__parameter(name) for name in page]}
+        if next_token:
+            response["NextToken"] = next_token
+        return response
+
+    def __describe_parameters(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        path_filter = next(parameter_filter for parameter_filter in params["ParameterFilters"]
+                           if parameter_filter["Key"] == "Path")
+        page, next_token = self.__parameters_page(path_filter["Values"][0], path_filter.get("Option") == "Recursive",
+                                                  params, 50)
+        response: Dict[str, Any] = {"Parameters": [{key: value for key, value in self.__parameter(name).items()
+                                                    if key != "Value"} for name in page]}
+        if next_token:
+            response["NextToken"] = next_token
+        return response
+
+    def __get_parameters(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        names = params["Names"]
+        if len(names) > 10:
+            raise StandInError("ValidationException")
+        return {"Parameters": [self.__parameter(name) for name in names if name in self.parameters],
+                "InvalidParameters": [name for name in names if name not in self.parameters]}
+
+    def __delete_parameters(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        names = params["Names"]
+        if len(names) > 10:
+            raise StandInError("ValidationException")
+        deleted = [name for name in names if self.parameters.pop(name, None) is not None]
+        for name in deleted:
+            self.parameter_versions.pop(name, None)
+        return {"DeletedParameters": deleted, "InvalidParameters": [name for name in names if name not in deleted]}
+
+    # Service discovery
+
+    def __discover_instances(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        instances = self.service_instances.get((params["NamespaceName"], params["ServiceName"]), [])
+        query = params.get("QueryParameters", {})
+        return {"Instances": [instance for instance in instances
+                              if all(instance["Attributes"].get(key) == value for key, value in query.items())]}
+
+    # EC2
+
+    def __filtered(self, collection: str, id_key: str, ids_param: str, params: Dict[str, Any]) -> List[Dict[str, Any]]:
+        items = self.ec2[collection]
+        ids = params.get(ids_param)
+        if ids:
+            missing = [item_id for item_id in ids if item_id not in items]
+            if missing:
+                raise StandInError(f"Invalid{id_key}.NotFound")
+            selected = [items[item_id] for item_id in ids]
+        else:
+            selected = list(items.values())
+        for ec2_filter in params.get("Filters", []):
+            values = set(ec2_filter["Values"])
+            selected = [item for item in selected if values.intersection(FILTER_VALUES[ec2_filter["Name"]](item))]
+        return selected
+
+    def __describe(self, collection: str, id_key: str, ids_param: str) -> Callable[[Dict[str, Any]], Dict[str, Any]]:
+        return lambda params: {collection: self.__filtered(collection, id_key, ids_param, params)}
+
+    def __delete(self, collection: str, id_key: str) -> Callable[[Dict[str, Any]], Dict[str, Any]]:
+        def delete(params: Dict[str, Any]) -> Dict[str, Any]:
+            if self.ec2[collection].pop(params[id_key], None) is None and collection != "KeyPairs":
+                raise StandInError(f"Invalid{id_key}.NotFound")
+            return {}
+        return delete
+
+    def __describe_instances(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        instances = self.__filtered("Instances", "InstanceId", "InstanceIds", params)
+        return {"Reservations": [{"ReservationId": "r-0", "Instances": instances}] if instances else []}
+
+    def __run_instances(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        if params["ImageId"] not in self.ec2["Images"]:
+            raise StandInError("InvalidAMIID.NotFound")
+        interface = params.get("NetworkInterfaces", [{}])[0]
+        subnet_id = interface.get("SubnetId")
+        tags = [tag for specification in params.get("TagSpecifications", [])
+                if specification["ResourceType"] == "instance" for tag in specification["Tags"]]
+        instances = [self.add_ec2("Instances", {
+            "InstanceId": self.new_id("i"),
+            "ImageId": params["ImageId"],
+            "InstanceType": params.get("InstanceType", "t2.micro"),
+            "KeyName": params.get("KeyName"),
+            "SubnetId": subnet_id,
+            "VpcId": self.ec2["Subnets"].get(subnet_id, {}).get("VpcId"),
+            "State": {"Code": 16, "Name": "running"},
+            "Tags": tags
+        }) for _ in range(params["MaxCount"])]
+        return {"ReservationId": self.new_id("r"), "Instances": instances}
+
+    def __terminate_instances(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        changes = []
+        for instance_id in params["InstanceIds"]:
+            instance = self.ec2["Instances"][instance_id]
+            previous = instance["State"]
+            instance["State"] = {"Code": 48, "Name": "terminated"}
+            changes.append({"InstanceId": instance_id, "PreviousState": previous, "CurrentState": instance["State"]})
+        return {"TerminatingInstances": changes}
+
+    def __detach_internet_gateway(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        internet_gateway = self.ec2["InternetGateways"][params["InternetGatewayId"]]
+        internet_gateway["Attachments"] = [attachment for attachment in internet_gateway["Attachments"]
+                                           if attachment["VpcId"] != params["VpcId"]]
+        return {}
+
+    def __disassociate_route_table(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        for route_table in self.ec2["RouteTables"].values():
+            route_table["Associations"] = [association for association in route_table["Associations"]
+                                           if association["RouteTableAssociationId"] != params["AssociationId"]]
+        return {}
+
+    def __delete_vpc_endpoints(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        for endpoint_id in params["VpcEndpointIds"]:
+            self.ec2["VpcEndpoints"].pop(endpoint_id, None)
+        return {"Unsuccessful": []}
@@ -0,0 +1,356 @@
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from octo_infra_aws_python.logic.artifacts import Artifacts
+from octo_infra_aws_python.logic.ec2 import EC2
+from octo_infra_aws_python.logic.network import Network
+from octo_infra_aws_python.logic.object_cache import ObjectCache
+from octo_infra_aws_python.logic.packs import Packs
+from octo_infra_aws_python.logic.s3 import S3
+from octo_infra_aws_python.logic.service_discovery import ServiceDiscovery
+from octo_infra_aws_python.logic.ssm import SSM
+from octo_infra_aws_python.logic.ssm_change_feed import SSMChangeFeed
+from octo_infra_aws_python.models.actions.artifacts import PublishArtifacts
+from octo_infra_aws_python.models.actions.ec2 import CreateEC2
+from octo_infra_aws_python.models.actions.network import DestroyVPC
+from octo_infra_aws_python.models.actions.s3 import DeleteObjects, FindObjects, LoadObject, LoadPackMember, \
+    MoveObjects, PresignObjects, SaveObject, SaveObjects, SavePack
+from octo_infra_aws_python.models.actions.service_discovery import FindServiceInstance
+from octo_infra_aws_python.models.actions.ssm import DestroySSMPath, FindSSMParameter, WatchSSMPath
+from octo_infra_aws_python.models.object_cache_policy import ObjectCachePolicy
+from octo_infra_aws_python.models.plan_settings import PlanSettings
+
+BUCKET_NAME = "benchmark-bucket"
+STORM_WORKERS = 64
+
+
+def test_find_objects(aws, benchmark, scale):
+    key_count = int(1_000_000 * scale)
+    aws.add_objects(BUCKET_NAME, (f"data/{index // 1000:05d}/object-{index:07d}.bin" for index in range(key_count)))
+
+    objects = benchmark(S3.find_objects, FindObjects(bucket_name=BUCKET_NAME, base_search_path="data/"))
+
+    assert len(objects) == key_count
+
+
+def test_find_objects_compact(aws, benchmark, scale):
+    key_count = int(1_000_000 * scale)
+    aws.add_objects(BUCKET_NAME, (f"data/{index // 1000:05d}/object-{index:07d}.bin" for index in range(key_count)))
+
+    objects = benchmark(S3.find_objects_compact, FindObjects(bucket_name=BUCKET_NAME, base_search_path="data/"))
+
+    assert len(objects) == key_count
+
+
+def test_delete_objects(aws, benchmark, scale):
+    keys = [f"delete/object-{index:07d}.bin" for index in range(int(100_000 * scale))]
+
+    def delete_all():
+        # A single delete call accepts up to 1000 keys
+        for chunk_start in range(0, len(keys), 1000):
+            assert S3.delete_objects(DeleteObjects(bucket_name=BUCKET_NAME,
+                                                   objects_path=keys[chunk_start:chunk_start + 1000]))
+
+    benchmark(delete_all, setup=lambda: aws.add_objects(BUCKET_NAME, keys))
+
+    assert not aws.objects[BUCKET_NAME]
+
+
+def test_save_object_stream(aws, benchmark, scale):
+    chunk = b"x" * 64 * 1024
+    chunk_count = int(256 * 1024 * 1024 * scale) // len(chunk)
+
+    def save():
+        # The body is produced while it is uploaded, and never held whole
+        return S3.save_object(SaveObject(bucket_name=BUCKET_NAME, object_path="stream/report.bin",
+                                         body=(chunk for _ in range(chunk_count))))
+
+    assert benchmark(save)
+    assert aws.objects[BUCKET_NAME]["stream/report.bin"] == len(chunk) * chunk_count
+
+
+def test_save_object_stream_compressed(aws, benchmark, scale):
+    chunk = b"timestamp=0 level=info message=benchmark\n" * 1024
+    chunk_count = max(1, int(64 * 1024 * 1024 * scale) // len(chunk))
+
+    def save():
+        # Compression runs ahead of the part uploads on a worker thread
+        return S3.save_object(SaveObject(bucket_name=BUCKET_NAME, object_path="stream/report.log.gz",
+                                         body=(chunk for _ in range(chunk_count)), codec="gzip"))
+
+    assert benchmark(save)
+    assert aws.objects[BUCKET_NAME]["stream/report.log.gz"] < len(chunk) * chunk_count
+
+
+def test_move_objects(aws, benchmark, scale):
+    keys = [f"move/source/object-{index:07d}.bin" for index in range(int(20_000 * scale))]
+    # Objects over 5 GB are copied in parts
+    large_keys = [f"move/source/large-{index}.bin" for index in range(2)]
+
+    def populate():
+        aws.objects.pop(BUCKET_NAME, None)
+        aws.add_objects(BUCKET_NAME, keys)
+        aws.add_objects(BUCKET_NAME, large_keys, size=6 * 1024 * 1024 * 1024)
+
+    moved = benchmark(S3.move_objects, MoveObjects(source=FindObjects(bucket_name=BUCKET_NAME,
+                                                                      base_search_path="move/source/"),
+                                                   destination_prefix="move/destination/",
+                                                   max_concurrent_copies=STORM_WORKERS), setup=populate)
+
+    assert moved
+    assert sorted(aws.objects[BUCKET_NAME]) == sorted(key.replace("/source/", "/destination/")
+                                                      for key in keys + large_keys)
+    assert aws.calls["s3.UploadPartCopy"] == len(large_keys) * 12
+
+
+def test_load_object_cached(aws, benchmark, scale):
+    aws.add_objects(BUCKET_NAME, ["config/model.bin"], size=4 * 1024 * 1024)
+    load_count = max(1, int(2_000 * scale))
+    ObjectCache.configure(ObjectCachePolicy())
+
+    def load_all():
+        # Unchanged objects cost a conditional get only, concurrent loads share it
+        with ThreadPoolExecutor(max_workers=STORM_WORKERS) as executor:
+            return list(executor.map(
+                lambda _: S3.load_object(LoadObject(bucket_name=BUCKET_NAME, object_path="config/model.bin")),
+                range(load_count)))
+
+    try:
+        bodies = benchmark(load_all)
+    finally:
+        ObjectCache.disable()
+
+    assert all(len(body) == 4 * 1024 * 1024 for body in bodies)
+
+
+def test_republish_artifacts(aws, benchmark, scale, tmp_path):
+    files = {}
+    for index in range(max(1, int(500 * scale))):
+        path = tmp_path / f"artifact-{index}.bin"
+        path.write_bytes(index.to_bytes(4, "big") * (256 * 1024 // 4))
+        files[f"build/artifact-{index}.bin"] = str(path)
+    publish_artifacts = PublishArtifacts(bucket_name=BUCKET_NAME, manifest_path="builds/latest.json", files=files)
+    assert Artifacts.publish_artifacts(publish_artifacts)
+
+    # An unchanged build costs hashing and reading the previous manifest only
+    manifest = benchmark(Artifacts.publish_artifacts, publish_artifacts)
+
+    assert len(manifest.artifacts) == len(files)
+    assert dict(aws.calls) == {"s3.GetObject": 1}
+
+
+def test_save_objects_bulk(aws, benchmark, scale):
+    object_count = int(20_000 * scale)
+    body = b"x" * 2048
+
+    def save_all():
+        return S3.save_objects(SaveObjects(
+            objects=(SaveObject(bucket_name=BUCKET_NAME, object_path=f"events/{index:07d}.json", body=body)
+                     for index in range(object_count)),
+            shard_digits=2
+        ))
+
+    report = benchmark(save_all)
+
+    assert report.saved == object_count and not report.failed
+    assert S3.shard_object_path("events/0000000.json", 2) in aws.objects[BUCKET_NAME]
+
+
+def test_presign_objects(aws, benchmark, scale):
+    object_paths = [f"data/part-{index:07d}.parquet" for index in range(int(1_000_000 * scale))]
+
+    def presign_all():
+        # Signed locally with the signing key of the first url, no client call per url
+        return S3.presign_objects(PresignObjects(bucket_name=BUCKET_NAME, object_paths=object_paths))
+
+    urls = benchmark(presign_all)
+
+    assert len(urls) == len(object_paths)
+    assert not aws.calls
+
+
+def test_save_pack(aws, benchmark, scale):
+    member_count = int(100_000 * scale)
+    member = b"x" * 1024
+
+    def save():
+        # Members are streamed into a single multipart upload instead of a put each
+        return Packs.save_pack(SavePack(bucket_name=BUCKET_NAME, object_path="packs/small-files.pack",
+                                        members=((f"files/{index:07d}.txt", member) for index in range(member_count))))
+
+    index = benchmark(save)
+
+    assert len(index) == member_count
+
+
+def test_load_pack_members(aws, benchmark, scale):
+    aws.keep_bodies = True
+    member_count = int(100_000 * scale)
+    Packs.save_pack(SavePack(bucket_name=BUCKET_NAME, object_path="packs/small-files.pack",
+                             members=((f"files/{index:07d}.txt", index.to_bytes(4, "big") * 256)
+                                      for index in range(member_count))))
+    indexes = range(0, member_count, max(1, member_count // int(5_000 * scale)))
+
+    def load_all():
+        # Every member is a single ranged get once the pack index is cached
+        with ThreadPoolExecutor(max_workers=STORM_WORKERS) as executor:
+            return list(executor.map(lambda index: Packs.load_pack_member(LoadPackMember(
+                bucket_name=BUCKET_NAME, object_path="packs/small-files.pack", member_name=f"files/{index:07d}.txt"
+            )), indexes))
+
+    members = benchmark(load_all)
+
+    assert members == [index.to_bytes(4, "big") * 256 for index in indexes]
+
+
+def test_ssm_read_storm(aws, benchmark, scale):
+    names = [f"/benchmark/parameter-{index}" for index in range(int(5_000 * scale))]
+    aws.parameters.update({name: f"value-{name}" for name in names})
+
+    def read_all():
+        with ThreadPoolExecutor(max_workers=STORM_WORKERS) as executor:
+            return list(executor.map(lambda name: SSM.find_ssm_parameter(FindSSMParameter(name=name)), names))
+
+    values = benchmark(read_all)
+
+    assert values == [f"value-{name}" for name in names]
+
+
+def test_destroy_ssm_path(aws, benchmark, scale):
+    names = [f"/benchmark/service-{index % 20}/parameter-{index}" for index in range(int(5_000 * scale))]
+
+    def populate():
+        aws.parameters.update({name: "value" for name in names})
+
+    # Every listed page is deleted with a single call while the next pages are listed
+    report = benchmark(SSM.destroy_ssm_path, DestroySSMPath(path="/benchmark"), setup=populate)
+
+    assert sorted(report.deleted) == sorted(names) and not report.failed
+    assert not aws.parameters
+    assert aws.calls["ssm.DeleteParameters"] == aws.calls["ssm.GetParametersByPath"] == -(-len(names) // 10)
+
+
+def test_ssm_change_feed_refresh(aws, benchmark, scale):
+    names = [f"/benchmark/config/parameter-{index:05d}" for index in range(int(10_000 * scale))]
+    changed_names = names[::100]
+    aws.parameters.update({name: "value" for name in names})
+    feed = SSMChangeFeed(WatchSSMPath(path="/benchmark/config"))
+    feed.refresh()
+
+    def change():
+        for name in changed_names:
+            aws.set_parameter(name, f"value-{aws.parameter_versions.get(name, 1)}")
+
+    # Versions are listed 50 per call, only the changed parameters are fetched
+    changes = benchmark(feed.refresh, setup=change)
+
+    assert sorted(changes.updated) == changed_names and not changes.added and not changes.removed
+    assert aws.calls["ssm.DescribeParameters"] == -(-len(names) // 50)
+    assert aws.calls["ssm.GetParameters"] == -(-len(changed_names) // 10)
+
+
+def test_ec2_launch_and_wait(aws, benchmark, scale):
+    instance_count = max(1, int(200 * scale))
+    aws.add_ec2("Images", {"ImageId": "ami-benchmark", "Name": "benchmark", "PlatformDetails": "Linux/UNIX",
+                           "State": "available"})
+    aws.add_ec2("Subnets", {"SubnetId": "subnet-benchmark", "VpcId": "vpc-benchmark"})
+    create_ec2 = CreateEC2(vpc_id="vpc-benchmark", subnet_id="subnet-benchmark", instance_name="benchmark",
+                           security_group="sg-benchmark", keypair="benchmark", ami="ami-benchmark")
+
+    instance_ids = benchmark(EC2.create_ec2_instance, create_ec2, instance_count)
+
+    assert len(instance_ids) == instance_count
+
+
+def populate_vpc(aws, vpc_id, subnet_count):
+    aws.add_ec2("Vpcs", {"VpcId": vpc_id})
+    aws.add_ec2("InternetGateways", {"InternetGatewayId": "igw-populated",
+                                     "Attachments": [{"VpcId": vpc_id, "State": "available"}]})
+    aws.add_ec2("RouteTables", {"RouteTableId": "rtb-main", "VpcId": vpc_id, "Associations": [
+        {"RouteTableAssociationId": "rtbassoc-main", "RouteTableId": "rtb-main", "Main": True}]})
+    aws.add_ec2("NetworkAcls", {"NetworkAclId": "acl-default", "VpcId": vpc_id, "IsDefault": True})
+    aws.add_ec2("SecurityGroups", {"GroupId": "sg-default", "GroupName": "default", "VpcId": vpc_id})
+    aws.add_ec2("VpcEndpoints", {"VpcEndpointId": "vpce-populated", "VpcId": vpc_id})
+    aws.add_ec2("VpcPeeringConnections", {"VpcPeeringConnectionId": "pcx-populated",
+                                          "RequesterVpcInfo": {"VpcId": vpc_id}})
+    for index in range(subnet_count):
+        subnet_id = f"subnet-{index}"
+        aws.add_ec2("Subnets", {"SubnetId": subnet_id, "VpcId": vpc_id})
+        aws.add_ec2("RouteTables", {"RouteTableId": f"rtb-{index}", "VpcId": vpc_id, "Associations": [
+            {"RouteTableAssociationId": f"rtbassoc-{index}", "RouteTableId": f"rtb-{index}",
+             "SubnetId": subnet_id, "Main": False}]})
+        aws.add_ec2("NetworkAcls", {"NetworkAclId": f"acl-{index}", "VpcId": vpc_id, "IsDefault": False})
+        aws.add_ec2("SecurityGroups", {"GroupId": f"sg-{index}", "GroupName": f"group-{index}",
+                                       "VpcId": vpc_id})
+        for interface in range(2):
+            aws.add_ec2("NetworkInterfaces", {"NetworkInterfaceId": f"eni-{index}-{interface}",
+                                              "SubnetId": subnet_id, "VpcId": vpc_id})
+        for instance in range(5):
+            aws.add_ec2("Instances", {"InstanceId": f"i-{index}-{instance}", "SubnetId": subnet_id,
+                                      "VpcId": vpc_id, "KeyName": f"key-{index}",
+                                      "State": {"Code": 16, "Name": "running"}})
+
+
+def test_destroy_populated_vpc(aws, benchmark, scale):
+    vpc_id = "vpc-populated"
+    subnet_count = max(1, int(20 * scale))
+
+    benchmark(Network.destroy_vpc, DestroyVPC(vpc_id=vpc_id, full_cleanup=True),
+              setup=lambda: populate_vpc(aws, vpc_id, subnet_count))
+
+    assert vpc_id not in aws.ec2["Vpcs"]
+    assert not aws.ec2["Subnets"]
+
+
+def test_plan_destroy_populated_vpc(aws, benchmark, scale):
+    vpc_id = "vpc-populated"
+    populate_vpc(aws, vpc_id, max(1, int(20 * scale)))
+    # The stand-in changes states at once, so waits poll a single time
+    plan_settings = PlanSettings(instance_termination_seconds=0)
+
+    plan = benchmark(Network.plan_destroy_vpc, DestroyVPC(vpc_id=vpc_id, full_cleanup=True), plan_settings)
+    aws.reset_calls()
+    Network.destroy_vpc(DestroyVPC(vpc_id=vpc_id, full_cleanup=True))
+
+    assert planned_calls(plan) == dict(aws.calls)
+
+
+def test_plan_ec2_launch(aws, benchmark, scale):
+    instance_count = max(1, int(200 * scale))
+    aws.add_ec2("Images", {"ImageId": "ami-benchmark", "Name": "benchmark", "PlatformDetails": "Linux/UNIX",
+                           "State": "available"})
+    create_ec2 = CreateEC2(vpc_id="vpc-benchmark", subnet_id="subnet-benchmark", instance_name="benchmark",
+                           security_group="sg-benchmark", keypair="benchmark", ami="ami-benchmark")
+    plan_settings = PlanSettings(instance_running_seconds=0)
+
+    plan = benchmark(EC2.plan_create_ec2_instance, create_ec2, instance_count, plan_settings)
+    aws.reset_calls()
+    EC2.create_ec2_instance(create_ec2, instance_count)
+
+    assert len(plan.resources["instance"]) == instance_count
+    assert planned_calls(plan) == dict(aws.calls)
+
+
+def planned_calls(plan):
+    calls = Counter()
+    for step in plan.steps:
+        calls.update(step.api_calls)
+    return dict(calls)
+
+
+def test_service_discovery_lookups(aws, benchmark, scale):
+    services = [f"service-{index}" for index in range(int(2_000 * scale))]
+    for service in services:
+        aws.service_instances[("benchmark", service)] = [
+            {"InstanceId": f"{service}-{index}", "NamespaceName": "benchmark", "ServiceName": service,
+             "Attributes": {"AWS_INSTANCE_IPV4": f"10.0.0.{index}", "zone": f"zone-{index % 3}"}}
+            for index in range(3)]
+
+    def find_all():
+        with ThreadPoolExecutor(max_workers=STORM_WORKERS) as executor:
+            return list(executor.map(lambda service: ServiceDiscovery.find_service_instance(FindServiceInstance(
+                namespace="benchmark", service=service, attributes_filter={"zone": "zone-1"})), services))
+
+    instances = benchmark(find_all)
+
+    assert [instance.instance for instance in instances] == [f"{service}-1" for service in services]
@@ -0,0 +1,49 @@
+import json
+import subprocess
+import sys
+
+import pytest
+
+# Imports a module in a fresh interpreter, reporting the import time, peak memory and the loaded modules
+IMPORT_SCRIPT = """
+import importlib, json, sys, time, tracemalloc
+if sys.argv[2] == "trace":
+    tracemalloc.start()
+start = time.perf_counter()
+module = importlib.import_module(sys.argv[1])
+for attribute in sys.argv[3:]:
+    getattr(module, attribute)
+seconds = time.perf_counter() - start
+print(json.dumps({"seconds": seconds, "peak_memory_bytes": tracemalloc.get_traced_memory()[1],
+                  "modules": sorted(sys.modules)}))
+"""
+
+# Modules that must not be loaded by importing the logic module alone
+EAGER_MODULES = ("boto3", "botocore.config", "mypy_boto3", "Crypto", "s3transfer")
+
+
+def cold_import(module_name, *attributes, trace=False):
+    output = subprocess.run([sys.executable, "-c", IMPORT_SCRIPT, module_name, "trace" if trace else "time",
+                             *attributes], check=True, capture_output=True, text=True).stdout
+    return json.loads(output)
+
+
+@pytest.mark.parametrize("module_name, attributes, forbidden", [
+    ("octo_infra_aws_python", (), EAGER_MODULES + ("pydantic", "octo_infra_aws_python.logic")),
+    ("octo_infra_aws_python", ("S3",), EAGER_MODULES + ("octo_infra_aws_python.logic.ec2",)),
+    ("octo_infra_aws_python.logic.ssm", (), EAGER_MODULES),
+    ("octo_infra_aws_python.logic.ec2", (), EAGER_MODULES + ("octo_infra_aws_python.logic.network",
+                                                             "octo_infra_aws_python.logic.ami")),
+    ("octo_infra_aws_python.logic.environment", (), EAGER_MODULES),
+], ids=["package", "package_s3", "ssm", "ec2", "environment"])
+def test_cold_import(record_measurement, request, module_name, attributes, forbidden):
+    rounds = request.config.getoption("--benchmark-rounds")
+    imports = [cold_import(module_name, *attributes) for _ in range(rounds)]
+    traced = cold_import(module_name, *attributes, trace=True)
+
+    record_measurement(min(result["seconds"] for result in imports), traced["peak_memory_bytes"])
+
+    loaded = [module for module in traced["modules"]
+              if any(module == prefix or module.startswith(f"{prefix}.") or module.startswith(f"{prefix}_")
+                     for prefix in forbidden)]
+    assert not loaded
@@ -0,0 +1,64 @@
+"""
+Unit tests against botocore stubbed pooled clients, no AWS account or network needed
+"""
+from typing import Any, Callable, Iterator, List
+
+import pytest
+from botocore.config import Config
+from botocore.stub import Stubber
+
+from octo_infra_aws_python.logic.clients import DEFAULT_MAX_ATTEMPTS, DEFAULT_RETRY_MODE, Clients
+from octo_infra_aws_python.logic.retry import RETRY_HOOK_NAME, Retry
+from octo_infra_aws_python.models.retry_policy import RetryPolicy
+
+
+@pytest.fixture(autouse=True)
+def aws_env(monkeypatch: Any) -> Iterator[None]:
+    """
+    Fake credentials and region, with fresh pooled clients for every test
+    """
+    monkeypatch.setenv("AWS_DEFAULT_REGION", "us-east-1")
+    monkeypatch.setenv("AWS_ACCESS_KEY_ID", "testing")
+    monkeypatch.setenv("AWS_SECRET_ACCESS_KEY", "testing")
+    monkeypatch.delenv("AWS_SESSION_TOKEN", raising=False)
+    monkeypatch.delenv("AWS_PROFILE", raising=False)
+    Clients.reset()
+    yield
+    Clients.reset()
+
+
+@pytest.fixture
+def stub() -> Iterator[Callable[..., Stubber]]:
+    """
+    Activates a stubber on the pooled client of a service, or on the client of its pooled resource,
+    the code under test gets the same client
+    Every stubbed response must have been used by the end of the test
+    """
+    stubbers: List[Stubber] = []
+
+    def stub_client(service_name: str, region_name: Any = None, resource: bool = False) -> Stubber:
+        client = Clients.resource(service_name, region_name).meta.client if resource else \
+            Clients.client(service_name, region_name)
+        stubber = Stubber(client)
+        stubber.activate()
+        stubbers.append(stubber)
+        return stubber
+
+    yield stub_client
+    for stubber in stubbers:
+        stubber.deactivate()
+    for stubber in stubbers:
+        stubber.assert_no_pending_responses()
+
+
+@pytest.fixture
+def retry_policy() -> Iterator[Callable[[RetryPolicy], None]]:
+    """
+    Configures a retry policy for the test, restoring the default client retries and removing the retry
+    handlers afterwards
+    """
+    yield Retry.configure
+    Retry.configure(RetryPolicy())
+    Clients.set_hook(RETRY_HOOK_NAME, None)
+    Clients.configure(Config(retries={"mode": DEFAULT_RETRY_MODE, "total_max_attempts": DEFAULT_MAX_ATTEMPTS}))
+    Retry.reset_statistics()
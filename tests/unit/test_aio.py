@@ -0,0 +1,72 @@
+import asyncio
+from threading import Event, Lock
+from typing import Any, Callable, List, Optional
+
+from octo_infra_aws_python.logic.aio import AsyncSTS, gather_bounded, to_async
+from octo_infra_aws_python.logic.clients import Clients
+from octo_infra_aws_python.logic.single_flight import single_flight
+
+IDENTITY = {"UserId": "user", "Account": "123456789012", "Arn": "arn:aws:iam::123456789012:user/user"}
+
+
+def blocking_region(value: int) -> Optional[str]:
+    return f"{value}@{Clients.region()}"
+
+
+def test_async_calls_run_in_the_task_region_scope() -> None:
+    async_region = to_async(blocking_region)
+
+    async def run() -> List[Optional[str]]:
+        with Clients.region_scope("eu-west-1"):
+            return await asyncio.gather(async_region(1), async_region(2))
+
+    assert asyncio.run(run()) == ["1@eu-west-1", "2@eu-west-1"]
+
+
+def test_gather_bounded_limits_concurrency() -> None:
+    running: List[int] = []
+    peak: List[int] = []
+
+    async def task(value: int) -> int:
+        running.append(value)
+        peak.append(len(running))
+        await asyncio.sleep(0.01)
+        running.remove(value)
+        return value
+
+    async def run() -> List[Any]:
+        return await gather_bounded((task(value) for value in range(10)), 3)
+
+    assert asyncio.run(run()) == list(range(10))
+    assert max(peak) == 3
+
+
+def test_single_flight_calls_are_shared_by_tasks() -> None:
+    calls: List[int] = []
+    lock = Lock()
+    release = Event()
+
+    @single_flight
+    def lookup(value: int) -> int:
+        with lock:
+            calls.append(value)
+        release.wait(5)
+        return value * 2
+
+    async_lookup = to_async(lookup)
+
+    async def run() -> List[int]:
+        tasks = [asyncio.ensure_future(async_lookup(21)) for _ in range(5)]
+        # Lets every task join the in flight call before it finishes
+        await asyncio.sleep(0.05)
+        release.set()
+        return await asyncio.gather(*tasks)
+
+    assert asyncio.run(run()) == [42] * 5
+    assert calls == [21]
+
+
+def test_async_facade_uses_pooled_clients(stub: Callable[..., Any]) -> None:
+    stubber = stub("sts")
+    stubber.add_response("get_caller_identity", IDENTITY)
+    assert asyncio.run(AsyncSTS.get_caller_identity_response())["Account"] == "123456789012"
@@ -0,0 +1,49 @@
+import io
+from hashlib import sha256
+from typing import Any, Callable, Dict
+
+from botocore.response import StreamingBody
+from botocore.stub import ANY
+
+from octo_infra_aws_python.logic.artifacts import Artifacts
+from octo_infra_aws_python.models.actions.artifacts import PublishArtifacts
+from octo_infra_aws_python.models.artifact_manifest import ArtifactBlob, ArtifactManifest
+
+OK: Dict[str, Any] = {"ResponseMetadata": {"HTTPStatusCode": 200}}
+
+
+def publish(tmp_path: Any, stub: Callable[..., Any], blob_present: bool, verify_previous: bool) -> Any:
+    content = b"artifact"
+    digest = sha256(content).hexdigest()
+    (tmp_path / "app.bin").write_bytes(content)
+    manifest = ArtifactManifest(blob_prefix="blobs/", artifacts={"app.bin": ArtifactBlob(digest=digest, size=8)})
+    data = manifest.model_dump_json().encode()
+    stubber = stub("s3")
+    stubber.add_response("get_object", {"Body": StreamingBody(io.BytesIO(data), len(data)), **OK},
+                         {"Bucket": "bucket", "Key": "manifest.json"})
+    if verify_previous:
+        blob_path = Artifacts.blob_path("blobs/", digest)
+        if blob_present:
+            stubber.add_response("head_object", OK, {"Bucket": "bucket", "Key": blob_path})
+        else:
+            stubber.add_client_error("head_object", "404", http_status_code=404,
+                                     expected_params={"Bucket": "bucket", "Key": blob_path})
+            stubber.add_response("put_object", {"ETag": '"etag"', **OK},
+                                 {"Bucket": "bucket", "Key": blob_path, "Body": ANY, "ChecksumAlgorithm": ANY})
+    result = Artifacts.publish_artifacts(PublishArtifacts(bucket_name="bucket", manifest_path="manifest.json",
+                                                          files={"app.bin": str(tmp_path / "app.bin")},
+                                                          verify_previous=verify_previous, max_workers=1))
+    assert result == manifest
+    return stubber
+
+
+def test_publish_artifacts_trusts_previous_manifest(tmp_path: Any, stub: Callable[..., Any]) -> None:
+    publish(tmp_path, stub, blob_present=False, verify_previous=False)
+
+
+def test_publish_artifacts_verifies_previous_blobs(tmp_path: Any, stub: Callable[..., Any]) -> None:
+    publish(tmp_path, stub, blob_present=True, verify_previous=True)
+
+
+def test_publish_artifacts_restores_missing_previous_blobs(tmp_path: Any, stub: Callable[..., Any]) -> None:
+    publish(tmp_path, stub, blob_present=False, verify_previous=True)
@@ -0,0 +1,56 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, List
+
+from octo_infra_aws_python.logic.clients import Clients, with_caller_context
+
+
+def test_clients_are_pooled_by_service_and_region() -> None:
+    client = Clients.client("s3")
+    assert Clients.client("s3") is client
+    assert Clients.client("s3", "eu-west-1") is not client
+    assert Clients.client("s3", "eu-west-1").meta.region_name == "eu-west-1"
+    assert client.meta.region_name == "us-east-1"
+
+
+def test_region_scope_reaches_pool_threads() -> None:
+    with Clients.region_scope("ap-southeast-2"):
+        assert Clients.region() == "ap-southeast-2"
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            regions = list(executor.map(with_caller_context(lambda _: Clients.client("ssm").meta.region_name),
+                                        range(4)))
+    assert regions == ["ap-southeast-2"] * 4
+    assert Clients.region() is None
+
+
+def test_add_and_remove_hook_keep_live_clients() -> None:
+    hooked: List[Any] = []
+    unhooked: List[Any] = []
+    client = Clients.client("sts")
+    try:
+        # Clients of earlier tests may still be alive and hooked as well
+        Clients.add_hook("test", hooked.append)
+        assert any(hooked_client is client for hooked_client in hooked)
+        other = Clients.client("sts", "eu-west-1")
+        assert hooked[-1] is other
+        Clients.remove_hook("test", unhooked.append)
+        assert any(unhooked_client is client for unhooked_client in unhooked)
+        assert any(unhooked_client is other for unhooked_client in unhooked)
+        assert Clients.client("sts") is client
+        hooked_count = len(hooked)
+        Clients.client("sts", "eu-central-1")
+        assert len(hooked) == hooked_count
+    finally:
+        Clients.remove_hook("test")
+
+
+def test_set_hook_drops_pooled_clients() -> None:
+    hooked: List[Any] = []
+    client = Clients.client("sts")
+    try:
+        Clients.set_hook("test", hooked.append)
+        assert hooked == []
+        new_client = Clients.client("sts")
+        assert new_client is not client
+        assert hooked == [new_client]
+    finally:
+        Clients.set_hook("test", None)
@@ -0,0 +1,80 @@
+import time
+from typing import Iterator, List
+
+import pytest
+
+from octo_infra_aws_python.logic.codecs import Codec, Codecs, GzipCodec, IDENTITY_CODEC, in_background
+
+
+@pytest.fixture(autouse=True)
+def reset_prefix_codecs() -> Iterator[None]:
+    yield
+    Codecs.configure({})
+
+
+@pytest.mark.parametrize("codec_name, module_name", [("gzip", None), ("zstd", "zstandard"), ("lz4", "lz4")])
+def test_codecs_round_trip_chunks(codec_name: str, module_name: str) -> None:
+    if module_name:
+        pytest.importorskip(module_name)
+    codec = Codecs.get(codec_name)
+    chunks = [b"octo" * 1000, b"", b"infra" * 5000]
+    compressed = list(codec.compress_chunks(iter(chunks)))
+    assert sum(map(len, compressed)) < sum(map(len, chunks))
+    assert b"".join(codec.decompress_chunks(iter(compressed))) == b"".join(chunks)
+
+
+def test_codec_is_abstract() -> None:
+    with pytest.raises(TypeError):
+        Codec()  # type: ignore[abstract]
+
+
+def test_resolve_uses_longest_prefix_codec() -> None:
+    Codecs.configure({"logs/": "gzip", "logs/raw/": IDENTITY_CODEC})
+    assert Codecs.resolve(None, "logs/app.log").name == "gzip"
+    assert Codecs.resolve(None, "logs/raw/app.log") is None
+    assert Codecs.resolve(None, "data/app.bin") is None
+    assert Codecs.resolve(IDENTITY_CODEC, "logs/app.log") is None
+    assert Codecs.resolve("gzip", "data/app.bin").name == "gzip"
+
+
+def test_configure_rejects_unknown_codecs() -> None:
+    with pytest.raises(ValueError):
+        Codecs.configure({"logs/": "brotli"})
+
+
+def test_register_replaces_codec_of_same_name() -> None:
+    default = Codecs.get("gzip")
+    try:
+        Codecs.register(GzipCodec(level=1))
+        assert Codecs.get("gzip") is not default
+    finally:
+        Codecs.register(default)
+
+
+def test_in_background_keeps_order_and_raises_producer_errors() -> None:
+    assert list(in_background(iter([b"a", b"b", b"c"]), max_buffered_chunks=1)) == [b"a", b"b", b"c"]
+
+    def failing() -> Iterator[bytes]:
+        yield b"a"
+        raise ValueError("producer failed")
+
+    chunks = in_background(failing())
+    assert next(chunks) == b"a"
+    with pytest.raises(ValueError):
+        next(chunks)
+
+
+def test_in_background_stops_producer_when_closed() -> None:
+    produced: List[int] = []
+
+    def endless() -> Iterator[bytes]:
+        while True:
+            produced.append(len(produced))
+            yield b"chunk"
+
+    chunks = in_background(endless(), max_buffered_chunks=2)
+    assert next(chunks) == b"chunk"
+    chunks.close()
+    time.sleep(0.3)
+    # At most the buffered chunks and the chunk being put are produced ahead of the consumer
+    assert len(produced) <= 5
@@ -0,0 +1,67 @@
+from typing import Any, Dict, List
+
+import pytest
+
+from octo_infra_aws_python.logic.clients import Clients
+from octo_infra_aws_python.logic.dependency_graph import DependencyGraph
+
+
+def test_nodes_run_after_their_dependencies_with_their_results() -> None:
+    order: List[str] = []
+
+    def node(name: str, value: int) -> Any:
+        def run(results: Dict[str, Any]) -> int:
+            order.append(name)
+            return value + sum(results[dependency] for dependency in graph.dependencies(name))
+        return run
+
+    graph = DependencyGraph()
+    graph.add_node("vpc", node("vpc", 1))
+    graph.add_node("subnet", node("subnet", 10), ["vpc"])
+    graph.add_node("group", node("group", 100), ["vpc"])
+    graph.add_node("instance", node("instance", 1000), ["subnet", "group"])
+    # A node of an existing name is ignored
+    graph.add_node("vpc", node("vpc", 5))
+    results, timings, failed = graph.run(max_workers=2)
+    assert results == {"vpc": 1, "subnet": 11, "group": 101, "instance": 1112}
+    assert set(timings) == set(results) and failed == []
+    assert order[0] == "vpc" and order[-1] == "instance"
+    assert graph.has_node("group") and not graph.has_node("volume")
+
+
+def test_failed_nodes_skip_their_dependents() -> None:
+    def fail(results: Dict[str, Any]) -> Any:
+        raise RuntimeError("node failed")
+
+    graph = DependencyGraph()
+    graph.add_node("vpc", lambda results: "vpc-1")
+    graph.add_node("subnet", fail, ["vpc"])
+    graph.add_node("routes", lambda results: None, ["vpc"])
+    graph.add_node("instance", lambda results: "i-1", ["subnet"])
+    results, _, failed = graph.run()
+    assert results == {"vpc": "vpc-1"}
+    assert sorted(failed) == ["instance", "routes", "subnet"]
+
+
+def test_unknown_dependencies_are_rejected() -> None:
+    graph = DependencyGraph()
+    graph.add_node("subnet", lambda results: "subnet-1", ["vpc"])
+    with pytest.raises(ValueError):
+        graph.run()
+
+
+def test_nodes_run_in_caller_region_scope() -> None:
+    graph = DependencyGraph()
+    graph.add_node("region", lambda results: Clients.region())
+    with Clients.region_scope("eu-north-1"):
+        results, _, _ = graph.run()
+    assert results == {"region": "eu-north-1"}
+
+
+def test_critical_path_is_slowest_chain() -> None:
+    graph = DependencyGraph()
+    graph.add_node("a", lambda results: 1)
+    graph.add_node("b", lambda results: 1, ["a"])
+    graph.add_node("c", lambda results: 1, ["a"])
+    graph.add_node("d", lambda results: 1, ["b", "c"])
+    assert graph.critical_path_seconds({"a": 1, "b": 5, "c": 2, "d": 1}) == 7
@@ -0,0 +1,75 @@
+from typing import Any, Callable, Iterator, List, Optional
+
+import pytest
+
+from octo_infra_aws_python.logic.clients import Clients
+from octo_infra_aws_python.logic.describe_cache import DescribeCache, persistent_cache
+from octo_infra_aws_python.models.actions.ssm import FindSSMParameter
+from octo_infra_aws_python.models.describe_cache_policy import DescribeCachePolicy
+
+calls: List[str] = []
+
+
+@persistent_cache("account")
+def describe(find_ssm_parameter: FindSSMParameter) -> Optional[List[str]]:
+    calls.append(find_ssm_parameter.name)
+    return None if find_ssm_parameter.name == "missing" else [find_ssm_parameter.name, Clients.region() or ""]
+
+
+@persistent_cache("network", FindSSMParameter)
+def describe_model(name: str) -> FindSSMParameter:
+    calls.append(name)
+    return FindSSMParameter(name=name, decrpyt=False)
+
+
+@pytest.fixture(autouse=True)
+def describe_cache(tmp_path: Any) -> Iterator[DescribeCachePolicy]:
+    calls.clear()
+    policy = DescribeCachePolicy(directory=str(tmp_path), ttl_seconds={"account": 60, "network": 60})
+    DescribeCache.configure(policy)
+    yield policy
+    DescribeCache.disable()
+
+
+def test_results_are_cached_per_region_and_model() -> None:
+    assert describe(FindSSMParameter(name="a")) == ["a", ""]
+    assert describe(FindSSMParameter(name="a")) == ["a", ""]
+    assert describe(FindSSMParameter(name="b")) == ["b", ""]
+    with Clients.region_scope("eu-west-1"):
+        assert describe(FindSSMParameter(name="a")) == ["a", "eu-west-1"]
+    assert calls == ["a", "b", "a"]
+
+
+def test_none_results_are_not_cached() -> None:
+    assert describe(FindSSMParameter(name="missing")) is None
+    assert describe(FindSSMParameter(name="missing")) is None
+    assert calls == ["missing", "missing"]
+
+
+def test_cache_is_shared_by_new_processes(describe_cache: DescribeCachePolicy) -> None:
+    describe(FindSSMParameter(name="a"))
+    DescribeCache.disable()
+    describe(FindSSMParameter(name="a"))
+    # A process configuring the same directory starts warm
+    DescribeCache.configure(describe_cache)
+    describe(FindSSMParameter(name="a"))
+    assert calls == ["a", "a"]
+
+
+def test_results_expire_after_their_ttl(tmp_path: Any) -> None:
+    DescribeCache.configure(DescribeCachePolicy(directory=str(tmp_path / "expiring"), ttl_seconds={"account": 0}))
+    describe(FindSSMParameter(name="a"))
+    describe(FindSSMParameter(name="a"))
+    assert calls == ["a", "a"]
+
+
+def test_model_results_are_keyed_by_account(stub: Callable[..., Any]) -> None:
+    stubber = stub("sts")
+    stubber.add_response("get_caller_identity", {"UserId": "user", "Account": "123456789012",
+                                                 "Arn": "arn:aws:iam::123456789012:user/user"})
+    assert describe_model("a") == FindSSMParameter(name="a", decrpyt=False)
+    # The account id is itself cached, so no further identity calls are made
+    assert describe_model("a") == FindSSMParameter(name="a", decrpyt=False)
+    assert calls == ["a"]
+    assert DescribeCache.invalidate("network") == 1
+    assert DescribeCache.invalidate() == 1
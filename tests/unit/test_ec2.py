@@ -0,0 +1,109 @@
+from typing import Any, Callable, Dict, List, Optional
+
+from botocore.stub import Stubber
+
+from octo_infra_aws_python.logic import ec2
+from octo_infra_aws_python.logic.clients import Clients
+from octo_infra_aws_python.logic.ec2 import EC2
+from octo_infra_aws_python.models.actions.ec2 import CreateEC2, CreateKeypair, DestroyEC2Instances
+
+
+def describe_response(states: Dict[str, str], key_name: str = "") -> Dict[str, Any]:
+    instances: List[Dict[str, Any]] = []
+    for instance_id, state in states.items():
+        instance: Dict[str, Any] = {"InstanceId": instance_id, "State": {"Name": state}}
+        if key_name:
+            instance["KeyName"] = key_name
+        instances.append(instance)
+    return {"Reservations": [{"Instances": instances}]}
+
+
+def test_destroy_ec2_instances_stops_and_terminates_in_chunks(stub: Callable[..., Any], monkeypatch: Any) -> None:
+    monkeypatch.setattr(ec2, "MAX_INSTANCES_PER_CALL", 2)
+    monkeypatch.setattr(ec2, "MAX_FILTER_VALUES", 2)
+    stubber = stub("ec2")
+    stubber.add_response("describe_instances",
+                         describe_response({"i-1": "running", "i-2": "pending"}),
+                         {"Filters": [{"Name": "instance-id", "Values": ["i-1", "i-2"]}]})
+    stubber.add_response("describe_instances",
+                         describe_response({"i-3": "running", "i-4": "terminated"}),
+                         {"Filters": [{"Name": "instance-id", "Values": ["i-3", "i-4"]}]})
+    stubber.add_response("stop_instances", {}, {"InstanceIds": ["i-1", "i-2"]})
+    stubber.add_response("stop_instances", {}, {"InstanceIds": ["i-3"]})
+    stubber.add_response("terminate_instances", {}, {"InstanceIds": ["i-1", "i-2"]})
+    stubber.add_response("terminate_instances", {}, {"InstanceIds": ["i-3"]})
+    assert EC2.destroy_ec2_instances(DestroyEC2Instances(instance_ids=["i-1", "i-2", "i-1", "i-3", "i-4"],
+                                                         destroy_keypair=False, wait_for_termination=False))
+
+
+def test_destroy_ec2_instances_describes_at_most_200_ids_per_filter(stub: Callable[..., Any]) -> None:
+    instance_ids = [f"i-{index}" for index in range(450)]
+    stubber = stub("ec2")
+    for chunk in (instance_ids[:200], instance_ids[200:400], instance_ids[400:]):
+        stubber.add_response("describe_instances", describe_response(dict.fromkeys(chunk, "running")),
+                             {"Filters": [{"Name": "instance-id", "Values": chunk}]})
+    stubber.add_response("stop_instances", {}, {"InstanceIds": instance_ids})
+    stubber.add_response("terminate_instances", {}, {"InstanceIds": instance_ids})
+    assert EC2.destroy_ec2_instances(DestroyEC2Instances(instance_ids=instance_ids, destroy_keypair=False,
+                                                         wait_for_termination=False))
+
+
+def test_destroy_ec2_instances_deletes_keypairs_once_and_waits(stub: Callable[..., Any], monkeypatch: Any) -> None:
+    monkeypatch.setattr(ec2, "INSTANCE_STATE_POLL_INTERVAL_SECONDS", 0)
+    stubber = stub("ec2")
+    stubber.add_response("describe_instances", describe_response({"i-1": "running", "i-2": "running"}, "key"))
+    stubber.add_response("terminate_instances", {}, {"InstanceIds": ["i-1", "i-2"]})
+    stubber.add_response("describe_instances", describe_response({"i-1": "terminated", "i-2": "shutting-down"}))
+    stubber.add_response("describe_instances", describe_response({"i-2": "terminated"}))
+    with Stubber(Clients.resource("ec2").meta.client) as keypair_stubber:
+        keypair_stubber.add_response("delete_key_pair", {}, {"KeyName": "key"})
+        assert EC2.destroy_ec2_instances(DestroyEC2Instances(instance_ids=["i-1", "i-2"], skip_stop=True))
+        keypair_stubber.assert_no_pending_responses()
+
+
+def test_destroy_ec2_instances_fails_on_errors(stub: Callable[..., Any]) -> None:
+    stubber = stub("ec2")
+    stubber.add_response("describe_instances", describe_response({"i-1": "running"}))
+    stubber.add_client_error("stop_instances", "UnauthorizedOperation")
+    assert not EC2.destroy_ec2_instances(DestroyEC2Instances(instance_ids=["i-1"], destroy_keypair=False,
+                                                             wait_for_termination=False))
+
+
+def expect_named_instances(stubber: Any, instance_ids: List[str]) -> None:
+    stubber.add_response("describe_instances", describe_response(dict.fromkeys(instance_ids, "running")), {"Filters": [
+        {"Name": "tag:Name", "Values": ["web"]},
+        {"Name": "subnet-id", "Values": ["subnet-1"]},
+        {"Name": "instance-state-name", "Values": ["pending", "running"]}
+    ]})
+
+
+def record_creates(monkeypatch: Any) -> List[Any]:
+    created: List[Any] = []
+
+    def create_ec2_instance(create_ec2: CreateEC2, instance_count: int = 1,
+                            logger: Optional[Any] = None) -> List[str]:
+        created.append((create_ec2, instance_count))
+        return [f"i-new-{index}" for index in range(instance_count)]
+    monkeypatch.setattr(EC2, "create_ec2_instance", staticmethod(create_ec2_instance))
+    return created
+
+
+def test_reconcile_ec2_instances_adopts_existing(stub: Callable[..., Any], monkeypatch: Any) -> None:
+    created = record_creates(monkeypatch)
+    expect_named_instances(stub("ec2"), ["i-1", "i-2"])
+    assert EC2.reconcile_ec2_instances(CreateEC2(vpc_id="vpc-1", subnet_id="subnet-1", instance_name="web",
+                                                 security_group="sg-1", keypair="key"), 2) == ["i-1", "i-2"]
+    assert created == []
+
+
+def test_reconcile_ec2_instances_creates_only_missing(stub: Callable[..., Any], monkeypatch: Any) -> None:
+    created = record_creates(monkeypatch)
+    expect_named_instances(stub("ec2"), ["i-1"])
+    assert EC2.reconcile_ec2_instances(CreateEC2(vpc_id="vpc-1", subnet_id="subnet-1", instance_name="web",
+                                                 security_group="sg-1", keypair=CreateKeypair(keypair_name="key")),
+                                       3) == ["i-1", "i-new-0", "i-new-1"]
+    [(create_ec2, instance_count)] = created
+    assert instance_count == 2
+    # The existing keypair is used instead of being re-created
+    assert isinstance(create_ec2.keypair, CreateKeypair)
+    assert create_ec2.keypair.use_if_exists and not create_ec2.keypair.delete_if_exists
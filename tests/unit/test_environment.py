@@ -0,0 +1,111 @@
+from threading import Lock
+from typing import Any, Dict, List, Optional, Tuple
+
+from octo_infra_aws_python.logic.ec2 import EC2
+from octo_infra_aws_python.logic.environment import Environment
+from octo_infra_aws_python.logic.network import Network
+from octo_infra_aws_python.models.actions.ec2 import CreateEC2, CreateKeypair
+from octo_infra_aws_python.models.actions.environment import ProvisionEnvironment, ProvisionInstances
+from octo_infra_aws_python.models.actions.network import CreateInternetGateway, CreateSecurityGroup, CreateSubnet, \
+    CreateVPC
+
+
+class Creates:
+    """
+    Records the creation calls of the environment in order, returning an id for every created resource
+    """
+    def __init__(self, monkeypatch: Any, failing: Tuple[str, ...] = ()) -> None:
+        self.calls: List[Tuple[str, Any]] = []
+        self.__lock = Lock()
+        self.__failing = failing
+        for owner, method_name in ((Network, "create_internet_gateway"), (Network, "create_vpc"),
+                                   (Network, "create_subnet"), (Network, "create_security_group")):
+            monkeypatch.setattr(owner, method_name, staticmethod(self.__recorder(method_name)))
+        monkeypatch.setattr(EC2, "create_key_pair", staticmethod(self.create_key_pair))
+        monkeypatch.setattr(EC2, "create_ec2_instance", staticmethod(self.create_ec2_instance))
+
+    def __recorder(self, method_name: str) -> Any:
+        def create(model: Any, logger: Optional[Any] = None) -> Optional[str]:
+            with self.__lock:
+                self.calls.append((method_name, model))
+            return None if method_name in self.__failing else f"{method_name}-id"
+        return create
+
+    def create_key_pair(self, create_key_pair: CreateKeypair, logger: Optional[Any] = None) -> Tuple[str, str]:
+        with self.__lock:
+            self.calls.append(("create_key_pair", create_key_pair))
+        return "key-id", create_key_pair.keypair_name
+
+    def create_ec2_instance(self, create_ec2: CreateEC2, instance_count: int = 1,
+                            logger: Optional[Any] = None) -> List[str]:
+        with self.__lock:
+            self.calls.append(("create_ec2_instance", create_ec2))
+        return [f"i-{index}" for index in range(instance_count)]
+
+    def order(self) -> Dict[str, int]:
+        return {name: index for index, (name, _) in enumerate(self.calls)}
+
+    def model(self, method_name: str) -> Any:
+        return next(model for name, model in self.calls if name == method_name)
+
+
+def environment() -> ProvisionEnvironment:
+    return ProvisionEnvironment(
+        vpc=CreateVPC(cidr_block="10.0.0.0/16", vpc_name="vpc",
+                      internet_gw=CreateInternetGateway(internet_gateway_name="gw")),
+        subnets=[CreateSubnet(subnet_name="subnet", vpc_id="vpc", cidr_block="10.0.1.0/24")],
+        instances=[ProvisionInstances(instance_count=2, create_ec2=CreateEC2(
+            vpc_id="vpc", subnet_id="subnet", instance_name="web", ami="ami-1",
+            security_group=CreateSecurityGroup(name="web", vpc_id="vpc"),
+            keypair=CreateKeypair(keypair_name="key")
+        ))]
+    )
+
+
+def test_build_graph_links_resources_referenced_by_name() -> None:
+    graph = Environment.build_graph(environment())
+    assert graph.dependencies("vpc") == ["internet_gateway"]
+    assert graph.dependencies("subnet:subnet") == ["vpc"]
+    assert graph.dependencies("security_group:web") == ["vpc"]
+    assert graph.dependencies("instances:web") == ["vpc", "subnet:subnet", "security_group:web", "keypair:key"]
+
+
+def test_build_graph_reconciles_with_batched_nodes() -> None:
+    graph = Environment.build_graph(environment().model_copy(update={"reconcile": True}))
+    assert graph.dependencies("subnets") == ["vpc"]
+    assert graph.dependencies("subnet:subnet") == ["subnets"]
+    assert graph.dependencies("security_groups") == ["vpc"]
+    assert graph.dependencies("security_group:web") == ["security_groups"]
+
+
+def test_provision_environment_creates_in_dependency_order(monkeypatch: Any) -> None:
+    creates = Creates(monkeypatch)
+    provisioned = Environment.provision_environment(environment())
+    order = creates.order()
+    assert order["create_internet_gateway"] < order["create_vpc"]
+    assert order["create_vpc"] < order["create_subnet"] < order["create_ec2_instance"]
+    assert order["create_vpc"] < order["create_security_group"] < order["create_ec2_instance"]
+    assert order["create_key_pair"] < order["create_ec2_instance"]
+    # Names of the environment resources are replaced by the created ids
+    assert creates.model("create_vpc").internet_gw == "create_internet_gateway-id"
+    assert creates.model("create_subnet").vpc_id == "create_vpc-id"
+    create_ec2 = creates.model("create_ec2_instance")
+    assert (create_ec2.vpc_id, create_ec2.subnet_id, create_ec2.security_group, create_ec2.keypair) == \
+        ("create_vpc-id", "create_subnet-id", "create_security_group-id", "key")
+    assert provisioned.vpc_id == "create_vpc-id"
+    assert provisioned.subnet_ids == {"subnet": "create_subnet-id"}
+    assert provisioned.security_group_ids == {"web": "create_security_group-id"}
+    assert provisioned.instance_ids == {"web": ["i-0", "i-1"]}
+    assert provisioned.failed == []
+
+
+def test_provision_environment_skips_dependents_of_failed_resources(monkeypatch: Any) -> None:
+    creates = Creates(monkeypatch, failing=("create_subnet",))
+    provisioned = Environment.provision_environment(environment())
+    called = {name for name, _ in creates.calls}
+    assert "create_security_group" in called
+    assert "create_ec2_instance" not in called
+    assert sorted(provisioned.failed) == ["instances:web", "subnet:subnet"]
+    assert provisioned.subnet_ids == {}
+    assert provisioned.security_group_ids == {"web": "create_security_group-id"}
+    assert provisioned.instance_ids == {}
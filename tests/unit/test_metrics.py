@@ -0,0 +1,68 @@
+from typing import Any, Callable, Iterator, List
+
+import pytest
+
+from octo_infra_aws_python.logic.clients import Clients
+from octo_infra_aws_python.logic.metrics import ApiCall, InMemorySink, Metrics, MetricsSink, PrometheusSink
+
+IDENTITY = {"UserId": "user", "Account": "123456789012", "Arn": "arn:aws:iam::123456789012:user/user"}
+
+
+class FailingSink(MetricsSink):
+    def record(self, call: ApiCall) -> None:
+        raise RuntimeError("sink failed")
+
+
+@pytest.fixture
+def disable_metrics() -> Iterator[None]:
+    yield
+    Metrics.disable()
+
+
+def test_metrics_sink_is_abstract() -> None:
+    with pytest.raises(TypeError):
+        MetricsSink()  # type: ignore[abstract]
+
+
+def test_enabled_metrics_record_calls_and_errors(stub: Callable[..., Any], disable_metrics: None) -> None:
+    stubber = stub("sts")
+    stubber.add_response("get_caller_identity", IDENTITY)
+    stubber.add_client_error("get_caller_identity", "ThrottlingException", http_status_code=400)
+    sink = InMemorySink()
+    Metrics.enable(FailingSink(), sink)
+    assert Metrics.is_enabled()
+    client = Clients.client("sts")
+    client.get_caller_identity()
+    with pytest.raises(Exception):
+        client.get_caller_identity()
+    [metrics] = sink.snapshot()
+    assert (metrics.service, metrics.operation) == ("sts", "GetCallerIdentity")
+    assert (metrics.calls, metrics.errors, metrics.throttles) == (2, 1, 1)
+    assert list(metrics.latency_buckets.values())[-1] == 2
+
+
+def test_toggling_metrics_keeps_clients(stub: Callable[..., Any], disable_metrics: None) -> None:
+    stubber = stub("sts")
+    client = Clients.client("sts")
+    sink = InMemorySink()
+    Metrics.enable(sink)
+    stubber.add_response("get_caller_identity", IDENTITY)
+    client.get_caller_identity()
+    Metrics.disable()
+    assert not Metrics.is_enabled()
+    stubber.add_response("get_caller_identity", IDENTITY)
+    client.get_caller_identity()
+    assert Clients.client("sts") is client
+    assert [metrics.calls for metrics in sink.snapshot()] == [1]
+
+
+def test_prometheus_sink_renders_counters_and_histogram() -> None:
+    sink = PrometheusSink(latency_buckets=(0.1, 1))
+    for seconds in (0.05, 0.5):
+        sink.record(ApiCall(service="s3", operation="GetObject", start_time_ns=0, seconds=seconds, retries=1,
+                            error_code=None, request_bytes=10, response_bytes=100))
+    lines: List[str] = sink.render().splitlines()
+    assert 'octo_aws_calls_total{service="s3",operation="GetObject"} 2' in lines
+    assert 'octo_aws_retries_total{service="s3",operation="GetObject"} 2' in lines
+    assert 'octo_aws_call_seconds_bucket{service="s3",operation="GetObject",le="0.1"} 1' in lines
+    assert 'octo_aws_call_seconds_bucket{service="s3",operation="GetObject",le="+Inf"} 2' in lines
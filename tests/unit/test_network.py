@@ -0,0 +1,270 @@
+from typing import Any, Callable, Dict, List, Optional
+
+from octo_infra_aws_python.logic.clients import Clients
+from octo_infra_aws_python.logic.describe_cache import DescribeCache
+from octo_infra_aws_python.logic.network import Network
+from octo_infra_aws_python.models.actions.network import CreateInternetGateway, CreateSecurityGroup, CreateSubnet, \
+    CreateVPC, DestroyVPC, SyncSecurityGroupRules
+from octo_infra_aws_python.models.describe_cache_policy import DescribeCachePolicy
+from octo_infra_aws_python.models.find_asset import FindAsset
+from octo_infra_aws_python.models.network_rule import NetworkRule
+
+ALLOW_ALL_EGRESS: Dict[str, Any] = {"IpProtocol": "-1", "IpRanges": [{"CidrIp": "0.0.0.0/0"}]}
+
+
+def security_group(ingress: List[Dict[str, Any]], egress: List[Dict[str, Any]]) -> Dict[str, Any]:
+    return {"SecurityGroups": [{"GroupId": "sg-1", "GroupName": "group", "VpcId": "vpc-1",
+                                "IpPermissions": ingress, "IpPermissionsEgress": egress}]}
+
+
+def test_sync_coalesces_rules_sharing_protocol_and_ports(stub: Callable[..., Any]) -> None:
+    stubber = stub("ec2")
+    stubber.add_response("describe_security_groups", security_group([], [ALLOW_ALL_EGRESS]), {"GroupIds": ["sg-1"]})
+    stubber.add_response("authorize_security_group_ingress", {}, {"GroupId": "sg-1", "IpPermissions": [{
+        "IpProtocol": "tcp", "FromPort": 443, "ToPort": 443,
+        "IpRanges": [{"CidrIp": "10.0.0.0/8", "Description": "Automated Rule"},
+                     {"CidrIp": "172.16.0.0/12", "Description": "Automated Rule"}],
+        "Ipv6Ranges": [{"CidrIpv6": "::/0", "Description": "Automated Rule"}],
+        "UserIdGroupPairs": [{"GroupId": "sg-2", "Description": "Automated Rule"}]
+    }, {
+        "IpProtocol": "-1", "FromPort": -1, "ToPort": -1,
+        "IpRanges": [{"CidrIp": "10.0.0.0/8", "Description": "Automated Rule"}]
+    }]})
+    assert Network.sync_security_group_rules(SyncSecurityGroupRules(security_group_id="sg-1", ingress=[
+        NetworkRule(from_port=443, to_port=443, allowed_cidr=["10.0.0.0/8", "::/0"], allowed_groups=["sg-2"]),
+        NetworkRule(protocol="TCP", from_port=443, to_port=443, allowed_cidr=["172.16.0.0/12", "10.0.0.0/8"]),
+        NetworkRule(protocol="all", from_port=0, to_port=65535, allowed_cidr=["10.0.0.0/8"])
+    ]))
+
+
+def test_sync_chunks_rule_entries_per_call(stub: Callable[..., Any]) -> None:
+    cidrs = [f"10.0.{index}.0/24" for index in range(150)]
+    stubber = stub("ec2")
+    stubber.add_response("describe_security_groups", security_group([], []))
+    for chunk in (cidrs[:100], cidrs[100:]):
+        stubber.add_response("authorize_security_group_egress", {}, {"GroupId": "sg-1", "IpPermissions": [{
+            "IpProtocol": "tcp", "FromPort": 80, "ToPort": 80,
+            "IpRanges": [{"CidrIp": cidr, "Description": "Automated Rule"} for cidr in chunk]
+        }]})
+    assert Network.sync_security_group_rules(SyncSecurityGroupRules(security_group_id="sg-1", egress=[
+        NetworkRule(from_port=80, to_port=80, allowed_cidr=cidrs)
+    ]))
+
+
+def test_sync_authorizes_missing_and_revokes_unlisted_rules(stub: Callable[..., Any]) -> None:
+    stubber = stub("ec2")
+    stubber.add_response("describe_security_groups", security_group([
+        {"IpProtocol": "tcp", "FromPort": 22, "ToPort": 22,
+         "IpRanges": [{"CidrIp": "10.0.0.0/8"}, {"CidrIp": "0.0.0.0/0", "Description": "Automated Rule"}]},
+        # Prefix lists are not managed
+        {"IpProtocol": "tcp", "FromPort": 80, "ToPort": 80, "PrefixListIds": [{"PrefixListId": "pl-1"}]}
+    ], [ALLOW_ALL_EGRESS]))
+    stubber.add_response("authorize_security_group_ingress", {}, {"GroupId": "sg-1", "IpPermissions": [{
+        "IpProtocol": "tcp", "FromPort": 443, "ToPort": 443,
+        "IpRanges": [{"CidrIp": "10.0.0.0/8", "Description": "Automated Rule"}]
+    }]})
+    stubber.add_response("revoke_security_group_ingress", {}, {"GroupId": "sg-1", "IpPermissions": [{
+        "IpProtocol": "tcp", "FromPort": 22, "ToPort": 22, "IpRanges": [{"CidrIp": "0.0.0.0/0"}]
+    }]})
+    # The egress rules are not given, so the default allow all egress is kept
+    assert Network.sync_security_group_rules(SyncSecurityGroupRules(security_group_id="sg-1", ingress=[
+        NetworkRule(from_port=22, to_port=22, allowed_cidr=["10.0.0.0/8"]),
+        NetworkRule(from_port=443, to_port=443, allowed_cidr=["10.0.0.0/8"])
+    ]))
+
+
+def test_sync_keeps_unlisted_rules_unless_revoked(stub: Callable[..., Any]) -> None:
+    stubber = stub("ec2")
+    stubber.add_response("describe_security_groups", security_group([], [ALLOW_ALL_EGRESS]))
+    assert Network.sync_security_group_rules(SyncSecurityGroupRules(security_group_id="sg-1", ingress=[],
+                                                                    egress=[], revoke_unlisted=False))
+    stubber.add_response("describe_security_groups", security_group([], [ALLOW_ALL_EGRESS]))
+    stubber.add_response("revoke_security_group_egress", {}, {"GroupId": "sg-1", "IpPermissions": [{
+        "IpProtocol": "-1", "FromPort": -1, "ToPort": -1, "IpRanges": [{"CidrIp": "0.0.0.0/0"}]
+    }]})
+    assert Network.sync_security_group_rules(SyncSecurityGroupRules(security_group_id="sg-1", egress=[]))
+
+
+def test_creating_a_subnet_drops_the_cached_lookups(stub: Callable[..., Any], tmp_path: Any) -> None:
+    DescribeCache.configure(DescribeCachePolicy(directory=str(tmp_path)))
+    try:
+        stub("sts").add_response("get_caller_identity", {"UserId": "user", "Account": "123456789012",
+                                                         "Arn": "arn:aws:iam::123456789012:user/user"})
+        stubber = stub("ec2")
+        vpc_filter = {"Filters": [{"Name": "vpc-id", "Values": ["vpc-1"]}]}
+        stubber.add_response("describe_subnets", {"Subnets": [{"SubnetId": "subnet-1"}]}, vpc_filter)
+        assert Network.find_subnets(FindAsset(vpc_id="vpc-1")) == ["subnet-1"]
+        assert Network.find_subnets(FindAsset(vpc_id="vpc-1")) == ["subnet-1"]
+        resource_stubber = stub("ec2", resource=True)
+        resource_stubber.add_response("create_subnet", {"Subnet": {"SubnetId": "subnet-2"}})
+        resource_stubber.add_client_error("describe_subnets", "UnauthorizedOperation")
+        # The creation fails past the subnet itself, which is then found by the next lookup
+        assert Network.create_subnet(CreateSubnet(subnet_name="subnet", vpc_id="vpc-1",
+                                                  cidr_block="10.0.1.0/24")) is None
+        stubber.add_response("describe_subnets", {"Subnets": [{"SubnetId": "subnet-1"}, {"SubnetId": "subnet-2"}]},
+                             vpc_filter)
+        assert Network.find_subnets(FindAsset(vpc_id="vpc-1")) == ["subnet-1", "subnet-2"]
+    finally:
+        DescribeCache.disable()
+
+
+def tags(**values: str) -> List[Dict[str, str]]:
+    return [{"Key": key, "Value": value} for key, value in values.items()]
+
+
+def record_creates(monkeypatch: Any, method_name: str, created_id: str) -> List[Any]:
+    created: List[Any] = []
+
+    def create(model: Any, logger: Optional[Any] = None) -> str:
+        created.append(model)
+        return created_id
+    monkeypatch.setattr(Network, method_name, staticmethod(create))
+    return created
+
+
+def test_reconcile_internet_gateway_adopts_existing_and_syncs_tags(stub: Callable[..., Any],
+                                                                   monkeypatch: Any) -> None:
+    created = record_creates(monkeypatch, "create_internet_gateway", "igw-new")
+    stubber = stub("ec2")
+    stubber.add_response("describe_internet_gateways", {"InternetGateways": [{
+        "InternetGatewayId": "igw-1", "Tags": tags(Name="gw", env="old", owner="team")
+    }]}, {"Filters": [{"Name": "tag:Name", "Values": ["gw"]}]})
+    stubber.add_response("create_tags", {}, {"Resources": ["igw-1"], "Tags": tags(env="new")})
+    assert Network.reconcile_internet_gateway(CreateInternetGateway(internet_gateway_name="gw",
+                                                                    tags={"env": "new", "owner": "team"})) == "igw-1"
+    assert created == []
+
+
+def test_reconcile_internet_gateway_creates_missing(stub: Callable[..., Any], monkeypatch: Any) -> None:
+    created = record_creates(monkeypatch, "create_internet_gateway", "igw-new")
+    stub("ec2").add_response("describe_internet_gateways", {"InternetGateways": []})
+    create_internet_gateway = CreateInternetGateway(internet_gateway_name="gw")
+    assert Network.reconcile_internet_gateway(create_internet_gateway) == "igw-new"
+    assert created == [create_internet_gateway]
+
+
+def expect_vpc(stubber: Any, attached: bool) -> None:
+    stubber.add_response("describe_vpcs", {"Vpcs": [{"VpcId": "vpc-1", "CidrBlock": "10.0.0.0/16",
+                                                     "Tags": tags(Name="vpc")}]},
+                         {"Filters": [{"Name": "tag:Name", "Values": ["vpc"]}]})
+    stubber.add_response("describe_internet_gateways", {"InternetGateways": [{
+        "InternetGatewayId": "igw-1", "Attachments": [{"VpcId": "vpc-1", "State": "available"}] if attached else []
+    }]}, {"InternetGatewayIds": ["igw-1"]})
+
+
+def expect_main_route_table(stubber: Any, routed: bool) -> None:
+    stubber.add_response("describe_route_tables", {"RouteTables": [{
+        "RouteTableId": "rtb-1",
+        "Routes": [{"DestinationCidrBlock": "0.0.0.0/0", "GatewayId": "igw-1"}] if routed else []
+    }]})
+
+
+def test_reconcile_vpc_adopts_existing_without_changes(stub: Callable[..., Any], monkeypatch: Any) -> None:
+    created = record_creates(monkeypatch, "create_vpc", "vpc-new")
+    stubber = stub("ec2")
+    expect_vpc(stubber, attached=True)
+    expect_main_route_table(stubber, routed=True)
+    assert Network.reconcile_vpc(CreateVPC(cidr_block="10.0.0.0/16", vpc_name="vpc", internet_gw="igw-1")) == "vpc-1"
+    assert created == []
+
+
+def test_reconcile_vpc_applies_only_the_drift(stub: Callable[..., Any], monkeypatch: Any) -> None:
+    created = record_creates(monkeypatch, "create_vpc", "vpc-new")
+    stubber = stub("ec2")
+    expect_vpc(stubber, attached=False)
+    stubber.add_response("attach_internet_gateway", {}, {"InternetGatewayId": "igw-1", "VpcId": "vpc-1"})
+    expect_main_route_table(stubber, routed=False)
+    stubber.add_response("create_route", {}, {"RouteTableId": "rtb-1", "DestinationCidrBlock": "0.0.0.0/0",
+                                              "GatewayId": "igw-1"})
+    assert Network.reconcile_vpc(CreateVPC(cidr_block="10.0.0.0/16", vpc_name="vpc", internet_gw="igw-1")) == "vpc-1"
+    assert created == []
+
+
+def test_reconcile_vpc_creates_missing_with_the_reconciled_gateway(stub: Callable[..., Any],
+                                                                   monkeypatch: Any) -> None:
+    created = record_creates(monkeypatch, "create_vpc", "vpc-new")
+    stubber = stub("ec2")
+    stubber.add_response("describe_internet_gateways", {"InternetGateways": [{
+        "InternetGatewayId": "igw-1", "Tags": tags(Name="gw")
+    }]})
+    stubber.add_response("describe_vpcs", {"Vpcs": []})
+    assert Network.reconcile_vpc(CreateVPC(cidr_block="10.0.0.0/16", vpc_name="vpc",
+                                           internet_gw=CreateInternetGateway(internet_gateway_name="gw"))) == "vpc-new"
+    assert [create_vpc.internet_gw for create_vpc in created] == ["igw-1"]
+
+
+def test_reconcile_subnets_adopts_existing_and_creates_missing(stub: Callable[..., Any], monkeypatch: Any) -> None:
+    created = record_creates(monkeypatch, "create_subnet", "subnet-new")
+    stub("ec2").add_response("describe_subnets", {"Subnets": [
+        {"SubnetId": "subnet-1", "VpcId": "vpc-1", "CidrBlock": "10.0.1.0/24", "Tags": tags(Name="a")},
+        # Same name in another VPC
+        {"SubnetId": "subnet-2", "VpcId": "vpc-2", "CidrBlock": "10.0.2.0/24", "Tags": tags(Name="b")}
+    ]})
+    assert Network.reconcile_subnets([
+        CreateSubnet(subnet_name="a", vpc_id="vpc-1", cidr_block="10.0.1.0/24"),
+        CreateSubnet(subnet_name="b", vpc_id="vpc-1", cidr_block="10.0.2.0/24")
+    ]) == {"a": "subnet-1", "b": "subnet-new"}
+    assert [create_subnet.subnet_name for create_subnet in created] == ["b"]
+
+
+def test_reconcile_security_groups_adopts_existing_and_creates_missing(stub: Callable[..., Any],
+                                                                       monkeypatch: Any) -> None:
+    created = record_creates(monkeypatch, "create_security_group", "sg-new")
+    stub("ec2").add_response("describe_security_groups", {"SecurityGroups": [{
+        "GroupId": "sg-1", "GroupName": "web", "VpcId": "vpc-1", "Tags": tags(Name="web"),
+        "IpPermissions": [{"IpProtocol": "tcp", "FromPort": 443, "ToPort": 443,
+                           "IpRanges": [{"CidrIp": "0.0.0.0/0"}]}],
+        "IpPermissionsEgress": [ALLOW_ALL_EGRESS]
+    }]})
+    # No egress rules are requested, so the existing egress rules are left untouched
+    assert Network.reconcile_security_groups([
+        CreateSecurityGroup(name="web", vpc_id="vpc-1",
+                            ingress=[NetworkRule(from_port=443, to_port=443, allowed_cidr=["0.0.0.0/0"])]),
+        CreateSecurityGroup(name="db", vpc_id="vpc-1")
+    ]) == {"web": "sg-1", "db": "sg-new"}
+    assert [create_security_group.name for create_security_group in created] == ["db"]
+
+
+def test_destroying_route_tables_keeps_the_main_table(stub: Callable[..., Any]) -> None:
+    stubber = stub("ec2", resource=True)
+    stubber.add_response("describe_route_tables", {"RouteTables": [
+        {"RouteTableId": "rtb-main", "Associations": [
+            {"RouteTableAssociationId": "rtbassoc-main", "RouteTableId": "rtb-main", "Main": True}
+        ]},
+        {"RouteTableId": "rtb-1", "Associations": [
+            {"RouteTableAssociationId": "rtbassoc-1", "RouteTableId": "rtb-1", "SubnetId": "subnet-1", "Main": False},
+            {"RouteTableAssociationId": "rtbassoc-2", "RouteTableId": "rtb-1", "SubnetId": "subnet-2", "Main": False}
+        ]}
+    ]}, {"Filters": [{"Name": "vpc-id", "Values": ["vpc-1"]}]})
+    stubber.add_response("disassociate_route_table", {}, {"AssociationId": "rtbassoc-1"})
+    stubber.add_response("disassociate_route_table", {}, {"AssociationId": "rtbassoc-2"})
+    stubber.add_response("delete_route_table", {}, {"RouteTableId": "rtb-1"})
+    destroy_vpc_routing_tables = getattr(Network, "_Network__destroy_vpc_routing_tables")
+    destroy_vpc_routing_tables("vpc-1", Clients.resource("ec2").Vpc("vpc-1"))
+
+
+def test_plan_destroy_vpc_counts_the_pages_read(stub: Callable[..., Any]) -> None:
+    stubber = stub("ec2")
+    stubber.add_response("describe_instances", {"Reservations": []})
+    stubber.add_response("describe_internet_gateways", {"InternetGateways": []})
+    stubber.add_response("describe_route_tables", {"RouteTables": [
+        {"RouteTableId": "rtb-1", "Associations": [{"RouteTableAssociationId": "rtbassoc-1", "Main": False}]}
+    ], "NextToken": "page-2"})
+    stubber.add_response("describe_route_tables", {"RouteTables": [
+        {"RouteTableId": "rtb-main", "Associations": [{"RouteTableAssociationId": "rtbassoc-main", "Main": True}]}
+    ]}, {"Filters": [{"Name": "vpc-id", "Values": ["vpc-1"]}], "NextToken": "page-2"})
+    for operation_name, result_key in (("describe_vpc_endpoints", "VpcEndpoints"),
+                                       ("describe_security_groups", "SecurityGroups"),
+                                       ("describe_vpc_peering_connections", "VpcPeeringConnections"),
+                                       ("describe_network_acls", "NetworkAcls"),
+                                       ("describe_subnets", "Subnets"),
+                                       ("describe_network_interfaces", "NetworkInterfaces")):
+        stubber.add_response(operation_name, {result_key: []})
+    plan = Network.plan_destroy_vpc(DestroyVPC(vpc_id="vpc-1", full_cleanup=True))
+    assert plan is not None
+    steps = {step.name: step for step in plan.steps}
+    assert steps["find_instances"].api_calls == {"ec2.DescribeInstances": 1}
+    assert steps["destroy_route_tables"].api_calls == {
+        "ec2.DescribeRouteTables": 2, "ec2.DisassociateRouteTable": 1, "ec2.DeleteRouteTable": 1
+    }
+    assert steps["destroy_route_tables"].resources == ["rtb-1"]
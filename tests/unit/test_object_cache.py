@@ -0,0 +1,65 @@
+import io
+from typing import Any, Callable, Dict, Iterator
+
+import pytest
+from botocore.response import StreamingBody
+
+from octo_infra_aws_python.logic.object_cache import ObjectCache
+from octo_infra_aws_python.models.object_cache_policy import ObjectCachePolicy
+
+OK: Dict[str, Any] = {"ResponseMetadata": {"HTTPStatusCode": 200}}
+
+
+@pytest.fixture(autouse=True)
+def disable_cache() -> Iterator[None]:
+    yield
+    ObjectCache.disable()
+
+
+def object_response(data: bytes, etag: str) -> Dict[str, Any]:
+    return {"Body": StreamingBody(io.BytesIO(data), len(data)), "ETag": etag, "ContentLength": len(data), **OK}
+
+
+def expect_not_modified(stubber: Any, etag: str) -> None:
+    stubber.add_client_error("get_object", "304", http_status_code=304,
+                             expected_params={"Bucket": "bucket", "Key": "key", "IfNoneMatch": etag})
+
+
+def test_cached_objects_are_revalidated_with_conditional_gets(stub: Callable[..., Any]) -> None:
+    ObjectCache.configure(ObjectCachePolicy())
+    stubber = stub("s3")
+    stubber.add_response("get_object", object_response(b"v1", '"e1"'), {"Bucket": "bucket", "Key": "key"})
+    expect_not_modified(stubber, '"e1"')
+    stubber.add_response("get_object", object_response(b"v2", '"e2"'),
+                         {"Bucket": "bucket", "Key": "key", "IfNoneMatch": '"e1"'})
+    assert ObjectCache.fetch("bucket", "key").read() == b"v1"
+    assert ObjectCache.fetch("bucket", "key").read() == b"v1"
+    cached = ObjectCache.fetch("bucket", "key")
+    assert (cached.read(), cached.etag) == (b"v2", '"e2"')
+
+
+def test_objects_within_max_staleness_are_not_revalidated(stub: Callable[..., Any]) -> None:
+    ObjectCache.configure(ObjectCachePolicy(max_staleness_seconds={"config/": 3600}))
+    stubber = stub("s3")
+    stubber.add_response("get_object", object_response(b"v1", '"e1"'), {"Bucket": "bucket", "Key": "config/a"})
+    assert ObjectCache.fetch("bucket", "config/a").read() == b"v1"
+    assert ObjectCache.fetch("bucket", "config/a").read() == b"v1"
+    assert ObjectCache.invalidate("bucket") == 1
+    assert ObjectCache.invalidate("bucket") == 0
+
+
+def test_disk_cache_is_shared_across_configurations(stub: Callable[..., Any], tmp_path: Any) -> None:
+    policy = ObjectCachePolicy(directory=str(tmp_path), max_memory_bytes=1)
+    ObjectCache.configure(policy)
+    stubber = stub("s3")
+    stubber.add_response("get_object", object_response(b"on disk", '"e1"'), {"Bucket": "bucket", "Key": "key"})
+    expect_not_modified(stubber, '"e1"')
+    cached = ObjectCache.fetch("bucket", "key")
+    # Over the memory budget, the body is read from the cached file
+    assert cached.body is None and cached.read() == b"on disk"
+    ObjectCache.configure(policy)
+    assert ObjectCache.fetch("bucket", "key").read() == b"on disk"
+    ObjectCache.download(cached, str(tmp_path / "downloaded"))
+    assert (tmp_path / "downloaded").read_bytes() == b"on disk"
+    assert ObjectCache.invalidate("bucket", "key") == 1
+    assert ObjectCache.invalidate() == 0
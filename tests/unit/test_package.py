@@ -0,0 +1,35 @@
+import json
+import subprocess
+import sys
+
+import pytest
+
+import octo_infra_aws_python
+from octo_infra_aws_python.logic.s3 import S3
+
+# Lists the modules loaded by importing the package and by resolving an attribute, in a fresh interpreter
+IMPORT_SCRIPT = """
+import json, sys
+import octo_infra_aws_python
+package_modules = sorted(sys.modules)
+octo_infra_aws_python.SSM
+print(json.dumps({"package": package_modules, "ssm": sorted(sys.modules)}))
+"""
+
+
+def test_package_loads_logic_modules_on_first_access() -> None:
+    modules = json.loads(subprocess.run([sys.executable, "-c", IMPORT_SCRIPT], check=True, capture_output=True,
+                                        text=True).stdout)
+    assert not [module for module in modules["package"]
+                if module.startswith(("boto3", "botocore", "pydantic", "octo_infra_aws_python.logic"))]
+    assert "octo_infra_aws_python.logic.ssm" in modules["ssm"]
+    assert "octo_infra_aws_python.logic.ec2" not in modules["ssm"]
+
+
+def test_lazy_attributes_resolve_to_logic_classes() -> None:
+    assert octo_infra_aws_python.S3 is S3
+    for name in octo_infra_aws_python.__all__:
+        assert getattr(octo_infra_aws_python, name).__name__ == name
+    assert set(octo_infra_aws_python.__all__) <= set(dir(octo_infra_aws_python))
+    with pytest.raises(AttributeError):
+        getattr(octo_infra_aws_python, "Unknown")
@@ -0,0 +1,75 @@
+import io
+from typing import Any, Callable, Dict, Tuple
+
+from botocore.response import StreamingBody
+from botocore.stub import ANY
+
+from octo_infra_aws_python.logic import packs
+from octo_infra_aws_python.logic.clients import Clients
+from octo_infra_aws_python.logic.packs import Packs
+from octo_infra_aws_python.models.actions.s3 import LoadPackMember, SavePack
+
+OK: Dict[str, Any] = {"ResponseMetadata": {"HTTPStatusCode": 200}}
+
+
+def save_pack(stubber: Any, object_path: str, members: Dict[str, bytes]) -> bytes:
+    saved = []
+    Clients.client("s3").meta.events.register("before-parameter-build.s3.PutObject",
+                                              lambda params, **kwargs: saved.append(params["Body"]))
+    stubber.add_response("put_object", {"ETag": '"saved"', **OK},
+                         {"Bucket": "bucket", "Key": object_path, "Body": ANY})
+    assert Packs.save_pack(SavePack(bucket_name="bucket", object_path=object_path, members=members)) is not None
+    return saved[0]
+
+
+def ranged(pack: bytes, etag: str, start: int, end: int) -> Dict[str, Any]:
+    data = pack[start:end + 1]
+    return {"Body": StreamingBody(io.BytesIO(data), len(data)), "ETag": etag,
+            "ContentRange": f"bytes {start}-{end}/{len(pack)}", **OK}
+
+
+def tail_range(pack: bytes, size: int) -> Tuple[int, int]:
+    return max(len(pack) - size, 0), len(pack) - 1
+
+
+def test_load_pack_member_reads_index_and_member(stub: Callable[..., Any]) -> None:
+    stubber = stub("s3")
+    pack = save_pack(stubber, "p1.pack", {"a": b"alpha", "b": b"beta", "empty": b""})
+    stubber.add_response("get_object", ranged(pack, '"v1"', *tail_range(pack, packs.INDEX_READ_AHEAD)),
+                         {"Bucket": "bucket", "Key": "p1.pack", "Range": f"bytes=-{packs.INDEX_READ_AHEAD}"})
+    stubber.add_response("get_object", ranged(pack, '"v1"', 5, 8),
+                         {"Bucket": "bucket", "Key": "p1.pack", "Range": "bytes=5-8", "IfMatch": '"v1"'})
+    assert Packs.load_pack_member(LoadPackMember(bucket_name="bucket", object_path="p1.pack",
+                                                 member_name="b")) == b"beta"
+    # The index is cached, empty members need no get
+    assert Packs.load_pack_member(LoadPackMember(bucket_name="bucket", object_path="p1.pack",
+                                                 member_name="empty")) == b""
+    assert Packs.load_pack_member(LoadPackMember(bucket_name="bucket", object_path="p1.pack",
+                                                 member_name="missing")) is None
+
+
+def test_load_pack_member_retries_pack_replaced_while_reading_index(stub: Callable[..., Any],
+                                                                    monkeypatch: Any) -> None:
+    # A read ahead of the footer only, so the index is read by a second conditional get
+    monkeypatch.setattr(packs, "INDEX_READ_AHEAD", packs.FOOTER.size)
+    stubber = stub("s3")
+    pack = save_pack(stubber, "p2.pack", {"a": b"alpha", "b": b"beta"})
+    _, index_offset, index_size = packs.FOOTER.unpack(pack[-packs.FOOTER.size:])
+    index_range = f"bytes={index_offset}-{index_offset + index_size - 1}"
+    stubber.add_response("get_object", ranged(pack, '"v1"', *tail_range(pack, packs.FOOTER.size)), {
+        "Bucket": "bucket", "Key": "p2.pack", "Range": f"bytes=-{packs.FOOTER.size}"
+    })
+    stubber.add_client_error("get_object", "PreconditionFailed", http_status_code=412, expected_params={
+        "Bucket": "bucket", "Key": "p2.pack", "Range": index_range, "IfMatch": '"v1"'
+    })
+    stubber.add_response("get_object", ranged(pack, '"v2"', *tail_range(pack, packs.FOOTER.size)), {
+        "Bucket": "bucket", "Key": "p2.pack", "Range": f"bytes=-{packs.FOOTER.size}"
+    })
+    stubber.add_response("get_object", ranged(pack, '"v2"', index_offset, index_offset + index_size - 1), {
+        "Bucket": "bucket", "Key": "p2.pack", "Range": index_range, "IfMatch": '"v2"'
+    })
+    stubber.add_response("get_object", ranged(pack, '"v2"', 0, 4), {
+        "Bucket": "bucket", "Key": "p2.pack", "Range": "bytes=0-4", "IfMatch": '"v2"'
+    })
+    assert Packs.load_pack_member(LoadPackMember(bucket_name="bucket", object_path="p2.pack",
+                                                 member_name="a")) == b"alpha"
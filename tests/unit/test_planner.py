@@ -0,0 +1,87 @@
+from typing import Any, Callable
+
+import pytest
+
+from octo_infra_aws_python.logic.ec2 import EC2
+from octo_infra_aws_python.logic.planner import Planner
+from octo_infra_aws_python.models.actions.ec2 import DestroyEC2Instances
+from octo_infra_aws_python.models.plan_settings import PlanSettings
+from octo_infra_aws_python.models.retry_policy import RetryPolicy
+
+
+def test_plan_estimates_the_slowest_chain() -> None:
+    planner = Planner("action", PlanSettings(call_latency_seconds=1))
+    planner.add_step("describe", {"ec2.DescribeVpcs": 1, "ec2.DescribeSubnets": 0}, ["vpc-1"])
+    planner.add_step("fast", {"ec2.DeleteSubnet": 2}, ["subnet-1", "subnet-2"])
+    planner.add_step("slow", {"ec2.DeleteRouteTable": 1}, dependencies=["describe"], wait_seconds=10)
+    planner.add_step("last", {"ec2.DeleteVpc": 1}, dependencies=["fast", "slow"])
+    planner.add_resources("vpc", ["vpc-1"])
+    plan = planner.plan()
+    assert [step.estimated_seconds for step in plan.steps] == [1, 2, 11, 1]
+    assert plan.steps[0].api_calls == {"ec2.DescribeVpcs": 1}
+    assert plan.steps[1].dependencies == ["describe"]
+    assert plan.estimated_seconds == 13
+    assert plan.api_calls == {"ec2": 5}
+    assert plan.resources == {"vpc": ["vpc-1"]}
+
+
+def test_plan_includes_sub_plans_with_prefixed_steps() -> None:
+    sub_planner = Planner("sub")
+    sub_planner.add_step("first", {"ec2.DescribeVpcs": 1})
+    sub_planner.add_step("second", {"ec2.DeleteVpc": 1})
+    sub_planner.add_resources("vpc", ["vpc-1"])
+    planner = Planner("action")
+    planner.add_step("start", {"sts.GetCallerIdentity": 1})
+    planner.add_plan(sub_planner.plan())
+    plan = planner.plan()
+    assert [(step.name, step.dependencies) for step in plan.steps] == [
+        ("start", []), ("sub.first", ["start"]), ("sub.second", ["sub.first"])
+    ]
+    assert plan.resources == {"vpc": ["vpc-1"]}
+    assert planner.last_step() == "sub.second"
+
+
+def test_plan_uses_slower_rate_limits(retry_policy: Callable[[RetryPolicy], None]) -> None:
+    retry_policy(RetryPolicy(rate_limits={"ec2": 10}))
+    planner = Planner("action", PlanSettings(call_latency_seconds=0.01))
+    planner.add_step("terminate", {"ec2.TerminateInstances": 20, "sts.GetCallerIdentity": 20})
+    assert planner.plan().estimated_seconds == pytest.approx(2 + 0.2)
+
+
+def test_call_counting_helpers() -> None:
+    assert Planner.chunks(2001, 1000) == 3
+    assert Planner.chunks(0, 1000) == 0
+    assert Planner.polls(60, 2) == 31
+
+
+def test_plan_destroy_ec2_instances_only_describes(stub: Callable[..., Any]) -> None:
+    stubber = stub("ec2")
+    stubber.add_response("describe_instances", {"Reservations": [{"Instances": [
+        {"InstanceId": "i-1", "KeyName": "key", "State": {"Name": "running"}},
+        {"InstanceId": "i-2", "KeyName": "key", "State": {"Name": "terminated"}}
+    ]}]}, {"Filters": [{"Name": "instance-id", "Values": ["i-1", "i-2"]}]})
+    plan = EC2.plan_destroy_ec2_instances(DestroyEC2Instances(instance_ids=["i-1", "i-2", "i-1"]),
+                                          PlanSettings(call_latency_seconds=0.1, instance_termination_seconds=10))
+    assert plan is not None
+    steps = {step.name: step for step in plan.steps}
+    assert steps["destroy_keypairs"].resources == ["key"]
+    assert steps["stop_instances"].resources == ["i-1"]
+    assert steps["terminate_instances"].resources == ["i-1"]
+    assert steps["wait_for_terminated"].api_calls == {"ec2.DescribeInstances": 6}
+    assert plan.resources == {"instance": ["i-1", "i-2"], "keypair": ["key"]}
+
+
+def test_plan_destroy_ec2_instances_counts_describes_per_filter_chunk(stub: Callable[..., Any]) -> None:
+    instance_ids = [f"i-{index}" for index in range(450)]
+    stubber = stub("ec2")
+    for chunk in (instance_ids[:200], instance_ids[200:400], instance_ids[400:]):
+        stubber.add_response("describe_instances", {"Reservations": [{"Instances": [
+            {"InstanceId": instance_id, "State": {"Name": "running"}} for instance_id in chunk
+        ]}]}, {"Filters": [{"Name": "instance-id", "Values": chunk}]})
+    plan = EC2.plan_destroy_ec2_instances(DestroyEC2Instances(instance_ids=instance_ids, destroy_keypair=False,
+                                                              wait_for_termination=False))
+    assert plan is not None
+    steps = {step.name: step for step in plan.steps}
+    assert steps["describe_instances"].api_calls == {"ec2.DescribeInstances": 3}
+    assert steps["stop_instances"].api_calls == {"ec2.StopInstances": 1}
+    assert steps["terminate_instances"].api_calls == {"ec2.TerminateInstances": 1}
@@ -0,0 +1,52 @@
+from logging import Logger
+from typing import Any, Callable, Dict, List, Optional
+
+from octo_infra_aws_python.logic.clients import Clients
+from octo_infra_aws_python.logic.regions import Regions
+from octo_infra_aws_python.models.actions.regions import FanOutRegions
+from octo_infra_aws_python.models.regions import Region
+
+
+def region_of(argument: str, logger: Logger) -> Optional[List[str]]:
+    if argument == "fail":
+        raise RuntimeError("action failed")
+    region_name = Clients.client("ec2").meta.region_name
+    return None if argument == "none" else [f"{argument}@{region_name}"]
+
+
+def enable_regions(stub: Callable[..., Any], *region_names: str) -> None:
+    stubber = stub("ec2")
+    stubber.add_response("describe_regions", {"Regions": [{"RegionName": name} for name in region_names]},
+                         {"AllRegions": False})
+    assert Regions.enabled_regions(refresh=True) == frozenset(region_names)
+
+
+def test_fan_out_runs_every_argument_in_every_region(stub: Callable[..., Any]) -> None:
+    enable_regions(stub, "us-east-1", "eu-west-1")
+    results = Regions.fan_out(region_of, ["a", "fail", "none"], FanOutRegions(
+        regions=[Region.NorthVirginia, Region.Ireland, Region.Ireland], skip_disabled_regions=False
+    ))
+    assert results == {Region.NorthVirginia: [["a@us-east-1"], None, None],
+                       Region.Ireland: [["a@eu-west-1"], None, None]}
+    assert Regions.merge(results) == [(Region.NorthVirginia, "a@us-east-1"), (Region.Ireland, "a@eu-west-1")]
+
+
+def test_fan_out_skips_disabled_regions(stub: Callable[..., Any]) -> None:
+    enable_regions(stub, "us-east-1", "eu-west-1")
+    results: Dict[Region, Any] = Regions.fan_out(region_of, ["a"], FanOutRegions(
+        regions=[Region.NorthVirginia, Region.CapeTown, Region.Ireland]
+    ))
+    assert list(results) == [Region.NorthVirginia, Region.Ireland]
+    # Enabled regions are found once per credentials
+    assert Regions.enabled_regions() == frozenset({"us-east-1", "eu-west-1"})
+
+
+def test_enabled_regions_are_found_per_credentials(stub: Callable[..., Any], monkeypatch: Any) -> None:
+    enable_regions(stub, "us-east-1", "eu-west-1")
+    monkeypatch.setenv("AWS_ACCESS_KEY_ID", "other-account")
+    Clients.reset()
+    stub("ec2").add_response("describe_regions", {"Regions": [{"RegionName": "us-east-1"}]}, {"AllRegions": False})
+    assert Regions.enabled_regions() == frozenset({"us-east-1"})
+    monkeypatch.setenv("AWS_ACCESS_KEY_ID", "testing")
+    Clients.reset()
+    assert Regions.enabled_regions() == frozenset({"us-east-1", "eu-west-1"})
@@ -0,0 +1,39 @@
+from typing import Any, Callable
+
+import pytest
+
+from octo_infra_aws_python.logic.clients import Clients
+from octo_infra_aws_python.logic.retry import Retry, TokenBucket
+from octo_infra_aws_python.models.retry_policy import RetryPolicy
+
+IDENTITY = {"UserId": "user", "Account": "123456789012", "Arn": "arn:aws:iam::123456789012:user/user"}
+
+
+@pytest.fixture
+def retry(retry_policy: Callable[[RetryPolicy], None]) -> None:
+    retry_policy(RetryPolicy(max_attempts=3, rate_limits={"sts": 1000}))
+    Retry.reset_statistics()
+
+
+def test_token_bucket_waits_once_empty() -> None:
+    bucket = TokenBucket(rate=100, capacity=2)
+    assert bucket.acquire() == 0
+    assert bucket.acquire() == 0
+    assert 0 < bucket.acquire() <= 0.01
+
+
+def test_configure_applies_policy_to_new_clients(retry: None) -> None:
+    assert Retry.policy() == RetryPolicy(max_attempts=3, rate_limits={"sts": 1000})
+    assert Clients.client("sts").meta.config.retries["total_max_attempts"] == 3
+
+
+def test_statistics_count_calls_and_throttles(retry: None, stub: Callable[..., Any]) -> None:
+    stubber = stub("sts")
+    stubber.add_response("get_caller_identity", IDENTITY)
+    stubber.add_client_error("get_caller_identity", "ThrottlingException", http_status_code=400)
+    client = Clients.client("sts")
+    client.get_caller_identity()
+    with pytest.raises(Exception):
+        client.get_caller_identity()
+    statistics = Retry.statistics()["sts"]
+    assert (statistics.calls, statistics.failures, statistics.throttled_failures) == (2, 1, 1)
@@ -0,0 +1,210 @@
+import datetime
+import gzip
+import io
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, List, Tuple
+
+import botocore.auth
+import pytest
+from botocore.stub import ANY
+from pydantic import ValidationError
+
+from octo_infra_aws_python.logic.clients import Clients
+from octo_infra_aws_python.logic.s3 import PRESIGNED_OPERATIONS, S3
+from octo_infra_aws_python.models.actions.s3 import CopyObjects, FindObjects, MoveObjects, ObjectInfo, \
+    PresignObjects, SaveObject, SaveObjects
+from octo_infra_aws_python.models.actions.s3.save_object import MIN_PART_SIZE
+
+OK: Dict[str, Any] = {"ResponseMetadata": {"HTTPStatusCode": 200}}
+
+
+@pytest.mark.parametrize("source_prefix, destination_prefix", [
+    ("data/", "data/"),
+    ("data/", "data/archive/"),
+    ("data/archive/", "data/"),
+    ("", "archive/"),
+])
+def test_move_objects_rejects_overlapping_prefixes(stub: Callable[..., Any], source_prefix: str,
+                                                   destination_prefix: str) -> None:
+    # No responses are stubbed, any call would fail the test
+    stubber = stub("s3")
+    move_objects = MoveObjects(source=FindObjects(bucket_name="bucket", base_search_path=source_prefix),
+                               destination_prefix=destination_prefix)
+    assert S3.move_objects(move_objects) is False
+    stubber.assert_no_pending_responses()
+
+
+def test_move_objects_allows_overlapping_prefixes_across_buckets(stub: Callable[..., Any]) -> None:
+    stubber = stub("s3")
+    stubber.add_response("list_objects", list_response(), {"Bucket": "bucket", "Prefix": "data/"})
+    move_objects = MoveObjects(source=FindObjects(bucket_name="bucket", base_search_path="data/"),
+                               destination_bucket_name="other", destination_prefix="data/archive/")
+    assert S3.move_objects(move_objects) is True
+
+
+def list_response(*objects: Tuple[str, int]) -> Dict[str, Any]:
+    return {"Contents": [{"Key": key, "Size": size} for key, size in objects], "IsTruncated": False, **OK}
+
+
+def test_find_objects_compact_filters_into_columns(stub: Callable[..., Any]) -> None:
+    stubber = stub("s3")
+    stubber.add_response("list_objects", list_response(("data/a.json", 1), ("data/b.csv", 2), ("data/c.json", 3)),
+                         {"Bucket": "bucket", "Prefix": "data/"})
+    objects = S3.find_objects_compact(FindObjects(bucket_name="bucket", base_search_path="data/",
+                                                  filters=["*.json"]))
+    assert objects is not None
+    assert objects.object_paths == ["data/a.json", "data/c.json"]
+    assert list(objects.object_sizes) == [1, 3]
+    assert objects[1] == ObjectInfo(bucket_name="bucket", object_path="data/c.json", object_size=3, is_folder=False)
+    assert objects[:1].object_paths == ["data/a.json"]
+    assert objects.to_object_infos() == list(objects)
+
+
+def test_copy_objects_copies_under_destination_prefix(stub: Callable[..., Any]) -> None:
+    stubber = stub("s3")
+    stubber.add_response("list_objects", list_response(("data/a", 1), ("data/nested/b", 2)),
+                         {"Bucket": "bucket", "Prefix": "data/"})
+    for source_path, destination_path in (("data/a", "copy/a"), ("data/nested/b", "copy/nested/b")):
+        stubber.add_response("copy_object", {"CopyObjectResult": {"ETag": '"etag"'}, **OK}, {
+            "Bucket": "other", "Key": destination_path, "CopySource": {"Bucket": "bucket", "Key": source_path}
+        })
+    assert S3.copy_objects(CopyObjects(source=FindObjects(bucket_name="bucket", base_search_path="data/"),
+                                       destination_bucket_name="other", destination_prefix="copy/",
+                                       max_concurrent_copies=1)) is True
+
+
+def test_copy_objects_copies_large_objects_in_parts(stub: Callable[..., Any]) -> None:
+    size = 2 * MIN_PART_SIZE + 1
+    copy_source = {"Bucket": "bucket", "Key": "data/large"}
+    stubber = stub("s3")
+    stubber.add_response("list_objects", list_response(("data/large", size)), {"Bucket": "bucket", "Prefix": "data/"})
+    stubber.add_response("head_object", {"ETag": '"source"', "ContentType": "text/plain", **OK}, copy_source)
+    stubber.add_response("create_multipart_upload", {"UploadId": "upload", **OK},
+                         {"Bucket": "bucket", "Key": "copy/large", "ContentType": "text/plain"})
+    for part_number, (start, end) in enumerate(((0, MIN_PART_SIZE - 1), (MIN_PART_SIZE, 2 * MIN_PART_SIZE - 1),
+                                                (2 * MIN_PART_SIZE, size - 1)), start=1):
+        stubber.add_response("upload_part_copy", {"CopyPartResult": {"ETag": f'"{part_number}"'}, **OK}, {
+            "Bucket": "bucket", "Key": "copy/large", "UploadId": "upload", "PartNumber": part_number,
+            "CopySource": copy_source, "CopySourceRange": f"bytes={start}-{end}", "CopySourceIfMatch": '"source"'
+        })
+    stubber.add_response("complete_multipart_upload", OK, {
+        "Bucket": "bucket", "Key": "copy/large", "UploadId": "upload",
+        "MultipartUpload": {"Parts": [{"PartNumber": number, "ETag": f'"{number}"'} for number in (1, 2, 3)]}
+    })
+    assert S3.copy_objects(CopyObjects(source=FindObjects(bucket_name="bucket", base_search_path="data/"),
+                                       destination_prefix="copy/", multipart_threshold=MIN_PART_SIZE,
+                                       part_size=MIN_PART_SIZE, max_concurrent_parts=1)) is True
+
+
+def test_move_objects_deletes_copied_sources(stub: Callable[..., Any]) -> None:
+    stubber = stub("s3")
+    stubber.add_response("list_objects", list_response(("data/a", 1), ("data/b", 2)),
+                         {"Bucket": "bucket", "Prefix": "data/"})
+    stubber.add_response("copy_object", {"CopyObjectResult": {"ETag": '"etag"'}, **OK},
+                         {"Bucket": "bucket", "Key": "archive/a", "CopySource": {"Bucket": "bucket", "Key": "data/a"}})
+    stubber.add_client_error("copy_object", "AccessDenied", http_status_code=403, expected_params={
+        "Bucket": "bucket", "Key": "archive/b", "CopySource": {"Bucket": "bucket", "Key": "data/b"}
+    })
+    # Only the confirmed copies are deleted
+    stubber.add_response("delete_objects", OK,
+                         {"Bucket": "bucket", "Delete": {"Objects": [{"Key": "data/a"}], "Quiet": True}})
+    assert S3.move_objects(MoveObjects(source=FindObjects(bucket_name="bucket", base_search_path="data/"),
+                                       destination_prefix="archive/", max_concurrent_copies=1)) is False
+
+
+@pytest.mark.parametrize("body", [b"small", "small", bytearray(b"small"), io.BytesIO(b"small"),
+                                  iter([b"sm", b"all"])])
+def test_save_object_puts_small_bodies_at_once(stub: Callable[..., Any], body: Any) -> None:
+    stubber = stub("s3")
+    stubber.add_response("put_object", {"ETag": '"etag"', **OK}, {"Bucket": "bucket", "Key": "key", "Body": b"small"})
+    assert S3.save_object(SaveObject(bucket_name="bucket", object_path="key", body=body, codec="identity")) is True
+
+
+def test_save_object_rejects_other_bodies() -> None:
+    with pytest.raises(ValidationError):
+        SaveObject(bucket_name="bucket", object_path="key", body=5)
+
+
+def expect_multipart(stubber: Any, body: bytes, fail_part: int = 0) -> None:
+    stubber.add_response("create_multipart_upload", {"UploadId": "upload", **OK}, {"Bucket": "bucket", "Key": "key"})
+    for part_number, start in enumerate(range(0, len(body), MIN_PART_SIZE), start=1):
+        expected = {"Bucket": "bucket", "Key": "key", "UploadId": "upload", "PartNumber": part_number,
+                    "Body": body[start:start + MIN_PART_SIZE]}
+        if part_number == fail_part:
+            stubber.add_client_error("upload_part", "InternalError", http_status_code=500, expected_params=expected)
+            stubber.add_response("abort_multipart_upload", OK, {"Bucket": "bucket", "Key": "key", "UploadId": "upload"})
+            return
+        stubber.add_response("upload_part", {"ETag": f'"{part_number}"', **OK}, expected)
+    stubber.add_response("complete_multipart_upload", OK, {
+        "Bucket": "bucket", "Key": "key", "UploadId": "upload",
+        "MultipartUpload": {"Parts": [{"PartNumber": number, "ETag": f'"{number}"'} for number in (1, 2, 3)]}
+    })
+
+
+def test_save_object_streams_large_bodies_in_parts(stub: Callable[..., Any]) -> None:
+    body = bytes(range(256)) * (2 * MIN_PART_SIZE // 256) + b"tail"
+    stubber = stub("s3")
+    expect_multipart(stubber, body)
+    chunks = (body[start:start + 1000000] for start in range(0, len(body), 1000000))
+    assert S3.save_object(SaveObject(bucket_name="bucket", object_path="key", body=chunks, part_size=MIN_PART_SIZE,
+                                     max_concurrent_parts=1, codec="identity")) is True
+
+
+def test_save_object_aborts_failed_multipart_uploads(stub: Callable[..., Any]) -> None:
+    body = b"x" * (2 * MIN_PART_SIZE + 1)
+    stubber = stub("s3")
+    expect_multipart(stubber, body, fail_part=2)
+    assert S3.save_object(SaveObject(bucket_name="bucket", object_path="key", body=io.BytesIO(body),
+                                     part_size=MIN_PART_SIZE, max_concurrent_parts=1, codec="identity")) is False
+
+
+def test_save_object_compresses_with_codec(stub: Callable[..., Any]) -> None:
+    saved: List[bytes] = []
+    client = Clients.client("s3")
+    client.meta.events.register("before-parameter-build.s3.PutObject",
+                                lambda params, **kwargs: saved.append(params["Body"]))
+    stubber = stub("s3")
+    stubber.add_response("put_object", {"ETag": '"etag"', **OK}, {
+        "Bucket": "bucket", "Key": "key", "Body": ANY, "ContentEncoding": "gzip", "Metadata": {"octo-codec": "gzip"}
+    })
+    assert S3.save_object(SaveObject(bucket_name="bucket", object_path="key", body=b"octo" * 1000,
+                                     codec="gzip")) is True
+    assert gzip.decompress(saved[0]) == b"octo" * 1000
+
+
+def test_save_objects_backs_off_throttles_and_shards_paths(stub: Callable[..., Any]) -> None:
+    sharded_path = S3.shard_object_path("a", 2)
+    assert sharded_path.endswith("/a") and len(sharded_path) == 4
+    stubber = stub("s3")
+    expected = {"Bucket": "bucket", "Key": sharded_path, "Body": b"a"}
+    stubber.add_client_error("put_object", "SlowDown", http_status_code=503, expected_params=expected)
+    stubber.add_response("put_object", {"ETag": '"etag"', **OK}, expected)
+    stubber.add_client_error("put_object", "SlowDown", http_status_code=503,
+                             expected_params={"Bucket": "bucket", "Key": S3.shard_object_path("b", 2), "Body": b"b"})
+    objects = (SaveObject(bucket_name="bucket", object_path=path, body=body, codec="identity")
+               for path, body in (("a", b"a"), ("b", iter([b"b"]))))
+    report = S3.save_objects(SaveObjects(objects=objects, max_concurrent_saves=1, shard_digits=2,
+                                         backoff_base_seconds=0.001))
+    assert report is not None
+    # Iterator bodies are consumed by the first attempt, so they are not retried
+    assert (report.saved, report.failed, report.throttles) == (1, [S3.shard_object_path("b", 2)], 2)
+    assert report.backoff_seconds > 0
+
+
+@pytest.mark.parametrize("region_name, algorithm", [("us-east-1", "Signature="), ("eu-central-1", "X-Amz-Signature=")])
+@pytest.mark.parametrize("method", ["GET", "PUT"])
+def test_presigned_urls_match_client_presigned_urls(monkeypatch: Any, region_name: str, algorithm: str,
+                                                    method: str) -> None:
+    # Signs every url at the same time, as urls signed by the client later in the test would change otherwise
+    now = datetime.datetime(2026, 1, 1, 12, 0, 0)
+    monkeypatch.setattr(botocore.auth, "get_current_datetime", lambda: now)
+    monkeypatch.setattr(botocore.auth, "time", SimpleNamespace(time=lambda: 1767268800.0))
+    object_paths = ["data/a.txt", "data/with space+plus.txt", "data/ünïcode/~tilde", "data/a.txt?query"]
+    with Clients.region_scope(region_name):
+        urls = S3.presign_objects(PresignObjects(bucket_name="bucket", object_paths=iter(object_paths),
+                                                 method=method, expires_in=600))
+        client = Clients.client("s3")
+        assert urls == {object_path: client.generate_presigned_url(
+            PRESIGNED_OPERATIONS[method], Params={"Bucket": "bucket", "Key": object_path}, ExpiresIn=600
+        ) for object_path in object_paths}
+    assert all(algorithm in url for url in urls.values())
@@ -0,0 +1,68 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from logging import getLogger
+from threading import Event
+from typing import Any, Hashable, List, Tuple
+
+import pytest
+
+from octo_infra_aws_python.logic.clients import Clients
+from octo_infra_aws_python.logic.single_flight import SingleFlight, single_flight
+from octo_infra_aws_python.models.actions.s3 import ObjectExists
+
+calls: List[ObjectExists] = []
+release = Event()
+
+
+@single_flight
+def lookup(object_exists: ObjectExists, logger: object = None) -> str:
+    calls.append(object_exists)
+    release.wait(5)
+    if object_exists.object_path == "missing":
+        raise KeyError(object_exists.object_path)
+    return f"{object_exists.bucket_name}/{object_exists.object_path}"
+
+
+@pytest.fixture(autouse=True)
+def reset() -> None:
+    calls.clear()
+    release.clear()
+
+
+def test_concurrent_identical_calls_share_a_single_call(monkeypatch: Any) -> None:
+    joins: List[bool] = []
+    join = SingleFlight.join
+
+    def counting_join(key: Hashable) -> Tuple[Any, bool]:
+        joined = join(key)
+        joins.append(joined[1])
+        return joined
+
+    monkeypatch.setattr(SingleFlight, "join", staticmethod(counting_join))
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        futures = [executor.submit(lookup, ObjectExists(bucket_name="bucket", object_path="key"),
+                                   logger=getLogger(f"caller-{index}")) for index in range(8)]
+        # Lets every caller join the in flight call before it finishes
+        while len(joins) < 8:
+            time.sleep(0.001)
+        release.set()
+        assert {future.result() for future in futures} == {"bucket/key"}
+    assert len(calls) == 1
+    # Finished calls are not cached
+    assert lookup(ObjectExists(bucket_name="bucket", object_path="key")) == "bucket/key"
+    assert len(calls) == 2
+
+
+def test_shared_call_raises_to_every_caller() -> None:
+    release.set()
+    with pytest.raises(KeyError):
+        lookup(ObjectExists(bucket_name="bucket", object_path="missing"))
+
+
+def test_key_tells_apart_models_and_region_scopes() -> None:
+    key = SingleFlight.key(lookup, (ObjectExists(bucket_name="bucket", object_path="key"),), {})
+    assert key == SingleFlight.key(lookup, (ObjectExists(bucket_name="bucket", object_path="key"),),
+                                   {"logger": getLogger("other")})
+    assert key != SingleFlight.key(lookup, (ObjectExists(bucket_name="bucket", object_path="other"),), {})
+    with Clients.region_scope("eu-west-1"):
+        assert key != SingleFlight.key(lookup, (ObjectExists(bucket_name="bucket", object_path="key"),), {})
@@ -0,0 +1,74 @@
+from threading import Event
+from typing import Any, Callable, Dict, List
+
+from octo_infra_aws_python.logic.clients import Clients
+from octo_infra_aws_python.logic.ssm import SSM
+from octo_infra_aws_python.models.actions.ssm import DestroySSMParameters, DestroySSMPath, FindSSMParameter
+
+OK: Dict[str, Any] = {"ResponseMetadata": {"HTTPStatusCode": 200}}
+
+
+def deleted(names: List[str], invalid: List[str]) -> Dict[str, Any]:
+    response: Dict[str, Any] = {"DeletedParameters": [name for name in names if name not in invalid], **OK}
+    if invalid:
+        response["InvalidParameters"] = invalid
+    return response
+
+
+def test_destroy_ssm_parameters_deletes_in_batches_of_ten(stub: Callable[..., Any]) -> None:
+    names = [f"/app/{index:02d}" for index in range(23)]
+    stubber = stub("ssm")
+    stubber.add_response("delete_parameters", deleted(names[:10], ["/app/03"]), {"Names": names[:10]})
+    stubber.add_client_error("delete_parameters", "AccessDeniedException", http_status_code=400,
+                             expected_params={"Names": names[10:20]})
+    stubber.add_response("delete_parameters", deleted(names[20:], []), {"Names": names[20:]})
+    # Duplicated names are deleted once
+    report = SSM.destroy_ssm_parameters(DestroySSMParameters(names=names + names[:5], max_concurrent_batches=1))
+    assert report is not None
+    assert report.deleted == [name for name in names[:10] if name != "/app/03"] + names[20:]
+    assert report.not_found == ["/app/03"]
+    assert sorted(report.failed) == names[10:20]
+
+
+def test_destroy_ssm_path_deletes_listed_pages(stub: Callable[..., Any]) -> None:
+    # A single page, the next pages are listed while the previous ones are deleted, in no fixed order
+    names = [f"/app/{index:02d}" for index in range(10)]
+    stubber = stub("ssm")
+    stubber.add_response("get_parameters_by_path", {
+        "Parameters": [{"Name": name, "Type": "String", "Value": "v", "Version": 1} for name in names]
+    }, {"Path": "/app", "Recursive": True, "MaxResults": 10})
+    stubber.add_response("delete_parameters", deleted(names, ["/app/09"]), {"Names": names})
+    report = SSM.destroy_ssm_path(DestroySSMPath(path="/app", max_concurrent_batches=1))
+    assert report is not None
+    assert report.deleted == names[:9] and report.not_found == ["/app/09"] and not report.failed
+
+
+def test_destroy_ssm_path_reports_listing_failures(stub: Callable[..., Any]) -> None:
+    names = [f"/app/{index:02d}" for index in range(10)]
+    stubber = stub("ssm")
+    stubber.add_response("get_parameters_by_path", {
+        "Parameters": [{"Name": name, "Type": "String", "Value": "v", "Version": 1} for name in names],
+        "NextToken": "page-2"
+    })
+    stubber.add_response("delete_parameters", deleted(names, []), {"Names": names})
+    stubber.add_client_error("get_parameters_by_path", "AccessDeniedException", http_status_code=400)
+    # The next page is only listed once the first one is deleted, so the stubbed calls come in order
+    first_page_deleted = Event()
+
+    def wait_for_first_page(params: Dict[str, Any], **kwargs: Any) -> None:
+        if "NextToken" in params:
+            first_page_deleted.wait(5)
+    events = Clients.client("ssm").meta.events
+    events.register("after-call.ssm.DeleteParameters", lambda **kwargs: first_page_deleted.set())
+    events.register("provide-client-params.ssm.GetParametersByPath", wait_for_first_page)
+    report = SSM.destroy_ssm_path(DestroySSMPath(path="/app", max_concurrent_batches=1))
+    assert report is not None
+    assert report.deleted == names and not report.failed
+    assert report.listing_error is not None and "AccessDeniedException" in report.listing_error
+
+
+def test_find_ssm_parameter(stub: Callable[..., Any]) -> None:
+    stubber = stub("ssm")
+    stubber.add_response("get_parameter", {"Parameter": {"Name": "/app/a", "Type": "String", "Value": "v"}, **OK},
+                         {"Name": "/app/a", "WithDecryption": True})
+    assert SSM.find_ssm_parameter(FindSSMParameter(name="/app/a")) == "v"
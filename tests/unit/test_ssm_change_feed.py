@@ -0,0 +1,155 @@
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, Tuple
+
+import pytest
+
+from octo_infra_aws_python.logic.ssm_change_feed import SSMChangeFeed
+from octo_infra_aws_python.models.actions.ssm import WatchSSMPath
+from octo_infra_aws_python.models.ssm_parameter_changes import SSMParameterChanges
+
+PATH = "/app"
+EPOCH = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+
+class Parameters:
+    """
+    Parameters of the watched path as the stubbed SSM holds them, by name the value, version and modification time
+    """
+    def __init__(self, stubber: Any) -> None:
+        self.stubber = stubber
+        self.parameters: Dict[str, Tuple[str, int, datetime]] = {}
+        self.puts = 0
+
+    def put(self, name: str, value: str, version: int = 0) -> None:
+        version = version or self.parameters.get(name, ("", 0, EPOCH))[1] + 1
+        self.puts += 1
+        self.parameters[name] = (value, version, EPOCH + timedelta(minutes=self.puts))
+
+    def delete(self, name: str) -> None:
+        del self.parameters[name]
+
+    def expect_load(self) -> None:
+        self.stubber.add_response("get_parameters_by_path", {
+            "Parameters": [self.__parameter(name) for name in sorted(self.parameters)]
+        }, {"Path": PATH, "Recursive": True, "WithDecryption": True, "MaxResults": 10})
+
+    def expect_describe(self) -> None:
+        self.stubber.add_response("describe_parameters", {
+            "Parameters": [{"Name": name, "Type": "String", "Version": self.parameters[name][1],
+                            "LastModifiedDate": self.parameters[name][2]} for name in sorted(self.parameters)]
+        }, {"ParameterFilters": [{"Key": "Path", "Option": "Recursive", "Values": [PATH]}], "MaxResults": 50})
+
+    def expect_get(self, names: List[str]) -> None:
+        response: Dict[str, Any] = {"Parameters": [self.__parameter(name) for name in names if name in self.parameters]}
+        invalid = [name for name in names if name not in self.parameters]
+        if invalid:
+            response["InvalidParameters"] = invalid
+        self.stubber.add_response("get_parameters", response, {"Names": names, "WithDecryption": True})
+
+    def __parameter(self, name: str) -> Dict[str, Any]:
+        value, version, last_modified_date = self.parameters[name]
+        return {"Name": name, "Type": "String", "Value": value, "Version": version,
+                "LastModifiedDate": last_modified_date}
+
+
+@pytest.fixture
+def parameters(stub: Callable[..., Any]) -> Parameters:
+    return Parameters(stub("ssm"))
+
+
+def loaded_feed(parameters: Parameters) -> Tuple[SSMChangeFeed, List[SSMParameterChanges]]:
+    feed = SSMChangeFeed(WatchSSMPath(path=PATH))
+    delivered: List[SSMParameterChanges] = []
+    feed.subscribe(delivered.append)
+    parameters.expect_load()
+    assert feed.refresh() is not None
+    return feed, delivered
+
+
+def test_first_refresh_loads_parameters_as_added(parameters: Parameters) -> None:
+    parameters.put(f"{PATH}/a", "1")
+    parameters.put(f"{PATH}/b", "2")
+    feed, delivered = loaded_feed(parameters)
+    assert delivered == [SSMParameterChanges(added={f"{PATH}/a": "1", f"{PATH}/b": "2"})]
+    # Late subscribers are replayed the current values
+    late: List[SSMParameterChanges] = []
+    feed.subscribe(late.append)
+    assert late == delivered
+
+
+def test_version_bump_with_same_value_is_not_a_change(parameters: Parameters) -> None:
+    parameters.put(f"{PATH}/a", "1")
+    feed, delivered = loaded_feed(parameters)
+    parameters.put(f"{PATH}/a", "1")
+    parameters.expect_describe()
+    parameters.expect_get([f"{PATH}/a"])
+    changes = feed.refresh()
+    assert changes is not None and changes.is_empty()
+    assert len(delivered) == 1
+    # The new version is recorded, so it is not fetched again
+    parameters.expect_describe()
+    assert feed.refresh() == SSMParameterChanges()
+
+
+def test_delete_then_recreate(parameters: Parameters) -> None:
+    parameters.put(f"{PATH}/a", "1")
+    parameters.put(f"{PATH}/b", "2")
+    feed, delivered = loaded_feed(parameters)
+    parameters.delete(f"{PATH}/a")
+    parameters.expect_describe()
+    assert feed.refresh() == SSMParameterChanges(removed=[f"{PATH}/a"])
+    parameters.put(f"{PATH}/a", "3")
+    parameters.expect_describe()
+    parameters.expect_get([f"{PATH}/a"])
+    assert feed.refresh() == SSMParameterChanges(added={f"{PATH}/a": "3"})
+    # Deleted and created again between two refreshes, its versions restart at the same version number
+    parameters.delete(f"{PATH}/a")
+    parameters.put(f"{PATH}/a", "4", version=1)
+    parameters.expect_describe()
+    parameters.expect_get([f"{PATH}/a"])
+    assert feed.refresh() == SSMParameterChanges(updated={f"{PATH}/a": "4"})
+    assert feed.values() == {f"{PATH}/a": "4", f"{PATH}/b": "2"}
+    assert len(delivered) == 4
+
+
+def test_fetch_failing_part_way_is_fetched_again(parameters: Parameters) -> None:
+    names = [f"{PATH}/{index:02d}" for index in range(12)]
+    for name in names:
+        parameters.put(name, "old")
+    feed, delivered = loaded_feed(parameters)
+    for name in names:
+        parameters.put(name, "new")
+    parameters.expect_describe()
+    parameters.expect_get(names[:10])
+    parameters.stubber.add_client_error("get_parameters", "ThrottlingException", http_status_code=400,
+                                        expected_params={"Names": names[10:], "WithDecryption": True})
+    assert feed.refresh() is None
+    assert feed.values() == {name: "old" for name in names}
+    assert len(delivered) == 1
+    # Nothing of the failed refresh was committed, the first batch is fetched again
+    parameters.expect_describe()
+    parameters.expect_get(names[:10])
+    parameters.expect_get(names[10:])
+    assert feed.refresh() == SSMParameterChanges(updated={name: "new" for name in names})
+    assert feed.values() == {name: "new" for name in names}
+    assert len(delivered) == 2
+
+
+def test_raising_subscriber_does_not_stop_delivery(parameters: Parameters) -> None:
+    parameters.put(f"{PATH}/a", "1")
+    feed = SSMChangeFeed(WatchSSMPath(path=PATH))
+    delivered: List[SSMParameterChanges] = []
+
+    def raising(changes: SSMParameterChanges) -> None:
+        raise RuntimeError("subscriber failed")
+
+    feed.subscribe(raising)
+    feed.subscribe(delivered.append)
+    parameters.expect_load()
+    assert feed.refresh() == SSMParameterChanges(added={f"{PATH}/a": "1"})
+    parameters.put(f"{PATH}/a", "2")
+    parameters.expect_describe()
+    parameters.expect_get([f"{PATH}/a"])
+    assert feed.refresh() == SSMParameterChanges(updated={f"{PATH}/a": "2"})
+    assert delivered == [SSMParameterChanges(added={f"{PATH}/a": "1"}),
+                         SSMParameterChanges(updated={f"{PATH}/a": "2"})]